@@ -0,0 +1,34 @@
+"""signals に (stock_id, date, signal_type) の一意制約を追加
+
+重複したシグナルは最新の行を残して削除し、削除する行を参照する売買プランは残す行へ付け替える。
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+from app.schema_upgrades import SIGNALS_UNIQUE_STOCK_DATE_TYPE
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: str | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.execute(sa.text(SIGNALS_UNIQUE_STOCK_DATE_TYPE.applied_sql)).first() is not None:
+        # create_all で作成したテーブルには制約がすでにある
+        return
+    for statement in SIGNALS_UNIQUE_STOCK_DATE_TYPE.statements:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_signals_stock_date_type", "signals", type_="unique")
@@ -0,0 +1,34 @@
+"""trade_plans に有効なプランをシグナルごとに1件とする部分ユニークインデックスを追加
+
+同じシグナルの有効なプランが複数ある場合は、最新のプラン以外を cancelled にする。
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+from app.schema_upgrades import TRADE_PLANS_UNIQUE_ACTIVE_SIGNAL
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: str | None = "0001"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.execute(sa.text(TRADE_PLANS_UNIQUE_ACTIVE_SIGNAL.applied_sql)).first() is not None:
+        # create_all で作成したテーブルにはインデックスがすでにある
+        return
+    for statement in TRADE_PLANS_UNIQUE_ACTIVE_SIGNAL.statements:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    op.drop_index("uq_trade_plans_active_signal", table_name="trade_plans")
@@ -0,0 +1,513 @@
+"""シグナル・売買プランのバックテストモジュール
+
+期間内の買いシグナルごとに calculate_trade_plan と同じ売買プラン（エントリー価格、利確3段階、損切り）を作り、
+日足のOHLCに対して約定・利確・損切りを再生する。全トレードを「トレード × 日数」の2次元配列に並べて
+一括で判定するため、銘柄・トレードごとのループはない。
+
+約定・決済のルール:
+- シグナル日の翌営業日から entry_window_days 日以内に、安値がエントリー価格以下になった日に約定する
+  （始値がエントリー価格を下回っていれば始値で約定）
+- 約定の翌営業日から max_holding_days 日間、ポジションを利確段階数で等分し、各利確価格に達した日に決済する。
+  損切り価格に達した日に残りを全て決済する
+- 同じ日に利確価格と損切り価格の両方に達した場合は損切りを優先する（始値が利確価格以上の場合を除く）
+- 窓を開けて価格を飛び越えた場合は始値で決済する
+- 売りシグナルを指定した場合は、売りシグナルが出た日の終値で残りを全て決済する（同じ日の利確・損切りが優先）
+- 保有期間の最終日に残った分は終値で決済する。データの最終日を越える場合は最終日の終値で評価する
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import date
+
+import numpy as np
+from sqlalchemy import Integer, and_, any_, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.analysis.trade_planner import (
+    DEFAULT_MAX_POSITION_RATIO,
+    DEFAULT_STOP_LOSS_RATE,
+    DEFAULT_TAKE_PROFIT_RATES,
+    calculate_trade_plan_arrays,
+)
+from app.config import get_settings
+from app.models.signal import Signal
+from app.models.stock import StockPrice
+from app.models.technical import TechnicalIndicator
+
+logger = logging.getLogger(__name__)
+
+# 決済理由（exit_reason の値）
+EXIT_TARGET = 1
+EXIT_STOP = 2
+EXIT_TIMEOUT = 3
+# データの最終日で未決済（最終日の終値で評価）
+EXIT_OPEN = 4
+EXIT_SELL_SIGNAL = 5
+
+
+@dataclass(frozen=True)
+class BacktestConfig:
+    """バックテストの条件（売買プランの設定は calculate_trade_plan と同じ）"""
+    take_profit_rates: tuple[float, ...] = tuple(DEFAULT_TAKE_PROFIT_RATES)
+    stop_loss_rate: float = DEFAULT_STOP_LOSS_RATE
+    max_position_ratio: float = DEFAULT_MAX_POSITION_RATIO
+    total_capital: float = 1_000_000
+    # シグナル日の翌営業日から約定を待つ営業日数
+    entry_window_days: int = 5
+    # 約定から決済までの最長保有営業日数
+    max_holding_days: int = 60
+    # この値以上のスコアの買いシグナルのみ対象にする（Noneは全件）
+    min_score: float | None = None
+
+
+@dataclass
+class OHLCPanel:
+    """銘柄 × 営業日のOHLC（値がない日はNaN）"""
+    stock_ids: np.ndarray
+    dates: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+
+@dataclass
+class SignalTrades:
+    """バックテスト対象の買いシグナル"""
+    stock_ids: np.ndarray
+    signal_dates: np.ndarray
+    close_price: np.ndarray
+    # 欠損はNaN
+    sma_25: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.stock_ids)
+
+
+@dataclass
+class TradeResults:
+    """トレードごとのシミュレーション結果と日次の損益・建玉"""
+    filled: np.ndarray
+    # 約定日・決済日はパネルの日付の位置（未約定は-1）
+    fill_index: np.ndarray
+    fill_price: np.ndarray
+    shares: np.ndarray
+    # (トレード数, 利確段階数)
+    exit_index: np.ndarray
+    exit_price: np.ndarray
+    exit_reason: np.ndarray
+    # 約定価格に対する損益率（未約定はNaN）
+    returns: np.ndarray
+    # パネルの日付ごとの評価損益の増減・建玉金額・保有銘柄数
+    daily_pnl: np.ndarray
+    open_notional: np.ndarray
+    open_positions: np.ndarray
+
+
+@dataclass(frozen=True)
+class BacktestReport:
+    """バックテスト結果の集計"""
+    start_date: date
+    end_date: date
+    signals: int
+    filled: int
+    fill_rate: float
+    # 利確段階ごとの到達率（約定したトレードに対する割合）
+    target_hit_rates: list[float]
+    stop_loss_rate: float
+    sell_signal_rate: float
+    # 保有期間の満了（またはデータの最終日）で決済した割合
+    expired_rate: float
+    win_rate: float
+    average_return: float
+    median_return: float
+    average_holding_days: float
+    total_pnl: float
+    total_return: float
+    max_drawdown: float
+    # 建玉金額の総資金に対する比率（日次平均 / 最大）
+    average_exposure: float
+    max_exposure: float
+    max_open_positions: int
+    equity_dates: list[date] = field(default_factory=list)
+    equity: list[float] = field(default_factory=list)
+
+
+def build_ohlc_panel(
+    stock_ids: np.ndarray,
+    dates: np.ndarray,
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+) -> OHLCPanel:
+    """縦持ちの株価から銘柄 × 営業日のパネルを作る（純粋関数。営業日はいずれかの銘柄に株価がある日）"""
+    unique_ids, rows = np.unique(np.asarray(stock_ids, dtype=np.int64), return_inverse=True)
+    unique_dates, cols = np.unique(np.asarray(dates, dtype="datetime64[D]"), return_inverse=True)
+    shape = (len(unique_ids), len(unique_dates))
+
+    def _pivot(values: np.ndarray) -> np.ndarray:
+        out = np.full(shape, np.nan)
+        out[rows, cols] = values
+        return out
+
+    return OHLCPanel(
+        stock_ids=unique_ids,
+        dates=unique_dates,
+        open=_pivot(open_),
+        high=_pivot(high),
+        low=_pivot(low),
+        close=_pivot(close),
+    )
+
+
+def _first_true(mask: np.ndarray) -> np.ndarray:
+    """各行で最初にTrueになる列の位置（Trueがない行は列数）"""
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), mask.shape[1])
+
+
+def _window(values: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """パネルから各トレードの行・列の値を取り出す（パネルの最終日より後はNaN）"""
+    last = values.shape[1] - 1
+    out = values[rows[:, np.newaxis], np.minimum(cols, last)]
+    out[cols > last] = np.nan
+    return out
+
+
+def _simulate_chunk(
+    panel: OHLCPanel,
+    trades: SignalTrades,
+    config: BacktestConfig,
+    sell_signals: np.ndarray | None,
+    out: TradeResults,
+) -> None:
+    """trades の全トレードを一括でシミュレーションし、結果を out に書き込む"""
+    n_dates = len(panel.dates)
+    levels = len(config.take_profit_rates)
+    holding = config.max_holding_days
+
+    plans = calculate_trade_plan_arrays(
+        trades.close_price,
+        trades.sma_25,
+        total_capital=config.total_capital,
+        take_profit_rates=list(config.take_profit_rates),
+        stop_loss_rate=config.stop_loss_rate,
+        max_position_ratio=config.max_position_ratio,
+    )
+    rows = np.searchsorted(panel.stock_ids, trades.stock_ids)
+    start = np.searchsorted(panel.dates, trades.signal_dates, side="right")
+
+    # 約定: シグナル翌営業日から entry_window_days 日以内に安値がエントリー価格以下
+    low = _window(panel.low, rows, start[:, np.newaxis] + np.arange(config.entry_window_days))
+    fill_offset = _first_true(low <= plans.entry_price[:, np.newaxis])
+    filled = fill_offset < config.entry_window_days
+    out.filled[:] = filled
+    out.shares[:] = plans.position_size
+    if not filled.any():
+        return
+
+    rows = rows[filled]
+    fill_index = start[filled] + fill_offset[filled]
+    fill_price = np.fmin(panel.open[rows, fill_index], plans.entry_price[filled])
+    stop = plans.stop_loss_price[filled]
+    targets = plans.target_prices[filled]
+    tranche = plans.position_size[filled] / levels
+
+    # 約定日（0列目）から保有期間の最終日までの窓。決済の判定は1列目から
+    cols = fill_index[:, np.newaxis] + np.arange(holding + 1)
+    open_, high, low, close = (
+        _window(values, rows, cols) for values in (panel.open, panel.high, panel.low, panel.close)
+    )
+    trade = np.arange(len(rows))
+
+    stop_day = _first_true(low[:, 1:] <= stop[:, np.newaxis]) + 1
+    stop_price = np.fmin(open_[trade, np.minimum(stop_day, holding)], stop)
+
+    # 売りシグナルの日（ない場合は保有期間外の holding + 1）
+    sell_day = np.full(len(rows), holding + 1)
+    if sell_signals is not None:
+        sell = sell_signals[rows[:, np.newaxis], np.minimum(cols, n_dates - 1)] & (cols < n_dates)
+        sell_day = _first_true(sell[:, 1:]) + 1
+    by_stop = stop_day <= np.minimum(holding, sell_day)
+    by_sell = sell_day <= holding
+
+    # 終値は値がない日を直前の値で埋める（約定日は必ず値がある）
+    has_close = ~np.isnan(close)
+    last_close = np.maximum.accumulate(np.where(has_close, np.arange(holding + 1), 0), axis=1)
+    close = close[trade[:, np.newaxis], last_close]
+    last_day = holding - _first_true(has_close[:, ::-1])
+    expired_reason = np.where(cols[:, -1] < n_dates, EXIT_TIMEOUT, EXIT_OPEN)
+
+    exit_day = np.empty((len(rows), levels), dtype=np.int64)
+    exit_price = np.empty((len(rows), levels))
+    exit_reason = np.empty((len(rows), levels), dtype=np.int8)
+    for k in range(levels):
+        target_day = _first_true(high[:, 1:] >= targets[:, k, np.newaxis]) + 1
+        target_open = open_[trade, np.minimum(target_day, holding)]
+        by_target = (target_day <= np.minimum(holding, sell_day)) & (
+            (target_day < stop_day) | ((target_day == stop_day) & (target_open >= targets[:, k]))
+        )
+        exits = [by_target, ~by_target & by_stop, ~by_target & by_sell]
+        exit_day[:, k] = np.select(exits, [target_day, stop_day, sell_day], last_day)
+        exit_price[:, k] = np.select(
+            exits,
+            [np.fmax(target_open, targets[:, k]), stop_price, close[trade, np.minimum(sell_day, holding)]],
+            close[trade, last_day],
+        )
+        exit_reason[:, k] = np.select(exits, [EXIT_TARGET, EXIT_STOP, EXIT_SELL_SIGNAL], expired_reason)
+
+    out.fill_index[filled] = fill_index
+    out.fill_price[filled] = fill_price
+    out.exit_index[filled] = fill_index[:, np.newaxis] + exit_day
+    out.exit_price[filled] = exit_price
+    out.exit_reason[filled] = exit_reason
+    out.returns[filled] = (exit_price / fill_price[:, np.newaxis] - 1).mean(axis=1)
+
+    # 日次の評価損益: 決済前は終値、決済後は決済価格で評価した含み損益の前日からの増減
+    held = np.arange(holding + 1) < exit_day[:, :, np.newaxis]
+    marks = np.where(held, close[:, np.newaxis, :], exit_price[:, :, np.newaxis])
+    value = ((marks - fill_price[:, np.newaxis, np.newaxis]) * tranche[:, np.newaxis, np.newaxis]).sum(axis=1)
+    in_panel = cols < n_dates
+    out.daily_pnl += np.bincount(
+        cols[in_panel], weights=np.diff(value, axis=1, prepend=0.0)[in_panel], minlength=n_dates
+    )
+
+    # 建玉: 約定日から決済日まで（決済日を含む）保有する
+    notional = np.repeat(tranche * fill_price, levels)
+    ends = (fill_index[:, np.newaxis] + exit_day + 1).ravel()
+    out.open_notional += np.bincount(np.repeat(fill_index, levels), weights=notional, minlength=n_dates + 1)[:-1]
+    out.open_notional -= np.bincount(np.minimum(ends, n_dates), weights=notional, minlength=n_dates + 1)[:-1]
+    ends = fill_index + exit_day.max(axis=1) + 1
+    out.open_positions += np.bincount(fill_index, minlength=n_dates + 1)[:-1]
+    out.open_positions -= np.bincount(np.minimum(ends, n_dates), minlength=n_dates + 1)[:-1]
+
+
+def simulate_trades(
+    panel: OHLCPanel,
+    trades: SignalTrades,
+    config: BacktestConfig,
+    chunk_size: int | None = None,
+    sell_signals: np.ndarray | None = None,
+) -> TradeResults:
+    """全トレードの約定・決済をシミュレーションする（純粋関数）
+
+    Args:
+        panel: シグナル対象の全銘柄を含むOHLCパネル
+        trades: 買いシグナル
+        sell_signals: パネルと同じ形の売りシグナルの有無（指定時は売りシグナルでも決済する）
+        chunk_size: 一括で判定するトレード数（未指定時は設定値 backtest_trade_chunk_size）
+    """
+    if chunk_size is None:
+        chunk_size = get_settings().backtest_trade_chunk_size
+    n = len(trades)
+    n_dates = len(panel.dates)
+    levels = len(config.take_profit_rates)
+    results = TradeResults(
+        filled=np.zeros(n, dtype=bool),
+        fill_index=np.full(n, -1, dtype=np.int64),
+        fill_price=np.full(n, np.nan),
+        shares=np.zeros(n, dtype=np.int64),
+        exit_index=np.full((n, levels), -1, dtype=np.int64),
+        exit_price=np.full((n, levels), np.nan),
+        exit_reason=np.zeros((n, levels), dtype=np.int8),
+        returns=np.full(n, np.nan),
+        daily_pnl=np.zeros(n_dates),
+        open_notional=np.zeros(n_dates),
+        open_positions=np.zeros(n_dates, dtype=np.int64),
+    )
+    size = max(1, chunk_size)
+    for start in range(0, n, size):
+        part = slice(start, start + size)
+        chunk = SignalTrades(
+            stock_ids=trades.stock_ids[part],
+            signal_dates=trades.signal_dates[part],
+            close_price=trades.close_price[part],
+            sma_25=trades.sma_25[part],
+        )
+        view = TradeResults(
+            filled=results.filled[part],
+            fill_index=results.fill_index[part],
+            fill_price=results.fill_price[part],
+            shares=results.shares[part],
+            exit_index=results.exit_index[part],
+            exit_price=results.exit_price[part],
+            exit_reason=results.exit_reason[part],
+            returns=results.returns[part],
+            daily_pnl=results.daily_pnl,
+            open_notional=results.open_notional,
+            open_positions=results.open_positions,
+        )
+        _simulate_chunk(panel, chunk, config, sell_signals, view)
+    results.open_positions[:] = np.cumsum(results.open_positions)
+    results.open_notional[:] = np.cumsum(results.open_notional)
+    return results
+
+
+def _rate(count: int | np.integer, total: int) -> float:
+    return float(count) / total if total else 0.0
+
+
+def summarize_backtest(
+    panel: OHLCPanel,
+    results: TradeResults,
+    config: BacktestConfig,
+    start_date: date,
+    end_date: date,
+) -> BacktestReport:
+    """シミュレーション結果から的中率・損益・ドローダウン・建玉を集計する（純粋関数）"""
+    filled = results.filled
+    n_filled = int(filled.sum())
+    reasons = results.exit_reason[filled]
+    returns = results.returns[filled]
+    holding_days = (results.exit_index[filled].max(axis=1) - results.fill_index[filled]) if n_filled else np.zeros(0)
+
+    capital = config.total_capital
+    equity = capital + np.cumsum(results.daily_pnl)
+    peak = np.maximum.accumulate(np.maximum(equity, capital)) if len(equity) else equity
+    drawdown = float(((peak - equity) / peak).max()) if len(equity) else 0.0
+    exposure = results.open_notional / capital
+    total_pnl = float(equity[-1] - capital) if len(equity) else 0.0
+
+    return BacktestReport(
+        start_date=start_date,
+        end_date=end_date,
+        signals=len(filled),
+        filled=n_filled,
+        fill_rate=_rate(n_filled, len(filled)),
+        target_hit_rates=[_rate((reasons[:, k] == EXIT_TARGET).sum(), n_filled) for k in range(reasons.shape[1])],
+        stop_loss_rate=_rate((reasons == EXIT_STOP).any(axis=1).sum(), n_filled),
+        sell_signal_rate=_rate((reasons == EXIT_SELL_SIGNAL).any(axis=1).sum(), n_filled),
+        expired_rate=_rate(np.isin(reasons, (EXIT_TIMEOUT, EXIT_OPEN)).any(axis=1).sum(), n_filled),
+        win_rate=_rate((returns > 0).sum(), n_filled),
+        average_return=float(returns.mean()) if n_filled else 0.0,
+        median_return=float(np.median(returns)) if n_filled else 0.0,
+        average_holding_days=float(holding_days.mean()) if n_filled else 0.0,
+        total_pnl=round(total_pnl, 2),
+        total_return=total_pnl / capital,
+        max_drawdown=drawdown,
+        average_exposure=float(exposure.mean()) if len(exposure) else 0.0,
+        max_exposure=float(exposure.max()) if len(exposure) else 0.0,
+        max_open_positions=int(results.open_positions.max()) if len(exposure) else 0,
+        equity_dates=panel.dates.astype(object).tolist(),
+        equity=np.round(equity, 2).tolist(),
+    )
+
+
+async def load_ohlc_panel(
+    db: AsyncSession,
+    stock_ids: list[int],
+    start_date: date,
+    end_date: date,
+) -> OHLCPanel:
+    """指定した銘柄・期間のOHLCをパネルに読み込む（銘柄IDは配列1つのパラメータで渡す）"""
+    price_rows = []
+    if stock_ids:
+        result = await db.execute(
+            select(
+                StockPrice.stock_id, StockPrice.date, StockPrice.open, StockPrice.high, StockPrice.low, StockPrice.close
+            )
+            .where(
+                StockPrice.stock_id == any_(literal(stock_ids, ARRAY(Integer))),
+                StockPrice.date.between(start_date, end_date),
+            )
+        )
+        price_rows = result.all()
+    columns = list(zip(*price_rows, strict=True)) or [[]] * 6
+    return build_ohlc_panel(
+        np.array(columns[0], dtype=np.int64),
+        np.array(columns[1], dtype="datetime64[D]"),
+        *(np.array(values, dtype=np.float64) for values in columns[2:]),
+    )
+
+
+async def _horizon_end_date(db: AsyncSession, stock_ids: list[int], end_date: date, days: int) -> date:
+    """end_date の翌営業日から数えて days 営業日目（対象銘柄の株価がある日。データがある最終日まで）"""
+    if days <= 0 or not stock_ids:
+        return end_date
+    trading_dates = (
+        select(StockPrice.date)
+        .where(StockPrice.stock_id == any_(literal(stock_ids, ARRAY(Integer))), StockPrice.date > end_date)
+        .distinct()
+        .order_by(StockPrice.date)
+        .limit(days)
+        .subquery()
+    )
+    last_date = await db.scalar(select(func.max(trading_dates.c.date)))
+    return last_date or end_date
+
+
+async def load_backtest_inputs(
+    db: AsyncSession,
+    start_date: date,
+    end_date: date,
+    min_score: float | None = None,
+    horizon_days: int = 0,
+) -> tuple[OHLCPanel, SignalTrades]:
+    """期間内の買いシグナル（シグナル日の終値・SMA25付き）と、対象銘柄のOHLCを一括で読み込む
+
+    Args:
+        horizon_days: end_date の後に読み込むOHLCの営業日数（期間末のシグナルの約定・決済まで再生するため）
+    """
+    query = (
+        select(Signal.stock_id, Signal.date, StockPrice.close, TechnicalIndicator.sma_25)
+        .join(StockPrice, and_(StockPrice.stock_id == Signal.stock_id, StockPrice.date == Signal.date))
+        .outerjoin(
+            TechnicalIndicator,
+            and_(TechnicalIndicator.stock_id == Signal.stock_id, TechnicalIndicator.date == Signal.date),
+        )
+        .where(Signal.signal_type == "buy", Signal.date.between(start_date, end_date))
+        .order_by(Signal.date, Signal.stock_id)
+    )
+    if min_score is not None:
+        query = query.where(Signal.score >= min_score)
+    signal_rows = (await db.execute(query)).all()
+
+    trades = SignalTrades(
+        stock_ids=np.array([row.stock_id for row in signal_rows], dtype=np.int64),
+        signal_dates=np.array([row.date for row in signal_rows], dtype="datetime64[D]"),
+        close_price=np.array([float(row.close) for row in signal_rows], dtype=np.float64),
+        sma_25=np.array([np.nan if row.sma_25 is None else float(row.sma_25) for row in signal_rows]),
+    )
+
+    first_date = signal_rows[0].date if signal_rows else start_date
+    stock_ids = np.unique(trades.stock_ids).tolist()
+    last_date = await _horizon_end_date(db, stock_ids, end_date, horizon_days)
+    panel = await load_ohlc_panel(db, stock_ids, first_date, last_date)
+    return panel, trades
+
+
+async def run_backtest(
+    db: AsyncSession,
+    start_date: date,
+    end_date: date,
+    config: BacktestConfig | None = None,
+) -> BacktestReport | None:
+    """期間内の買いシグナルを売買プランどおりに売買した場合の成績を計算する
+
+    OHLCは end_date の後も約定待ち・最長保有期間の営業日数分読み込み、期間末のシグナルも
+    データの範囲で最後まで再生する（損益曲線は end_date の後の決済日まで続く）。
+    期間外のデータを使わない評価（スイープ・ウォークフォワード）は end_date で打ち切る。
+
+    Returns:
+        集計結果（期間内に対象の買いシグナルがない場合はNone）
+    """
+    config = config or BacktestConfig()
+    panel, trades = await load_backtest_inputs(
+        db, start_date, end_date, config.min_score, config.entry_window_days + config.max_holding_days
+    )
+    if len(trades) == 0:
+        return None
+
+    def _simulate() -> BacktestReport:
+        results = simulate_trades(panel, trades, config)
+        return summarize_backtest(panel, results, config, start_date, end_date)
+
+    # 配列演算はイベントループを塞がないようスレッドで実行する
+    report = await asyncio.to_thread(_simulate)
+    logger.info(
+        f"バックテスト: {start_date} ~ {end_date} - シグナル{report.signals}件, 約定{report.filled}件, "
+        f"勝率{report.win_rate:.1%}, 最大ドローダウン{report.max_drawdown:.1%}"
+    )
+    return report
@@ -0,0 +1,248 @@
+"""テクニカル指標の増分計算モジュール
+
+銘柄ごとの計算状態（EMA値、RSIの平均上昇/下落幅、直近ウィンドウの値）を持ち越し、
+新しく追加された日足だけから指標行を計算する。
+計算する指標とウィンドウ長等は app.analysis.indicators のレジストリ（DBに格納する指標とその依存）から決める。
+EMA/RSIはpandasのewmと同じ漸化式で更新するため全件再計算と一致し、
+移動平均/移動標準偏差は保持したウィンドウから計算するため格納精度の範囲で一致する。
+"""
+
+import hashlib
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from app.analysis.indicators import IndicatorSpec, compute_indicators, persisted_indicators, resolve_indicators
+
+# 増分計算・パネル計算・NumPyカーネルが入力として使う株価列
+PLAN_SOURCES = ("close", "volume")
+# 増分計算・パネル計算・NumPyカーネルが解釈できる計算式の種類
+SUPPORTED_KINDS = ("sma", "ema", "rsi", "rolling_std", "difference", "band")
+# 直近ウィンドウを使う計算式の種類
+WINDOW_KINDS = ("sma", "rolling_std")
+
+
+def indicator_plan() -> list[IndicatorSpec]:
+    """DBに格納する指標とその依存を計算できる順に並べる
+
+    増分計算等で解釈できない指標が含まれる場合は ValueError を送出する。
+    """
+    specs = resolve_indicators(spec.name for spec in persisted_indicators())
+    for spec in specs:
+        if spec.kind not in SUPPORTED_KINDS:
+            raise ValueError(f"増分計算に対応していないテクニカル指標: {spec.name} (kind={spec.kind})")
+        for source in spec.inputs:
+            if source not in PLAN_SOURCES and source not in {s.name for s in specs}:
+                raise ValueError(f"増分計算に対応していない入力: {spec.name} ← {source}")
+    return specs
+
+
+def plan_signature(specs: list[IndicatorSpec]) -> str:
+    """指標の定義のハッシュ（定義が変わった後は保存済みの状態を使わない）"""
+    definition = [(s.name, s.kind, s.inputs, sorted(s.params.items())) for s in specs]
+    return hashlib.sha256(repr(definition).encode()).hexdigest()[:16]
+
+
+def tail_lengths(specs: list[IndicatorSpec]) -> dict[str, int]:
+    """持ち越す直近ウィンドウの長さ（当日分を除く）を入力ごとに求める"""
+    lengths: dict[str, int] = {}
+    for spec in specs:
+        if spec.kind in WINDOW_KINDS:
+            source = spec.inputs[0]
+            lengths[source] = max(lengths.get(source, 0), int(spec.params["length"]) - 1)
+    return lengths
+
+
+@dataclass
+class IndicatorState:
+    """増分計算用の銘柄ごとの状態"""
+    bars: int
+    # 作成時の指標の定義のハッシュ
+    signature: str
+    # EMAの指標名 → 最終値
+    ema: dict[str, float] = field(default_factory=dict)
+    # RSIの指標名 → [平均上昇幅, 平均下落幅, ewmの重みの合計]
+    rsi: dict[str, list[float]] = field(default_factory=dict)
+    # RSIの入力 → 最終日の値
+    last: dict[str, float] = field(default_factory=dict)
+    # ウィンドウの入力 → 直近の値（当日分を除く）
+    tails: dict[str, list[float]] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "IndicatorState":
+        return cls(**data)
+
+
+def restore_indicator_state(data: dict[str, Any]) -> IndicatorState | None:
+    """保存済みの状態を復元する
+
+    旧形式の状態や、指標の定義が変わる前に作った状態は None を返す（全期間を再計算させる）。
+    """
+    try:
+        state = IndicatorState.from_dict(data)
+    except TypeError:
+        return None
+    if state.signature != plan_signature(indicator_plan()):
+        return None
+    return state
+
+
+def _ewm_step(
+    weighted: float,
+    old_weight: float,
+    value: float,
+    alpha: float,
+    adjust: bool,
+) -> tuple[float, float]:
+    """pandasのewm().mean()と同じ漸化式で1件分更新する"""
+    new_weight = 1.0 if adjust else alpha
+    old_weight *= 1.0 - alpha
+    if weighted != value:
+        weighted = (old_weight * weighted + new_weight * value) / (old_weight + new_weight)
+    old_weight = old_weight + new_weight if adjust else 1.0
+    return weighted, old_weight
+
+
+def _ema_step(previous: float, value: float, span: int) -> float:
+    """adjust=False のEMAを1件分更新する"""
+    weighted, _ = _ewm_step(previous, 1.0, value, 2 / (span + 1), adjust=False)
+    return weighted
+
+
+def rsi_ewm_weight(bars: int, length: int) -> float:
+    """bars件を処理した時点でRSIのewm（adjust=True）が内部で持つ重みの合計"""
+    weight = 1.0
+    for _ in range(bars - 1):
+        weight = weight * (1.0 - 1 / length) + 1.0
+    return weight
+
+
+def rsi_averages(values: pd.Series | pd.DataFrame, length: int) -> tuple[Any, Any]:
+    """RSIの平均上昇幅/下落幅（min_periodsなし。入力が欠損の位置はNaNのまま）"""
+    observed = values.notna()
+    delta = values.diff()
+    gain = delta.where(delta > 0, 0.0).where(observed)
+    loss = (-delta).where(delta < 0, 0.0).where(observed)
+    return gain.ewm(alpha=1 / length).mean(), loss.ewm(alpha=1 / length).mean()
+
+
+def build_indicator_state(close: np.ndarray, volume: np.ndarray) -> IndicatorState:
+    """全期間の終値・出来高から増分計算用の状態を作る（純粋関数）
+
+    Args:
+        close: 終値（日付昇順）
+        volume: 出来高（日付昇順）
+    """
+    specs = indicator_plan()
+    frame = pd.DataFrame({"close": np.asarray(close, dtype=float), "volume": np.asarray(volume, dtype=float)})
+    values = compute_indicators(frame, [spec.name for spec in specs])
+    series = {**{source: frame[source] for source in PLAN_SOURCES}, **{name: values[name] for name in values}}
+
+    state = IndicatorState(bars=len(frame), signature=plan_signature(specs))
+    for spec in specs:
+        if spec.kind == "ema":
+            state.ema[spec.name] = float(series[spec.name].iloc[-1])
+        elif spec.kind == "rsi":
+            source = spec.inputs[0]
+            length = int(spec.params["length"])
+            avg_gain, avg_loss = rsi_averages(series[source], length)
+            state.rsi[spec.name] = [
+                float(avg_gain.iloc[-1]), float(avg_loss.iloc[-1]), rsi_ewm_weight(len(frame), length)
+            ]
+            state.last[source] = float(series[source].iloc[-1])
+    for source, length in tail_lengths(specs).items():
+        state.tails[source] = [float(v) for v in series[source].to_numpy()[-length:]] if length else []
+    return state
+
+
+def update_technical_indicators(
+    state: IndicatorState,
+    bars: pd.DataFrame,
+) -> tuple[pd.DataFrame, IndicatorState]:
+    """新しい日足だけからテクニカル指標を計算する（純粋関数）
+
+    Args:
+        state: 前回までの状態
+        bars: 前回以降の株価データ（columns: date, close, volume 等。日付昇順）
+
+    Returns:
+        (calculate_technical_indicators と同じ列を持つ新規行のDataFrame, 更新後の状態)
+    """
+    if bars.empty:
+        return pd.DataFrame(), state
+
+    specs = indicator_plan()
+    lengths = tail_lengths(specs)
+    count = state.bars
+    ema = dict(state.ema)
+    rsi_state = {name: list(values) for name, values in state.rsi.items()}
+    last = dict(state.last)
+    tails = {source: list(values) for source, values in state.tails.items()}
+
+    outputs = [spec.name for spec in specs if spec.persisted]
+    columns: dict[str, list[float]] = {name: [] for name in outputs}
+
+    prices = {source: bars[source].to_numpy(dtype=float).tolist() for source in PLAN_SOURCES}
+    for i in range(len(bars)):
+        count += 1
+        values: dict[str, float] = {source: prices[source][i] for source in PLAN_SOURCES}
+        windows: dict[str, np.ndarray] = {}
+
+        for spec in specs:
+            source = spec.inputs[0]
+            if spec.kind in WINDOW_KINDS:
+                length = int(spec.params["length"])
+                if source not in windows:
+                    windows[source] = np.asarray(tails[source] + [values[source]])
+                if count < length:
+                    values[spec.name] = np.nan
+                elif spec.kind == "sma":
+                    values[spec.name] = float(windows[source][-length:].mean())
+                else:
+                    values[spec.name] = float(windows[source][-length:].std(ddof=1))
+            elif spec.kind == "ema":
+                ema[spec.name] = _ema_step(ema[spec.name], values[source], int(spec.params["span"]))
+                values[spec.name] = ema[spec.name]
+            elif spec.kind == "rsi":
+                length = int(spec.params["length"])
+                avg_gain, avg_loss, weight = rsi_state[spec.name]
+                delta = values[source] - last[source]
+                gain = delta if delta > 0 else 0.0
+                loss = -delta if delta < 0 else 0.0
+                avg_gain, next_weight = _ewm_step(avg_gain, weight, gain, 1 / length, adjust=True)
+                avg_loss, _ = _ewm_step(avg_loss, weight, loss, 1 / length, adjust=True)
+                rsi_state[spec.name] = [avg_gain, avg_loss, next_weight]
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    rs = np.float64(avg_gain) / np.float64(avg_loss)
+                    rsi = 100 - (100 / (1 + rs))
+                values[spec.name] = float(rsi) if count >= length else np.nan
+            elif spec.kind == "difference":
+                values[spec.name] = values[spec.inputs[0]] - values[spec.inputs[1]]
+            else:
+                values[spec.name] = values[spec.inputs[0]] + spec.params["width"] * values[spec.inputs[1]]
+
+        for name in outputs:
+            columns[name].append(values[name])
+        for source in last:
+            last[source] = values[source]
+        for source, length in lengths.items():
+            tails[source] = (tails[source] + [values[source]])[-length:] if length else []
+
+    result = bars.reset_index(drop=True).copy()
+    for name, column in columns.items():
+        result[name] = column
+
+    new_state = IndicatorState(
+        bars=count,
+        signature=state.signature,
+        ema=ema,
+        rsi=rsi_state,
+        last=last,
+        tails=tails,
+    )
+    return result, new_state
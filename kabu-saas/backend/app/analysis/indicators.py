@@ -0,0 +1,252 @@
+"""テクニカル指標レジストリ
+
+各指標は入力（株価列または他の指標）、ウィンドウ長、ウォームアップ期間、DB格納時の丸め桁数を宣言して登録する。
+compute_indicators は要求された指標とその依存だけを依存順に1回ずつ計算し、
+中間結果（MACDが使うEMAなど）は共有する。required_history は要求された指標を
+計算するのに必要な最小の株価履歴の日数を返す。
+DBに格納する指標は計算式の種類（kind）とパラメータも宣言し、増分計算・パネル計算・NumPyカーネルは
+それを解釈して計算するため、ウィンドウ長等はここだけで定義する。
+"""
+
+import math
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+# 指標の入力として使える株価列
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# EMA等のウォームアップ期間: 履歴を打ち切ったことによる影響（重み）がこの値を下回る日数
+EWM_WARMUP_TOLERANCE = 1e-6
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    """テクニカル指標の定義"""
+    name: str
+    inputs: tuple[str, ...]
+    func: Callable[..., pd.Series]
+    window: int = 1
+    warmup: int = 0
+    precision: int | None = 2
+    persisted: bool = False
+    # 計算式の種類とパラメータ（増分計算・パネル計算・NumPyカーネルはこれを解釈して同じ値を計算する）
+    kind: str | None = None
+    params: Mapping[str, float] = field(default_factory=dict)
+
+
+_REGISTRY: dict[str, IndicatorSpec] = {}
+
+
+def register_indicator(
+    name: str,
+    inputs: tuple[str, ...],
+    window: int = 1,
+    warmup: int = 0,
+    precision: int | None = 2,
+    persisted: bool = False,
+    kind: str | None = None,
+    params: Mapping[str, float] | None = None,
+) -> Callable[[Callable[..., pd.Series]], Callable[..., pd.Series]]:
+    """指標の計算関数を登録するデコレータ
+
+    Args:
+        name: 指標名（DBに格納する指標は TechnicalIndicator の列名と同じ）
+        inputs: 計算関数に渡す株価列・指標名（この順で引数になる）
+        window: 値が出るまでに必要な日数
+        warmup: windowに加えて値が安定するまでに必要な日数（EMA等）
+        precision: DB格納時の丸め桁数（Noneは整数）
+        persisted: technical_indicators テーブルに格納する指標か
+        kind: 計算式の種類（sma, ema, rsi, rolling_std, difference, band。
+            DBに格納する指標とその依存は増分計算等のためにいずれかを指定する）
+        params: 計算式のパラメータ（sma/rsi/rolling_std は length、ema は span、band は width）
+    """
+    def decorator(func: Callable[..., pd.Series]) -> Callable[..., pd.Series]:
+        _REGISTRY[name] = IndicatorSpec(
+            name, inputs, func, window, warmup, precision, persisted, kind, dict(params or {})
+        )
+        return func
+    return decorator
+
+
+def ewm_warmup(alpha: float, tolerance: float = EWM_WARMUP_TOLERANCE) -> int:
+    """指数平滑で打ち切った履歴の重みが tolerance を下回るまでの日数"""
+    return math.ceil(math.log(tolerance) / math.log(1.0 - alpha))
+
+
+def get_indicator(name: str) -> IndicatorSpec:
+    """登録済みの指標定義を取得する"""
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"未登録のテクニカル指標: {name}") from None
+
+
+def persisted_indicators() -> list[IndicatorSpec]:
+    """DBに格納する指標の定義（登録順）"""
+    return [spec for spec in _REGISTRY.values() if spec.persisted]
+
+
+def resolve_indicators(names: Iterable[str]) -> list[IndicatorSpec]:
+    """要求された指標とその依存を、計算できる順に重複なく並べる"""
+    ordered: list[IndicatorSpec] = []
+    done: set[str] = set()
+    visiting: set[str] = set()
+
+    def _visit(name: str) -> None:
+        if name in done or name in PRICE_COLUMNS:
+            return
+        if name in visiting:
+            raise ValueError(f"テクニカル指標の依存が循環しています: {name}")
+        visiting.add(name)
+        spec = get_indicator(name)
+        for dependency in spec.inputs:
+            _visit(dependency)
+        visiting.discard(name)
+        done.add(name)
+        ordered.append(spec)
+
+    for name in names:
+        _visit(name)
+    return ordered
+
+
+def required_history(names: Iterable[str]) -> int:
+    """要求された指標の最新値を計算するのに必要な株価履歴の日数"""
+    lookback: dict[str, int] = {}
+    for spec in resolve_indicators(names):
+        upstream = max((lookback[i] for i in spec.inputs if i in lookback), default=0)
+        lookback[spec.name] = upstream + spec.window - 1 + spec.warmup
+    return max(lookback.values(), default=0) + 1
+
+
+def compute_indicators(df: pd.DataFrame, names: Iterable[str]) -> pd.DataFrame:
+    """株価DataFrameから要求された指標だけを計算する（純粋関数）
+
+    Args:
+        df: 株価データ（columns: open, high, low, close, volume。日付昇順）
+        names: 計算する指標名
+
+    Returns:
+        要求された指標の列を持つDataFrame（dfと同じindex）
+    """
+    names = list(names)
+    values: dict[str, pd.Series] = {c: df[c] for c in PRICE_COLUMNS if c in df.columns}
+    for spec in resolve_indicators(names):
+        values[spec.name] = spec.func(*(values[i] for i in spec.inputs))
+    return pd.DataFrame({name: values[name] for name in names}, index=df.index)
+
+
+# --- 移動平均線 ---
+
+def _register_sma(name: str, source: str, length: int, precision: int | None = 2) -> None:
+    register_indicator(
+        name, (source,), window=length, precision=precision, persisted=True, kind="sma", params={"length": length}
+    )(lambda values: values.astype(float).rolling(window=length).mean())
+
+
+def _register_ema(name: str, source: str, span: int, precision: int | None = 2) -> None:
+    register_indicator(
+        name, (source,), warmup=ewm_warmup(2 / (span + 1)), precision=precision, persisted=True,
+        kind="ema", params={"span": span},
+    )(lambda values: values.ewm(span=span, adjust=False).mean())
+
+
+for _length in (5, 25, 75, 200):
+    _register_sma(f"sma_{_length}", "close", _length)
+
+_register_ema("ema_12", "close", 12)
+_register_ema("ema_26", "close", 26)
+
+
+# --- オシレーター ---
+
+def _register_rsi(name: str, source: str, length: int) -> None:
+    def _rsi(values: pd.Series) -> pd.Series:
+        delta = values.diff()
+        gain = delta.where(delta > 0, 0.0)
+        loss = (-delta).where(delta < 0, 0.0)
+        avg_gain = gain.ewm(alpha=1 / length, min_periods=length).mean()
+        avg_loss = loss.ewm(alpha=1 / length, min_periods=length).mean()
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+    register_indicator(
+        name, (source,), window=length, warmup=ewm_warmup(1 / length), persisted=True,
+        kind="rsi", params={"length": length},
+    )(_rsi)
+
+
+_register_rsi("rsi_14", "close", 14)
+
+
+@register_indicator("macd_line", ("ema_12", "ema_26"), precision=4, persisted=True, kind="difference")
+def _macd_line(ema_fast: pd.Series, ema_slow: pd.Series) -> pd.Series:
+    return ema_fast - ema_slow
+
+
+_register_ema("macd_signal", "macd_line", 9, precision=4)
+
+
+@register_indicator("macd_histogram", ("macd_line", "macd_signal"), precision=4, persisted=True, kind="difference")
+def _macd_histogram(macd_line: pd.Series, macd_signal: pd.Series) -> pd.Series:
+    return macd_line - macd_signal
+
+
+# --- ボリンジャーバンド ---
+
+def _register_band(name: str, width: float) -> None:
+    register_indicator(
+        name, ("bb_middle", "bb_std_20"), persisted=True, kind="band", params={"width": width}
+    )(lambda middle, std: middle + width * std)
+
+
+def _register_rolling_std(name: str, source: str, length: int) -> None:
+    register_indicator(name, (source,), window=length, kind="rolling_std", params={"length": length})(
+        lambda values: values.rolling(window=length).std()
+    )
+
+
+_register_rolling_std("bb_std_20", "close", 20)
+_register_band("bb_upper_2", 2.0)
+_register_sma("bb_middle", "close", 20)
+_register_band("bb_lower_2", -2.0)
+
+
+# --- 出来高 ---
+
+_register_sma("volume_sma_25", "volume", 25, precision=None)
+
+
+# --- DBに格納しない指標（スクリーニング・バックテスト等で必要な場合のみ計算） ---
+
+@register_indicator("atr_14", ("high", "low", "close"), window=14, warmup=ewm_warmup(1 / 14))
+def _atr_14(high: pd.Series, low: pd.Series, close: pd.Series) -> pd.Series:
+    previous_close = close.shift(1)
+    true_range = pd.concat(
+        [high - low, (high - previous_close).abs(), (low - previous_close).abs()], axis=1
+    ).max(axis=1)
+    return true_range.ewm(alpha=1 / 14, min_periods=14, adjust=False).mean()
+
+
+@register_indicator("stoch_k_14", ("high", "low", "close"), window=14)
+def _stoch_k_14(high: pd.Series, low: pd.Series, close: pd.Series) -> pd.Series:
+    lowest = low.rolling(window=14).min()
+    highest = high.rolling(window=14).max()
+    return 100 * (close - lowest) / (highest - lowest)
+
+
+@register_indicator("stoch_d_3", ("stoch_k_14",), window=3)
+def _stoch_d_3(stoch_k: pd.Series) -> pd.Series:
+    return stoch_k.rolling(window=3).mean()
+
+
+@register_indicator("ichimoku_tenkan_9", ("high", "low"), window=9)
+def _ichimoku_tenkan_9(high: pd.Series, low: pd.Series) -> pd.Series:
+    return (high.rolling(window=9).max() + low.rolling(window=9).min()) / 2
+
+
+@register_indicator("ichimoku_kijun_26", ("high", "low"), window=26)
+def _ichimoku_kijun_26(high: pd.Series, low: pd.Series) -> pd.Series:
+    return (high.rolling(window=26).max() + low.rolling(window=26).min()) / 2
@@ -0,0 +1,189 @@
+"""NumPyによるテクニカル指標カーネル
+
+calculate_technical_indicators と同じ指標を、レジストリの計算式の種類とパラメータに従って
+pandasのSeriesを作らずに連続したNumPy配列上で計算する。
+出力は呼び出し側が確保したバッファ（指標数 × 日数の2次元配列）に書き込むため、
+多数の銘柄を処理する場合は最長の日数で1回だけ確保して使い回せる。
+float32のバッファを渡すと出力のメモリは半分になる（内部計算はfloat64で行い、書き込み時に丸める）。
+
+EMA/RSIの漸化式はブロック単位の閉形式（下三角行列の積）で計算するため、pandasのewmとは
+浮動小数点の誤差の範囲（相対1e-12程度）で一致する。入力は欠損のない日付昇順の配列を前提とする。
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.analysis.incremental import indicator_plan
+
+# 出力バッファの行の並び（DBに格納する指標の登録順）
+INDICATOR_NAMES = tuple(spec.name for spec in indicator_plan() if spec.persisted)
+_ROW = {name: i for i, name in enumerate(INDICATOR_NAMES)}
+
+# 漸化式を閉形式で計算するブロックの長さ
+RECURRENCE_BLOCK = 64
+# 移動標準偏差を一度に計算するウィンドウ数
+ROLLING_CHUNK = 128
+
+# calculate_technical_indicators が計算対象とする最小日数
+MIN_BARS = 26
+
+
+def allocate_indicator_buffer(length: int, dtype: np.dtype | type = np.float64) -> np.ndarray:
+    """指標の出力バッファ（指標数 × length）を確保する"""
+    return np.empty((len(INDICATOR_NAMES), length), dtype=dtype)
+
+
+@lru_cache(maxsize=32)
+def _recurrence_kernel(decay: float, scale: float, block: int) -> tuple[np.ndarray, np.ndarray]:
+    """ブロック内の漸化式を表す下三角行列（転置済み）と、持ち越し値に掛ける decay の冪"""
+    lag = np.arange(block)[:, np.newaxis] - np.arange(block)[np.newaxis, :]
+    kernel = np.where(lag >= 0, decay ** np.maximum(lag, 0), 0.0) * scale
+    return np.ascontiguousarray(kernel.T), decay ** np.arange(1, block + 1)
+
+
+def linear_recurrence(
+    values: np.ndarray,
+    decay: float,
+    scale: float,
+    initial: float,
+    out: np.ndarray,
+) -> np.ndarray:
+    """y[i] = decay * y[i-1] + scale * values[i]（y[-1] = initial）を計算する
+
+    RECURRENCE_BLOCK件ごとのブロック内は decay の冪を並べた下三角行列との積で一括計算し、
+    ブロック間の持ち越しだけを逐次計算する。outはvaluesと同じ長さのfloat64の連続配列であること。
+    """
+    n = len(values)
+    block = RECURRENCE_BLOCK
+    kernel, powers = _recurrence_kernel(decay, scale, block)
+    full = n - n % block
+
+    if full:
+        blocks = out[:full].reshape(-1, block)
+        np.matmul(values[:full].reshape(-1, block), kernel, out=blocks)
+    else:
+        blocks = out[:0].reshape(0, block)
+    carry = initial
+    for row in blocks:
+        row += carry * powers
+        carry = row[-1]
+
+    if full < n:
+        rest = n - full
+        tail = out[full:]
+        np.matmul(values[full:], kernel[:rest, :rest], out=tail)
+        tail += carry * powers[:rest]
+    return out
+
+
+def ema(values: np.ndarray, span: int, out: np.ndarray) -> np.ndarray:
+    """adjust=False のEMA（pandasの ewm(span=span, adjust=False).mean() 相当）"""
+    alpha = 2 / (span + 1)
+    return linear_recurrence(values, 1.0 - alpha, alpha, float(values[0]), out)
+
+
+def wilder_average(values: np.ndarray, length: int, out: np.ndarray, scratch: np.ndarray) -> np.ndarray:
+    """adjust=True のewm平均（pandasの ewm(alpha=1/length, min_periods=length).mean() 相当）"""
+    decay = 1.0 - 1 / length
+    linear_recurrence(values, decay, 1.0, 0.0, scratch)
+    # 重みの合計 Σ decay^k は閉形式で求まる（valuesは使用済みのため out と同じ配列でもよい）
+    np.power(decay, np.arange(1, len(values) + 1, dtype=np.float64), out=out)
+    np.subtract(1.0, out, out=out)
+    out /= 1.0 - decay
+    np.divide(scratch, out, out=out)
+    out[:length - 1] = np.nan
+    return out
+
+
+def rolling_mean(values: np.ndarray, window: int, out: np.ndarray) -> np.ndarray:
+    """単純移動平均（先頭 window-1 件はNaN）"""
+    out[:window - 1] = np.nan
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values, window).mean(axis=1)
+    return out
+
+
+def rolling_std(values: np.ndarray, window: int, out: np.ndarray) -> np.ndarray:
+    """移動標準偏差（不偏、ddof=1。先頭 window-1 件はNaN）
+
+    一時配列を抑えるため、ROLLING_CHUNK個のウィンドウずつ計算する。
+    """
+    out[:window - 1] = np.nan
+    if len(values) >= window:
+        windows = sliding_window_view(values, window)
+        for start in range(0, len(windows), ROLLING_CHUNK):
+            chunk = windows[start:start + ROLLING_CHUNK]
+            out[window - 1 + start:window - 1 + start + len(chunk)] = chunk.std(axis=1, ddof=1)
+    return out
+
+
+def _rsi(values: np.ndarray, length: int, out: np.ndarray) -> np.ndarray:
+    """RSI（初日の変化幅は0として扱う）"""
+    n = len(values)
+    delta = np.empty(n)
+    delta[0] = 0.0
+    np.subtract(values[1:], values[:-1], out=delta[1:])
+    scratch = np.empty(n)
+    gain = np.maximum(delta, 0.0)
+    avg_gain = wilder_average(gain, length, gain, scratch)
+    avg_loss = wilder_average(np.maximum(np.negative(delta, out=delta), 0.0, out=delta), length, delta, scratch)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(avg_gain, avg_loss, out=out)
+        out += 1
+        np.divide(100, out, out=out)
+    np.subtract(100, out, out=out)
+    return out
+
+
+def calculate_indicator_arrays(
+    close: np.ndarray,
+    volume: np.ndarray,
+    out: np.ndarray | None = None,
+    dtype: np.dtype | type = np.float64,
+) -> dict[str, np.ndarray]:
+    """終値・出来高の配列からテクニカル指標を計算する（純粋関数）
+
+    Args:
+        close: 終値（日付昇順、欠損なし）
+        volume: 出来高
+        out: 出力バッファ（allocate_indicator_buffer で確保。日数以上の長さがあれば使い回せる）
+        dtype: out未指定時に確保するバッファの型（np.float32 で省メモリ）
+
+    Returns:
+        指標名 → out の各行のビュー（日数が MIN_BARS 未満の場合は空）
+    """
+    n = len(close)
+    if n < MIN_BARS:
+        return {}
+    if out is None:
+        out = allocate_indicator_buffer(n, dtype)
+    rows = out[:, :n]
+
+    # 中間の系列はfloat64で計算し、DBに格納する指標だけを出力バッファに書き込む
+    series = {
+        "close": np.ascontiguousarray(close, dtype=np.float64),
+        "volume": np.ascontiguousarray(volume, dtype=np.float64),
+    }
+    for spec in indicator_plan():
+        source = series[spec.inputs[0]]
+        values = np.empty(n)
+        if spec.kind == "sma":
+            rolling_mean(source, int(spec.params["length"]), values)
+        elif spec.kind == "rolling_std":
+            rolling_std(source, int(spec.params["length"]), values)
+        elif spec.kind == "ema":
+            ema(source, int(spec.params["span"]), values)
+        elif spec.kind == "rsi":
+            _rsi(source, int(spec.params["length"]), values)
+        elif spec.kind == "difference":
+            np.subtract(source, series[spec.inputs[1]], out=values)
+        else:
+            np.multiply(series[spec.inputs[1]], spec.params["width"], out=values)
+            values += source
+        series[spec.name] = values
+        if spec.persisted:
+            rows[_ROW[spec.name]] = values
+
+    return {name: rows[i] for i, name in enumerate(INDICATOR_NAMES)}
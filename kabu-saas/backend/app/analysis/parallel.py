@@ -0,0 +1,138 @@
+"""CPUバウンドな分析処理のプロセス並列実行モジュール
+
+指標計算・スコア計算などの純粋関数をProcessPoolExecutorで実行する。
+DBの読み書きはイベントループ上に残し、ワーカーにはNumPy配列などの小さなデータだけを渡す。
+ワーカー数が1以下の場合はプールを作らず、イベントループを塞がないよう別スレッドで1件ずつ実行する。
+多数のタスクで同じ大きな配列を読む場合は SharedArrays で共有メモリに置き、ワーカーにはハンドルだけを渡す。
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, TypeVar
+
+import numpy as np
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class AnalysisPool:
+    """分析処理の実行先（プロセスプール、または別スレッドでの逐次実行）"""
+
+    def __init__(self, workers: int) -> None:
+        self.workers = max(1, workers)
+        self._executor: ProcessPoolExecutor | None = None
+        # プールを作らない場合に、同時に実行する処理を1件に制限する
+        self._inline_lock = asyncio.Lock()
+        if self.workers > 1:
+            # asyncpgの接続やスレッドを抱えたままforkしないよう spawn で起動する
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    @property
+    def parallel(self) -> bool:
+        return self._executor is not None
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """関数を実行する（funcと引数はpickle可能であること）"""
+        if self._executor is None:
+            async with self._inline_lock:
+                return await asyncio.to_thread(func, *args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+@asynccontextmanager
+async def analysis_pool(workers: int | None = None) -> AsyncIterator[AnalysisPool]:
+    """ステージ実行中だけ使う分析用プールを作成する
+
+    Args:
+        workers: ワーカープロセス数（未指定時は設定値 analysis_workers）
+    """
+    if workers is None:
+        workers = get_settings().analysis_workers
+    pool = AnalysisPool(workers)
+    if pool.parallel:
+        logger.info(f"分析プロセスプール起動: {pool.workers}ワーカー")
+    try:
+        yield pool
+    finally:
+        pool.shutdown()
+
+
+@dataclass(frozen=True)
+class SharedArrayHandle:
+    """共有メモリ上の配列の参照（ワーカーへはこれだけをpickleして渡す）"""
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+
+# このプロセスで作成した共有メモリ / ワーカーで接続済みの共有メモリ（名前 → ブロック）
+_owned_blocks: dict[str, shared_memory.SharedMemory] = {}
+_attached_blocks: dict[str, shared_memory.SharedMemory] = {}
+
+
+class SharedArrays:
+    """配列を共有メモリにコピーし、ワーカーからは attach_shared_arrays で読み取り専用のビューとして参照する
+
+    with ブロックを抜けると共有メモリを解放する（ワーカーが接続したままでも、全員が閉じた時点で解放される）。
+    """
+
+    def __init__(self, arrays: dict[str, np.ndarray]) -> None:
+        self.handles: dict[str, SharedArrayHandle] = {}
+        self._blocks: list[shared_memory.SharedMemory] = []
+        try:
+            for key, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                self._blocks.append(block)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+                _owned_blocks[block.name] = block
+                self.handles[key] = SharedArrayHandle(block.name, array.shape, array.dtype.str)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        for block in self._blocks:
+            _owned_blocks.pop(block.name, None)
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def attach_shared_arrays(handles: dict[str, SharedArrayHandle]) -> dict[str, np.ndarray]:
+    """共有メモリ上の配列を読み取り専用のビューとして取得する（接続はプロセス内で使い回す）"""
+    arrays: dict[str, np.ndarray] = {}
+    for key, handle in handles.items():
+        block = _owned_blocks.get(handle.name) or _attached_blocks.get(handle.name)
+        if block is None:
+            # spawnしたワーカーは親プロセスの resource_tracker を共有するため、解放は作成したプロセスに任せる
+            block = shared_memory.SharedMemory(name=handle.name)
+            _attached_blocks[handle.name] = block
+        view = np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=block.buf)
+        view.flags.writeable = False
+        arrays[key] = view
+    return arrays
@@ -0,0 +1,152 @@
+"""項目別スコアによる再ランキングモジュール
+
+シグナル検出時に保存した項目別スコア（component_scores）から、任意の重みで全銘柄の総合スコアを
+計算し直して並べ替える。指標・ファンダメンタルの読み込みやスコア計算はやり直さない。
+日付ごとの項目別スコアと、重みのハッシュごとのランキング結果はプロセス内にキャッシュする
+（シグナル検出で項目別スコアを書き込むと、その日付のキャッシュは破棄される）。
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.analysis.scoring import COMPONENT_NAMES, combine_component_scores, round_scores, validate_weights
+from app.config import get_settings
+from app.models.signal import ComponentScore
+
+
+@dataclass(frozen=True)
+class ComponentMatrix:
+    """1日分の項目別スコア"""
+    date: date
+    stock_ids: np.ndarray
+    # (銘柄数, 項目数) の整数配列（COMPONENT_NAMES 順）
+    components: np.ndarray
+
+
+@dataclass(frozen=True)
+class RankedScores:
+    """重みを指定した再ランキング結果（総合スコアの降順）"""
+    date: date
+    weights_hash: str
+    stock_ids: np.ndarray
+    total_score: np.ndarray
+    technical_score: np.ndarray
+    fundamental_score: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.stock_ids)
+
+
+# 日付 → (読み込んだ時刻, 項目別スコア)
+_matrix_cache: dict[date, tuple[float, ComponentMatrix]] = {}
+# (日付, 重みのハッシュ) → ランキング結果（LRU）
+_rank_cache: OrderedDict[tuple[date, str], RankedScores] = OrderedDict()
+
+
+def weights_hash(weights: dict[str, float]) -> str:
+    """重みのハッシュ（キャッシュのキー）"""
+    normalized = {name: float(weights[name]) for name in COMPONENT_NAMES}
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def rank_components(matrix: ComponentMatrix, weights: dict[str, float]) -> RankedScores:
+    """項目別スコアを重み付けして総合スコアの降順に並べる（純粋関数）
+
+    同点の場合は銘柄ID順とする。スコアはシグナル検出と同じく小数2桁に丸める。
+    """
+    weights = validate_weights(weights)
+    components = {
+        name: matrix.components[:, j].astype(np.float64) for j, name in enumerate(COMPONENT_NAMES)
+    }
+    total, technical, fundamental = map(round_scores, combine_component_scores(components, weights))
+    order = np.lexsort((matrix.stock_ids, -total))
+    return RankedScores(
+        date=matrix.date,
+        weights_hash=weights_hash(weights),
+        stock_ids=matrix.stock_ids[order],
+        total_score=total[order],
+        technical_score=technical[order],
+        fundamental_score=fundamental[order],
+    )
+
+
+def invalidate_rerank_cache(target_date: date | None = None) -> None:
+    """キャッシュを破棄する（target_date 指定時はその日付分のみ）"""
+    if target_date is None:
+        _matrix_cache.clear()
+        _rank_cache.clear()
+        return
+    _matrix_cache.pop(target_date, None)
+    for key in [key for key in _rank_cache if key[0] == target_date]:
+        del _rank_cache[key]
+
+
+async def latest_component_date(db: AsyncSession) -> date | None:
+    """項目別スコアが保存されている最新の日付"""
+    return await db.scalar(select(func.max(ComponentScore.date)))
+
+
+async def load_component_matrix(db: AsyncSession, target_date: date) -> ComponentMatrix:
+    """指定日の項目別スコアを取得する（rerank_cache_ttl_seconds の間キャッシュする）"""
+    ttl = get_settings().rerank_cache_ttl_seconds
+    cached = _matrix_cache.get(target_date)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+
+    result = await db.execute(
+        select(ComponentScore.stock_id, ComponentScore.components)
+        .where(ComponentScore.date == target_date)
+        .order_by(ComponentScore.stock_id)
+    )
+    rows = result.all()
+    components = np.array([row.components for row in rows], dtype=np.int16)
+    matrix = ComponentMatrix(
+        date=target_date,
+        stock_ids=np.array([row.stock_id for row in rows], dtype=np.int64),
+        components=components.reshape(len(rows), len(COMPONENT_NAMES)),
+    )
+    # 項目別スコアを読み直したら、その日付のランキングも作り直す
+    invalidate_rerank_cache(target_date)
+    _matrix_cache[target_date] = (time.monotonic(), matrix)
+    return matrix
+
+
+async def rerank_universe(
+    db: AsyncSession,
+    weights: dict[str, float],
+    target_date: date | None = None,
+) -> RankedScores | None:
+    """指定した重みで全銘柄を再ランキングする
+
+    Args:
+        weights: COMPONENT_NAMES の全項目の重み（相対値。合計が1である必要はない）
+        target_date: 対象日（未指定時は項目別スコアが保存されている最新日）
+
+    Returns:
+        ランキング結果（項目別スコアが1件もない場合はNone）
+    """
+    if target_date is None:
+        target_date = await latest_component_date(db)
+        if target_date is None:
+            return None
+
+    matrix = await load_component_matrix(db, target_date)
+    key = (target_date, weights_hash(validate_weights(weights)))
+    ranked = _rank_cache.get(key)
+    if ranked is not None:
+        _rank_cache.move_to_end(key)
+        return ranked
+
+    ranked = rank_components(matrix, weights)
+    _rank_cache[key] = ranked
+    while len(_rank_cache) > max(1, get_settings().rerank_cache_size):
+        _rank_cache.popitem(last=False)
+    return ranked
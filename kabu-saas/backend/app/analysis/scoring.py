@@ -5,6 +5,9 @@
 
 from dataclasses import dataclass
 from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
 
 from app.models.fundamental import FundamentalData
 from app.models.technical import TechnicalIndicator
@@ -23,6 +26,18 @@ DEFAULT_WEIGHTS = {
     "roe": 0.10,
 }
 
+# 項目別スコアの並び（component_scores テーブルに配列で格納する順序）
+COMPONENT_NAMES = tuple(DEFAULT_WEIGHTS)
+TECHNICAL_COMPONENTS = ("sma_cross", "rsi", "macd", "bollinger", "volume")
+FUNDAMENTAL_COMPONENTS = ("per", "pbr", "dividend_yield", "roe")
+
+# ワーカープロセスへ配列で渡す項目
+INDICATOR_FIELDS = (
+    "sma_5", "sma_25", "sma_75", "rsi_14", "macd_line", "macd_signal", "macd_histogram",
+    "bb_upper_2", "bb_middle", "bb_lower_2", "volume_sma_25",
+)
+FUNDAMENTAL_FIELDS = ("per", "pbr", "dividend_yield", "roe")
+
 
 @dataclass(frozen=True)
 class ScoreResult:
@@ -339,3 +354,267 @@ def calculate_total_score(
         fundamental_score=round(fundamental_score, 2),
         reasons=reasons,
     )
+
+
+def pack_score_inputs(objects: list[object | None], fields: tuple[str, ...]) -> np.ndarray:
+    """指標・ファンダメンタルの値を (銘柄数, 項目数) のfloat配列に詰める（Noneは NaN）"""
+    values = np.full((len(objects), len(fields)), np.nan)
+    for i, obj in enumerate(objects):
+        if obj is None:
+            continue
+        for j, name in enumerate(fields):
+            value = getattr(obj, name)
+            if value is not None:
+                values[i, j] = float(value)
+    return values
+
+
+def _unpack_row(fields: tuple[str, ...], row: list[float]) -> SimpleNamespace:
+    return SimpleNamespace(**{name: None if value != value else value for name, value in zip(fields, row, strict=True)})
+
+
+def _column(values: np.ndarray, fields: tuple[str, ...], name: str) -> np.ndarray:
+    return values[:, fields.index(name)]
+
+
+def _vector_sma_cross(ind: np.ndarray) -> np.ndarray:
+    """score_sma_cross の配列版"""
+    sma_5 = _column(ind, INDICATOR_FIELDS, "sma_5")
+    sma_25 = _column(ind, INDICATOR_FIELDS, "sma_25")
+    sma_75 = _column(ind, INDICATOR_FIELDS, "sma_75")
+    # sma_75 が None または 0 の場合はパーフェクトオーダー判定をしない
+    has_75 = ~np.isnan(sma_75) & (sma_75 != 0)
+    score = np.select(
+        [(sma_5 > sma_25) & has_75 & (sma_25 > sma_75), sma_5 > sma_25, sma_5 < sma_25],
+        [90.0, 70.0, 30.0],
+        default=50.0,
+    )
+    return np.where(np.isnan(sma_5) | np.isnan(sma_25), 50.0, score)
+
+
+def _vector_rsi(ind: np.ndarray) -> np.ndarray:
+    """score_rsi の配列版"""
+    rsi = _column(ind, INDICATOR_FIELDS, "rsi_14")
+    score = np.select([rsi <= 30, rsi <= 40, rsi >= 70, rsi >= 60], [80.0, 65.0, 20.0, 40.0], default=50.0)
+    return np.where(np.isnan(rsi), 50.0, score)
+
+
+def _vector_macd(ind: np.ndarray) -> np.ndarray:
+    """score_macd の配列版"""
+    macd = _column(ind, INDICATOR_FIELDS, "macd_line")
+    signal = _column(ind, INDICATOR_FIELDS, "macd_signal")
+    histogram = _column(ind, INDICATOR_FIELDS, "macd_histogram")
+    histogram = np.where(np.isnan(histogram), 0.0, histogram)
+    score = np.select([(macd > signal) & (histogram > 0), macd > signal], [80.0, 70.0], default=30.0)
+    return np.where(np.isnan(macd) | np.isnan(signal), 50.0, score)
+
+
+def _vector_bollinger(ind: np.ndarray, close_prices: np.ndarray) -> np.ndarray:
+    """score_bollinger の配列版"""
+    lower = _column(ind, INDICATOR_FIELDS, "bb_lower_2")
+    upper = _column(ind, INDICATOR_FIELDS, "bb_upper_2")
+    middle = _column(ind, INDICATOR_FIELDS, "bb_middle")
+    middle = np.where(np.isnan(middle) | (middle == 0), (lower + upper) / 2, middle)
+    score = np.select(
+        [close_prices <= lower, close_prices <= middle, close_prices >= upper],
+        [80.0, 60.0, 20.0],
+        default=40.0,
+    )
+    return np.where(np.isnan(lower) | np.isnan(upper), 50.0, score)
+
+
+def _vector_volume(ind: np.ndarray, volumes: np.ndarray) -> np.ndarray:
+    """score_volume の配列版"""
+    volume_sma = _column(ind, INDICATOR_FIELDS, "volume_sma_25")
+    missing = np.isnan(volume_sma) | (volume_sma == 0)
+    ratio = volumes / np.where(missing, 1.0, volume_sma)
+    score = np.select([ratio >= 2.0, ratio >= 1.5, ratio <= 0.5], [80.0, 65.0, 30.0], default=50.0)
+    return np.where(missing, 50.0, score)
+
+
+def _vector_per(fund: np.ndarray) -> np.ndarray:
+    """score_per の配列版"""
+    per = _column(fund, FUNDAMENTAL_FIELDS, "per")
+    score = np.select(
+        [per <= 0, per <= 10, per <= 15, per <= 25, per <= 40],
+        [20.0, 90.0, 70.0, 50.0, 30.0],
+        default=15.0,
+    )
+    return np.where(np.isnan(per), 50.0, score)
+
+
+def _vector_pbr(fund: np.ndarray) -> np.ndarray:
+    """score_pbr の配列版"""
+    pbr = _column(fund, FUNDAMENTAL_FIELDS, "pbr")
+    score = np.select([pbr <= 0, pbr <= 0.5, pbr <= 1.0, pbr <= 2.0], [20.0, 90.0, 75.0, 50.0], default=25.0)
+    return np.where(np.isnan(pbr), 50.0, score)
+
+
+def _vector_dividend_yield(fund: np.ndarray) -> np.ndarray:
+    """score_dividend_yield の配列版"""
+    dy = _column(fund, FUNDAMENTAL_FIELDS, "dividend_yield")
+    score = np.select([dy >= 5.0, dy >= 3.0, dy >= 2.0, dy > 0], [90.0, 75.0, 55.0, 40.0], default=30.0)
+    return np.where(np.isnan(dy), 50.0, score)
+
+
+def _vector_roe(fund: np.ndarray) -> np.ndarray:
+    """score_roe の配列版"""
+    roe = _column(fund, FUNDAMENTAL_FIELDS, "roe")
+    score = np.select([roe >= 20, roe >= 10, roe >= 5, roe > 0], [90.0, 70.0, 50.0, 30.0], default=15.0)
+    return np.where(np.isnan(roe), 50.0, score)
+
+
+def round_scores(values: np.ndarray) -> np.ndarray:
+    """calculate_total_score と同じく組み込みround()で小数2桁に丸める"""
+    return np.array([round(v, 2) for v in values.tolist()], dtype=float)
+
+
+@dataclass(frozen=True)
+class UniverseScores:
+    """全銘柄分のスコアリング結果
+
+    スコアは配列で保持し、根拠（reasons）は reasons() / result() で必要な銘柄についてだけ生成する。
+    """
+    total_score: np.ndarray
+    technical_score: np.ndarray
+    fundamental_score: np.ndarray
+    # 項目別スコア（DEFAULT_WEIGHTS のキー → 配列）
+    components: dict[str, np.ndarray]
+    indicator_values: np.ndarray
+    fundamental_values: np.ndarray
+    close_prices: np.ndarray
+    volumes: np.ndarray
+    weights: dict[str, float] | None = None
+
+    def __len__(self) -> int:
+        return len(self.total_score)
+
+    def reasons(self, index: int) -> list[dict[str, str]]:
+        """指定した銘柄のスコア根拠を生成する"""
+        return calculate_total_score(
+            indicator=_unpack_row(INDICATOR_FIELDS, self.indicator_values[index].tolist()),
+            fundamental=_unpack_row(FUNDAMENTAL_FIELDS, self.fundamental_values[index].tolist()),
+            close_price=float(self.close_prices[index]),
+            current_volume=float(self.volumes[index]),
+            weights=self.weights,
+        ).reasons
+
+    def component_matrix(self) -> np.ndarray:
+        """項目別スコアを (銘柄数, 項目数) の整数配列（COMPONENT_NAMES 順）で返す"""
+        return np.column_stack([self.components[name] for name in COMPONENT_NAMES]).astype(np.int16)
+
+    def result(self, index: int) -> ScoreResult:
+        """指定した銘柄の結果を calculate_total_score と同じ形で返す"""
+        return ScoreResult(
+            total_score=float(self.total_score[index]),
+            technical_score=float(self.technical_score[index]),
+            fundamental_score=float(self.fundamental_score[index]),
+            reasons=self.reasons(index),
+        )
+
+
+def validate_weights(weights: dict[str, float]) -> dict[str, float]:
+    """重みを検証する（全項目が0以上で、テクニカル・ファンダメンタルそれぞれの合計が正であること）"""
+    if set(weights) != set(COMPONENT_NAMES):
+        raise ValueError(f"重みには次の項目をすべて指定してください: {', '.join(COMPONENT_NAMES)}")
+    if any(value < 0 for value in weights.values()):
+        raise ValueError("重みは0以上で指定してください")
+    for group in (TECHNICAL_COMPONENTS, FUNDAMENTAL_COMPONENTS):
+        if sum(weights[name] for name in group) <= 0:
+            raise ValueError(f"次の項目の重みの合計は正である必要があります: {', '.join(group)}")
+    return {name: float(weights[name]) for name in COMPONENT_NAMES}
+
+
+def combine_component_scores(
+    components: dict[str, np.ndarray],
+    weights: dict[str, float],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """項目別スコアを重み付けして（総合, テクニカル, ファンダメンタル）スコアを計算する（丸め前）
+
+    calculate_total_score と同じ演算順序で計算する。
+    """
+    w = weights
+    technical_score = (
+        components["sma_cross"] * w["sma_cross"]
+        + components["rsi"] * w["rsi"]
+        + components["macd"] * w["macd"]
+        + components["bollinger"] * w["bollinger"]
+        + components["volume"] * w["volume"]
+    ) / (w["sma_cross"] + w["rsi"] + w["macd"] + w["bollinger"] + w["volume"])
+
+    fundamental_score = (
+        components["per"] * w["per"]
+        + components["pbr"] * w["pbr"]
+        + components["dividend_yield"] * w["dividend_yield"]
+        + components["roe"] * w["roe"]
+    ) / (w["per"] + w["pbr"] + w["dividend_yield"] + w["roe"])
+
+    tech_weight = w["sma_cross"] + w["rsi"] + w["macd"] + w["bollinger"] + w["volume"]
+    fund_weight = w["per"] + w["pbr"] + w["dividend_yield"] + w["roe"]
+    total_score = (
+        technical_score * tech_weight + fundamental_score * fund_weight
+    ) / (tech_weight + fund_weight)
+
+    return total_score, technical_score, fundamental_score
+
+
+def score_universe(
+    indicator_values: np.ndarray,
+    fundamental_values: np.ndarray,
+    close_prices: np.ndarray,
+    volumes: np.ndarray,
+    weights: dict[str, float] | None = None,
+) -> UniverseScores:
+    """全銘柄の総合スコアを配列演算で一括計算する（純粋関数）
+
+    各項目の if/elif の分岐は同じ順序の条件による np.select で表し、
+    重み付けも calculate_total_score と同じ演算順序で行うため、銘柄ごとの結果は完全に一致する。
+
+    Args:
+        indicator_values: pack_score_inputs(指標, INDICATOR_FIELDS) の配列
+        fundamental_values: pack_score_inputs(ファンダメンタル, FUNDAMENTAL_FIELDS) の配列
+        close_prices: 終値
+        volumes: 出来高
+    """
+    w = weights or DEFAULT_WEIGHTS
+    with np.errstate(invalid="ignore", divide="ignore"):
+        components = {
+            "sma_cross": _vector_sma_cross(indicator_values),
+            "rsi": _vector_rsi(indicator_values),
+            "macd": _vector_macd(indicator_values),
+            "bollinger": _vector_bollinger(indicator_values, close_prices),
+            "volume": _vector_volume(indicator_values, volumes),
+            "per": _vector_per(fundamental_values),
+            "pbr": _vector_pbr(fundamental_values),
+            "dividend_yield": _vector_dividend_yield(fundamental_values),
+            "roe": _vector_roe(fundamental_values),
+        }
+
+    total_score, technical_score, fundamental_score = combine_component_scores(components, w)
+
+    return UniverseScores(
+        total_score=round_scores(total_score),
+        technical_score=round_scores(technical_score),
+        fundamental_score=round_scores(fundamental_score),
+        components=components,
+        indicator_values=indicator_values,
+        fundamental_values=fundamental_values,
+        close_prices=close_prices,
+        volumes=volumes,
+        weights=weights,
+    )
+
+
+def calculate_scores_from_arrays(
+    indicator_values: np.ndarray,
+    fundamental_values: np.ndarray,
+    close_prices: np.ndarray,
+    volumes: np.ndarray,
+    weights: dict[str, float] | None = None,
+) -> list[ScoreResult]:
+    """配列化した入力から複数銘柄の総合スコアを根拠付きで計算する（純粋関数）
+
+    全銘柄の根拠を生成するため、閾値を超えた銘柄だけが必要な場合は score_universe を使うこと。
+    """
+    scores = score_universe(indicator_values, fundamental_values, close_prices, volumes, weights)
+    return [scores.result(i) for i in range(len(scores))]
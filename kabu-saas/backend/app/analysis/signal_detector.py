@@ -4,16 +4,38 @@
 買い/売りシグナルを検出してDBに格納する。
 """
 
+import asyncio
+import hashlib
+import json
 import logging
-from datetime import date
+from collections.abc import Collection
+from datetime import date, timedelta
 from decimal import Decimal
+from typing import Any
 
-from sqlalchemy import select
+import numpy as np
+import pandas as pd
+from sqlalchemy import ColumnElement, Date, Integer, Row, all_, and_, any_, delete, func, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, distinct_on
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.analysis.scoring import calculate_total_score
+from app.analysis.parallel import AnalysisPool, analysis_pool
+from app.analysis.rerank import invalidate_rerank_cache
+from app.analysis.scoring import (
+    COMPONENT_NAMES,
+    DEFAULT_WEIGHTS,
+    FUNDAMENTAL_FIELDS,
+    INDICATOR_FIELDS,
+    ScoreResult,
+    pack_score_inputs,
+    score_universe,
+)
+from app.analysis.technical import MAX_BIND_PARAMS
+from app.analysis.weight_schedule import WeightSchedule, load_scoring_weights, load_weight_schedule
+from app.config import get_settings
 from app.models.fundamental import FundamentalData
-from app.models.signal import Signal
+from app.models.signal import ComponentScore, Signal, SignalBackfillCheckpoint
 from app.models.stock import Stock, StockPrice
 from app.models.technical import TechnicalIndicator
 
@@ -24,6 +46,17 @@ BUY_THRESHOLD = 60.0
 STRONG_BUY_THRESHOLD = 80.0
 SELL_THRESHOLD = 40.0
 
+# シグナル行の列（UPSERTのバッチサイズ計算に使う）
+SIGNAL_COLUMNS = (
+    "stock_id", "date", "signal_type", "score", "technical_score", "fundamental_score", "reasons",
+)
+
+
+def signal_rules_fingerprint(weights: dict[str, float] | None = None) -> str:
+    """シグナル判定の結果に影響する閾値・重みのハッシュ（weights 未指定時は DEFAULT_WEIGHTS）"""
+    rules = {"weights": weights or DEFAULT_WEIGHTS, "buy_threshold": BUY_THRESHOLD, "sell_threshold": SELL_THRESHOLD}
+    return hashlib.sha256(json.dumps(rules, sort_keys=True).encode()).hexdigest()
+
 
 def determine_signal_type(score: float) -> str | None:
     """スコアからシグナルタイプを判定する"""
@@ -34,111 +67,507 @@ def determine_signal_type(score: float) -> str | None:
     return None
 
 
-async def detect_stock_signal(
+def _build_signal_row(stock_id: int, target_date: date, score_result: ScoreResult) -> dict[str, Any] | None:
+    """スコアからシグナル行を作成する（シグナルに該当しない場合はNone）"""
+    signal_type = determine_signal_type(score_result.total_score)
+    if signal_type is None:
+        return None
+
+    return {
+        "stock_id": stock_id,
+        "date": target_date,
+        "signal_type": signal_type,
+        "score": Decimal(str(score_result.total_score)),
+        "technical_score": Decimal(str(score_result.technical_score)),
+        "fundamental_score": Decimal(str(score_result.fundamental_score)),
+        "reasons": {"items": score_result.reasons},
+    }
+
+
+async def replace_signals(
     db: AsyncSession,
-    stock: Stock,
-    target_date: date | None = None,
-) -> Signal | None:
-    """個別銘柄のシグナルを検出する"""
-    if target_date is None:
-        target_date = date.today()
+    rows: list[dict[str, Any]],
+    scope: ColumnElement[bool],
+) -> None:
+    """scope に該当するシグナルを rows の内容に置き換える（冪等）
 
-    # 最新のテクニカル指標を取得
-    indicator_result = await db.execute(
-        select(TechnicalIndicator)
-        .where(
-            TechnicalIndicator.stock_id == stock.id,
-            TechnicalIndicator.date <= target_date,
-        )
-        .order_by(TechnicalIndicator.date.desc())
-        .limit(1)
+    rows は (stock_id, date, signal_type) をキーにまとめてUPSERTし、scope に該当する
+    シグナルのうち rows に含まれないもの（条件を満たさなくなった銘柄・種別）は削除する。
+    同じ入力で何度実行しても、行数・内容は変わらない。
+
+    Args:
+        rows: _build_signal_row で作成したシグナル行
+        scope: 今回判定した日付・銘柄を表す条件（判定できなかった銘柄のシグナルは残す）
+    """
+    kept_ids: list[int] = []
+    batch_size = MAX_BIND_PARAMS // len(SIGNAL_COLUMNS)
+    for start in range(0, len(rows), batch_size):
+        stmt = pg_insert(Signal).values(rows[start:start + batch_size])
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_signals_stock_date_type",
+            set_={c: stmt.excluded[c] for c in SIGNAL_COLUMNS if c not in ("stock_id", "date", "signal_type")},
+        ).returning(Signal.id)
+        result = await db.execute(stmt)
+        kept_ids.extend(result.scalars().all())
+
+    # 残す行のIDは件数によらず配列1つのパラメータで渡す
+    await db.execute(
+        delete(Signal).where(scope, Signal.id != all_(literal(kept_ids, ARRAY(Integer))))
     )
-    indicator = indicator_result.scalar_one_or_none()
-    if not indicator:
-        return None
 
-    # 最新のファンダメンタルデータを取得
-    fund_result = await db.execute(
-        select(FundamentalData)
-        .where(
-            FundamentalData.stock_id == stock.id,
-            FundamentalData.date <= target_date,
-        )
-        .order_by(FundamentalData.date.desc())
-        .limit(1)
+
+def _scored_pairs_scope(
+    model: type[Signal] | type[ComponentScore],
+    stock_ids: list[int],
+    dates: list[date],
+) -> ColumnElement[bool]:
+    """今回判定した (銘柄ID, 日付) の組だけを表す条件
+
+    銘柄と日付を別々に ANY で絞ると、判定していない組（その日に指標がない銘柄など）まで含まれるため、
+    組を2つの配列パラメータから unnest した集合と比較する。
+    """
+    pairs = select(
+        func.unnest(literal(stock_ids, ARRAY(Integer))),
+        func.unnest(literal(dates, ARRAY(Date))),
     )
-    fundamental = fund_result.scalar_one_or_none()
+    return tuple_(model.stock_id, model.date).in_(pairs)
+
+
+# (銘柄, 最新の指標, 最新のファンダメンタル, 最新の株価)。指標・株価等はORMオブジェクトまたは同名の列を持つ行
+SignalTarget = tuple[Stock, Any, Any | None, Any]
+
 
-    # 最新の株価を取得
-    price_result = await db.execute(
-        select(StockPrice)
+def _target_stock_filter(stock_ids: Collection[int] | None = None) -> ColumnElement[bool]:
+    """対象銘柄の条件（アクティブ銘柄。stock_ids 指定時はその中に限る）"""
+    condition = Stock.is_active.is_(True)
+    if stock_ids is not None:
+        condition = and_(condition, Stock.id == any_(literal(sorted(stock_ids), ARRAY(Integer))))
+    return condition
+
+
+async def fetch_latest_rows(
+    db: AsyncSession,
+    model: type,
+    columns: tuple[str, ...],
+    target_date: date,
+    stock_ids: Collection[int] | None = None,
+) -> dict[int, Row]:
+    """対象銘柄ごとに target_date 以前の最新行を1クエリ（DISTINCT ON）で取得する"""
+    result = await db.execute(
+        select(model.stock_id, model.date, *(getattr(model, c) for c in columns))
         .where(
-            StockPrice.stock_id == stock.id,
-            StockPrice.date <= target_date,
+            model.stock_id.in_(select(Stock.id).where(_target_stock_filter(stock_ids))),
+            model.date <= target_date,
         )
-        .order_by(StockPrice.date.desc())
-        .limit(1)
+        .ext(distinct_on(model.stock_id))
+        .order_by(model.stock_id, model.date.desc())
     )
-    price = price_result.scalar_one_or_none()
-    if not price:
-        return None
+    return {row.stock_id: row for row in result.all()}
+
+
+async def prefetch_signal_inputs(
+    db: AsyncSession,
+    stocks: list[Stock],
+    target_date: date,
+    stock_ids: Collection[int] | None = None,
+) -> list[SignalTarget]:
+    """アクティブ銘柄のスコア計算入力を、テーブルごとに1クエリでまとめて取得する
+
+    銘柄数によらずラウンドトリップは3回（指標・ファンダメンタル・株価）で済む。
+    指標または株価がない銘柄は対象外とする。
+
+    Args:
+        stock_ids: 指定時はこの銘柄だけを取得する
+    """
+    indicators = await fetch_latest_rows(db, TechnicalIndicator, INDICATOR_FIELDS, target_date, stock_ids)
+    fundamentals = await fetch_latest_rows(db, FundamentalData, FUNDAMENTAL_FIELDS, target_date, stock_ids)
+    prices = await fetch_latest_rows(db, StockPrice, ("close", "volume"), target_date, stock_ids)
+
+    return [
+        (stock, indicators[stock.id], fundamentals.get(stock.id), prices[stock.id])
+        for stock in stocks
+        if stock.id in indicators and stock.id in prices
+    ]
 
-    # スコア計算
-    score_result = calculate_total_score(
-        indicator=indicator,
-        fundamental=fundamental,
-        close_price=float(price.close),
-        current_volume=price.volume,
+
+def _pack_targets(targets: list[SignalTarget]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """ワーカーに渡すため、スコア計算の入力をNumPy配列に詰める"""
+    return (
+        pack_score_inputs([t[1] for t in targets], INDICATOR_FIELDS),
+        pack_score_inputs([t[2] for t in targets], FUNDAMENTAL_FIELDS),
+        np.array([float(t[3].close) for t in targets]),
+        np.array([t[3].volume for t in targets], dtype=float),
     )
 
-    # シグナル判定
-    signal_type = determine_signal_type(score_result.total_score)
-    if signal_type is None:
-        return None
 
-    # シグナルをDBに保存
-    signal = Signal(
-        stock_id=stock.id,
-        date=target_date,
-        signal_type=signal_type,
-        score=Decimal(str(score_result.total_score)),
-        technical_score=Decimal(str(score_result.technical_score)),
-        fundamental_score=Decimal(str(score_result.fundamental_score)),
-        reasons={"items": score_result.reasons},
+def score_signal_candidates(
+    indicator_values: np.ndarray,
+    fundamental_values: np.ndarray,
+    close_prices: np.ndarray,
+    volumes: np.ndarray,
+    weights: dict[str, float] | None = None,
+) -> tuple[list[tuple[int, ScoreResult]], np.ndarray]:
+    """配列化した入力を一括でスコアリングし、シグナルに該当する銘柄だけを根拠付きで返す（純粋関数）
+
+    Returns:
+        ((入力中の位置, スコア結果) のリスト, 全銘柄の項目別スコア（UniverseScores.component_matrix）)
+    """
+    scores = score_universe(indicator_values, fundamental_values, close_prices, volumes, weights)
+    hits = (scores.total_score >= BUY_THRESHOLD) | (scores.total_score <= SELL_THRESHOLD)
+    return [(i, scores.result(i)) for i in np.flatnonzero(hits).tolist()], scores.component_matrix()
+
+
+async def save_component_scores(
+    db: AsyncSession,
+    stock_ids: list[int],
+    dates: list[date],
+    components: np.ndarray,
+    scope: ColumnElement[bool],
+) -> None:
+    """scope に該当する項目別スコアを今回の計算結果に置き換える（値が変わらない行は書き換えない）
+
+    scope に該当する行のうち今回計算していない (銘柄, 日付) の行（判定対象外になった銘柄など）は削除する。
+    再ランキングのキャッシュは、呼び出し側がコミットした後に invalidate_rerank_cache で破棄すること
+    （コミット前に破棄すると、その間に読み込んだ古いスコアがキャッシュに残る）。
+
+    Args:
+        stock_ids: 銘柄ID
+        dates: スコア算出日（stock_ids と同じ長さ）
+        components: (行数, 項目数) の項目別スコア（COMPONENT_NAMES 順）
+        scope: 今回判定した日付・銘柄を表す条件（replace_signals と同じ範囲）
+    """
+    rows = [
+        {"stock_id": stock_id, "date": row_date, "components": values}
+        for stock_id, row_date, values in zip(stock_ids, dates, components.tolist(), strict=True)
+    ]
+    table = ComponentScore.__table__
+    batch_size = MAX_BIND_PARAMS // 3
+    for start in range(0, len(rows), batch_size):
+        stmt = pg_insert(ComponentScore).values(rows[start:start + batch_size])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["stock_id", "date"],
+            set_={"components": stmt.excluded.components},
+            where=table.c.components.is_distinct_from(stmt.excluded.components),
+        )
+        await db.execute(stmt)
+
+    await db.execute(
+        delete(ComponentScore).where(scope, ~_scored_pairs_scope(ComponentScore, stock_ids, dates))
     )
-    db.add(signal)
-    return signal
+
+
+def _target_scope(
+    model: type[Signal] | type[ComponentScore],
+    target_date: date,
+    failed_stock_ids: list[int],
+    stock_ids: Collection[int] | None,
+) -> ColumnElement[bool]:
+    """判定対象のうち、スコア計算に失敗した銘柄以外の同日の行を表す条件"""
+    scope = and_(model.date == target_date, model.stock_id != all_(literal(failed_stock_ids, ARRAY(Integer))))
+    if stock_ids is not None:
+        scope = and_(scope, model.stock_id == any_(literal(sorted(stock_ids), ARRAY(Integer))))
+    return scope
 
 
 async def detect_all_signals(
     db: AsyncSession,
     target_date: date | None = None,
+    stock_ids: Collection[int] | None = None,
+    workers: int | None = None,
+    failed_ids: set[int] | None = None,
 ) -> tuple[int, int, list[str]]:
     """全銘柄のシグナルを検出する
 
+    stock_ids を指定した場合はその銘柄（前回以降に入力が変わった銘柄など）だけを再判定し、
+    それ以外の銘柄の同日シグナルはそのまま残す。
+    入力は対象銘柄分をテーブルごとに1クエリで先読みする。
+    DBからの入力取得とシグナルの保存はイベントループ上で行い、スコア計算は
+    analysis_chunk_size 銘柄ずつ配列にまとめて analysis_workers のプロセスプールで実行する。
+    スコアは配列演算で一括計算し、根拠の文字列は閾値を超えた銘柄についてだけ生成する。
+    重みを変えた再ランキング（rerank）用に、全対象銘柄の項目別スコアも保存する。
+
+    Args:
+        workers: スコア計算のワーカープロセス数（未指定時は設定値 analysis_workers。少数の銘柄では1を指定する）
+        failed_ids: 指定時はエラーになった銘柄IDを追加する
+
     Returns:
         (成功件数, エラー件数, エラー詳細リスト)
     """
-    result = await db.execute(select(Stock).where(Stock.is_active.is_(True)))
+    if target_date is None:
+        target_date = date.today()
+    if stock_ids is not None and not stock_ids:
+        logger.info("入力が変わった銘柄がないため、シグナル検出をスキップ")
+        return 0, 0, []
+
+    result = await db.execute(select(Stock).where(_target_stock_filter(stock_ids)))
     stocks = result.scalars().all()
 
     success_count = 0
     error_count = 0
     errors: list[str] = []
 
-    for stock in stocks:
-        try:
-            signal = await detect_stock_signal(db, stock, target_date)
-            if signal:
-                success_count += 1
-                logger.info(
-                    f"シグナル検出: {stock.code} - {signal.signal_type} (スコア: {signal.score})"
-                )
-        except Exception as e:
-            error_count += 1
-            error_msg = f"{stock.code}: {str(e)}"
+    # スコア計算の入力を取得（テーブルごとに1クエリ）
+    targets = await prefetch_signal_inputs(db, list(stocks), target_date, stock_ids)
+    logger.info(f"シグナル検出対象: {len(targets)}/{len(stocks)}銘柄")
+
+    # スコア計算（重みは対象日に有効なもの）
+    weights = await load_scoring_weights(db, target_date)
+    chunk_size = max(1, get_settings().analysis_chunk_size)
+    chunks = [targets[i:i + chunk_size] for i in range(0, len(targets), chunk_size)]
+    async with analysis_pool(workers) as pool:
+        chunk_results = await asyncio.gather(
+            *(pool.run(score_signal_candidates, *_pack_targets(chunk), weights) for chunk in chunks),
+            return_exceptions=True,
+        )
+
+    # シグナルを保存
+    rows: list[dict[str, Any]] = []
+    failed_stock_ids: list[int] = []
+    scored_stock_ids: list[int] = []
+    scored_components: list[np.ndarray] = []
+    for chunk, chunk_result in zip(chunks, chunk_results, strict=True):
+        if isinstance(chunk_result, Exception):
+            error_count += len(chunk)
+            failed_stock_ids.extend(t[0].id for t in chunk)
+            error_msg = f"{chunk[0][0].code}〜{chunk[-1][0].code}: {str(chunk_result)}"
             errors.append(error_msg)
             logger.error(f"シグナル検出エラー: {error_msg}")
+            continue
+        candidates, components = chunk_result
+        scored_stock_ids.extend(t[0].id for t in chunk)
+        scored_components.append(components)
+        for index, score_result in candidates:
+            stock = chunk[index][0]
+            row = _build_signal_row(stock.id, target_date, score_result)
+            if row is None:
+                continue
+            rows.append(row)
+            success_count += 1
+            logger.info(
+                f"シグナル検出: {stock.code} - {row['signal_type']} (スコア: {row['score']})"
+            )
+
+    # 判定対象のうち、スコア計算に失敗した銘柄以外の同日シグナルを置き換える
+    await replace_signals(db, rows, _target_scope(Signal, target_date, failed_stock_ids, stock_ids))
 
+    # 重みを変えた再ランキング用に、全対象銘柄の項目別スコアを同じ範囲で置き換える
+    await save_component_scores(
+        db,
+        scored_stock_ids,
+        [target_date] * len(scored_stock_ids),
+        np.concatenate(scored_components) if scored_components else np.empty((0, len(COMPONENT_NAMES))),
+        _target_scope(ComponentScore, target_date, failed_stock_ids, stock_ids),
+    )
     await db.commit()
+    invalidate_rerank_cache(target_date)
+    if failed_ids is not None:
+        failed_ids.update(failed_stock_ids)
+    return success_count, error_count, errors
+
+
+def backfill_date_chunks(start_date: date, end_date: date, chunk_days: int) -> list[tuple[date, date]]:
+    """期間を chunk_days 日（暦日）ごとの (開始日, 終了日) に分割する（純粋関数）"""
+    chunk_days = max(1, chunk_days)
+    chunks = []
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def _rows_frame(rows: list, columns: list[str]) -> pd.DataFrame:
+    """クエリ結果の行を、数値列をfloat（NULLはNaN）にしたDataFrameに変換する"""
+    frame = pd.DataFrame([tuple(getattr(row, c) for c in columns) for row in rows], columns=columns)
+    frame["stock_id"] = frame["stock_id"].astype("int64")
+    frame["date"] = pd.to_datetime(frame["date"])
+    value_columns = columns[2:]
+    frame[value_columns] = frame[value_columns].astype(float)
+    return frame
+
+
+async def load_backfill_frame(db: AsyncSession, chunk_start: date, chunk_end: date) -> pd.DataFrame:
+    """期間内の (銘柄, 日付) ごとのスコア計算入力を1つのDataFrameにまとめる
+
+    指標と株価は同じ日付の行を結合し、ファンダメンタルは各日付時点で最新の行を
+    as-of 結合（merge_asof）で対応付ける。期間開始前の最新のファンダメンタルも含めて読み込む。
+
+    Returns:
+        stock_id, date, INDICATOR_FIELDS, close, volume, FUNDAMENTAL_FIELDS の列を持つDataFrame（日付・銘柄順）
+    """
+    active = select(Stock.id).where(_target_stock_filter())
+
+    async def _range_rows(model: type, columns: tuple[str, ...]) -> list:
+        result = await db.execute(
+            select(model.stock_id, model.date, *(getattr(model, c) for c in columns))
+            .where(model.stock_id.in_(active), model.date.between(chunk_start, chunk_end))
+        )
+        return result.all()
+
+    indicator_columns = ["stock_id", "date", *INDICATOR_FIELDS]
+    price_columns = ["stock_id", "date", "close", "volume"]
+    fundamental_columns = ["stock_id", "date", *FUNDAMENTAL_FIELDS]
+
+    frame = _rows_frame(await _range_rows(TechnicalIndicator, INDICATOR_FIELDS), indicator_columns).merge(
+        _rows_frame(await _range_rows(StockPrice, ("close", "volume")), price_columns),
+        on=["stock_id", "date"],
+    )
+    earlier = await fetch_latest_rows(db, FundamentalData, FUNDAMENTAL_FIELDS, chunk_start - timedelta(days=1))
+    fundamentals = _rows_frame(
+        [*earlier.values(), *await _range_rows(FundamentalData, FUNDAMENTAL_FIELDS)], fundamental_columns
+    )
+
+    merged = pd.merge_asof(
+        frame.sort_values("date"),
+        fundamentals.sort_values("date"),
+        on="date",
+        by="stock_id",
+        direction="backward",
+    )
+    return merged.sort_values(["date", "stock_id"], ignore_index=True)
+
+
+async def _backfill_chunk(
+    db: AsyncSession,
+    pool: AnalysisPool,
+    chunk_start: date,
+    chunk_end: date,
+    fingerprint: str,
+    schedule: WeightSchedule,
+) -> int:
+    """1チャンク分のシグナル・項目別スコアを再計算して書き込み、チェックポイントを記録する"""
+    frame = await load_backfill_frame(db, chunk_start, chunk_end)
+    stock_ids = frame["stock_id"].tolist()
+    dates = frame["date"].dt.date.tolist()
+    indicator_values = frame[list(INDICATOR_FIELDS)].to_numpy(dtype=float)
+    fundamental_values = frame[list(FUNDAMENTAL_FIELDS)].to_numpy(dtype=float)
+    close_prices = frame["close"].to_numpy(dtype=float)
+    volumes = frame["volume"].to_numpy(dtype=float)
+
+    # スコア計算（同じ重みが続く期間ごとに、analysis_chunk_size 行ずつプロセスプールで実行）
+    size = max(1, get_settings().analysis_chunk_size)
+    frame_dates = frame["date"].to_numpy(dtype="datetime64[D]")
+    batches = []
+    for segment_start, segment_end, weights in schedule.segments(chunk_start, chunk_end):
+        first = int(np.searchsorted(frame_dates, np.datetime64(segment_start), "left"))
+        last = int(np.searchsorted(frame_dates, np.datetime64(segment_end), "right"))
+        batches.extend((i, min(i + size, last), weights) for i in range(first, last, size))
+    offsets = [i for i, _, _ in batches]
+    chunk_results = await asyncio.gather(*(
+        pool.run(
+            score_signal_candidates,
+            indicator_values[i:j],
+            fundamental_values[i:j],
+            close_prices[i:j],
+            volumes[i:j],
+            weights,
+        )
+        for i, j, weights in batches
+    ))
+
+    rows: list[dict[str, Any]] = []
+    components: list[np.ndarray] = []
+    for offset, (candidates, chunk_components) in zip(offsets, chunk_results, strict=True):
+        components.append(chunk_components)
+        for index, score_result in candidates:
+            row = _build_signal_row(stock_ids[offset + index], dates[offset + index], score_result)
+            if row is not None:
+                rows.append(row)
+
+    if stock_ids:
+        await replace_signals(db, rows, _scored_pairs_scope(Signal, stock_ids, dates))
+        await save_component_scores(
+            db, stock_ids, dates, np.concatenate(components), _scored_pairs_scope(ComponentScore, stock_ids, dates)
+        )
+
+    values = {
+        "chunk_end": chunk_end, "fingerprint": fingerprint, "signal_count": len(rows), "completed_at": func.now(),
+    }
+    stmt = pg_insert(SignalBackfillCheckpoint).values(chunk_start=chunk_start, **values)
+    await db.execute(stmt.on_conflict_do_update(index_elements=["chunk_start"], set_=values))
+    logger.info(
+        f"シグナルバックフィル: {chunk_start} ~ {chunk_end} - {len(frame)}行, シグナル{len(rows)}件"
+    )
+    return len(rows)
+
+
+def _chunk_fingerprint(schedule: WeightSchedule, chunk_start: date, chunk_end: date) -> str:
+    """チャンク内で使う閾値・重みのハッシュ（チェックポイントの照合用）"""
+    parts = [signal_rules_fingerprint(weights) for _, _, weights in schedule.segments(chunk_start, chunk_end)]
+    if len(parts) == 1:
+        return parts[0]
+    return hashlib.sha256("".join(parts).encode()).hexdigest()
+
+
+async def backfill_signals(
+    db: AsyncSession,
+    start_date: date,
+    end_date: date,
+    chunk_days: int | None = None,
+    restart: bool = False,
+) -> tuple[int, int, list[str]]:
+    """期間内の全銘柄・全営業日のシグナルを再計算する（閾値・重みを変えた後の履歴作成用）
+
+    chunk_days 日ごとに指標・株価・ファンダメンタルをテーブルごとに一括で読み込み、配列演算で
+    まとめてスコアリングして、シグナル（冪等なUPSERT＋不要分の削除）と項目別スコアを一括で書き込む。
+    チャンクごとにコミットしてチェックポイントを記録するため、中断した場合は同じ引数で再実行すると
+    完了済みのチャンクを飛ばして再開する。閾値・重みを変えた場合は全チャンクを計算し直す。
+    ウォークフォワードの重みを使う設定の場合は、日付ごとにその日に有効な重みでスコアリングする。
+    シグナルは指標と株価がその日に存在する (銘柄, 日付) について作成する。
+
+    Args:
+        chunk_days: 1チャンクの日数（未指定時は設定値 signal_backfill_chunk_days）
+        restart: Trueの場合、チェックポイントを無視して全チャンクを計算し直す
+
+    Returns:
+        (書き込んだシグナル件数, エラーになったチャンク数, エラー詳細リスト)
+    """
+    if chunk_days is None:
+        chunk_days = get_settings().signal_backfill_chunk_days
+    schedule = await load_weight_schedule(db)
+    chunks = backfill_date_chunks(start_date, end_date, chunk_days)
+    fingerprints = {chunk: _chunk_fingerprint(schedule, *chunk) for chunk in chunks}
+
+    completed: set[tuple[date, date]] = set()
+    if not restart:
+        result = await db.execute(
+            select(
+                SignalBackfillCheckpoint.chunk_start,
+                SignalBackfillCheckpoint.chunk_end,
+                SignalBackfillCheckpoint.fingerprint,
+            )
+            .where(SignalBackfillCheckpoint.chunk_start.between(start_date, end_date))
+        )
+        completed = {
+            (row.chunk_start, row.chunk_end) for row in result.all()
+            if fingerprints.get((row.chunk_start, row.chunk_end)) == row.fingerprint
+        }
+    logger.info(
+        f"シグナルバックフィル開始: {start_date} ~ {end_date} / {len(chunks)}チャンク"
+        f"（完了済み{sum(chunk in completed for chunk in chunks)}チャンクはスキップ）"
+    )
+
+    success_count = 0
+    error_count = 0
+    errors: list[str] = []
+
+    async with analysis_pool() as pool:
+        for chunk_start, chunk_end in chunks:
+            if (chunk_start, chunk_end) in completed:
+                continue
+            try:
+                success_count += await _backfill_chunk(
+                    db, pool, chunk_start, chunk_end, fingerprints[(chunk_start, chunk_end)], schedule
+                )
+                await db.commit()
+                for offset in range((chunk_end - chunk_start).days + 1):
+                    invalidate_rerank_cache(chunk_start + timedelta(days=offset))
+            except Exception as e:
+                await db.rollback()
+                error_count += 1
+                error_msg = f"{chunk_start} ~ {chunk_end}: {str(e)}"
+                errors.append(error_msg)
+                logger.error(f"シグナルバックフィルエラー: {error_msg}")
+
     return success_count, error_count, errors
@@ -0,0 +1,341 @@
+"""パラメータスイープモジュール
+
+シグナルの閾値（BUY_THRESHOLD / SELL_THRESHOLD）・重み（DEFAULT_WEIGHTS）と売買プランの利確率・損切り率の
+組み合わせを、保存済みの項目別スコア（component_scores）と株価の履歴でバックテストして評価する。
+入力のパネル（項目別スコア・OHLC・SMA25）は一度だけ読み込んで共有メモリに置き、
+プロセスプールの各ワーカーはハンドルで参照するため、組み合わせごとに配列をpickleしない。
+結果は指定した目的関数の降順に並べたリーダーボードとして返す。
+"""
+
+import asyncio
+import logging
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field, replace
+from datetime import date
+
+import numpy as np
+from sqlalchemy import Integer, any_, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.analysis.backtest import (
+    BacktestConfig,
+    BacktestReport,
+    OHLCPanel,
+    SignalTrades,
+    load_ohlc_panel,
+    simulate_trades,
+    summarize_backtest,
+)
+from app.analysis.parallel import SharedArrayHandle, SharedArrays, analysis_pool, attach_shared_arrays
+from app.analysis.scoring import (
+    COMPONENT_NAMES,
+    DEFAULT_WEIGHTS,
+    combine_component_scores,
+    round_scores,
+    validate_weights,
+)
+from app.analysis.signal_detector import BUY_THRESHOLD, SELL_THRESHOLD
+from app.analysis.trade_planner import DEFAULT_STOP_LOSS_RATE, DEFAULT_TAKE_PROFIT_RATES
+from app.config import get_settings
+from app.models.signal import ComponentScore
+from app.models.technical import TechnicalIndicator
+
+logger = logging.getLogger(__name__)
+
+# 総合スコアを計算する銘柄数（重み付けの一時配列を抑える）
+SCORE_BLOCK_ROWS = 500
+
+
+def _sharpe_ratio(report: BacktestReport) -> float:
+    """評価額の日次リターンから計算した年率シャープレシオ"""
+    equity = np.asarray(report.equity)
+    if len(equity) < 2:
+        return 0.0
+    returns = np.diff(equity) / equity[:-1]
+    std = returns.std()
+    return float(returns.mean() / std * np.sqrt(252)) if std > 0 else 0.0
+
+
+# 目的関数（大きいほど良い）
+OBJECTIVES: dict[str, Callable[[BacktestReport], float]] = {
+    "total_return": lambda report: report.total_return,
+    "average_return": lambda report: report.average_return,
+    "win_rate": lambda report: report.win_rate,
+    "sharpe": _sharpe_ratio,
+    "return_over_drawdown": lambda report: report.total_return / max(report.max_drawdown, 1e-9),
+}
+
+
+@dataclass(frozen=True)
+class SweepParams:
+    """評価するパラメータの1組"""
+    buy_threshold: float = BUY_THRESHOLD
+    sell_threshold: float = SELL_THRESHOLD
+    weights: dict[str, float] = field(default_factory=lambda: dict(DEFAULT_WEIGHTS))
+    take_profit_rates: tuple[float, ...] = tuple(DEFAULT_TAKE_PROFIT_RATES)
+    stop_loss_rate: float = DEFAULT_STOP_LOSS_RATE
+
+
+@dataclass(frozen=True)
+class SweepSpace:
+    """パラメータごとの候補（全組み合わせがグリッドになる）"""
+    buy_thresholds: list[float] = field(default_factory=lambda: [BUY_THRESHOLD])
+    sell_thresholds: list[float] = field(default_factory=lambda: [SELL_THRESHOLD])
+    weights: list[dict[str, float]] = field(default_factory=lambda: [dict(DEFAULT_WEIGHTS)])
+    take_profit_rates: list[tuple[float, ...]] = field(default_factory=lambda: [tuple(DEFAULT_TAKE_PROFIT_RATES)])
+    stop_loss_rates: list[float] = field(default_factory=lambda: [DEFAULT_STOP_LOSS_RATE])
+
+    def size(self) -> int:
+        return (
+            len(self.buy_thresholds) * len(self.sell_thresholds) * len(self.weights)
+            * len(self.take_profit_rates) * len(self.stop_loss_rates)
+        )
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    """1組のパラメータの評価結果（リーダーボードの1行）"""
+    rank: int
+    params: SweepParams
+    # 約定件数が min_trades に満たない場合はNone
+    objective: float | None
+    signals: int
+    filled: int
+    win_rate: float
+    average_return: float
+    total_return: float
+    max_drawdown: float
+    target_hit_rates: list[float]
+    stop_loss_hit_rate: float
+
+
+def expand_space(space: SweepSpace, samples: int | None = None, seed: int = 0) -> list[SweepParams]:
+    """候補の全組み合わせ（samples 指定時はその中から重複なく無作為に samples 組）を作る
+
+    Raises:
+        ValueError: 重みが validate_weights の条件を満たさない場合
+    """
+    axes = (
+        space.buy_thresholds, space.sell_thresholds, space.weights, space.take_profit_rates, space.stop_loss_rates,
+    )
+    total = space.size()
+    if samples is None or samples >= total:
+        picks = range(total)
+    else:
+        picks = sorted(np.random.default_rng(seed).choice(total, size=samples, replace=False).tolist())
+
+    params = []
+    for index in picks:
+        # 組み合わせの番号を各候補の位置に分解する（itertools.product と同じ順序）
+        choice = []
+        for axis in reversed(axes):
+            index, position = divmod(index, len(axis))
+            choice.append(axis[position])
+        buy, sell, weights, take_profit, stop_loss = reversed(choice)
+        params.append(SweepParams(buy, sell, validate_weights(weights), tuple(take_profit), stop_loss))
+    return params
+
+
+def _threshold_mask(total: np.ndarray, threshold: float, above: bool) -> np.ndarray:
+    """round_scores で丸めた総合スコアが閾値以上（above=False は以下）の要素
+
+    丸めで判定が変わり得る閾値の前後0.01以内の要素だけを組み込みround()で丸め直す。
+    """
+    mask = total >= threshold if above else total <= threshold
+    near = np.abs(total - threshold) <= 0.01
+    if near.any():
+        rounded = round_scores(total[near])
+        mask[near] = rounded >= threshold if above else rounded <= threshold
+    return mask
+
+
+def evaluate_params(
+    handles: dict[str, SharedArrayHandle],
+    params: SweepParams,
+    base_config: BacktestConfig,
+    start_date: date,
+    end_date: date,
+) -> BacktestReport:
+    """共有メモリ上のパネルで1組のパラメータをバックテストする（ワーカープロセスで実行する）
+
+    シグナル・約定・決済には start_date ~ end_date の列だけを使う（期間後の株価は参照しない）。
+    """
+    arrays = attach_shared_arrays(handles)
+    dates = arrays["dates"]
+    period = slice(
+        int(np.searchsorted(dates, np.datetime64(start_date), "left")),
+        int(np.searchsorted(dates, np.datetime64(end_date), "right")),
+    )
+    panel = OHLCPanel(
+        stock_ids=arrays["stock_ids"],
+        dates=dates[period],
+        open=arrays["open"][:, period],
+        high=arrays["high"][:, period],
+        low=arrays["low"][:, period],
+        close=arrays["close"][:, period],
+    )
+    components = arrays["components"][:, period]
+    scored = components[..., 0] >= 0
+
+    buy = np.zeros(scored.shape, dtype=bool)
+    sell = np.zeros(scored.shape, dtype=bool)
+    for start in range(0, len(components), SCORE_BLOCK_ROWS):
+        block = components[start:start + SCORE_BLOCK_ROWS].astype(np.float64)
+        total, _, _ = combine_component_scores(
+            {name: block[..., j] for j, name in enumerate(COMPONENT_NAMES)}, params.weights
+        )
+        rows = slice(start, start + SCORE_BLOCK_ROWS)
+        buy[rows] = _threshold_mask(total, params.buy_threshold, above=True)
+        # determine_signal_type と同じく買いの判定を優先する
+        sell[rows] = ~buy[rows] & _threshold_mask(total, params.sell_threshold, above=False)
+    buy &= scored
+    sell &= scored
+
+    rows, cols = np.nonzero(buy)
+    trades = SignalTrades(
+        stock_ids=panel.stock_ids[rows],
+        signal_dates=panel.dates[cols],
+        close_price=panel.close[rows, cols],
+        sma_25=arrays["sma_25"][:, period][rows, cols],
+    )
+    config = replace(base_config, take_profit_rates=params.take_profit_rates, stop_loss_rate=params.stop_loss_rate)
+    results = simulate_trades(panel, trades, config, sell_signals=sell)
+    return summarize_backtest(panel, results, config, start_date, end_date)
+
+
+async def load_sweep_panels(db: AsyncSession, start_date: date, end_date: date) -> dict[str, np.ndarray]:
+    """期間内の項目別スコア・OHLC・SMA25を銘柄 × 営業日のパネルに読み込む
+
+    項目別スコアがない (銘柄, 日付) は components を-1で埋める。
+    """
+    score_rows = (await db.execute(
+        select(ComponentScore.stock_id, ComponentScore.date, ComponentScore.components)
+        .where(ComponentScore.date.between(start_date, end_date))
+    )).all()
+    stock_ids = sorted({row.stock_id for row in score_rows})
+    panel = await load_ohlc_panel(db, stock_ids, start_date, end_date)
+    shape = (len(panel.stock_ids), len(panel.dates))
+
+    def _positions(ids: list[int], dates: list[date]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """パネル上の行・列と、パネルに含まれるかどうか"""
+        ids_array = np.asarray(ids, dtype=np.int64)
+        dates_array = np.asarray(dates, dtype="datetime64[D]")
+        rows = np.minimum(np.searchsorted(panel.stock_ids, ids_array), max(shape[0] - 1, 0))
+        cols = np.minimum(np.searchsorted(panel.dates, dates_array), max(shape[1] - 1, 0))
+        found = np.zeros(len(ids_array), dtype=bool)
+        if shape[0] and shape[1]:
+            found = (panel.stock_ids[rows] == ids_array) & (panel.dates[cols] == dates_array)
+        return rows[found], cols[found], found
+
+    components = np.full((*shape, len(COMPONENT_NAMES)), -1, dtype=np.int16)
+    rows, cols, found = _positions([row.stock_id for row in score_rows], [row.date for row in score_rows])
+    if found.any():
+        values = np.array([row.components for row, hit in zip(score_rows, found, strict=True) if hit], dtype=np.int16)
+        components[rows, cols] = values
+
+    sma_rows = (await db.execute(
+        select(TechnicalIndicator.stock_id, TechnicalIndicator.date, TechnicalIndicator.sma_25)
+        .where(
+            TechnicalIndicator.stock_id == any_(literal(stock_ids, ARRAY(Integer))),
+            TechnicalIndicator.date.between(start_date, end_date),
+            TechnicalIndicator.sma_25.is_not(None),
+        )
+    )).all()
+    sma_25 = np.full(shape, np.nan)
+    rows, cols, found = _positions([row.stock_id for row in sma_rows], [row.date for row in sma_rows])
+    sma_25[rows, cols] = np.array([float(row.sma_25) for row in sma_rows], dtype=np.float64)[found]
+
+    return {
+        "stock_ids": panel.stock_ids,
+        "dates": panel.dates,
+        "open": panel.open,
+        "high": panel.high,
+        "low": panel.low,
+        "close": panel.close,
+        "sma_25": sma_25,
+        "components": components,
+    }
+
+
+def build_leaderboard(
+    params: list[SweepParams],
+    reports: list[BacktestReport],
+    objective: str,
+    min_trades: int = 0,
+) -> list[SweepResult]:
+    """目的関数の降順に並べる（約定が min_trades 件未満の組み合わせは末尾）"""
+    scorer = OBJECTIVES[objective]
+    values = [scorer(report) if report.filled >= min_trades else None for report in reports]
+    order = sorted(range(len(params)), key=lambda i: (values[i] is None, -(values[i] or 0.0)))
+    return [
+        SweepResult(
+            rank=rank,
+            params=params[i],
+            objective=values[i],
+            signals=reports[i].signals,
+            filled=reports[i].filled,
+            win_rate=reports[i].win_rate,
+            average_return=reports[i].average_return,
+            total_return=reports[i].total_return,
+            max_drawdown=reports[i].max_drawdown,
+            target_hit_rates=reports[i].target_hit_rates,
+            stop_loss_hit_rate=reports[i].stop_loss_rate,
+        )
+        for rank, i in enumerate(order, start=1)
+    ]
+
+
+async def run_sweep(
+    db: AsyncSession,
+    start_date: date,
+    end_date: date,
+    space: SweepSpace,
+    objective: str = "total_return",
+    samples: int | None = None,
+    seed: int = 0,
+    min_trades: int = 0,
+    base_config: BacktestConfig | None = None,
+    workers: int | None = None,
+) -> list[SweepResult]:
+    """パラメータの組み合わせを評価してリーダーボードを返す
+
+    Args:
+        space: パラメータごとの候補
+        objective: 並べ替えに使う目的関数（OBJECTIVES のキー）
+        samples: 指定時は全組み合わせから無作為に抽出して評価する組数
+        seed: 無作為抽出の乱数シード
+        min_trades: 約定がこの件数未満の組み合わせはリーダーボードの末尾に置く
+        base_config: 利確率・損切り率以外のバックテスト条件
+        workers: ワーカープロセス数（未指定時は設定値 analysis_workers）
+
+    Raises:
+        ValueError: 目的関数が不明、または組み合わせ数が sweep_max_combinations を超える場合
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"目的関数は次のいずれかを指定してください: {', '.join(OBJECTIVES)}")
+    # 組み合わせを展開する前に件数を確認する（巨大なグリッドをメモリ上に作らない）
+    count = space.size() if samples is None else min(samples, space.size())
+    limit = get_settings().sweep_max_combinations
+    if count > limit:
+        raise ValueError(f"組み合わせ数 {count} が上限 {limit} を超えています（samples で絞り込んでください）")
+    params = expand_space(space, samples, seed)
+    base_config = base_config or BacktestConfig()
+
+    arrays = await load_sweep_panels(db, start_date, end_date)
+    logger.info(
+        f"パラメータスイープ開始: {start_date} ~ {end_date} / {len(params)}組 / "
+        f"{arrays['components'].shape[0]}銘柄 × {arrays['components'].shape[1]}日"
+    )
+    with SharedArrays(arrays) as shared:
+        del arrays
+        async with analysis_pool(workers) as pool:
+            reports = await asyncio.gather(*(
+                pool.run(evaluate_params, shared.handles, p, base_config, start_date, end_date) for p in params
+            ))
+
+    leaderboard = build_leaderboard(params, reports, objective, min_trades)
+    if leaderboard and leaderboard[0].objective is not None:
+        best = leaderboard[0]
+        logger.info(f"パラメータスイープ完了: 最良 {objective}={best.objective:.4f} {asdict(best.params)}")
+    return leaderboard
@@ -1,76 +1,80 @@
 """テクニカル指標計算モジュール
 
 pandasのrolling/ewm関数を使用して各種テクニカル指標を計算し、DBに格納する。
+指標の定義は app.analysis.indicators のレジストリにある。
 （pandas-taはDocker ARM環境でSIGILLを起こすため不使用）
 """
 
+import asyncio
 import logging
+from collections import deque
+from collections.abc import Collection
 from datetime import date
 from decimal import Decimal
 
 import numpy as np
 import pandas as pd
-from sqlalchemy import select
+from sqlalchemy import Integer, any_, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.analysis.incremental import (
+    IndicatorState,
+    build_indicator_state,
+    restore_indicator_state,
+    update_technical_indicators,
+)
+from app.analysis.indicators import compute_indicators, persisted_indicators, required_history
+from app.analysis.parallel import analysis_pool
+from app.analysis.technical_panel import (
+    build_price_panel,
+    calculate_panel_indicators,
+    panel_indicator_states,
+    split_panel_indicators,
+)
+from app.bulk_ingest import copy_upsert_records
+from app.change_tracking import mark_stocks_changed
+from app.config import get_settings
 from app.models.stock import Stock, StockPrice
-from app.models.technical import TechnicalIndicator
+from app.models.technical import TechnicalIndicator, TechnicalIndicatorState
 
 logger = logging.getLogger(__name__)
 
 
-def _to_decimal(value, precision: int = 2) -> Decimal | None:
-    """NaN安全にDecimalへ変換する"""
-    if pd.isna(value):
-        return None
-    return Decimal(str(round(float(value), precision)))
-
-
-def _to_int(value) -> int | None:
-    """NaN安全にintへ変換する"""
-    if pd.isna(value):
-        return None
-    return int(float(value))
-
-
-def _calc_rsi(close: pd.Series, length: int = 14) -> pd.Series:
-    """RSIを計算する"""
-    delta = close.diff()
-    gain = delta.where(delta > 0, 0.0)
-    loss = (-delta).where(delta < 0, 0.0)
-    avg_gain = gain.ewm(alpha=1 / length, min_periods=length).mean()
-    avg_loss = loss.ewm(alpha=1 / length, min_periods=length).mean()
-    rs = avg_gain / avg_loss
-    return 100 - (100 / (1 + rs))
-
-
-def _calc_macd(
-    close: pd.Series,
-    fast: int = 12,
-    slow: int = 26,
-    signal: int = 9,
-) -> tuple[pd.Series, pd.Series, pd.Series]:
-    """MACD（ライン、シグナル、ヒストグラム）を計算する"""
-    ema_fast = close.ewm(span=fast, adjust=False).mean()
-    ema_slow = close.ewm(span=slow, adjust=False).mean()
-    macd_line = ema_fast - ema_slow
-    macd_signal = macd_line.ewm(span=signal, adjust=False).mean()
-    macd_histogram = macd_line - macd_signal
-    return macd_line, macd_signal, macd_histogram
-
-
-def _calc_bollinger_bands(
-    close: pd.Series,
-    length: int = 20,
-    std_dev: float = 2.0,
-) -> tuple[pd.Series, pd.Series, pd.Series]:
-    """ボリンジャーバンド（上限、中央、下限）を計算する"""
-    middle = close.rolling(window=length).mean()
-    std = close.rolling(window=length).std()
-    upper = middle + std_dev * std
-    lower = middle - std_dev * std
-    return upper, middle, lower
+# DB格納時の丸め桁数（Noneは整数列）
+INDICATOR_PRECISION: dict[str, int | None] = {spec.name: spec.precision for spec in persisted_indicators()}
+
+
+def _round_column(values: np.ndarray, precision: int) -> np.ndarray:
+    """配列を組み込みround()と同じ結果になるよう丸める
+
+    np.roundは10^n倍してから丸めるため、ちょうど中間付近の値で組み込みround()
+    （正確な2進値に対する最近接丸め）と結果が異なる場合がある。該当する要素だけ組み込みround()で計算し直す。
+    """
+    rounded = np.round(values, precision)
+    with np.errstate(invalid="ignore", over="ignore"):
+        scaled = values * 10.0**precision
+        distance = np.abs(scaled - np.floor(scaled) - 0.5)
+        suspect = (distance <= 1e-9 + np.abs(scaled) * 1e-12) | (np.abs(scaled) >= 2.0**52)
+    for i in np.flatnonzero(suspect & np.isfinite(values)):
+        rounded[i] = round(float(values[i]), precision)
+    return rounded
+
+
+def _decimal_column(values: np.ndarray, precision: int = 2) -> list[Decimal | None]:
+    """NaN安全に列単位でDecimalのリストへ変換する"""
+    values = np.asarray(values, dtype=float)
+    result: list[Decimal | None] = list(map(Decimal, map(str, _round_column(values, precision).tolist())))
+    for i in np.flatnonzero(np.isnan(values)):
+        result[i] = None
+    return result
+
+
+def _int_column(values: np.ndarray) -> list[int | None]:
+    """NaN安全に列単位でintのリストへ変換する"""
+    values = np.asarray(values, dtype=float)
+    return [None if v != v else int(v) for v in values.tolist()]
 
 
 def calculate_technical_indicators(df: pd.DataFrame) -> pd.DataFrame:
@@ -80,99 +84,191 @@ def calculate_technical_indicators(df: pd.DataFrame) -> pd.DataFrame:
         df: 株価データ（columns: open, high, low, close, volume, date）
 
     Returns:
-        テクニカル指標を追加したDataFrame
+        DBに格納する全指標の列を追加したDataFrame
     """
     if df.empty or len(df) < 26:
         return pd.DataFrame()
 
     result = df.copy()
-    close = result["close"]
-
-    # SMA（単純移動平均線）
-    result["sma_5"] = close.rolling(window=5).mean()
-    result["sma_25"] = close.rolling(window=25).mean()
-    result["sma_75"] = close.rolling(window=75).mean()
-    result["sma_200"] = close.rolling(window=200).mean()
-
-    # EMA（指数移動平均線）
-    result["ema_12"] = close.ewm(span=12, adjust=False).mean()
-    result["ema_26"] = close.ewm(span=26, adjust=False).mean()
-
-    # RSI
-    result["rsi_14"] = _calc_rsi(close, 14)
-
-    # MACD
-    macd_line, macd_signal, macd_histogram = _calc_macd(close, 12, 26, 9)
-    result["macd_line"] = macd_line
-    result["macd_signal"] = macd_signal
-    result["macd_histogram"] = macd_histogram
-
-    # ボリンジャーバンド
-    bb_upper, bb_middle, bb_lower = _calc_bollinger_bands(close, 20, 2.0)
-    result["bb_upper_2"] = bb_upper
-    result["bb_middle"] = bb_middle
-    result["bb_lower_2"] = bb_lower
-
-    # 出来高SMA
-    result["volume_sma_25"] = result["volume"].astype(float).rolling(window=25).mean()
-
+    indicators = compute_indicators(result, INDICATOR_PRECISION)
+    for name in INDICATOR_PRECISION:
+        result[name] = indicators[name]
     return result
 
 
 def transform_to_indicator_records(
     df: pd.DataFrame,
-    stock_id: int,
+    stock_id: int | None = None,
 ) -> list[dict]:
-    """計算結果をDB挿入用のレコードリストに変換する"""
+    """計算結果をDB挿入用のレコードリストに変換する
+
+    行ごとのSeries生成を避け、列単位で丸め・NaNマスクしてから1パスでレコードを組み立てる。
+    stock_idを省略した場合は、複数銘柄分の計算結果としてdfのstock_id列を使う。
+    """
     if df.empty:
         return []
 
-    records = []
-    for _, row in df.iterrows():
-        records.append({
-            "stock_id": stock_id,
-            "date": row["date"] if isinstance(row["date"], date) else row["date"].date(),
-            "sma_5": _to_decimal(row.get("sma_5")),
-            "sma_25": _to_decimal(row.get("sma_25")),
-            "sma_75": _to_decimal(row.get("sma_75")),
-            "sma_200": _to_decimal(row.get("sma_200")),
-            "ema_12": _to_decimal(row.get("ema_12")),
-            "ema_26": _to_decimal(row.get("ema_26")),
-            "rsi_14": _to_decimal(row.get("rsi_14")),
-            "macd_line": _to_decimal(row.get("macd_line"), 4),
-            "macd_signal": _to_decimal(row.get("macd_signal"), 4),
-            "macd_histogram": _to_decimal(row.get("macd_histogram"), 4),
-            "bb_upper_2": _to_decimal(row.get("bb_upper_2")),
-            "bb_middle": _to_decimal(row.get("bb_middle")),
-            "bb_lower_2": _to_decimal(row.get("bb_lower_2")),
-            "volume_sma_25": _to_int(row.get("volume_sma_25")),
-        })
-    return records
+    stock_ids = [stock_id] * len(df) if stock_id is not None else df["stock_id"].tolist()
+    dates = [d if isinstance(d, date) else d.date() for d in df["date"].tolist()]
+
+    columns: dict[str, list] = {}
+    for name, precision in INDICATOR_PRECISION.items():
+        if name not in df.columns:
+            columns[name] = [None] * len(df)
+        elif precision is None:
+            columns[name] = _int_column(df[name].to_numpy(dtype=float))
+        else:
+            columns[name] = _decimal_column(df[name].to_numpy(dtype=float), precision)
+
+    names = list(columns)
+    return [
+        {"stock_id": record_stock_id, "date": record_date, **dict(zip(names, values, strict=True))}
+        for record_stock_id, record_date, *values in zip(stock_ids, dates, *columns.values(), strict=True)
+    ]
+
+
+# PostgreSQLの1ステートメントあたりのバインドパラメータ上限
+MAX_BIND_PARAMS = 32767
 
 
 async def upsert_indicator_records(
     db: AsyncSession,
     records: list[dict],
+    batch_size: int | None = None,
+    only_changed: bool | None = None,
 ) -> int:
-    """テクニカル指標レコードをUPSERTする"""
+    """テクニカル指標レコードをUPSERTする
+
+    batch_size件ずつ multi-VALUES の1ステートメントにまとめて集合的にUPSERTする。
+    挿入・更新された行の銘柄は変更として記録する。
+
+    Args:
+        batch_size: 1ステートメントあたりの件数（未指定時は設定値。パラメータ上限で頭打ち）
+        only_changed: Trueの場合、既存行と値が異なる行のみ更新する（未指定時は設定値）
+    """
     if not records:
         return 0
 
-    for record in records:
-        stmt = pg_insert(TechnicalIndicator).values(**record)
+    settings = get_settings()
+    if batch_size is None:
+        batch_size = settings.indicator_upsert_batch_size
+    if only_changed is None:
+        only_changed = settings.indicator_upsert_only_changed
+
+    update_columns = [k for k in records[0] if k not in ("stock_id", "date")]
+    batch_size = max(1, min(batch_size, MAX_BIND_PARAMS // len(records[0])))
+    table = TechnicalIndicator.__table__
+
+    for start in range(0, len(records), batch_size):
+        stmt = pg_insert(TechnicalIndicator).values(records[start:start + batch_size])
         stmt = stmt.on_conflict_do_update(
             constraint="uq_technical_indicators_stock_date",
-            set_={k: v for k, v in record.items() if k not in ("stock_id", "date")},
+            set_={c: stmt.excluded[c] for c in update_columns},
+            # 値が変わらない行は書き換えない（不要な行バージョン・WALを抑える）
+            where=or_(*(table.c[c].is_distinct_from(stmt.excluded[c]) for c in update_columns))
+            if only_changed else None,
+        ).returning(TechnicalIndicator.stock_id)
+        result = await db.execute(stmt)
+        await mark_stocks_changed(db, result.scalars().all())
+    return len(records)
+
+
+def _prices_to_frame(prices: list[StockPrice]) -> pd.DataFrame:
+    """株価レコードを指標計算用のDataFrameに変換する"""
+    return pd.DataFrame([{
+        "date": p.date,
+        "open": float(p.open),
+        "high": float(p.high),
+        "low": float(p.low),
+        "close": float(p.close),
+        "volume": p.volume,
+    } for p in prices])
+
+
+async def load_latest_indicators(
+    db: AsyncSession,
+    stock_id: int,
+    names: list[str],
+    end_date: date | None = None,
+    rows: int = 1,
+) -> pd.DataFrame:
+    """指定した指標だけを、計算に必要な最小限の株価履歴から計算する
+
+    technical_indicators に格納しない指標（ATR等）や、任意の日付時点の値が必要な場合に使う。
+
+    Args:
+        names: 指標名（レジストリに登録済みのもの）
+        end_date: この日以前の株価で計算する（未指定時は最新まで）
+        rows: 返す直近の行数
+
+    Returns:
+        date と要求された指標の列を持つ直近rows行のDataFrame
+    """
+    query = select(StockPrice).where(StockPrice.stock_id == stock_id)
+    if end_date is not None:
+        query = query.where(StockPrice.date <= end_date)
+    result = await db.execute(
+        query.order_by(StockPrice.date.desc()).limit(required_history(names) + rows - 1)
+    )
+    prices = list(reversed(result.scalars().all()))
+    if not prices:
+        return pd.DataFrame(columns=["date", *names])
+
+    df = _prices_to_frame(prices)
+    indicators = compute_indicators(df, names)
+    return pd.concat([df[["date"]], indicators], axis=1).tail(rows).reset_index(drop=True)
+
+
+async def _store_indicator_records(db: AsyncSession, records: list[dict]) -> int:
+    """設定に応じた方式でテクニカル指標レコードを書き込む"""
+    settings = get_settings()
+    if settings.bulk_copy_enabled:
+        return await copy_upsert_records(
+            db, TechnicalIndicator, records, only_changed=settings.indicator_upsert_only_changed, mark_changed=True
+        )
+    return await upsert_indicator_records(db, records)
+
+
+async def _save_indicator_states(
+    db: AsyncSession,
+    states: list[tuple[int, date, IndicatorState]],
+) -> None:
+    """増分計算用の状態を保存する
+
+    Args:
+        states: (銘柄ID, 状態に反映済みの最終日, 状態) のリスト
+    """
+    rows = [
+        {"stock_id": stock_id, "last_date": last_date, "state": state.to_dict()}
+        for stock_id, last_date, state in states
+    ]
+    batch_size = MAX_BIND_PARAMS // 3
+    for start in range(0, len(rows), batch_size):
+        stmt = pg_insert(TechnicalIndicatorState).values(rows[start:start + batch_size])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["stock_id"],
+            set_={"last_date": stmt.excluded.last_date, "state": stmt.excluded.state, "updated_at": func.now()},
         )
         await db.execute(stmt)
-    return len(records)
 
 
 async def calculate_stock_technicals(
     db: AsyncSession,
     stock: Stock,
+    full_recompute: bool = False,
 ) -> int:
-    """個別銘柄のテクニカル指標を計算してDBに格納する"""
+    """個別銘柄のテクニカル指標を計算してDBに格納する
+
+    保存済みの計算状態があれば、前回以降の新しい日足だけから指標行を計算する（増分モード）。
+    状態がない場合や full_recompute=True の場合は全期間を再計算し、状態を作り直す。
+    状態に反映済みの日付以前の株価が挿入・更新されると、株価の書き込み時に状態が破棄され全期間を再計算する。
+    指標の定義（レジストリ）が変わる前に作った状態も使わずに全期間を再計算する。
+    """
+    state_row = None if full_recompute else await db.get(TechnicalIndicatorState, stock.id)
+    state = None if state_row is None else restore_indicator_state(state_row.state)
+    if state_row is not None and state is not None:
+        return await _calculate_stock_technicals_incremental(db, stock, state_row.last_date, state)
+
     logger.info(f"テクニカル分析開始: {stock.code}")
 
     # 株価データを取得
@@ -188,46 +284,232 @@ async def calculate_stock_technicals(
         return 0
 
     # DataFrameに変換
-    df = pd.DataFrame([{
-        "date": p.date,
-        "open": float(p.open),
-        "high": float(p.high),
-        "low": float(p.low),
-        "close": float(p.close),
-        "volume": p.volume,
-    } for p in prices])
+    df = _prices_to_frame(prices)
 
     # テクニカル指標計算
     indicators_df = calculate_technical_indicators(df)
     records = transform_to_indicator_records(indicators_df, stock.id)
-    count = await upsert_indicator_records(db, records)
+    count = await _store_indicator_records(db, records)
+
+    state = build_indicator_state(df["close"].to_numpy(dtype=float), df["volume"].to_numpy(dtype=float))
+    await _save_indicator_states(db, [(stock.id, prices[-1].date, state)])
 
     logger.info(f"テクニカル分析完了: {stock.code} - {count}件")
     return count
 
 
+async def _calculate_stock_technicals_incremental(
+    db: AsyncSession,
+    stock: Stock,
+    last_date: date,
+    state: IndicatorState,
+) -> int:
+    """保存済みの状態から新しい日足分のテクニカル指標だけを計算する
+
+    Args:
+        last_date: 状態に反映済みの最終日
+    """
+    result = await db.execute(
+        select(StockPrice)
+        .where(
+            StockPrice.stock_id == stock.id,
+            StockPrice.date > last_date,
+        )
+        .order_by(StockPrice.date.asc())
+    )
+    prices = result.scalars().all()
+    if not prices:
+        logger.info(f"テクニカル指標は最新: {stock.code}")
+        return 0
+
+    indicators_df, state = update_technical_indicators(state, _prices_to_frame(prices))
+    records = transform_to_indicator_records(indicators_df, stock.id)
+    count = await _store_indicator_records(db, records)
+    await _save_indicator_states(db, [(stock.id, prices[-1].date, state)])
+
+    logger.info(f"テクニカル分析完了（増分）: {stock.code} - {count}件")
+    return count
+
+
+def compute_panel_chunk(
+    stock_ids: np.ndarray,
+    date_ordinals: np.ndarray,
+    close: np.ndarray,
+    volume: np.ndarray,
+) -> tuple[list[dict], list[tuple[int, date, IndicatorState]]]:
+    """複数銘柄分の縦持ち株価から指標レコードと増分計算用の状態を作る（純粋関数）
+
+    ワーカープロセスで実行できるよう、引数はNumPy配列のみとする。
+
+    Args:
+        stock_ids: 銘柄ID（銘柄ID・日付の昇順）
+        date_ordinals: 日付（date.toordinal()の値）
+        close: 終値
+        volume: 出来高
+
+    Returns:
+        (指標レコード, (銘柄ID, 最終日, 状態) のリスト)
+    """
+    panel = build_price_panel(stock_ids, [date.fromordinal(d) for d in date_ordinals.tolist()], close, volume)
+    if not panel.stock_ids:
+        return [], []
+
+    indicators = calculate_panel_indicators(panel)
+    records = transform_to_indicator_records(split_panel_indicators(panel, indicators))
+
+    last_dates = [panel.dates[i] for i in (np.cumsum(panel.counts) - 1).tolist()]
+    states = panel_indicator_states(panel, indicators)
+    return records, [
+        (stock_id, last_date, states[stock_id])
+        for stock_id, last_date in zip(panel.stock_ids, last_dates, strict=True)
+        if stock_id in states
+    ]
+
+
+async def _load_price_arrays(
+    db: AsyncSession,
+    stock_ids: list[int],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """複数銘柄の株価を1クエリで取得し、縦持ちの配列（銘柄ID, 日付序数, 終値, 出来高）にする"""
+    result = await db.execute(
+        select(StockPrice.stock_id, StockPrice.date, StockPrice.close, StockPrice.volume)
+        .where(StockPrice.stock_id.in_(stock_ids))
+        .order_by(StockPrice.stock_id.asc(), StockPrice.date.asc())
+    )
+    rows = result.all()
+    return (
+        np.array([r.stock_id for r in rows], dtype=np.int64),
+        np.array([r.date.toordinal() for r in rows], dtype=np.int64),
+        np.array([float(r.close) for r in rows]),
+        np.array([r.volume for r in rows], dtype=float),
+    )
+
+
+async def _store_panel_chunk(
+    db: AsyncSession,
+    stocks: list[Stock],
+    result: tuple[list[dict], list[tuple[int, date, IndicatorState]]],
+) -> int:
+    """パネル計算の結果をDBに格納する
+
+    Returns:
+        指標を格納した銘柄数
+    """
+    records, states = result
+    count = await _store_indicator_records(db, records)
+    await _save_indicator_states(db, states)
+
+    logger.info(f"テクニカル分析完了（パネル）: {len(states)}/{len(stocks)}銘柄 - {count}件")
+    return len(states)
+
+
+async def _calculate_technicals_panel(
+    db: AsyncSession,
+    chunks: list[list[Stock]],
+    failed_ids: set[int] | None = None,
+) -> tuple[int, int, list[str]]:
+    """チャンクごとに株価を読み込み、パネル形式でまとめて計算してDBに格納する
+
+    計算は analysis_workers のプロセスプールで行い、次のチャンクの読み込みや
+    前のチャンクの書き込みと並行させる（同時に計算中のチャンクはワーカー数まで）。
+
+    Returns:
+        (成功件数, エラー件数, エラー詳細リスト)
+    """
+    success_count = 0
+    error_count = 0
+    errors: list[str] = []
+
+    def _record_error(chunk: list[Stock], e: Exception) -> None:
+        nonlocal error_count
+        error_count += len(chunk)
+        if failed_ids is not None:
+            failed_ids.update(stock.id for stock in chunk)
+        error_msg = f"{chunk[0].code}〜{chunk[-1].code}: {str(e)}"
+        errors.append(error_msg)
+        logger.error(f"テクニカル分析エラー（パネル）: {error_msg}")
+
+    async with analysis_pool() as pool:
+        in_flight: deque[tuple[list[Stock], asyncio.Future]] = deque()
+
+        async def _store_oldest() -> None:
+            nonlocal success_count
+            chunk, future = in_flight.popleft()
+            try:
+                success_count += await _store_panel_chunk(db, chunk, await future)
+            except Exception as e:
+                _record_error(chunk, e)
+
+        for chunk in chunks:
+            try:
+                arrays = await _load_price_arrays(db, [stock.id for stock in chunk])
+            except Exception as e:
+                _record_error(chunk, e)
+                continue
+            in_flight.append((chunk, asyncio.ensure_future(pool.run(compute_panel_chunk, *arrays))))
+            if len(in_flight) > pool.workers:
+                await _store_oldest()
+
+        while in_flight:
+            await _store_oldest()
+
+    return success_count, error_count, errors
+
+
 async def calculate_all_technicals(
     db: AsyncSession,
+    full_recompute: bool = False,
+    stock_ids: Collection[int] | None = None,
+    failed_ids: set[int] | None = None,
 ) -> tuple[int, int, list[str]]:
     """全銘柄のテクニカル指標を計算する
 
+    パネルモードが有効な場合、状態のない銘柄（full_recompute=True の場合は全銘柄）は
+    technical_panel_chunk_size 銘柄ずつ1クエリで読み込み、パネル形式でまとめて計算する。
+    パネル計算は analysis_workers > 1 のときプロセスプールで並列に実行する。
+
+    Args:
+        full_recompute: Trueの場合、増分計算の状態を使わず全期間を再計算する
+        stock_ids: 指定時はこの銘柄だけを計算する
+        failed_ids: 指定時はエラーになった銘柄IDを追加する
+
     Returns:
         (成功件数, エラー件数, エラー詳細リスト)
     """
-    result = await db.execute(select(Stock).where(Stock.is_active.is_(True)))
-    stocks = result.scalars().all()
+    query = select(Stock).where(Stock.is_active.is_(True))
+    if stock_ids is not None:
+        query = query.where(Stock.id == any_(literal(sorted(stock_ids), ARRAY(Integer))))
+    result = await db.execute(query)
+    stocks = list(result.scalars().all())
 
     success_count = 0
     error_count = 0
     errors: list[str] = []
 
+    settings = get_settings()
+    if settings.technical_panel_enabled:
+        if full_recompute:
+            stateful_ids: set[int] = set()
+        else:
+            state_result = await db.execute(select(TechnicalIndicatorState.stock_id))
+            stateful_ids = set(state_result.scalars().all())
+        panel_stocks = [stock for stock in stocks if stock.id not in stateful_ids]
+        stocks = [stock for stock in stocks if stock.id in stateful_ids]
+
+        chunk_size = max(1, settings.technical_panel_chunk_size)
+        success_count, error_count, errors = await _calculate_technicals_panel(
+            db, [panel_stocks[i:i + chunk_size] for i in range(0, len(panel_stocks), chunk_size)], failed_ids
+        )
+
     for stock in stocks:
         try:
-            count = await calculate_stock_technicals(db, stock)
+            count = await calculate_stock_technicals(db, stock, full_recompute)
             if count > 0:
                 success_count += 1
         except Exception as e:
             error_count += 1
+            if failed_ids is not None:
+                failed_ids.add(stock.id)
             error_msg = f"{stock.code}: {str(e)}"
             errors.append(error_msg)
             logger.error(f"テクニカル分析エラー: {error_msg}")
@@ -0,0 +1,182 @@
+"""パネル形式のテクニカル指標計算モジュール
+
+複数銘柄の株価を「日足位置 × 銘柄」の2次元配列にまとめ、pandasの2次元rolling/ewmで
+全銘柄の指標を一度に計算する（計算する指標はレジストリから incremental.indicator_plan で決める）。
+各銘柄の日足は末尾（最新日）を最終行に揃えて右詰めで配置し、
+先頭の不足分はNaNで埋める。rolling/ewmは先頭のNaNを観測値として扱わないため、
+銘柄ごとの calculate_technical_indicators と同じ値になる。
+"""
+
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from app.analysis.incremental import (
+    PLAN_SOURCES,
+    IndicatorState,
+    indicator_plan,
+    plan_signature,
+    rsi_averages,
+    rsi_ewm_weight,
+    tail_lengths,
+)
+
+# calculate_technical_indicators が計算対象とする最小日数
+MIN_BARS = 26
+
+
+@dataclass
+class PricePanel:
+    """日足位置 × 銘柄の株価パネル"""
+    stock_ids: list[int]
+    counts: np.ndarray
+    dates: list[date]
+    close: np.ndarray
+    volume: np.ndarray
+
+
+def build_price_panel(
+    stock_ids: np.ndarray,
+    dates: list[date],
+    close: np.ndarray,
+    volume: np.ndarray,
+) -> PricePanel:
+    """縦持ちの株価からパネルを作る（純粋関数）
+
+    Args:
+        stock_ids: 銘柄ID（銘柄ID・日付の昇順に並んでいること）
+        dates: 日付
+        close: 終値
+        volume: 出来高
+    """
+    stock_ids = np.asarray(stock_ids)
+    unique_ids, starts, counts = np.unique(stock_ids, return_index=True, return_counts=True)
+    rows = int(counts.max()) if len(counts) else 0
+
+    column = np.repeat(np.arange(len(unique_ids)), counts)
+    position = np.arange(len(stock_ids)) - np.repeat(starts, counts)
+    row = np.repeat(rows - counts, counts) + position
+
+    close_panel = np.full((rows, len(unique_ids)), np.nan)
+    volume_panel = np.full((rows, len(unique_ids)), np.nan)
+    close_panel[row, column] = np.asarray(close, dtype=float)
+    volume_panel[row, column] = np.asarray(volume, dtype=float)
+
+    return PricePanel(
+        stock_ids=[int(v) for v in unique_ids.tolist()],
+        counts=counts,
+        dates=list(dates),
+        close=close_panel,
+        volume=volume_panel,
+    )
+
+
+@dataclass
+class PanelIndicators:
+    """パネルの計算結果"""
+    # DBに格納する指標
+    values: dict[str, np.ndarray]
+    # 入力・中間の指標を含む全系列の最終行（状態の作成に使う）
+    last_row: dict[str, np.ndarray]
+    # RSIの指標名 → 最終行の平均上昇幅/下落幅（min_periodsなし）
+    rsi_averages: dict[str, tuple[np.ndarray, np.ndarray]]
+    # ウィンドウの入力 → 直近の行（当日分を除く持ち越し長）
+    tails: dict[str, np.ndarray]
+
+
+def calculate_panel_indicators(panel: PricePanel) -> PanelIndicators:
+    """パネル全体のテクニカル指標を計算する（純粋関数）
+
+    Returns:
+        指標名 → パネルと同じ形の2次元配列 を持つ計算結果
+    """
+    specs = indicator_plan()
+    series = {source: pd.DataFrame(getattr(panel, source)) for source in PLAN_SOURCES}
+    averages: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+
+    for spec in specs:
+        source = series[spec.inputs[0]]
+        if spec.kind == "sma":
+            series[spec.name] = source.rolling(window=int(spec.params["length"])).mean()
+        elif spec.kind == "rolling_std":
+            series[spec.name] = source.rolling(window=int(spec.params["length"])).std()
+        elif spec.kind == "ema":
+            series[spec.name] = source.ewm(span=int(spec.params["span"]), adjust=False).mean()
+        elif spec.kind == "rsi":
+            length = int(spec.params["length"])
+            # 先頭の埋め草行を0として扱わないよう、入力がない位置の上昇/下落幅はNaNのままにする
+            avg_gain, avg_loss = rsi_averages(source, length)
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+            # min_periods=length と同じく、観測数が足りない位置はNaNにする
+            series[spec.name] = rsi.where(source.notna().cumsum() >= length)
+            averages[spec.name] = (avg_gain.to_numpy()[-1], avg_loss.to_numpy()[-1])
+        elif spec.kind == "difference":
+            series[spec.name] = source - series[spec.inputs[1]]
+        else:
+            series[spec.name] = source + spec.params["width"] * series[spec.inputs[1]]
+
+    return PanelIndicators(
+        values={spec.name: series[spec.name].to_numpy() for spec in specs if spec.persisted},
+        last_row={name: frame.to_numpy()[-1] for name, frame in series.items()},
+        rsi_averages=averages,
+        tails={
+            source: series[source].to_numpy()[-length:] if length else panel.close[:0]
+            for source, length in tail_lengths(specs).items()
+        },
+    )
+
+
+def split_panel_indicators(
+    panel: PricePanel,
+    indicators: PanelIndicators,
+) -> pd.DataFrame:
+    """パネルの指標を縦持ちのDataFrame（stock_id, date, 各指標）に戻す
+
+    日足が MIN_BARS 未満の銘柄は calculate_technical_indicators と同様に対象外とする。
+    """
+    enough = panel.counts >= MIN_BARS
+    cell_mask = ~np.isnan(panel.close) & enough[np.newaxis, :]
+    flat_mask = cell_mask.ravel(order="F")
+    row_mask = np.repeat(enough, panel.counts)
+
+    data: dict[str, object] = {
+        "stock_id": np.repeat(np.asarray(panel.stock_ids, dtype=np.int64)[enough], panel.counts[enough]),
+        "date": [d for d, keep in zip(panel.dates, row_mask.tolist(), strict=True) if keep],
+    }
+    for name, values in indicators.values.items():
+        data[name] = values.ravel(order="F")[flat_mask]
+    return pd.DataFrame(data)
+
+
+def panel_indicator_states(
+    panel: PricePanel,
+    indicators: PanelIndicators,
+) -> dict[int, IndicatorState]:
+    """パネルの計算結果から銘柄ごとの増分計算用の状態を作る
+
+    各銘柄の最新日は最終行に揃っているため、EMA等の最終値は最終行から取り出せる。
+    """
+    specs = indicator_plan()
+    signature = plan_signature(specs)
+    states: dict[int, IndicatorState] = {}
+    for column, (stock_id, count) in enumerate(zip(panel.stock_ids, panel.counts.tolist(), strict=True)):
+        if count < MIN_BARS:
+            continue
+        state = IndicatorState(bars=count, signature=signature)
+        for spec in specs:
+            if spec.kind == "ema":
+                state.ema[spec.name] = float(indicators.last_row[spec.name][column])
+            elif spec.kind == "rsi":
+                avg_gain, avg_loss = indicators.rsi_averages[spec.name]
+                state.rsi[spec.name] = [
+                    float(avg_gain[column]),
+                    float(avg_loss[column]),
+                    rsi_ewm_weight(count, int(spec.params["length"])),
+                ]
+                state.last[spec.inputs[0]] = float(indicators.last_row[spec.inputs[0]][column])
+        for source, tail in indicators.tails.items():
+            state.tails[source] = tail[len(tail) - min(count, len(tail)):, column].tolist()
+        states[stock_id] = state
+    return states
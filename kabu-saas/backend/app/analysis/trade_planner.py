@@ -8,6 +8,8 @@ import logging
 from dataclasses import dataclass
 from decimal import Decimal
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 # デフォルトの利確/損切り設定
@@ -82,3 +84,111 @@ def calculate_trade_plan(
         position_size=position_size,
         risk_reward_ratio=Decimal(str(round(risk_reward, 2))),
     )
+
+
+@dataclass(frozen=True)
+class TradePlanArrays:
+    """複数シグナル分の売買プラン（calculate_trade_plan と同じ計算を配列で行った結果）"""
+    entry_price: np.ndarray
+    # (件数, 利確段階数)
+    target_prices: np.ndarray
+    stop_loss_price: np.ndarray
+    position_size: np.ndarray
+    risk_reward_ratio: np.ndarray
+
+
+def _trade_plan_values(
+    close_price: np.ndarray,
+    sma_25: np.ndarray,
+    total_capital: float,
+    take_profit_rates: list[float] | None,
+    stop_loss_rate: float,
+    max_position_ratio: float,
+) -> TradePlanArrays:
+    """calculate_trade_plan と同じ計算を配列で行う（価格・リスクリワード比は丸めない）"""
+    tp_rates = np.asarray(take_profit_rates or DEFAULT_TAKE_PROFIT_RATES, dtype=np.float64)
+    close_price = np.asarray(close_price, dtype=np.float64)
+    sma_25 = np.asarray(sma_25, dtype=np.float64)
+
+    pullback = (sma_25 > 0) & (sma_25 < close_price)
+    entry = np.where(pullback, (close_price + sma_25) / 2, close_price)
+    targets = entry[:, np.newaxis] * (1 + tp_rates)
+    stop_loss = entry * (1 - stop_loss_rate)
+
+    max_investment = total_capital * max_position_ratio
+    position_size = np.maximum(np.floor(max_investment / entry // 100) * 100, 100).astype(np.int64)
+
+    risk = entry - stop_loss
+    reward = targets[:, 0] - entry
+    risk_reward = np.divide(reward, risk, out=np.zeros_like(reward), where=risk > 0)
+
+    return TradePlanArrays(
+        entry_price=entry,
+        target_prices=targets,
+        stop_loss_price=stop_loss,
+        position_size=position_size,
+        risk_reward_ratio=risk_reward,
+    )
+
+
+def calculate_trade_plan_arrays(
+    close_price: np.ndarray,
+    sma_25: np.ndarray,
+    total_capital: float = 1_000_000,
+    take_profit_rates: list[float] | None = None,
+    stop_loss_rate: float = DEFAULT_STOP_LOSS_RATE,
+    max_position_ratio: float = DEFAULT_MAX_POSITION_RATIO,
+) -> TradePlanArrays:
+    """calculate_trade_plan の配列版（バックテスト用。SMA25が欠損の場合はNaNを渡す）"""
+    values = _trade_plan_values(
+        close_price, sma_25, total_capital, take_profit_rates, stop_loss_rate, max_position_ratio
+    )
+    return TradePlanArrays(
+        entry_price=np.round(values.entry_price, 2),
+        target_prices=np.round(values.target_prices, 2),
+        stop_loss_price=np.round(values.stop_loss_price, 2),
+        position_size=values.position_size,
+        risk_reward_ratio=np.round(values.risk_reward_ratio, 2),
+    )
+
+
+def _to_decimal(values: np.ndarray) -> list[Decimal]:
+    """calculate_trade_plan と同じく組み込みround()で小数2桁に丸めてDecimalにする"""
+    return [Decimal(str(round(value, 2))) for value in values.tolist()]
+
+
+def calculate_trade_plans(
+    close_price: np.ndarray,
+    sma_25: np.ndarray,
+    total_capital: float = 1_000_000,
+    take_profit_rates: list[float] | None = None,
+    stop_loss_rate: float = DEFAULT_STOP_LOSS_RATE,
+    max_position_ratio: float = DEFAULT_MAX_POSITION_RATIO,
+) -> list[TradePlanResult]:
+    """複数シグナル分の売買プランをまとめて計算する（各要素は calculate_trade_plan の結果と一致する）
+
+    SMA25が欠損の場合はNaNを渡す。
+    """
+    values = _trade_plan_values(
+        close_price, sma_25, total_capital, take_profit_rates, stop_loss_rate, max_position_ratio
+    )
+    targets = [_to_decimal(values.target_prices[:, level]) for level in range(3)]
+    return [
+        TradePlanResult(
+            entry_price=entry,
+            target_price_1=target_1,
+            target_price_2=target_2,
+            target_price_3=target_3,
+            stop_loss_price=stop_loss,
+            position_size=position_size,
+            risk_reward_ratio=risk_reward,
+        )
+        for entry, target_1, target_2, target_3, stop_loss, position_size, risk_reward in zip(
+            _to_decimal(values.entry_price),
+            *targets,
+            _to_decimal(values.stop_loss_price),
+            values.position_size.tolist(),
+            _to_decimal(values.risk_reward_ratio),
+            strict=True,
+        )
+    ]
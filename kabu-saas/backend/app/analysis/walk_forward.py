@@ -0,0 +1,218 @@
+"""ウォークフォワード最適化モジュール
+
+スコアの重み（DEFAULT_WEIGHTS）を、ずらしながら取る学習期間ごとに選び直し、直後の検証期間（学習に使っていない期間）で評価する。
+項目別スコア・OHLCのパネルは一度だけ読み込んで共有メモリに置くため、各期間・各候補の評価は
+重み付けの計算とバックテストだけで済む。重みの候補は DEFAULT_WEIGHTS と乱数で生成した重みで、
+学習期間の目的関数が最も大きい候補をその期間の重みとする。
+結果は検証期間の開始日を適用開始日として scoring_weight_sets に保存し、weight_schedule から日付ごとに読み込む。
+"""
+
+import asyncio
+import logging
+from dataclasses import asdict, dataclass
+from datetime import date
+from typing import Any
+
+import numpy as np
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.analysis.backtest import BacktestConfig, BacktestReport
+from app.analysis.parallel import SharedArrays, analysis_pool
+from app.analysis.scoring import COMPONENT_NAMES, DEFAULT_WEIGHTS, validate_weights
+from app.analysis.signal_detector import BUY_THRESHOLD, SELL_THRESHOLD
+from app.analysis.sweep import OBJECTIVES, SweepParams, build_leaderboard, evaluate_params, load_sweep_panels
+from app.config import get_settings
+from app.models.signal import ScoringWeightSet
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class WalkForwardFold:
+    """学習期間と直後の検証期間"""
+    train_start: date
+    train_end: date
+    test_start: date
+    test_end: date
+
+
+@dataclass(frozen=True)
+class WalkForwardResult:
+    """1期間の学習結果と検証期間の成績"""
+    fold: WalkForwardFold
+    weights: dict[str, float]
+    objective: str
+    # 目的関数の値（約定が min_trades 件未満の場合は None）
+    train_score: float | None
+    oos_score: float | None
+    baseline_oos_score: float | None
+    oos_report: BacktestReport
+
+
+def walk_forward_folds(dates: np.ndarray, train_days: int, test_days: int) -> list[WalkForwardFold]:
+    """営業日の並びを、学習 train_days 日 + 検証 test_days 日の期間に分割する（検証期間の日数ずつずらす）
+
+    最後の検証期間はデータの終わりまでで、test_days 日に満たない場合がある。
+    """
+    if train_days < 1 or test_days < 1:
+        raise ValueError("学習期間・検証期間の日数は1以上で指定してください")
+    days = [d.item() if isinstance(d, np.datetime64) else d for d in dates]
+    folds = []
+    for train_start in range(0, len(days) - train_days, test_days):
+        test_start = train_start + train_days
+        test_end = min(test_start + test_days, len(days)) - 1
+        folds.append(
+            WalkForwardFold(days[train_start], days[test_start - 1], days[test_start], days[test_end])
+        )
+    return folds
+
+
+def weight_candidates(count: int, seed: int = 0) -> list[dict[str, float]]:
+    """重みの候補（先頭は DEFAULT_WEIGHTS、残りはディリクレ分布から生成した合計1の重み）"""
+    rng = np.random.default_rng(seed)
+    candidates = [dict(DEFAULT_WEIGHTS)]
+    while len(candidates) < count:
+        values = np.round(rng.dirichlet(np.ones(len(COMPONENT_NAMES))), 3)
+        try:
+            candidates.append(validate_weights(dict(zip(COMPONENT_NAMES, values.tolist(), strict=True))))
+        except ValueError:
+            # テクニカル・ファンダメンタルいずれかの重みが丸めで0になった場合は引き直す
+            continue
+    return candidates
+
+
+def _oos_metrics(report: BacktestReport) -> dict[str, Any]:
+    """検証期間のバックテスト結果（評価額の推移を除く、JSONに保存できる形式）"""
+    metrics = asdict(report)
+    del metrics["equity_dates"], metrics["equity"]
+    metrics["start_date"] = report.start_date.isoformat()
+    metrics["end_date"] = report.end_date.isoformat()
+    return metrics
+
+
+async def save_weight_sets(db: AsyncSession, results: list[WalkForwardResult]) -> None:
+    """学習した重みを適用開始日（検証期間の開始日）ごとに保存する（同じ適用開始日は上書き）"""
+    if not results:
+        return
+    stmt = pg_insert(ScoringWeightSet).values([
+        {
+            "effective_from": result.fold.test_start,
+            "effective_to": result.fold.test_end,
+            "weights": result.weights,
+            "train_start": result.fold.train_start,
+            "train_end": result.fold.train_end,
+            "objective": result.objective,
+            "train_score": result.train_score,
+            "oos_score": result.oos_score,
+            "baseline_oos_score": result.baseline_oos_score,
+            "oos_metrics": _oos_metrics(result.oos_report),
+        }
+        for result in results
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["effective_from"],
+        set_={
+            column: stmt.excluded[column]
+            for column in (
+                "effective_to", "weights", "train_start", "train_end", "objective",
+                "train_score", "oos_score", "baseline_oos_score", "oos_metrics",
+            )
+        },
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+
+async def run_walk_forward(
+    db: AsyncSession,
+    start_date: date,
+    end_date: date,
+    train_days: int | None = None,
+    test_days: int | None = None,
+    candidates: int | None = None,
+    objective: str = "total_return",
+    min_trades: int = 0,
+    seed: int = 0,
+    base_config: BacktestConfig | None = None,
+    workers: int | None = None,
+    save: bool = True,
+) -> list[WalkForwardResult]:
+    """ウォークフォワード最適化で期間ごとの重みを学習し、検証期間の成績とともに返す
+
+    Args:
+        train_days: 学習期間の営業日数（未指定時は設定値 walk_forward_train_days）
+        test_days: 検証期間の営業日数（未指定時は設定値 walk_forward_test_days）
+        candidates: 重みの候補数（未指定時は設定値 walk_forward_candidates）
+        objective: 重みの選択に使う目的関数（OBJECTIVES のキー）
+        min_trades: 学習期間の約定がこの件数未満の候補は選ばない（すべて未満の場合は DEFAULT_WEIGHTS）
+        seed: 重みの候補を生成する乱数シード
+        base_config: バックテスト条件
+        workers: ワーカープロセス数（未指定時は設定値 analysis_workers）
+        save: 結果を scoring_weight_sets に保存するか
+
+    Raises:
+        ValueError: 目的関数が不明、または期間が学習期間と検証期間の合計に満たない場合
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"目的関数は次のいずれかを指定してください: {', '.join(OBJECTIVES)}")
+    settings = get_settings()
+    train_days = train_days or settings.walk_forward_train_days
+    test_days = test_days or settings.walk_forward_test_days
+    base_config = base_config or BacktestConfig()
+    params = [
+        SweepParams(buy_threshold=BUY_THRESHOLD, sell_threshold=SELL_THRESHOLD, weights=weights)
+        for weights in weight_candidates(candidates or settings.walk_forward_candidates, seed)
+    ]
+    baseline = params[0]
+
+    arrays = await load_sweep_panels(db, start_date, end_date)
+    folds = walk_forward_folds(arrays["dates"], train_days, test_days)
+    if not folds:
+        raise ValueError(
+            f"期間の営業日数 {len(arrays['dates'])} が学習期間 {train_days}日 + 検証期間1日に足りません"
+        )
+    logger.info(
+        f"ウォークフォワード最適化開始: {start_date} ~ {end_date} / {len(folds)}期間 × {len(params)}候補 / "
+        f"{arrays['components'].shape[0]}銘柄 × {arrays['components'].shape[1]}日"
+    )
+    with SharedArrays(arrays) as shared:
+        del arrays
+        async with analysis_pool(workers) as pool:
+            train_reports = await asyncio.gather(*(
+                pool.run(evaluate_params, shared.handles, p, base_config, fold.train_start, fold.train_end)
+                for fold in folds
+                for p in params
+            ))
+            leaderboards = [
+                build_leaderboard(params, train_reports[start:start + len(params)], objective, min_trades)
+                for start in range(0, len(train_reports), len(params))
+            ]
+            best = [board[0] if board[0].objective is not None else None for board in leaderboards]
+            test_reports = await asyncio.gather(*(
+                pool.run(evaluate_params, shared.handles, p, base_config, fold.test_start, fold.test_end)
+                for fold, result in zip(folds, best, strict=True)
+                for p in ((result.params if result else baseline), baseline)
+            ))
+
+    scorer = OBJECTIVES[objective]
+    results = []
+    for i, (fold, result) in enumerate(zip(folds, best, strict=True)):
+        oos_report, baseline_report = test_reports[2 * i], test_reports[2 * i + 1]
+        results.append(WalkForwardResult(
+            fold=fold,
+            weights=(result.params if result else baseline).weights,
+            objective=objective,
+            train_score=result.objective if result else None,
+            oos_score=scorer(oos_report) if oos_report.filled >= min_trades else None,
+            baseline_oos_score=scorer(baseline_report) if baseline_report.filled >= min_trades else None,
+            oos_report=oos_report,
+        ))
+        logger.info(
+            f"検証期間 {fold.test_start} ~ {fold.test_end}: {objective}={results[-1].oos_score} "
+            f"(DEFAULT_WEIGHTS: {results[-1].baseline_oos_score})"
+        )
+
+    if save:
+        await save_weight_sets(db, results)
+    return results
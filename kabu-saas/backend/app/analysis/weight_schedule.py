@@ -0,0 +1,52 @@
+"""日付ごとのスコア重みモジュール
+
+ウォークフォワード最適化で学習した重み（scoring_weight_sets）を適用開始日順に保持し、
+指定日に有効な重みを返す。calculate_total_score / score_universe には weights_for(日付) の結果を渡す。
+walk_forward_weights_enabled が無効の場合、または指定日より前に学習した重みがない場合は DEFAULT_WEIGHTS を返す。
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.analysis.scoring import DEFAULT_WEIGHTS
+from app.config import get_settings
+from app.models.signal import ScoringWeightSet
+
+
+@dataclass(frozen=True)
+class WeightSchedule:
+    """適用開始日ごとの重み（適用開始日の昇順）"""
+    effective_from: list[date] = field(default_factory=list)
+    weights: list[dict[str, float]] = field(default_factory=list)
+
+    def weights_for(self, target_date: date) -> dict[str, float]:
+        """target_date に有効な重み（適用開始日が target_date 以前で最も新しいもの）"""
+        index = bisect_right(self.effective_from, target_date) - 1
+        return self.weights[index] if index >= 0 else DEFAULT_WEIGHTS
+
+    def segments(self, start_date: date, end_date: date) -> list[tuple[date, date, dict[str, float]]]:
+        """期間を同じ重みが続く (開始日, 終了日, 重み) に分割する"""
+        boundaries = [d for d in self.effective_from if start_date < d <= end_date]
+        starts = [start_date, *boundaries]
+        ends = [date.fromordinal(d.toordinal() - 1) for d in boundaries] + [end_date]
+        return [(s, e, self.weights_for(s)) for s, e in zip(starts, ends, strict=True)]
+
+
+async def load_weight_schedule(db: AsyncSession) -> WeightSchedule:
+    """学習済みの重みを読み込む（walk_forward_weights_enabled が無効の場合は空＝常に DEFAULT_WEIGHTS）"""
+    if not get_settings().walk_forward_weights_enabled:
+        return WeightSchedule()
+    result = await db.execute(
+        select(ScoringWeightSet.effective_from, ScoringWeightSet.weights).order_by(ScoringWeightSet.effective_from)
+    )
+    rows = result.all()
+    return WeightSchedule([row.effective_from for row in rows], [row.weights for row in rows])
+
+
+async def load_scoring_weights(db: AsyncSession, target_date: date) -> dict[str, float]:
+    """target_date のスコア計算に使う重み"""
+    return (await load_weight_schedule(db)).weights_for(target_date)
@@ -0,0 +1,151 @@
+"""COPYによる一括取り込みモジュール
+
+レコードを一時ステージングテーブルへasyncpgのバイナリCOPYで流し込み、
+バッチごとに1回の集合演算UPSERTで本テーブルへマージする。
+大量のパラメータを持つ multi-VALUES INSERT を避けるため、バックフィル等の大量書き込みで使用する。
+"""
+
+import hashlib
+import logging
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.change_tracking import invalidate_indicator_states, mark_stocks_changed
+from app.config import get_settings
+from app.models.base import Base
+
+logger = logging.getLogger(__name__)
+
+
+def _quote(name: str) -> str:
+    """識別子をクオートする"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _staging_table_name(table_name: str, columns: list[str]) -> str:
+    """列の構成ごとのステージングテーブル名
+
+    同じトランザクションで列の構成が異なる書き込みをしても、別の列構成で作成済みのテーブルを使わない。
+    """
+    signature = hashlib.sha1(",".join(columns).encode()).hexdigest()[:8]
+    return f"_stage_{table_name}_{signature}"
+
+
+def _build_merge_sql(
+    table_name: str,
+    staging: str,
+    columns: list[str],
+    conflict_columns: tuple[str, ...],
+    only_changed: bool,
+    returning: tuple[str, ...],
+) -> str:
+    """ステージングテーブルから本テーブルへUPSERTするSQL
+
+    すべての列が一意制約の列の場合は更新する列がないため、既存の行はそのままにして新しい行だけを挿入する。
+    """
+    update_columns = [c for c in columns if c not in conflict_columns]
+    column_list = ", ".join(_quote(c) for c in columns)
+    merge_sql = (
+        f"INSERT INTO {_quote(table_name)} ({column_list}) "
+        f"SELECT {column_list} FROM {_quote(staging)} "
+        f"ON CONFLICT ({', '.join(_quote(c) for c in conflict_columns)}) "
+    )
+    if not update_columns:
+        merge_sql += "DO NOTHING"
+    else:
+        merge_sql += "DO UPDATE SET " + ", ".join(f"{_quote(c)} = EXCLUDED.{_quote(c)}" for c in update_columns)
+    if only_changed and update_columns:
+        merge_sql += " WHERE " + " OR ".join(
+            f"{_quote(table_name)}.{_quote(c)} IS DISTINCT FROM EXCLUDED.{_quote(c)}" for c in update_columns
+        )
+    if returning:
+        merge_sql += " RETURNING " + ", ".join(_quote(c) for c in returning)
+    return merge_sql
+
+
+def _dedupe_records(records: list[dict[str, Any]], conflict_columns: tuple[str, ...]) -> list[dict[str, Any]]:
+    """一意制約の列が同じレコードを後のもので置き換えて1件にする（最初に出現した位置を保つ）
+
+    1回のマージ（INSERT ... ON CONFLICT DO UPDATE）で同じ行を2回更新するとエラーになるため。
+    """
+    unique: dict[tuple[Any, ...], dict[str, Any]] = {}
+    for record in records:
+        unique[tuple(record[c] for c in conflict_columns)] = record
+    return list(unique.values())
+
+
+async def copy_upsert_records(
+    db: AsyncSession,
+    model: type[Base],
+    records: list[dict[str, Any]],
+    conflict_columns: tuple[str, ...] = ("stock_id", "date"),
+    batch_size: int | None = None,
+    only_changed: bool = False,
+    mark_changed: bool = False,
+    invalidate_states: bool = False,
+) -> int:
+    """レコードをCOPY経由でUPSERTする
+
+    一意制約の列が同じレコードが複数ある場合は、後のレコードだけを書き込む。
+    失敗すると呼び出し元のトランザクションは中断するため、後続の書き込みを続ける場合は
+    呼び出し元で db.begin_nested() の中で呼ぶ。
+
+    Args:
+        model: 書き込み先のSQLAlchemyモデル
+        records: 挿入レコード（全レコードが同じキーを持つこと）
+        conflict_columns: 一意制約の列（競合時は残りの列を更新）
+        batch_size: 1回のCOPY＋マージで扱う件数（未指定時は設定値）
+        only_changed: Trueの場合、既存行と値が異なる行のみ更新する
+        mark_changed: Trueの場合、挿入・更新された行の銘柄を変更として記録する（stock_id列が必要）
+        invalidate_states: Trueの場合、挿入・更新された株価の日付がテクニカル指標の増分計算状態に
+            反映済みの銘柄は状態を破棄する（株価用。stock_id, date列が必要）
+
+    Returns:
+        処理件数（重複を除いた件数）
+    """
+    if not records:
+        return 0
+
+    if batch_size is None:
+        batch_size = get_settings().bulk_copy_batch_size
+
+    records = _dedupe_records(records, conflict_columns)
+    table_name = model.__tablename__
+    columns = list(records[0].keys())
+    staging = _staging_table_name(table_name, columns)
+    column_list = ", ".join(_quote(c) for c in columns)
+
+    # SQLAlchemy経由で実行してトランザクションを開始させ、同じトランザクション内でCOPYする
+    await db.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {_quote(staging)} ON COMMIT DROP AS "
+        f"SELECT {column_list} FROM {_quote(table_name)} WITH NO DATA"
+    ))
+    returning = ("stock_id", "date") if mark_changed or invalidate_states else ()
+    merge_sql = _build_merge_sql(table_name, staging, columns, conflict_columns, only_changed, returning)
+
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+    if driver_connection is None:
+        raise RuntimeError("COPY取り込みにはasyncpgの接続が必要です")
+
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        await db.execute(text(f"TRUNCATE {_quote(staging)}"))
+        await driver_connection.copy_records_to_table(
+            staging,
+            records=[tuple(record[c] for c in columns) for record in batch],
+            columns=columns,
+        )
+        result = await db.execute(text(merge_sql))
+        if mark_changed or invalidate_states:
+            changed = [(stock_id, changed_date) for stock_id, changed_date in result.all()]
+            if mark_changed:
+                await mark_stocks_changed(db, [stock_id for stock_id, _ in changed])
+            if invalidate_states:
+                await invalidate_indicator_states(db, changed)
+
+    logger.debug(f"COPY一括取り込み: {table_name} - {len(records)}件")
+    return len(records)
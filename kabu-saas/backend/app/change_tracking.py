@@ -0,0 +1,141 @@
+"""分析入力の変更追跡モジュール
+
+株価・ファンダメンタル・テクニカル指標のUPSERTで実際に挿入・更新された銘柄を
+stock_input_changes に追記する（値が変わらない再書き込みは記録しない）。
+銘柄ごとの行を更新せず追記するため、並行して実行するステップが同じ銘柄を書き込んでも互いの行ロックを待たない。
+シグナル検出などの下流処理は処理名ごとのカーソルと比較して、前回処理以降に入力が
+変わった銘柄だけを処理する。キャッシュ等も独自の処理名で同じ変更集合を読み取れる。
+変更は書き込んだトランザクションのIDで記録し、カーソルは読み取り時のスナップショットの xmin
+（実行中のトランザクションのうち最小のID）まで進める。時刻で比較すると、読み取り時点で未コミットの
+トランザクションが書いた変更（now() はトランザクション開始時刻）をカーソルが追い越して取りこぼすが、
+xmin 以降のIDの変更は次回も読み取るため取りこぼさない。
+過去日付の株価が変わった銘柄は、テクニカル指標の増分計算状態も破棄する。
+"""
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy import BigInteger, Date, Integer, Text, cast, delete, func, insert, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.change_tracking import ChangeCursor, StockInputChange
+from app.models.technical import TechnicalIndicatorState
+
+
+@dataclass(frozen=True)
+class ChangeSet:
+    """下流処理が処理すべき銘柄"""
+    # 入力が変わった銘柄ID（Noneは全銘柄を処理する）
+    stock_ids: frozenset[int] | None
+    # 読み取り時のスナップショットの xmin（処理完了後に advance_change_cursor に渡す）
+    as_of: int
+
+
+def _xid(value: ColumnElement[object]) -> ColumnElement[int]:
+    """xid8 を bigint として比較・保存できるように変換する"""
+    return cast(cast(value, Text), BigInteger)
+
+
+async def mark_stocks_changed(db: AsyncSession, stock_ids: Iterable[int]) -> None:
+    """入力が変わった銘柄を記録する（銘柄IDは配列1つのパラメータで渡す）"""
+    ids = sorted(set(stock_ids))
+    if not ids:
+        return
+    await db.execute(
+        insert(StockInputChange).from_select(
+            ["stock_id", "change_xid"],
+            select(func.unnest(literal(ids, ARRAY(Integer))), _xid(func.pg_current_xact_id())),
+        )
+    )
+
+
+async def invalidate_indicator_states(db: AsyncSession, changed_prices: Iterable[tuple[int, date]]) -> None:
+    """状態に反映済みの最終日以前の株価が挿入・更新された銘柄の増分計算状態を削除する
+
+    増分計算は last_date より後の日足しか読まないため、修正・追加された過去の株価は反映されない。
+    状態を削除して、次回のテクニカル計算で全期間を再計算させる。
+
+    Args:
+        changed_prices: 挿入・更新された株価の (銘柄ID, 日付)
+    """
+    earliest: dict[int, date] = {}
+    for stock_id, price_date in changed_prices:
+        if stock_id not in earliest or price_date < earliest[stock_id]:
+            earliest[stock_id] = price_date
+    if not earliest:
+        return
+    ids = sorted(earliest)
+    changed = select(
+        func.unnest(literal(ids, ARRAY(Integer))).label("stock_id"),
+        func.unnest(literal([earliest[i] for i in ids], ARRAY(Date))).label("date"),
+    ).subquery()
+    await db.execute(
+        delete(TechnicalIndicatorState).where(
+            TechnicalIndicatorState.stock_id == changed.c.stock_id,
+            TechnicalIndicatorState.last_date >= changed.c.date,
+        )
+    )
+
+
+async def load_changed_stocks(
+    db: AsyncSession,
+    consumer: str,
+    target_date: date,
+    fingerprint: str,
+) -> ChangeSet:
+    """前回処理以降に入力が変わった銘柄を取得する
+
+    初回、対象日が前回と異なる場合、ルール・重み（fingerprint）が変わった場合は全銘柄を対象とする。
+    前回の読み取り時に未コミットだったトランザクションの変更は、その後コミットされていれば含む。
+
+    Args:
+        consumer: 処理名（カーソルのキー）
+        target_date: 処理の対象日
+        fingerprint: 処理結果に影響する設定のハッシュ
+    """
+    # このIDより前のトランザクションはすべて終了しており、コミットされた変更は以降の読み取りで見える
+    snapshot = await db.execute(select(_xid(func.pg_snapshot_xmin(func.pg_current_snapshot()))))
+    as_of = snapshot.scalar_one()
+    cursor = await db.get(ChangeCursor, consumer)
+    if (
+        cursor is None
+        or cursor.target_date != target_date
+        or cursor.fingerprint != fingerprint
+    ):
+        return ChangeSet(None, as_of)
+
+    result = await db.execute(
+        select(StockInputChange.stock_id).distinct().where(StockInputChange.change_xid >= cursor.consumed_xmin)
+    )
+    return ChangeSet(frozenset(result.scalars().all()), as_of)
+
+
+async def advance_change_cursor(
+    db: AsyncSession,
+    consumer: str,
+    target_date: date,
+    fingerprint: str,
+    changes: ChangeSet,
+) -> None:
+    """changes の読み取り時点で終了していたトランザクションの変更を処理済みとして記録する
+
+    すべてのカーソルが処理済みの変更記録は以降読まれないため削除する。
+    """
+    values = {
+        "target_date": target_date,
+        "fingerprint": fingerprint,
+        "consumed_xmin": changes.as_of,
+        "consumed_at": func.now(),
+    }
+    stmt = pg_insert(ChangeCursor).values(consumer=consumer, **values)
+    stmt = stmt.on_conflict_do_update(index_elements=["consumer"], set_=values)
+    await db.execute(stmt)
+    await db.execute(
+        delete(StockInputChange).where(
+            StockInputChange.change_xid < select(func.min(ChangeCursor.consumed_xmin)).scalar_subquery()
+        )
+    )
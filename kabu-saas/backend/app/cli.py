@@ -0,0 +1,164 @@
+"""コマンドラインツール
+
+    cd backend
+    python -m app.cli sweep --start 2021-01-01 --end 2025-12-31 \
+        --buy-thresholds 55 60 65 --sell-thresholds 35 40 \
+        --take-profit-rates 0.1,0.2,0.3 0.05,0.1,0.15 --stop-loss-rates 0.03 0.05 \
+        --objective sharpe --workers 8 --top 20
+    python -m app.cli walk-forward --start 2019-01-01 --end 2025-12-31 \
+        --train-days 250 --test-days 60 --candidates 64 --objective sharpe --workers 8
+    python -m app.cli worker --worker-id node1-a
+"""
+
+import argparse
+import asyncio
+import json
+from dataclasses import asdict
+from datetime import date
+from pathlib import Path
+
+from app.analysis.sweep import OBJECTIVES, SweepResult, SweepSpace, run_sweep
+from app.analysis.walk_forward import WalkForwardResult, run_walk_forward
+from app.database import async_session_factory
+from app.services.pipeline import run_pipeline_worker
+
+
+def _rates(value: str) -> tuple[float, ...]:
+    """カンマ区切りの利確率（例: 0.1,0.2,0.3）"""
+    return tuple(float(rate) for rate in value.split(","))
+
+
+def _print_leaderboard(leaderboard: list[SweepResult], objective: str, top: int) -> None:
+    print(f"{len(leaderboard)}組を評価（目的関数: {objective}）")
+    print("| 順位 | 買い閾値 | 売り閾値 | 利確率 | 損切り率 | 重み | 目的関数 | 約定 | 勝率 | 総リターン | 最大DD |")
+    print("|---:|---:|---:|---|---:|---|---:|---:|---:|---:|---:|")
+    for result in leaderboard[:top]:
+        params = result.params
+        objective_value = "-" if result.objective is None else f"{result.objective:.4f}"
+        weights = " ".join(f"{name}={weight:g}" for name, weight in params.weights.items())
+        print(
+            f"| {result.rank} | {params.buy_threshold:g} | {params.sell_threshold:g} "
+            f"| {','.join(f'{rate:g}' for rate in params.take_profit_rates)} | {params.stop_loss_rate:g} "
+            f"| {weights} | {objective_value} | {result.filled} | {result.win_rate:.1%} "
+            f"| {result.total_return:.1%} | {result.max_drawdown:.1%} |"
+        )
+
+
+async def _sweep(args: argparse.Namespace) -> None:
+    weights = [json.loads(Path(path).read_text(encoding="utf-8")) for path in args.weights] if args.weights else None
+    space = SweepSpace(
+        buy_thresholds=args.buy_thresholds,
+        sell_thresholds=args.sell_thresholds,
+        take_profit_rates=args.take_profit_rates,
+        stop_loss_rates=args.stop_loss_rates,
+        **({"weights": weights} if weights else {}),
+    )
+    async with async_session_factory() as db:
+        leaderboard = await run_sweep(
+            db,
+            args.start,
+            args.end,
+            space,
+            objective=args.objective,
+            samples=args.samples,
+            seed=args.seed,
+            min_trades=args.min_trades,
+            workers=args.workers,
+        )
+    if args.json:
+        print(json.dumps([asdict(result) for result in leaderboard[:args.top]], ensure_ascii=False, indent=2))
+    else:
+        _print_leaderboard(leaderboard, args.objective, args.top)
+
+
+def _score(value: float | None) -> str:
+    return "-" if value is None else f"{value:.4f}"
+
+
+def _print_walk_forward(results: list[WalkForwardResult], objective: str) -> None:
+    print(f"{len(results)}期間を学習（目的関数: {objective}）")
+    print("| 学習期間 | 検証期間 | 重み | 学習 | 検証 | 検証（DEFAULT_WEIGHTS） | 検証の約定 |")
+    print("|---|---|---|---:|---:|---:|---:|")
+    for result in results:
+        fold = result.fold
+        weights = " ".join(f"{name}={weight:g}" for name, weight in result.weights.items())
+        print(
+            f"| {fold.train_start} ~ {fold.train_end} | {fold.test_start} ~ {fold.test_end} | {weights} "
+            f"| {_score(result.train_score)} | {_score(result.oos_score)} | {_score(result.baseline_oos_score)} "
+            f"| {result.oos_report.filled} |"
+        )
+
+
+async def _walk_forward(args: argparse.Namespace) -> None:
+    async with async_session_factory() as db:
+        results = await run_walk_forward(
+            db,
+            args.start,
+            args.end,
+            train_days=args.train_days,
+            test_days=args.test_days,
+            candidates=args.candidates,
+            objective=args.objective,
+            min_trades=args.min_trades,
+            seed=args.seed,
+            workers=args.workers,
+            save=not args.dry_run,
+        )
+    _print_walk_forward(results, args.objective)
+
+
+async def _worker(args: argparse.Namespace) -> None:
+    processed = await run_pipeline_worker(async_session_factory, args.worker_id, until_idle=args.until_idle)
+    print(f"{processed}ジョブを実行しました")
+
+
+def main(argv: list[str] | None = None) -> None:
+    defaults = SweepSpace()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sweep = commands.add_parser("sweep", help="閾値・重み・利確率・損切り率のパラメータスイープ")
+    sweep.add_argument("--start", type=date.fromisoformat, required=True, help="開始日（YYYY-MM-DD）")
+    sweep.add_argument("--end", type=date.fromisoformat, required=True, help="終了日（YYYY-MM-DD）")
+    sweep.add_argument("--buy-thresholds", type=float, nargs="+", default=defaults.buy_thresholds)
+    sweep.add_argument("--sell-thresholds", type=float, nargs="+", default=defaults.sell_thresholds)
+    sweep.add_argument("--take-profit-rates", type=_rates, nargs="+", default=defaults.take_profit_rates)
+    sweep.add_argument("--stop-loss-rates", type=float, nargs="+", default=defaults.stop_loss_rates)
+    sweep.add_argument("--weights", nargs="+", help="重みのJSONファイル（1ファイル1組。未指定時はDEFAULT_WEIGHTS）")
+    sweep.add_argument("--samples", type=int, help="全組み合わせから無作為に評価する組数")
+    sweep.add_argument("--seed", type=int, default=0, help="無作為抽出の乱数シード")
+    sweep.add_argument("--objective", choices=list(OBJECTIVES), default="total_return", help="並べ替えの目的関数")
+    sweep.add_argument("--min-trades", type=int, default=0, help="約定がこの件数未満の組み合わせは末尾に置く")
+    sweep.add_argument("--workers", type=int, help="ワーカープロセス数（未指定時は設定値 analysis_workers）")
+    sweep.add_argument("--top", type=int, default=20, help="表示する件数")
+    sweep.add_argument("--json", action="store_true", help="JSONで出力する")
+
+    walk_forward = commands.add_parser("walk-forward", help="学習期間ごとに重みを選び直すウォークフォワード最適化")
+    walk_forward.add_argument("--start", type=date.fromisoformat, required=True, help="開始日（YYYY-MM-DD）")
+    walk_forward.add_argument("--end", type=date.fromisoformat, required=True, help="終了日（YYYY-MM-DD）")
+    walk_forward.add_argument("--train-days", type=int, help="学習期間の営業日数（未指定時は設定値）")
+    walk_forward.add_argument("--test-days", type=int, help="検証期間の営業日数（未指定時は設定値）")
+    walk_forward.add_argument("--candidates", type=int, help="重みの候補数（未指定時は設定値）")
+    walk_forward.add_argument(
+        "--objective", choices=list(OBJECTIVES), default="total_return", help="重みの選択に使う目的関数"
+    )
+    walk_forward.add_argument("--min-trades", type=int, default=0, help="学習期間の約定がこの件数未満の候補は選ばない")
+    walk_forward.add_argument("--seed", type=int, default=0, help="重みの候補を生成する乱数シード")
+    walk_forward.add_argument("--workers", type=int, help="ワーカープロセス数（未指定時は設定値 analysis_workers）")
+    walk_forward.add_argument("--dry-run", action="store_true", help="結果を scoring_weight_sets に保存しない")
+
+    worker = commands.add_parser("worker", help="分散実行（pipeline_mode=distributed）のパイプラインジョブを実行する")
+    worker.add_argument("--worker-id", help="ワーカーの識別名（未指定時は ホスト名:プロセスID）")
+    worker.add_argument("--until-idle", action="store_true", help="取得できるジョブがなくなったら終了する")
+
+    args = parser.parse_args(argv)
+    if args.command == "sweep":
+        asyncio.run(_sweep(args))
+    elif args.command == "walk-forward":
+        asyncio.run(_walk_forward(args))
+    elif args.command == "worker":
+        asyncio.run(_worker(args))
+
+
+if __name__ == "__main__":
+    main()
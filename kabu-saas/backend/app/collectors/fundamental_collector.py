@@ -5,14 +5,19 @@ yfinanceを使用して銘柄のファンダメンタル指標を取得し、DB
 
 import asyncio
 import logging
+from collections.abc import Collection
 from datetime import date
 from decimal import Decimal
 
 import yfinance as yf
-from sqlalchemy import select
+from sqlalchemy import Integer, any_, literal, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.bulk_ingest import copy_upsert_records
+from app.change_tracking import mark_stocks_changed
+from app.config import get_settings
 from app.models.fundamental import FundamentalData
 from app.models.stock import Stock
 
@@ -83,13 +88,20 @@ async def upsert_fundamental_record(
     db: AsyncSession,
     record: dict,
 ) -> bool:
-    """ファンダメンタルデータをUPSERTする"""
+    """ファンダメンタルデータをUPSERTする
+
+    値が変わらない場合は書き換えず、挿入・更新した場合は銘柄を変更として記録する。
+    """
+    update_columns = [k for k in record if k not in ("stock_id", "date")]
+    table = FundamentalData.__table__
     stmt = pg_insert(FundamentalData).values(**record)
     stmt = stmt.on_conflict_do_update(
         constraint="uq_fundamental_data_stock_date",
-        set_={k: v for k, v in record.items() if k not in ("stock_id", "date")},
-    )
-    await db.execute(stmt)
+        set_={c: stmt.excluded[c] for c in update_columns},
+        where=or_(*(table.c[c].is_distinct_from(stmt.excluded[c]) for c in update_columns)),
+    ).returning(FundamentalData.stock_id)
+    result = await db.execute(stmt)
+    await mark_stocks_changed(db, result.scalars().all())
     return True
 
 
@@ -97,8 +109,13 @@ async def collect_stock_fundamentals(
     db: AsyncSession,
     stock: Stock,
     target_date: date | None = None,
+    pending: list[dict] | None = None,
 ) -> bool:
-    """個別銘柄のファンダメンタルデータを収集してDBに格納する"""
+    """個別銘柄のファンダメンタルデータを収集してDBに格納する
+
+    Args:
+        pending: 指定時はDBに書き込まずレコードを追加する（呼び出し元で一括取り込み）
+    """
     if target_date is None:
         target_date = date.today()
 
@@ -109,7 +126,10 @@ async def collect_stock_fundamentals(
     record = transform_fundamental_data(info, stock.id, target_date) if info else None
 
     if record:
-        await upsert_fundamental_record(db, record)
+        if pending is not None:
+            pending.append(record)
+        else:
+            await upsert_fundamental_record(db, record)
         logger.info(f"ファンダメンタル収集完了: {stock.code}")
         return True
 
@@ -120,27 +140,54 @@ async def collect_stock_fundamentals(
 async def collect_all_fundamentals(
     db: AsyncSession,
     target_date: date | None = None,
+    stock_ids: Collection[int] | None = None,
+    failed_ids: set[int] | None = None,
 ) -> tuple[int, int, list[str]]:
     """全銘柄のファンダメンタルデータを収集する
 
+    Args:
+        stock_ids: 指定時はこの銘柄だけを収集する
+        failed_ids: 指定時はエラーになった銘柄IDを追加する
+
     Returns:
         (成功件数, エラー件数, エラー詳細リスト)
     """
-    result = await db.execute(select(Stock).where(Stock.is_active.is_(True)))
+    query = select(Stock).where(Stock.is_active.is_(True))
+    if stock_ids is not None:
+        query = query.where(Stock.id == any_(literal(sorted(stock_ids), ARRAY(Integer))))
+    result = await db.execute(query)
     stocks = result.scalars().all()
 
     success_count = 0
     error_count = 0
     errors: list[str] = []
 
+    # COPY取り込み時は全銘柄分をまとめて1回で書き込む
+    pending: list[dict] | None = [] if get_settings().bulk_copy_enabled else None
+
     for stock in stocks:
         try:
-            if await collect_stock_fundamentals(db, stock, target_date):
+            if await collect_stock_fundamentals(db, stock, target_date, pending):
                 success_count += 1
         except Exception as e:
             error_count += 1
+            if failed_ids is not None:
+                failed_ids.add(stock.id)
             error_msg = f"{stock.code}: {str(e)}"
             errors.append(error_msg)
             logger.error(f"ファンダメンタル収集エラー: {error_msg}")
 
+    if pending:
+        try:
+            # 失敗しても呼び出し元のトランザクションを中断させない
+            async with db.begin_nested():
+                await copy_upsert_records(db, FundamentalData, pending, only_changed=True, mark_changed=True)
+        except Exception as e:
+            error_count += success_count
+            success_count = 0
+            if failed_ids is not None:
+                failed_ids.update(record["stock_id"] for record in pending)
+            errors.append(f"一括取り込み失敗: {str(e)}")
+            logger.error(f"ファンダメンタル一括取り込みエラー: {e}")
+
     return success_count, error_count, errors
@@ -5,16 +5,25 @@ yfinanceを使用して日本株の日足データを取得し、DBに格納す
 
 import asyncio
 import logging
+import time
+from collections.abc import Collection
 from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 
+import numpy as np
 import pandas as pd
 import yfinance as yf
-from sqlalchemy import select
+from sqlalchemy import Integer, any_, delete, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.analysis.technical import MAX_BIND_PARAMS
+from app.bulk_ingest import copy_upsert_records
+from app.change_tracking import invalidate_indicator_states, mark_stocks_changed
+from app.config import get_settings
 from app.models.stock import Stock, StockPrice
+from app.models.technical import TechnicalIndicatorState
 
 logger = logging.getLogger(__name__)
 
@@ -43,67 +52,261 @@ def fetch_price_data(
         return pd.DataFrame()
 
 
+def split_batch_frame(
+    df: pd.DataFrame,
+    ticker_codes: list[str],
+) -> dict[str, pd.DataFrame]:
+    """一括取得した結合DataFrameを銘柄ごとのDataFrameに分割する（純粋関数）
+
+    Args:
+        df: yf.download(group_by="ticker") の結果（columns: (銘柄コード, 項目)）
+        ticker_codes: 取得対象の銘柄コード
+
+    Returns:
+        銘柄コード → 株価DataFrame（データなしの銘柄は空DataFrame）
+    """
+    frames = {code: pd.DataFrame() for code in ticker_codes}
+    if df is None or df.empty:
+        return frames
+
+    if not isinstance(df.columns, pd.MultiIndex):
+        # 単一銘柄のみの場合はフラットな列で返ることがある
+        if len(ticker_codes) == 1:
+            frames[ticker_codes[0]] = _drop_missing_rows(df)
+        return frames
+
+    available = set(df.columns.get_level_values(0))
+    for code in ticker_codes:
+        if code in available:
+            frames[code] = _drop_missing_rows(df[code])
+    return frames
+
+
+def _drop_missing_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """結合時に補完された欠損行（他銘柄のみ取引のあった日）を除去する"""
+    df = df.dropna(how="all")
+    if "Close" in df.columns:
+        df = df.dropna(subset=["Close"])
+    return df
+
+
+def fetch_price_data_batch(
+    ticker_codes: list[str],
+    start_date: date,
+    end_date: date,
+) -> dict[str, pd.DataFrame]:
+    """yfinanceから複数銘柄の株価データを1リクエストで取得する
+
+    取得自体の失敗はチャンク単位のエラーとして扱うため、例外は呼び出し元に送出する。
+    """
+    if not ticker_codes:
+        return {}
+
+    df = yf.download(
+        tickers=ticker_codes,
+        start=start_date.isoformat(),
+        end=end_date.isoformat(),
+        auto_adjust=False,
+        group_by="ticker",
+        threads=False,
+        progress=False,
+    )
+    frames = split_batch_frame(df, ticker_codes)
+    for code, frame in frames.items():
+        if frame.empty:
+            logger.warning(f"株価データなし: {code}")
+    return frames
+
+
+def _price_decimal_column(values: np.ndarray, precision: int = 2) -> list[Decimal]:
+    """株価の数値配列を列単位で丸めてDecimalのリストに変換する
+
+    従来の行単位変換は numpy の float64 を round() で丸めており、これは np.round と同じ結果になるため
+    np.round で丸める（組み込み round() に合わせる technical._decimal_column とは中間値の丸めが異なる）。
+    株価に欠損はない前提で、NaN は None ではなく Decimal('NaN') になる。
+    """
+    rounded = np.round(np.asarray(values, dtype=float), precision)
+    return list(map(Decimal, map(str, rounded.tolist())))
+
+
 def transform_price_data(
     df: pd.DataFrame,
     stock_id: int,
 ) -> list[dict]:
-    """DataFrameをDB挿入用の辞書リストに変換する"""
+    """DataFrameをDB挿入用の辞書リストに変換する
+
+    行ごとのSeries生成を避け、列単位で丸め・変換してから1パスでレコードを組み立てる。
+    """
     if df.empty:
         return []
 
-    records = []
-    for idx, row in df.iterrows():
-        record_date = idx.date() if hasattr(idx, "date") else idx
-        records.append({
+    if isinstance(df.index, pd.DatetimeIndex):
+        dates = list(df.index.date)
+    else:
+        dates = [idx.date() if hasattr(idx, "date") else idx for idx in df.index]
+
+    close = df["Close"].to_numpy(dtype=float)
+    adjusted_close = df["Adj Close"].to_numpy(dtype=float) if "Adj Close" in df.columns else close
+    volumes = [int(v) for v in df["Volume"].to_numpy(dtype=float).tolist()]
+
+    columns = zip(
+        dates,
+        _price_decimal_column(df["Open"].to_numpy(dtype=float)),
+        _price_decimal_column(df["High"].to_numpy(dtype=float)),
+        _price_decimal_column(df["Low"].to_numpy(dtype=float)),
+        _price_decimal_column(close),
+        volumes,
+        _price_decimal_column(adjusted_close),
+        strict=True,
+    )
+    return [
+        {
             "stock_id": stock_id,
             "date": record_date,
-            "open": Decimal(str(round(row["Open"], 2))),
-            "high": Decimal(str(round(row["High"], 2))),
-            "low": Decimal(str(round(row["Low"], 2))),
-            "close": Decimal(str(round(row["Close"], 2))),
-            "volume": int(row["Volume"]),
-            "adjusted_close": Decimal(str(round(row.get("Adj Close", row["Close"]), 2))),
-        })
-    return records
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close_,
+            "volume": volume,
+            "adjusted_close": adj_close,
+        }
+        for record_date, open_, high, low, close_, volume, adj_close in columns
+    ]
 
 
 async def upsert_price_records(
     db: AsyncSession,
     records: list[dict],
 ) -> int:
-    """株価レコードをUPSERTする"""
+    """株価レコードをUPSERTする
+
+    値が変わらない行は書き換えず、挿入・更新された行の銘柄を変更として記録する。
+    テクニカル指標の計算済みの日付以前の株価が変わった銘柄は、増分計算の状態を破棄する。
+    複数銘柄のバックフィル等で件数が多い場合も、バインドパラメータの上限に収まる件数ずつ書き込む。
+    """
     if not records:
         return 0
 
-    stmt = pg_insert(StockPrice).values(records)
-    stmt = stmt.on_conflict_do_update(
-        constraint="uq_stock_prices_stock_date",
-        set_={
-            "open": stmt.excluded.open,
-            "high": stmt.excluded.high,
-            "low": stmt.excluded.low,
-            "close": stmt.excluded.close,
-            "volume": stmt.excluded.volume,
-            "adjusted_close": stmt.excluded.adjusted_close,
-        },
-    )
-    await db.execute(stmt)
+    update_columns = ("open", "high", "low", "close", "volume", "adjusted_close")
+    batch_size = max(1, MAX_BIND_PARAMS // len(records[0]))
+    table = StockPrice.__table__
+    for start in range(0, len(records), batch_size):
+        stmt = pg_insert(StockPrice).values(records[start:start + batch_size])
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_stock_prices_stock_date",
+            set_={c: stmt.excluded[c] for c in update_columns},
+            where=or_(*(table.c[c].is_distinct_from(stmt.excluded[c]) for c in update_columns)),
+        ).returning(StockPrice.stock_id, StockPrice.date)
+        result = await db.execute(stmt)
+        changed = result.all()
+        await mark_stocks_changed(db, [stock_id for stock_id, _ in changed])
+        await invalidate_indicator_states(db, changed)
     return len(records)
 
 
+async def store_price_records(db: AsyncSession, records: list[dict]) -> int:
+    """設定に応じた方式（COPY取り込み / UPSERT）で株価レコードを書き込む"""
+    if get_settings().bulk_copy_enabled:
+        return await copy_upsert_records(
+            db, StockPrice, records, only_changed=True, mark_changed=True, invalidate_states=True
+        )
+    return await upsert_price_records(db, records)
+
+
+async def fetch_latest_price_dates(
+    db: AsyncSession,
+    stock_ids: list[int] | None = None,
+) -> dict[int, date]:
+    """銘柄ごとの格納済み最終日（ウォーターマーク）を1クエリで取得する"""
+    query = select(StockPrice.stock_id, func.max(StockPrice.date)).group_by(StockPrice.stock_id)
+    if stock_ids is not None:
+        query = query.where(StockPrice.stock_id.in_(stock_ids))
+    result = await db.execute(query)
+    return {stock_id: last_date for stock_id, last_date in result.all()}
+
+
+def resolve_fetch_start(
+    last_date: date | None,
+    end_date: date,
+    backfill_start: date,
+) -> date | None:
+    """ウォーターマークから取得開始日を決定する（純粋関数）
+
+    Args:
+        last_date: 格納済みの最終日（未格納ならNone）
+        end_date: 取得終了日（yfinanceの仕様上この日を含まない）
+        backfill_start: 未格納銘柄（新規上場など）のバックフィル開始日
+
+    Returns:
+        取得開始日。取得すべき営業日がなければNone
+    """
+    if last_date is None:
+        return backfill_start
+
+    start_date = last_date + timedelta(days=1)
+    if start_date >= end_date or np.busday_count(start_date, end_date) == 0:
+        return None
+    return start_date
+
+
+def _backfill_start_date(today: date) -> date:
+    """未格納銘柄のバックフィル開始日を返す"""
+    return today - timedelta(days=365 * get_settings().price_backfill_years)
+
+
+async def resolve_price_targets(
+    db: AsyncSession,
+    stocks: list[Stock],
+    end_date: date,
+    start_date: date | None = None,
+) -> list[tuple[Stock, date]]:
+    """株価を取得する銘柄と取得開始日
+
+    start_date 指定時は全銘柄をこの日から取得する。未指定時は格納済み最終日の翌日からとし、
+    最新の銘柄は含めない（未格納の銘柄は price_backfill_years 分をバックフィルする）。
+    """
+    if start_date is not None:
+        return [(stock, start_date) for stock in stocks]
+    watermarks = await fetch_latest_price_dates(db)
+    backfill_start = _backfill_start_date(date.today())
+    targets = []
+    for stock in stocks:
+        stock_start = resolve_fetch_start(watermarks.get(stock.id), end_date, backfill_start)
+        if stock_start is not None:
+            targets.append((stock, stock_start))
+    return targets
+
+
 async def collect_stock_prices(
     db: AsyncSession,
     stock: Stock,
     start_date: date | None = None,
     end_date: date | None = None,
 ) -> int:
-    """個別銘柄の株価データを収集してDBに格納する"""
+    """個別銘柄の株価データを収集してDBに格納する
+
+    start_date 未指定時は格納済み最終日の翌日から取得し、最新なら何もしない。
+    """
     today = date.today()
     if end_date is None:
         end_date = today
     if start_date is None:
-        start_date = today - timedelta(days=7)
+        watermarks = await fetch_latest_price_dates(db, [stock.id])
+        start_date = resolve_fetch_start(watermarks.get(stock.id), end_date, _backfill_start_date(today))
+        if start_date is None:
+            logger.info(f"株価は最新のためスキップ: {stock.code}")
+            return 0
+
+    return await _collect_stock_prices_range(db, stock, start_date, end_date)
 
+
+async def _collect_stock_prices_range(
+    db: AsyncSession,
+    stock: Stock,
+    start_date: date,
+    end_date: date,
+) -> int:
+    """個別銘柄の指定期間の株価データを収集してDBに格納する"""
     logger.info(f"株価収集開始: {stock.code} ({start_date} ~ {end_date})")
 
     # yfinanceは同期I/Oのため別スレッドで実行
@@ -119,26 +322,67 @@ async def collect_all_prices(
     db: AsyncSession,
     start_date: date | None = None,
     end_date: date | None = None,
+    batch_size: int | None = None,
+    max_concurrency: int | None = None,
+    stock_ids: Collection[int] | None = None,
+    failed_ids: set[int] | None = None,
 ) -> tuple[int, int, list[str]]:
     """全銘柄の株価データを収集する
 
+    start_date 未指定時は増分取得となり、銘柄ごとの格納済み最終日以降のみを取得する。
+    最新の銘柄はスキップし、未格納の銘柄は price_backfill_years 分をバックフィルする。
+
+    Args:
+        start_date: 取得開始日（指定時は全銘柄をこの日から再取得）
+        batch_size: 1リクエストでまとめて取得する銘柄数（未指定時は設定値。1以下で銘柄ごとに逐次取得）
+        max_concurrency: 同時に取得するチャンク数（未指定時は設定値）
+        stock_ids: 指定時はこの銘柄だけを収集する
+        failed_ids: 指定時はエラーになった銘柄IDを追加する
+
     Returns:
         (成功件数, エラー件数, エラー詳細リスト)
     """
-    result = await db.execute(select(Stock).where(Stock.is_active.is_(True)))
+    settings = get_settings()
+    if batch_size is None:
+        batch_size = settings.price_batch_size
+    if max_concurrency is None:
+        max_concurrency = settings.price_batch_concurrency
+
+    today = date.today()
+    if end_date is None:
+        end_date = today
+
+    query = select(Stock).where(Stock.is_active.is_(True))
+    if stock_ids is not None:
+        query = query.where(Stock.id == any_(literal(sorted(stock_ids), ARRAY(Integer))))
+    result = await db.execute(query)
     stocks = result.scalars().all()
 
+    # 銘柄ごとの取得開始日を決定
+    targets = await resolve_price_targets(db, stocks, end_date, start_date)
+    if start_date is None:
+        logger.info(
+            f"株価増分取得: 対象={len(targets)}銘柄, 最新のためスキップ={len(stocks) - len(targets)}銘柄"
+        )
+
+    if batch_size > 1:
+        return await _collect_prices_batched(
+            db, targets, end_date, batch_size, max(max_concurrency, 1), failed_ids
+        )
+
     success_count = 0
     error_count = 0
     errors: list[str] = []
 
-    for stock in stocks:
+    for stock, stock_start in targets:
         try:
-            count = await collect_stock_prices(db, stock, start_date, end_date)
+            count = await _collect_stock_prices_range(db, stock, stock_start, end_date)
             if count > 0:
                 success_count += 1
         except Exception as e:
             error_count += 1
+            if failed_ids is not None:
+                failed_ids.add(stock.id)
             error_msg = f"{stock.code}: {str(e)}"
             errors.append(error_msg)
             logger.error(f"株価収集エラー: {error_msg}")
@@ -146,11 +390,136 @@ async def collect_all_prices(
     return success_count, error_count, errors
 
 
+async def _collect_prices_batched(
+    db: AsyncSession,
+    targets: list[tuple[Stock, date]],
+    end_date: date,
+    batch_size: int,
+    max_concurrency: int,
+    failed_ids: set[int] | None = None,
+) -> tuple[int, int, list[str]]:
+    """銘柄をチャンクに分けて一括取得し、銘柄ごとにDBへ格納する
+
+    チャンクは取得開始日が同じ銘柄ごとに作る。取得（同期I/O）は最大 max_concurrency
+    チャンクを並行実行し、DB書き込みはセッションを共有するため取得完了順に逐次行う。
+    bulk_copy_enabled 時はチャンク単位でCOPY取り込みする。取り込みはチャンクごとのセーブポイントで行い、
+    失敗したチャンクだけを取り消す。
+    """
+    groups: dict[date, list[Stock]] = {}
+    for stock, stock_start in targets:
+        groups.setdefault(stock_start, []).append(stock)
+
+    chunks: list[tuple[date, list[Stock]]] = [
+        (group_start, group[i:i + batch_size])
+        for group_start, group in sorted(groups.items())
+        for i in range(0, len(group), batch_size)
+    ]
+    semaphore = asyncio.Semaphore(max_concurrency)
+    use_copy = get_settings().bulk_copy_enabled
+
+    async def _fetch_chunk(
+        index: int,
+        chunk_start: date,
+        chunk: list[Stock],
+    ) -> tuple[int, list[Stock], dict[str, pd.DataFrame] | None, Exception | None, float]:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                frames = await asyncio.to_thread(
+                    fetch_price_data_batch, [s.code for s in chunk], chunk_start, end_date
+                )
+                return index, chunk, frames, None, time.perf_counter() - started
+            except Exception as e:
+                return index, chunk, None, e, time.perf_counter() - started
+
+    logger.info(
+        f"株価一括収集開始: {len(targets)}銘柄 / {len(chunks)}チャンク "
+        f"(チャンクサイズ={batch_size}, 並列数={max_concurrency}, ~ {end_date})"
+    )
+
+    success_count = 0
+    error_count = 0
+    errors: list[str] = []
+
+    tasks = [
+        asyncio.create_task(_fetch_chunk(i, chunk_start, chunk))
+        for i, (chunk_start, chunk) in enumerate(chunks)
+    ]
+    for future in asyncio.as_completed(tasks):
+        index, chunk, frames, fetch_error, elapsed = await future
+        label = f"チャンク{index + 1}/{len(chunks)} ({chunk[0].code}〜{chunk[-1].code})"
+
+        if fetch_error is not None:
+            error_count += len(chunk)
+            if failed_ids is not None:
+                failed_ids.update(stock.id for stock in chunk)
+            error_msg = f"{label}: 取得失敗 {elapsed:.1f}秒 - {fetch_error}"
+            errors.append(error_msg)
+            logger.error(f"株価一括取得エラー: {error_msg}")
+            continue
+
+        chunk_success = 0
+        if use_copy:
+            # チャンク全体をCOPYでまとめて取り込む
+            chunk_records: list[dict] = []
+            chunk_stock_ids: list[int] = []
+            for stock in chunk:
+                records = transform_price_data(frames.get(stock.code, pd.DataFrame()), stock.id)
+                if records:
+                    chunk_records.extend(records)
+                    chunk_stock_ids.append(stock.id)
+            try:
+                # 失敗したチャンクの取り込みだけを取り消し、後続のチャンクは同じトランザクションで続ける
+                async with db.begin_nested():
+                    await copy_upsert_records(
+                        db, StockPrice, chunk_records, only_changed=True, mark_changed=True, invalidate_states=True
+                    )
+                chunk_success = len(chunk_stock_ids)
+            except Exception as e:
+                error_count += len(chunk_stock_ids)
+                if failed_ids is not None:
+                    failed_ids.update(chunk_stock_ids)
+                error_msg = f"{label}: 取り込み失敗 - {e}"
+                errors.append(error_msg)
+                logger.error(f"株価一括取り込みエラー: {error_msg}")
+        else:
+            for stock in chunk:
+                try:
+                    records = transform_price_data(frames.get(stock.code, pd.DataFrame()), stock.id)
+                    count = await upsert_price_records(db, records)
+                    if count > 0:
+                        chunk_success += 1
+                except Exception as e:
+                    error_count += 1
+                    if failed_ids is not None:
+                        failed_ids.add(stock.id)
+                    error_msg = f"{stock.code}: {str(e)}"
+                    errors.append(error_msg)
+                    logger.error(f"株価収集エラー: {error_msg}")
+
+        success_count += chunk_success
+        logger.info(f"株価一括収集 {label}: 成功={chunk_success}/{len(chunk)}, 取得時間={elapsed:.1f}秒")
+
+    return success_count, error_count, errors
+
+
 async def collect_historical_prices(
     db: AsyncSession,
     years: int = 5,
+    full_recompute: bool = False,
 ) -> tuple[int, int, list[str]]:
-    """全銘柄のヒストリカルデータを一括取得する"""
+    """全銘柄のヒストリカルデータを一括取得する（格納済みデータに関わらず再取得）
+
+    値が変わった過去の株価は、その銘柄のテクニカル指標の増分計算状態を破棄する。
+
+    Args:
+        full_recompute: Trueの場合、値の変化によらず全銘柄の増分計算状態を破棄し、
+            次回のテクニカル計算で全期間を再計算させる
+    """
     today = date.today()
     start_date = today - timedelta(days=365 * years)
-    return await collect_all_prices(db, start_date, today)
+    result = await collect_all_prices(db, start_date, today)
+    if full_recompute:
+        await db.execute(delete(TechnicalIndicatorState))
+        logger.info("テクニカル指標の増分計算状態を破棄（次回は全期間を再計算）")
+    return result
@@ -33,6 +33,71 @@ class Settings(BaseSettings):
     calculate_technicals_minute: int = 0
     detect_signals_hour: int = 19
     detect_signals_minute: int = 30
+    # スケジューラのリーダー（cronジョブを実行する1プロセス）の選出を試みる間隔（秒）。
+    # リーダーのプロセスが停止した場合、他のプロセスがこの秒数以内に引き継ぐ
+    scheduler_leader_retry_seconds: int = 30
+
+    # 株価一括取得（1チャンクあたりの銘柄数 / 同時実行チャンク数。1以下で銘柄ごとの逐次取得）
+    price_batch_size: int = 50
+    price_batch_concurrency: int = 4
+    # 株価未格納の銘柄（新規上場など）を増分取得時にバックフィルする年数
+    price_backfill_years: int = 5
+
+    # COPYによる一括取り込み（株価・テクニカル指標・ファンダメンタルの書き込みに使用）
+    bulk_copy_enabled: bool = False
+    bulk_copy_batch_size: int = 50_000
+
+    # テクニカル指標UPSERT（1ステートメントあたりの件数 / 値が変わった行のみ更新）
+    indicator_upsert_batch_size: int = 1000
+    indicator_upsert_only_changed: bool = True
+
+    # テクニカル指標のパネル計算（状態のない銘柄を複数銘柄まとめて1クエリ・2次元演算で計算）
+    technical_panel_enabled: bool = True
+    technical_panel_chunk_size: int = 500
+
+    # CPUバウンドな分析処理（パネル指標計算・スコア計算）のワーカープロセス数（1以下で別スレッドで逐次実行）
+    analysis_workers: int = 1
+    # スコア計算で1ワーカーに渡す銘柄数
+    analysis_chunk_size: int = 250
+
+    # シグナルのバックフィルで1回に読み込み・書き込みする日数（暦日）
+    signal_backfill_chunk_days: int = 30
+
+    # 分析パイプラインで同時に実行するステージ数の上限（ステージごとにDBセッションを1つ使う）
+    pipeline_max_concurrency: int = 3
+    # 分析パイプラインの実行方式（dag: ステップ単位 / streaming: 銘柄ごとに取得〜スコア計算まで流す /
+    # distributed: 銘柄のチャンクごとのジョブを pipeline_jobs に登録し、ワーカーが分担して実行する）
+    pipeline_mode: str = "dag"
+    # ストリーミング方式のステージ間キューの大きさ（銘柄数）と、ステージごとの同時実行数・まとめる銘柄数
+    stream_queue_size: int = 32
+    stream_fetch_concurrency: int = 4
+    stream_db_concurrency: int = 2
+    stream_batch_size: int = 20
+    # パイプライン実行中の heartbeat がこの秒数以上途切れた実行は中断したものとみなし、次回の実行で再開する
+    pipeline_run_stale_seconds: int = 300
+    # 分散実行: 1ジョブの銘柄数 / リースの秒数（実行中は1/3ごとに延長）/ 取得回数の上限 / 再試行までの秒数 /
+    # 取得できるジョブがない時に確認する間隔（秒）
+    pipeline_job_chunk_size: int = 100
+    pipeline_job_lease_seconds: int = 300
+    pipeline_job_max_attempts: int = 3
+    pipeline_job_retry_seconds: int = 30
+    pipeline_worker_poll_seconds: float = 5.0
+
+    # バックテストで一括判定するトレード数（トレード × 保有日数の配列を作るため、メモリ使用量に比例する）
+    backtest_trade_chunk_size: int = 20_000
+    # パラメータスイープで1回に評価する組み合わせ数の上限
+    sweep_max_combinations: int = 500
+
+    # ウォークフォワード最適化（学習期間 / 検証期間の営業日数 / 重みの候補数）
+    walk_forward_train_days: int = 250
+    walk_forward_test_days: int = 60
+    walk_forward_candidates: int = 64
+    # シグナル検出でウォークフォワード最適化の重み（scoring_weight_sets）を使うか（Falseは DEFAULT_WEIGHTS）
+    walk_forward_weights_enabled: bool = False
+
+    # 重みを指定した再ランキングのキャッシュ（項目別スコアの保持秒数 / 重みごとの結果の保持件数）
+    rerank_cache_ttl_seconds: int = 300
+    rerank_cache_size: int = 64
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
@@ -17,23 +17,39 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 
 from app.config import get_settings
-from app.database import engine
+from app.database import async_session_factory, engine
 from app.models import Base
-from app.routers import agent, auth, dashboard, data, portfolio, screening, settings as settings_router, signals, stocks, trades, watchlists
-from app.scheduler import shutdown_scheduler, start_scheduler
+from app.routers import (
+    agent,
+    auth,
+    dashboard,
+    data,
+    portfolio,
+    research,
+    screening,
+    signals,
+    stocks,
+    trades,
+    watchlists,
+)
+from app.routers import settings as settings_router
+from app.scheduler import SchedulerLeader
+from app.schema_upgrades import apply_schema_upgrades
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """アプリケーションのライフサイクル管理"""
-    # 起動時にテーブルを自動作成
+    # 起動時にテーブルを自動作成し、既存テーブルに追加した制約・インデックスを適用
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
-    # スケジューラ起動
-    start_scheduler()
+        await apply_schema_upgrades(conn)
+    # スケジューラ起動（リーダーに選出された1プロセスだけが定時実行する）
+    scheduler_leader = SchedulerLeader(async_session_factory)
+    scheduler_leader.start()
     yield
     # 終了時の処理
-    shutdown_scheduler()
+    await scheduler_leader.stop()
 
 
 def create_app() -> FastAPI:
@@ -68,6 +84,7 @@ def create_app() -> FastAPI:
     app.include_router(data.router, prefix="/api/data", tags=["データ管理"])
     app.include_router(settings_router.router, prefix="/api/settings", tags=["設定"])
     app.include_router(agent.router, prefix="/api/agent", tags=["エージェント"])
+    app.include_router(research.router, prefix="/api/research", tags=["リサーチ"])
 
     @app.get("/api/health", tags=["ヘルスチェック"])
     async def health_check() -> dict[str, str]:
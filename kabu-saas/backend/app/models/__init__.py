@@ -1,28 +1,39 @@
 """SQLAlchemy モデル定義"""
 
 from app.models.base import Base
+from app.models.change_tracking import ChangeCursor, StockInputChange
 from app.models.data_collection_log import DataCollectionLog
 from app.models.fundamental import FundamentalData
+from app.models.pipeline import PipelineJob, PipelineRun, PipelineRunItem
 from app.models.portfolio import Portfolio, PortfolioHolding
 from app.models.screening import ScreeningPreset
-from app.models.signal import Signal
+from app.models.signal import ComponentScore, ScoringWeightSet, Signal, SignalBackfillCheckpoint
 from app.models.stock import Stock, StockPrice
-from app.models.technical import TechnicalIndicator
+from app.models.technical import TechnicalIndicator, TechnicalIndicatorState
 from app.models.trade import Trade, TradePlan
 from app.models.user import User, UserSetting
 from app.models.watchlist import Watchlist, WatchlistItem
 
 __all__ = [
     "Base",
+    "ChangeCursor",
+    "ComponentScore",
     "DataCollectionLog",
     "FundamentalData",
+    "PipelineJob",
+    "PipelineRun",
+    "PipelineRunItem",
     "Portfolio",
     "PortfolioHolding",
+    "ScoringWeightSet",
     "ScreeningPreset",
     "Signal",
+    "SignalBackfillCheckpoint",
     "Stock",
+    "StockInputChange",
     "StockPrice",
     "TechnicalIndicator",
+    "TechnicalIndicatorState",
     "Trade",
     "TradePlan",
     "User",
@@ -0,0 +1,51 @@
+"""入力変更追跡モデル"""
+
+from datetime import date, datetime
+
+from sqlalchemy import BigInteger, Date, DateTime, ForeignKey, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class StockInputChange(Base):
+    """銘柄ごとの分析入力（株価・ファンダメンタル・テクニカル指標）の変更記録
+
+    書き込みのたびに行を追加するだけで更新しない（同じ銘柄を並行して書き込むトランザクションが
+    行ロックを待たない）。全カーソルが処理済みの行は advance_change_cursor で削除する。
+    """
+
+    __tablename__ = "stock_input_changes"
+    __table_args__ = (
+        Index("ix_stock_input_changes_change_xid", "change_xid"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    stock_id: Mapped[int] = mapped_column(ForeignKey("stocks.id", ondelete="CASCADE"), nullable=False)
+    change_xid: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, comment="入力を挿入・更新したトランザクションID（pg_current_xact_id）"
+    )
+
+    def __repr__(self) -> str:
+        return f"<StockInputChange(stock_id={self.stock_id}, change_xid={self.change_xid})>"
+
+
+class ChangeCursor(Base):
+    """下流処理ごとの変更読み取り位置"""
+
+    __tablename__ = "change_cursors"
+
+    consumer: Mapped[str] = mapped_column(String(50), primary_key=True, comment="処理名")
+    target_date: Mapped[date] = mapped_column(Date, nullable=False, comment="前回処理した対象日")
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False, comment="前回処理時のルール・重みのハッシュ")
+    consumed_xmin: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        comment="このトランザクションIDより前の変更を処理済み（読み取り時のスナップショットxmin）",
+    )
+    consumed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, comment="前回処理した日時"
+    )
+
+    def __repr__(self) -> str:
+        return f"<ChangeCursor(consumer={self.consumer}, target_date={self.target_date})>"
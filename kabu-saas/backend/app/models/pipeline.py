@@ -0,0 +1,109 @@
+"""パイプライン実行記録モデル"""
+
+from datetime import date, datetime
+from typing import Any
+
+from sqlalchemy import Date, DateTime, ForeignKey, Index, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class PipelineRun(Base):
+    """分析パイプラインの実行（プロセスの再起動・複数ワーカーをまたいで状態を参照する）"""
+
+    __tablename__ = "pipeline_runs"
+    __table_args__ = (
+        Index("ix_pipeline_runs_started_at", "started_at"),
+        Index("ix_pipeline_runs_target_mode", "target_date", "mode"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    target_date: Mapped[date] = mapped_column(Date, nullable=False, comment="対象日")
+    mode: Mapped[str] = mapped_column(String(16), nullable=False, comment="dag / streaming")
+    status: Mapped[str] = mapped_column(String(16), nullable=False, comment="running / completed / failed")
+    summary: Mapped[dict[str, Any]] = mapped_column(
+        JSONB, nullable=False, comment="ステップごとの結果（PipelineResult.summary）"
+    )
+    started_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    heartbeat_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        comment="実行中のプロセスが最後に生存を記録した日時",
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<PipelineRun(id={self.id}, target_date={self.target_date}, status={self.status})>"
+
+
+class PipelineRunItem(Base):
+    """パイプライン実行のステージ × 銘柄ごとの処理状態（再開時に完了済みの銘柄を飛ばす）"""
+
+    __tablename__ = "pipeline_run_items"
+
+    run_id: Mapped[int] = mapped_column(ForeignKey("pipeline_runs.id", ondelete="CASCADE"), primary_key=True)
+    stage: Mapped[str] = mapped_column(String(32), primary_key=True, comment="ステージ名")
+    stock_id: Mapped[int] = mapped_column(ForeignKey("stocks.id", ondelete="CASCADE"), primary_key=True)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, comment="completed / failed")
+    error: Mapped[str | None] = mapped_column(Text, nullable=True, comment="失敗時のエラー")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return f"<PipelineRunItem(run_id={self.run_id}, stage={self.stage}, stock_id={self.stock_id})>"
+
+
+class PipelineJob(Base):
+    """分散実行するパイプラインのジョブ（ワーカーが FOR UPDATE SKIP LOCKED で取得する）"""
+
+    __tablename__ = "pipeline_jobs"
+    __table_args__ = (
+        Index("ix_pipeline_jobs_claim", "status", "lease_until"),
+        Index("ix_pipeline_jobs_run_kind", "run_id", "kind"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    run_id: Mapped[int] = mapped_column(ForeignKey("pipeline_runs.id", ondelete="CASCADE"), nullable=False)
+    kind: Mapped[str] = mapped_column(String(16), nullable=False, comment="stocks / finalize")
+    stock_ids: Mapped[list[int] | None] = mapped_column(
+        ARRAY(Integer), nullable=True, comment="処理する銘柄ID（stocks のみ）"
+    )
+    status: Mapped[str] = mapped_column(
+        String(16), nullable=False, comment="queued / running / completed / failed"
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, comment="取得された回数")
+    worker_id: Mapped[str | None] = mapped_column(String(128), nullable=True, comment="取得したワーカー")
+    lease_until: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="running: リースの期限（過ぎると他のワーカーが取得する）/ queued: 再試行を待つ期限",
+    )
+    result: Mapped[list[dict[str, Any]] | None] = mapped_column(
+        JSONB, nullable=True, comment="ステップごとの結果（PipelineResult.summary の steps の要素）"
+    )
+    error: Mapped[str | None] = mapped_column(Text, nullable=True, comment="最後に失敗した時のエラー")
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return f"<PipelineJob(id={self.id}, run_id={self.run_id}, kind={self.kind}, status={self.status})>"
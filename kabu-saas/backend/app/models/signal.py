@@ -4,8 +4,8 @@ from datetime import date, datetime
 from decimal import Decimal
 from typing import Any
 
-from sqlalchemy import Date, DateTime, ForeignKey, Index, Numeric, String, func
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Date, DateTime, ForeignKey, Index, Numeric, SmallInteger, String, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
@@ -16,6 +16,7 @@ class Signal(Base):
 
     __tablename__ = "signals"
     __table_args__ = (
+        UniqueConstraint("stock_id", "date", "signal_type", name="uq_signals_stock_date_type"),
         Index("ix_signals_date_type_score", "date", "signal_type", "score"),
         Index("ix_signals_stock_date_desc", "stock_id", "date"),
     )
@@ -39,3 +40,67 @@ class Signal(Base):
 
     def __repr__(self) -> str:
         return f"<Signal(stock_id={self.stock_id}, type={self.signal_type}, score={self.score})>"
+
+
+class ComponentScore(Base):
+    """銘柄・日付ごとの項目別スコア（重みを変えた再ランキング用）"""
+
+    __tablename__ = "component_scores"
+    __table_args__ = (
+        Index("ix_component_scores_date", "date"),
+    )
+
+    stock_id: Mapped[int] = mapped_column(ForeignKey("stocks.id", ondelete="CASCADE"), primary_key=True)
+    date: Mapped[date] = mapped_column(Date, primary_key=True, comment="スコア算出日")
+    components: Mapped[list[int]] = mapped_column(
+        ARRAY(SmallInteger), nullable=False, comment="項目別スコア(0-100)。並びは scoring.COMPONENT_NAMES"
+    )
+
+    def __repr__(self) -> str:
+        return f"<ComponentScore(stock_id={self.stock_id}, date={self.date})>"
+
+
+class SignalBackfillCheckpoint(Base):
+    """シグナルのバックフィルで完了した日付チャンク"""
+
+    __tablename__ = "signal_backfill_checkpoints"
+
+    chunk_start: Mapped[date] = mapped_column(Date, primary_key=True, comment="チャンクの開始日")
+    chunk_end: Mapped[date] = mapped_column(Date, nullable=False, comment="チャンクの終了日")
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False, comment="計算時の閾値・重みのハッシュ")
+    signal_count: Mapped[int] = mapped_column(nullable=False, comment="書き込んだシグナル件数")
+    completed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return f"<SignalBackfillCheckpoint(chunk_start={self.chunk_start}, chunk_end={self.chunk_end})>"
+
+
+class ScoringWeightSet(Base):
+    """ウォークフォワード最適化で学習した重み（effective_from 以降のスコア計算に使う）"""
+
+    __tablename__ = "scoring_weight_sets"
+
+    effective_from: Mapped[date] = mapped_column(Date, primary_key=True, comment="適用開始日（検証期間の開始日）")
+    effective_to: Mapped[date] = mapped_column(Date, nullable=False, comment="検証期間の終了日")
+    weights: Mapped[dict[str, float]] = mapped_column(JSONB, nullable=False, comment="項目ごとの重み")
+    train_start: Mapped[date] = mapped_column(Date, nullable=False, comment="学習期間の開始日")
+    train_end: Mapped[date] = mapped_column(Date, nullable=False, comment="学習期間の終了日")
+    objective: Mapped[str] = mapped_column(String(32), nullable=False, comment="重みの選択に使った目的関数")
+    train_score: Mapped[float | None] = mapped_column(nullable=True, comment="学習期間の目的関数の値")
+    oos_score: Mapped[float | None] = mapped_column(nullable=True, comment="検証期間の目的関数の値")
+    baseline_oos_score: Mapped[float | None] = mapped_column(
+        nullable=True, comment="検証期間のDEFAULT_WEIGHTSでの目的関数の値"
+    )
+    oos_metrics: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False, comment="検証期間のバックテスト結果")
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return f"<ScoringWeightSet(effective_from={self.effective_from}, effective_to={self.effective_to})>"
@@ -1,9 +1,11 @@
 """テクニカル指標モデル"""
 
-from datetime import date
+from datetime import date, datetime
 from decimal import Decimal
+from typing import Any
 
-from sqlalchemy import BigInteger, Date, ForeignKey, Index, Numeric, UniqueConstraint
+from sqlalchemy import BigInteger, Date, DateTime, ForeignKey, Index, Numeric, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
@@ -51,3 +53,24 @@ class TechnicalIndicator(Base):
 
     def __repr__(self) -> str:
         return f"<TechnicalIndicator(stock_id={self.stock_id}, date={self.date})>"
+
+
+class TechnicalIndicatorState(Base):
+    """テクニカル指標の増分計算状態"""
+
+    __tablename__ = "technical_indicator_states"
+
+    stock_id: Mapped[int] = mapped_column(ForeignKey("stocks.id", ondelete="CASCADE"), primary_key=True)
+    last_date: Mapped[date] = mapped_column(Date, nullable=False, comment="状態に反映済みの最終日")
+    state: Mapped[dict[str, Any]] = mapped_column(
+        JSONB, nullable=False, comment="EMA値・RSI平均・直近ウィンドウ等"
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return f"<TechnicalIndicatorState(stock_id={self.stock_id}, last_date={self.last_date})>"
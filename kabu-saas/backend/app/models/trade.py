@@ -3,7 +3,7 @@
 from datetime import date, datetime
 from decimal import Decimal
 
-from sqlalchemy import Date, DateTime, ForeignKey, Index, Numeric, String, Text, func
+from sqlalchemy import Date, DateTime, ForeignKey, Index, Numeric, String, Text, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
@@ -44,6 +44,15 @@ class TradePlan(Base):
     """売買プラン"""
 
     __tablename__ = "trade_plans"
+    __table_args__ = (
+        # 同じシグナルの有効なプランは1件だけ（再実行時は既存のプランを更新する）
+        Index(
+            "uq_trade_plans_active_signal",
+            "signal_id",
+            unique=True,
+            postgresql_where=text("status = 'active' AND signal_id IS NOT NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     stock_id: Mapped[int] = mapped_column(ForeignKey("stocks.id", ondelete="CASCADE"), nullable=False)
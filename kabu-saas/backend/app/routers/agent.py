@@ -6,11 +6,12 @@
 import asyncio
 import logging
 import threading
+from concurrent.futures import Future
 from datetime import date, datetime, timezone
 from decimal import Decimal
 from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
@@ -26,7 +27,8 @@ from app.schemas.agent import (
     SignalReason,
     TodayActionsResponse,
 )
-from app.services.pipeline import get_pipeline_status, run_pipeline
+from app.services.pipeline import PipelineAlreadyRunningError, run_pipeline
+from app.services.run_store import load_pipeline_status
 
 logger = logging.getLogger(__name__)
 
@@ -92,8 +94,8 @@ async def get_today_actions(
     """今日の推奨アクションを取得する（認証不要）"""
     today = date.today()
 
-    # パイプライン状態
-    pipeline_info = get_pipeline_status()
+    # パイプライン状態（他のワーカー・プロセスでの実行も含む）
+    pipeline_info = await load_pipeline_status(db)
     pipeline_status = pipeline_info["status"] if pipeline_info else "not_run"
     pipeline_last_run = pipeline_info["started_at"] if pipeline_info else None
 
@@ -174,8 +176,12 @@ def _generate_summary(
     return "。".join(parts) + "。"
 
 
-def _run_pipeline_in_thread() -> None:
-    """別スレッド＋専用DB接続でパイプラインを実行する"""
+def _run_pipeline_in_thread(lock_result: Future[bool]) -> None:
+    """別スレッド＋専用DB接続でパイプラインを実行する
+
+    Args:
+        lock_result: パイプラインのロックを取得できたかを設定する（取得を試みる前に失敗した場合は例外）
+    """
     settings = get_settings()
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
@@ -194,33 +200,53 @@ def _run_pipeline_in_thread() -> None:
         )
 
         async def _run() -> None:
-            async with bg_session_factory() as db:
-                await run_pipeline(db)
-            await bg_engine.dispose()
+            try:
+                await run_pipeline(bg_session_factory, on_lock=lock_result.set_result)
+            finally:
+                await bg_engine.dispose()
 
         loop.run_until_complete(_run())
+    except PipelineAlreadyRunningError as e:
+        logger.info(f"バックグラウンドパイプライン スキップ: {e}")
     except Exception as e:
         logger.error(f"バックグラウンドパイプライン失敗: {e}")
+        if not lock_result.done():
+            lock_result.set_exception(e)
     finally:
         loop.close()
 
 
 @router.post("/run-pipeline")
 async def trigger_pipeline() -> dict[str, str]:
-    """分析パイプラインを手動実行する（認証不要）"""
-    current = get_pipeline_status()
-    if current and current["status"] == "running":
-        return {"status": "already_running", "message": "パイプラインは既に実行中です"}
-
-    thread = threading.Thread(target=_run_pipeline_in_thread, daemon=True)
+    """分析パイプラインを手動実行する（認証不要）
+
+    バックグラウンドのスレッドがパイプラインのアドバイザリロックを取得できたかが確定してから応答する。
+    ロックは実行するスレッドの接続が保持したままパイプラインを実行するため、確認と開始の間に
+    他のワーカー・レプリカが開始することはない。他で実行中の場合は already_running を返す。
+    """
+    lock_result: Future[bool] = Future()
+    thread = threading.Thread(target=_run_pipeline_in_thread, args=(lock_result,), daemon=True)
     thread.start()
+    try:
+        acquired = await asyncio.wrap_future(lock_result)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"分析パイプラインを開始できませんでした: {e}"
+        ) from e
+    if not acquired:
+        return {"status": "already_running", "message": "パイプラインは既に実行中です"}
     return {"status": "triggered", "message": "分析パイプラインをバックグラウンドで開始しました"}
 
 
 @router.get("/pipeline-status")
-async def pipeline_status() -> dict[str, Any]:
-    """パイプライン実行状態を取得する（認証不要）"""
-    info = get_pipeline_status()
+async def pipeline_status(
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> dict[str, Any]:
+    """パイプライン実行状態を取得する（認証不要）
+
+    状態はDB（pipeline_runs）から読むため、どのワーカーで実行したパイプラインでも同じ結果を返す。
+    """
+    info = await load_pipeline_status(db)
     if info is None:
         return {"status": "not_run", "message": "パイプラインは未実行です"}
     return info
@@ -4,10 +4,11 @@ import asyncio
 from datetime import date
 from typing import Annotated, Any
 
-from fastapi import APIRouter, BackgroundTasks, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.analysis.signal_detector import backfill_signals
 from app.collectors.fundamental_collector import collect_all_fundamentals
 from app.collectors.master_collector import get_active_stock_count, seed_initial_stocks
 from app.collectors.price_collector import collect_all_prices, collect_historical_prices
@@ -19,10 +20,13 @@ from app.models.user import User
 router = APIRouter()
 
 
-async def _run_collection_in_background() -> None:
+async def _run_collection_in_background(historical: bool = False, full_recompute: bool = False) -> None:
     """バックグラウンドでデータ収集を実行する"""
     async with async_session_factory() as db:
-        await collect_all_prices(db)
+        if historical:
+            await collect_historical_prices(db, full_recompute=full_recompute)
+        else:
+            await collect_all_prices(db)
         await collect_all_fundamentals(db)
         await db.commit()
 
@@ -32,12 +36,36 @@ async def trigger_data_collection(
     background_tasks: BackgroundTasks,
     _current_user: Annotated[User, Depends(get_current_user)],
     historical: bool = Query(default=False, description="ヒストリカルデータを取得するか"),
+    full_recompute: bool = Query(
+        default=False, description="ヒストリカル取得後、テクニカル指標を全期間再計算させるか（historical時のみ）"
+    ),
 ) -> dict[str, str]:
     """データ収集の手動実行"""
-    background_tasks.add_task(_run_collection_in_background)
+    background_tasks.add_task(_run_collection_in_background, historical, full_recompute)
     return {"status": "triggered", "message": "データ収集ジョブをバックグラウンドで開始しました"}
 
 
+async def _run_signal_backfill_in_background(start_date: date, end_date: date, restart: bool) -> None:
+    """バックグラウンドでシグナルのバックフィルを実行する（チャンクごとにコミット）"""
+    async with async_session_factory() as db:
+        await backfill_signals(db, start_date, end_date, restart=restart)
+
+
+@router.post("/backfill-signals")
+async def trigger_signal_backfill(
+    background_tasks: BackgroundTasks,
+    _current_user: Annotated[User, Depends(get_current_user)],
+    start_date: date,
+    end_date: date,
+    restart: bool = Query(default=False, description="完了済みのチャンクも計算し直すか"),
+) -> dict[str, str]:
+    """期間内のシグナルを再計算（中断した場合は同じ期間で再実行すると続きから再開）"""
+    if start_date > end_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="開始日は終了日以前にしてください")
+    background_tasks.add_task(_run_signal_backfill_in_background, start_date, end_date, restart)
+    return {"status": "triggered", "message": f"シグナルのバックフィル（{start_date} ~ {end_date}）を開始しました"}
+
+
 @router.post("/seed")
 async def seed_stocks(
     db: Annotated[AsyncSession, Depends(get_db)],
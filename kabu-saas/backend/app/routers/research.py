@@ -0,0 +1,93 @@
+"""リサーチAPIルーター（バックテスト）"""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.analysis.backtest import BacktestConfig, run_backtest
+from app.analysis.sweep import SweepResult, SweepSpace, run_sweep
+from app.database import get_db
+from app.dependencies import get_current_user
+from app.models.user import User
+from app.schemas.research import BacktestRequest, BacktestResponse, SweepItem, SweepRequest, SweepResponse
+
+router = APIRouter()
+
+
+@router.post("/backtest", response_model=BacktestResponse)
+async def backtest_signals(
+    request: BacktestRequest,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    _current_user: Annotated[User, Depends(get_current_user)],
+) -> BacktestResponse:
+    """期間内の買いシグナルを売買プランどおりに売買した場合の成績（的中率・損益・ドローダウン・建玉）"""
+    config = BacktestConfig(
+        take_profit_rates=tuple(request.take_profit_rates),
+        stop_loss_rate=request.stop_loss_rate,
+        max_position_ratio=request.max_position_ratio,
+        total_capital=request.total_capital,
+        entry_window_days=request.entry_window_days,
+        max_holding_days=request.max_holding_days,
+        min_score=request.min_score,
+    )
+    report = await run_backtest(db, request.start_date, request.end_date, config)
+    if report is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="期間内に買いシグナルがありません")
+    return BacktestResponse.model_validate(report)
+
+
+def _sweep_item(result: SweepResult) -> SweepItem:
+    """リーダーボードの1行をレスポンス形式に変換する"""
+    params = result.params
+    return SweepItem(
+        rank=result.rank,
+        buy_threshold=params.buy_threshold,
+        sell_threshold=params.sell_threshold,
+        weights=params.weights,
+        take_profit_rates=list(params.take_profit_rates),
+        stop_loss_rate=params.stop_loss_rate,
+        objective=result.objective,
+        signals=result.signals,
+        filled=result.filled,
+        win_rate=result.win_rate,
+        average_return=result.average_return,
+        total_return=result.total_return,
+        max_drawdown=result.max_drawdown,
+        target_hit_rates=result.target_hit_rates,
+        stop_loss_hit_rate=result.stop_loss_hit_rate,
+    )
+
+
+@router.post("/sweep", response_model=SweepResponse)
+async def sweep_parameters(
+    request: SweepRequest,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    _current_user: Annotated[User, Depends(get_current_user)],
+) -> SweepResponse:
+    """閾値・重み・利確率・損切り率の組み合わせをバックテストしてリーダーボードを返す"""
+    space = SweepSpace(
+        buy_thresholds=request.buy_thresholds,
+        sell_thresholds=request.sell_thresholds,
+        weights=request.weights,
+        take_profit_rates=[tuple(rates) for rates in request.take_profit_rates],
+        stop_loss_rates=request.stop_loss_rates,
+    )
+    try:
+        leaderboard = await run_sweep(
+            db,
+            request.start_date,
+            request.end_date,
+            space,
+            objective=request.objective,
+            samples=request.samples,
+            seed=request.seed,
+            min_trades=request.min_trades,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from None
+    return SweepResponse(
+        objective=request.objective,
+        evaluated=len(leaderboard),
+        items=[_sweep_item(result) for result in leaderboard[:request.top]],
+    )
@@ -3,14 +3,16 @@
 from datetime import date
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
+from app.analysis.rerank import rerank_universe
 from app.database import get_db
 from app.models.signal import Signal
-from app.schemas.signal import SignalResponse
+from app.models.stock import Stock
+from app.schemas.signal import RerankItem, RerankRequest, RerankResponse, SignalResponse
 
 router = APIRouter()
 
@@ -50,3 +52,39 @@ async def get_sell_signals(
     query = query.order_by(Signal.date.desc()).limit(limit)
     result = await db.execute(query)
     return [SignalResponse.model_validate(s) for s in result.scalars().all()]
+
+
+@router.post("/rerank", response_model=RerankResponse)
+async def rerank_signals(
+    request: RerankRequest,
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> RerankResponse:
+    """指定した重みで全銘柄を再ランキング（保存済みの項目別スコアから計算）"""
+    ranked = await rerank_universe(db, request.weights, request.target_date)
+    if ranked is None or len(ranked) == 0:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="項目別スコアがありません")
+
+    top = slice(0, request.limit)
+    stock_ids = ranked.stock_ids[top].tolist()
+    result = await db.execute(select(Stock).where(Stock.id.in_(stock_ids)))
+    stocks = {stock.id: stock for stock in result.scalars().all()}
+
+    items = [
+        RerankItem(
+            stock_id=stock_id,
+            code=stocks[stock_id].code,
+            name=stocks[stock_id].name,
+            total_score=total,
+            technical_score=technical,
+            fundamental_score=fundamental,
+        )
+        for stock_id, total, technical, fundamental in zip(
+            stock_ids,
+            ranked.total_score[top].tolist(),
+            ranked.technical_score[top].tolist(),
+            ranked.fundamental_score[top].tolist(),
+            strict=True,
+        )
+        if stock_id in stocks
+    ]
+    return RerankResponse(date=ranked.date, weights_hash=ranked.weights_hash, total=len(ranked), items=items)
@@ -3,9 +3,12 @@
 APSchedulerを使用して日次パイプラインを定時実行する。
 スケジューラジョブはBackgroundScheduler（別スレッド）で実行し、
 専用のDBエンジンを使ってメインイベントループをブロックしない。
+複数のAPIプロセス・レプリカで起動した場合も、アドバイザリロックで選ばれた1プロセス（リーダー）だけが
+スケジューラを起動する（SchedulerLeader）。
 """
 
 import asyncio
+import contextlib
 import logging
 
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -13,7 +16,8 @@ from apscheduler.triggers.cron import CronTrigger
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.config import get_settings
-from app.services.pipeline import run_pipeline
+from app.services.advisory_lock import SCHEDULER_LEADER_LOCK, AdvisoryLock, advisory_lock
+from app.services.pipeline import PipelineAlreadyRunningError, run_pipeline
 
 logger = logging.getLogger(__name__)
 
@@ -41,12 +45,15 @@ def _run_daily_pipeline_sync() -> None:
         )
 
         async def _run() -> None:
-            async with bg_session_factory() as db:
-                result = await run_pipeline(db)
+            try:
+                result = await run_pipeline(bg_session_factory)
                 logger.info(f"日次パイプラインジョブ完了: {result.status}")
-            await bg_engine.dispose()
+            finally:
+                await bg_engine.dispose()
 
         loop.run_until_complete(_run())
+    except PipelineAlreadyRunningError as e:
+        logger.info(f"日次パイプラインジョブ スキップ: {e}")
     except Exception as e:
         logger.error(f"日次パイプラインジョブ失敗: {e}")
     finally:
@@ -86,3 +93,59 @@ def shutdown_scheduler() -> None:
         _scheduler.shutdown(wait=False)
         logger.info("スケジューラ停止")
         _scheduler = None
+
+
+class SchedulerLeader:
+    """スケジューラのリーダー選出
+
+    すべてのAPIプロセスで起動し、SCHEDULER_LEADER_LOCK を取得できた1プロセスだけがスケジューラを起動する。
+    リーダーはロックを保持する接続を scheduler_leader_retry_seconds ごとに確認し、接続が切れたらスケジューラを止める。
+    リーダーのプロセスが停止すると接続とともにロックが解放され、他のプロセスが次の選出で引き継ぐ。
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        retry_seconds: float | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.retry_seconds = retry_seconds or get_settings().scheduler_leader_retry_seconds
+        self.is_leader = False
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """リーダー選出を開始する（実行中のイベントループで動く）"""
+        self._task = asyncio.create_task(self._run(), name="scheduler-leader")
+
+    async def stop(self) -> None:
+        """リーダー選出を止め、リーダーならスケジューラを停止してロックを解放する"""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with advisory_lock(self.session_factory, SCHEDULER_LEADER_LOCK) as lock:
+                    if lock.acquired:
+                        await self._lead(lock)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"スケジューラのリーダー選出エラー: {e}")
+            await asyncio.sleep(self.retry_seconds)
+
+    async def _lead(self, lock: AdvisoryLock) -> None:
+        self.is_leader = True
+        logger.info("スケジューラのリーダーに選出されました")
+        start_scheduler()
+        try:
+            while True:
+                await asyncio.sleep(self.retry_seconds)
+                await lock.check()
+        finally:
+            shutdown_scheduler()
+            self.is_leader = False
+            logger.info("スケジューラのリーダーを退きました")
@@ -0,0 +1,103 @@
+"""既存テーブルのスキーマ更新モジュール
+
+Base.metadata.create_all はテーブルを新規作成するだけで、既存のテーブルに制約・インデックスを追加しない。
+モデルに追加した制約・インデックスのうち、既存データの整理が必要なものをここで定義し、
+Alembic のリビジョンと起動時の apply_schema_upgrades の両方から同じSQLで適用する。
+各更新は適用済みかを確認してから実行するため、何度実行しても結果は変わらない。
+"""
+
+import logging
+from dataclasses import dataclass
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.services.advisory_lock import lock_key
+
+logger = logging.getLogger(__name__)
+
+# 複数のプロセスが同時に起動しても、スキーマ更新は1プロセスずつ実行する
+SCHEMA_UPGRADE_LOCK = "kabu-saas:schema-upgrade"
+
+
+@dataclass(frozen=True)
+class SchemaUpgrade:
+    """既存データを整理してから制約・インデックスを追加する更新"""
+    name: str
+    # 適用済みなら1行返すSQL
+    applied_sql: str
+    # 順に実行するSQL
+    statements: tuple[str, ...]
+
+
+SIGNALS_UNIQUE_STOCK_DATE_TYPE = SchemaUpgrade(
+    name="uq_signals_stock_date_type",
+    applied_sql="SELECT 1 FROM pg_constraint WHERE conname = 'uq_signals_stock_date_type'",
+    statements=(
+        # 重複したシグナルは最新（idが最大）の行を残す。削除する行を参照するプランは
+        # ON DELETE SET NULL で紐付けが外れるため、先に残す行へ付け替える
+        """
+        UPDATE trade_plans
+        SET signal_id = ranked.keep_id
+        FROM (
+            SELECT id, max(id) OVER (PARTITION BY stock_id, date, signal_type) AS keep_id
+            FROM signals
+        ) AS ranked
+        WHERE trade_plans.signal_id = ranked.id AND ranked.id <> ranked.keep_id
+        """,
+        """
+        DELETE FROM signals
+        USING signals AS newer
+        WHERE newer.stock_id = signals.stock_id
+          AND newer.date = signals.date
+          AND newer.signal_type = signals.signal_type
+          AND newer.id > signals.id
+        """,
+        "ALTER TABLE signals ADD CONSTRAINT uq_signals_stock_date_type UNIQUE (stock_id, date, signal_type)",
+    ),
+)
+
+TRADE_PLANS_UNIQUE_ACTIVE_SIGNAL = SchemaUpgrade(
+    name="uq_trade_plans_active_signal",
+    applied_sql="SELECT 1 FROM pg_indexes WHERE indexname = 'uq_trade_plans_active_signal'",
+    statements=(
+        # 同じシグナルの有効なプランが複数ある場合は最新（idが最大）のプランだけを有効のまま残す
+        """
+        UPDATE trade_plans
+        SET status = 'cancelled', updated_at = now()
+        FROM trade_plans AS newer
+        WHERE newer.signal_id = trade_plans.signal_id
+          AND newer.status = 'active'
+          AND trade_plans.status = 'active'
+          AND newer.id > trade_plans.id
+        """,
+        """
+        CREATE UNIQUE INDEX uq_trade_plans_active_signal ON trade_plans (signal_id)
+        WHERE status = 'active' AND signal_id IS NOT NULL
+        """,
+    ),
+)
+
+# 適用順（シグナルの重複を整理するとプランの付け替えで有効なプランが重複しうるため、プランを後にする）
+SCHEMA_UPGRADES: tuple[SchemaUpgrade, ...] = (
+    SIGNALS_UNIQUE_STOCK_DATE_TYPE,
+    TRADE_PLANS_UNIQUE_ACTIVE_SIGNAL,
+)
+
+
+async def apply_schema_upgrades(conn: AsyncConnection) -> list[str]:
+    """未適用のスキーマ更新を適用する（create_all の後、同じトランザクションで呼ぶ）
+
+    Returns:
+        適用した更新の名前
+    """
+    await conn.execute(select(func.pg_advisory_xact_lock(lock_key(SCHEMA_UPGRADE_LOCK))))
+    applied: list[str] = []
+    for upgrade in SCHEMA_UPGRADES:
+        if (await conn.execute(text(upgrade.applied_sql))).first() is not None:
+            continue
+        for statement in upgrade.statements:
+            await conn.execute(text(statement))
+        logger.info(f"スキーマ更新 {upgrade.name} を適用")
+        applied.append(upgrade.name)
+    return applied
@@ -0,0 +1,142 @@
+"""リサーチ（バックテスト）スキーマ"""
+
+from datetime import date
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from app.analysis.scoring import DEFAULT_WEIGHTS, validate_weights
+from app.analysis.signal_detector import BUY_THRESHOLD, SELL_THRESHOLD
+from app.analysis.sweep import OBJECTIVES
+from app.analysis.trade_planner import DEFAULT_MAX_POSITION_RATIO, DEFAULT_STOP_LOSS_RATE, DEFAULT_TAKE_PROFIT_RATES
+
+
+def _validate_take_profit_rates(rates: list[float]) -> list[float]:
+    if any(rate <= 0 for rate in rates) or rates != sorted(rates):
+        raise ValueError("利確率は正の値を昇順で指定してください")
+    return rates
+
+
+class BacktestRequest(BaseModel):
+    """バックテストリクエスト（未指定の項目は売買プランのデフォルト設定）"""
+
+    start_date: date
+    end_date: date
+    min_score: float | None = None
+    take_profit_rates: list[float] = Field(default_factory=lambda: list(DEFAULT_TAKE_PROFIT_RATES), min_length=1)
+    stop_loss_rate: float = Field(default=DEFAULT_STOP_LOSS_RATE, gt=0, lt=1)
+    max_position_ratio: float = Field(default=DEFAULT_MAX_POSITION_RATIO, gt=0, le=1)
+    total_capital: float = Field(default=1_000_000, gt=0)
+    entry_window_days: int = Field(default=5, ge=1, le=60)
+    max_holding_days: int = Field(default=60, ge=1, le=500)
+
+    @model_validator(mode="after")
+    def _validate_ranges(self) -> "BacktestRequest":
+        if self.start_date > self.end_date:
+            raise ValueError("開始日は終了日以前にしてください")
+        _validate_take_profit_rates(self.take_profit_rates)
+        return self
+
+
+class BacktestResponse(BaseModel):
+    """バックテスト結果"""
+
+    start_date: date
+    end_date: date
+    signals: int
+    filled: int
+    fill_rate: float
+    target_hit_rates: list[float]
+    stop_loss_rate: float
+    sell_signal_rate: float
+    expired_rate: float
+    win_rate: float
+    average_return: float
+    median_return: float
+    average_holding_days: float
+    total_pnl: float
+    total_return: float
+    max_drawdown: float
+    average_exposure: float
+    max_exposure: float
+    max_open_positions: int
+    equity_dates: list[date]
+    equity: list[float]
+
+    model_config = {"from_attributes": True}
+
+
+class SweepRequest(BaseModel):
+    """パラメータスイープリクエスト（各パラメータの候補の全組み合わせ、または samples 組の無作為抽出を評価）"""
+
+    start_date: date
+    end_date: date
+    buy_thresholds: list[float] = Field(default_factory=lambda: [BUY_THRESHOLD], min_length=1)
+    sell_thresholds: list[float] = Field(default_factory=lambda: [SELL_THRESHOLD], min_length=1)
+    weights: list[dict[str, float]] = Field(default_factory=lambda: [dict(DEFAULT_WEIGHTS)], min_length=1)
+    take_profit_rates: list[list[float]] = Field(
+        default_factory=lambda: [list(DEFAULT_TAKE_PROFIT_RATES)], min_length=1
+    )
+    stop_loss_rates: list[float] = Field(default_factory=lambda: [DEFAULT_STOP_LOSS_RATE], min_length=1)
+    samples: int | None = Field(default=None, ge=1)
+    seed: int = 0
+    objective: str = "total_return"
+    min_trades: int = Field(default=0, ge=0)
+    top: int = Field(default=20, ge=1, le=500)
+
+    @field_validator("weights")
+    @classmethod
+    def _validate_weights(cls, value: list[dict[str, float]]) -> list[dict[str, float]]:
+        return [validate_weights(weights) for weights in value]
+
+    @field_validator("take_profit_rates")
+    @classmethod
+    def _validate_take_profit_rates(cls, value: list[list[float]]) -> list[list[float]]:
+        return [_validate_take_profit_rates(rates) for rates in value]
+
+    @field_validator("stop_loss_rates")
+    @classmethod
+    def _validate_stop_loss_rates(cls, value: list[float]) -> list[float]:
+        if any(not 0 < rate < 1 for rate in value):
+            raise ValueError("損切り率は0より大きく1未満で指定してください")
+        return value
+
+    @field_validator("objective")
+    @classmethod
+    def _validate_objective(cls, value: str) -> str:
+        if value not in OBJECTIVES:
+            raise ValueError(f"目的関数は次のいずれかを指定してください: {', '.join(OBJECTIVES)}")
+        return value
+
+    @model_validator(mode="after")
+    def _validate_period(self) -> "SweepRequest":
+        if self.start_date > self.end_date:
+            raise ValueError("開始日は終了日以前にしてください")
+        return self
+
+
+class SweepItem(BaseModel):
+    """リーダーボードの1行"""
+
+    rank: int
+    buy_threshold: float
+    sell_threshold: float
+    weights: dict[str, float]
+    take_profit_rates: list[float]
+    stop_loss_rate: float
+    objective: float | None
+    signals: int
+    filled: int
+    win_rate: float
+    average_return: float
+    total_return: float
+    max_drawdown: float
+    target_hit_rates: list[float]
+    stop_loss_hit_rate: float
+
+
+class SweepResponse(BaseModel):
+    """パラメータスイープ結果（目的関数の降順）"""
+
+    objective: str
+    evaluated: int
+    items: list[SweepItem]
@@ -4,7 +4,9 @@ from datetime import date, datetime
 from decimal import Decimal
 from typing import Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
+
+from app.analysis.scoring import validate_weights
 
 
 class SignalResponse(BaseModel):
@@ -21,3 +23,36 @@ class SignalResponse(BaseModel):
     created_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class RerankRequest(BaseModel):
+    """重みを指定した再ランキングリクエスト"""
+
+    weights: dict[str, float]
+    target_date: date | None = None
+    limit: int = Field(default=50, ge=1, le=500)
+
+    @field_validator("weights")
+    @classmethod
+    def _validate_weights(cls, value: dict[str, float]) -> dict[str, float]:
+        return validate_weights(value)
+
+
+class RerankItem(BaseModel):
+    """再ランキング結果の1銘柄"""
+
+    stock_id: int
+    code: str
+    name: str
+    total_score: float
+    technical_score: float
+    fundamental_score: float
+
+
+class RerankResponse(BaseModel):
+    """再ランキングレスポンス"""
+
+    date: date
+    weights_hash: str
+    total: int
+    items: list[RerankItem]
@@ -0,0 +1,69 @@
+"""PostgreSQL アドバイザリロックモジュール
+
+同じDBを使うすべてのプロセス・レプリカの間で排他するためのロック。
+ロックはDB接続（セッション）に結び付くため、ロック中はセッションを閉じずに接続を保持する。
+接続は AUTOCOMMIT で使い、ロック中もトランザクションを開いたままにしない。
+プロセスが停止して接続が切れるとPostgreSQLがロックを解放するため、残ったロックで他のプロセスが止まることはない。
+"""
+
+import hashlib
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# 分析パイプラインの実行（同時に1つだけ）
+PIPELINE_LOCK = "kabu-saas:pipeline"
+# スケジューラのリーダー（cronジョブを実行するプロセス）
+SCHEDULER_LEADER_LOCK = "kabu-saas:scheduler-leader"
+
+
+def lock_key(name: str) -> int:
+    """ロック名から pg_advisory_lock の64bitキーを求める（プロセス・ノードによらず同じ値）"""
+    return int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big", signed=True)
+
+
+@dataclass
+class AdvisoryLock:
+    """取得を試みたロック"""
+    name: str
+    acquired: bool
+    connection: AsyncConnection
+
+    async def check(self) -> None:
+        """ロックを保持している接続が生きていることを確認する
+
+        Raises:
+            Exception: 接続が切れている場合（ロックはPostgreSQLが解放済み）
+        """
+        await self.connection.execute(select(1))
+
+
+@asynccontextmanager
+async def advisory_lock(
+    session_factory: async_sessionmaker[AsyncSession],
+    name: str,
+) -> AsyncIterator[AdvisoryLock]:
+    """ロックの取得を試み、ブロックを抜けるときに解放する（他のプロセスが保持している場合は待たない）
+
+    取得できたかは acquired で判定する。
+    """
+    key = lock_key(name)
+    async with session_factory() as db:
+        connection = await db.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+        acquired = bool(await connection.scalar(select(func.pg_try_advisory_lock(key))))
+        try:
+            yield AdvisoryLock(name, acquired, connection)
+        finally:
+            if acquired:
+                try:
+                    await connection.execute(select(func.pg_advisory_unlock(key)))
+                except Exception as e:
+                    # 接続が切れている場合、ロックはすでに解放されている
+                    logger.warning(f"アドバイザリロック {name} の解放に失敗: {e}")
+
@@ -0,0 +1,182 @@
+"""DAG実行モジュール
+
+依存関係を宣言したステージを、依存先がすべて完了したものから並行して実行する。
+ステージごとに、実行可能になってから開始するまでの待ち時間（同時実行数の上限による）と実行時間を記録し、
+全体の所要時間を決めたステージの並び（クリティカルパス）を求める。
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """DAGの1ステージ"""
+    name: str
+    run: Callable[[], Awaitable[Any]]
+    # 完了を待つステージ名
+    depends_on: tuple[str, ...] = ()
+
+
+@dataclass
+class StageRun:
+    """ステージの実行記録（時刻はDAG開始からの経過秒）"""
+    name: str
+    depends_on: tuple[str, ...] = ()
+    # 依存先がすべて完了し、実行可能になった時刻
+    ready_at: float | None = None
+    started_at: float | None = None
+    finished_at: float | None = None
+    result: Any = None
+    error: Exception | None = None
+    # 依存先が失敗したため実行しなかった
+    skipped: bool = False
+
+    @property
+    def succeeded(self) -> bool:
+        return self.finished_at is not None and self.error is None
+
+    @property
+    def queue_seconds(self) -> float:
+        """実行可能になってから開始するまでの待ち時間"""
+        if self.ready_at is None or self.started_at is None:
+            return 0.0
+        return self.started_at - self.ready_at
+
+    @property
+    def wall_seconds(self) -> float:
+        """実行時間"""
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+
+@dataclass
+class DagRun:
+    """DAG全体の実行結果"""
+    # ステージ名 → 実行記録（依存先が先に来る順）
+    runs: dict[str, StageRun] = field(default_factory=dict)
+    # 最後に完了したステージから、それを待たせた依存先を順にたどった経路（先頭が最初のステージ）
+    critical_path: list[str] = field(default_factory=list)
+    total_seconds: float = 0.0
+
+    @property
+    def errors(self) -> list[Exception]:
+        return [run.error for run in self.runs.values() if run.error is not None]
+
+
+def validate_stages(stages: Iterable[Stage]) -> list[Stage]:
+    """ステージを依存先が先に来る順に並べる
+
+    Raises:
+        ValueError: ステージ名の重複、存在しない依存先、または循環依存がある場合
+    """
+    by_name: dict[str, Stage] = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"ステージ名が重複しています: {stage.name}")
+        by_name[stage.name] = stage
+    for stage in by_name.values():
+        unknown = [name for name in stage.depends_on if name not in by_name]
+        if unknown:
+            raise ValueError(f"ステージ {stage.name} の依存先が存在しません: {', '.join(unknown)}")
+
+    ordered: list[Stage] = []
+    # 0: 未訪問 / 1: 訪問中 / 2: 完了
+    state = dict.fromkeys(by_name, 0)
+
+    def visit(name: str, path: list[str]) -> None:
+        if state[name] == 2:
+            return
+        if state[name] == 1:
+            raise ValueError(f"ステージが循環依存しています: {' -> '.join([*path, name])}")
+        state[name] = 1
+        for dependency in by_name[name].depends_on:
+            visit(dependency, [*path, name])
+        state[name] = 2
+        ordered.append(by_name[name])
+
+    for name in by_name:
+        visit(name, [])
+    return ordered
+
+
+def critical_path(runs: dict[str, StageRun]) -> list[str]:
+    """最後に完了したステージから、最も遅く完了した依存先を順にたどる"""
+    finished = {name: run for name, run in runs.items() if run.finished_at is not None}
+    if not finished:
+        return []
+    current = max(finished.values(), key=lambda run: run.finished_at)
+    path = [current.name]
+    while True:
+        dependencies = [finished[name] for name in current.depends_on if name in finished]
+        if not dependencies:
+            break
+        current = max(dependencies, key=lambda run: run.finished_at)
+        path.append(current.name)
+    return path[::-1]
+
+
+async def run_dag(
+    stages: Iterable[Stage],
+    max_concurrency: int | None = None,
+    on_stage_done: Callable[[StageRun], Awaitable[None] | None] | None = None,
+) -> DagRun:
+    """依存先がすべて完了したステージから並行して実行する
+
+    ステージの例外は記録して続行し、そのステージに（間接的に）依存するステージは実行しない。
+
+    Args:
+        max_concurrency: 同時に実行するステージ数の上限（未指定時は無制限）
+        on_stage_done: ステージの完了・失敗・スキップのたびに呼ぶ関数（コルーチン関数の場合は完了を待つ）
+
+    Raises:
+        ValueError: ステージの宣言が不正な場合（validate_stages）
+    """
+    ordered = validate_stages(stages)
+    dag = DagRun(runs={stage.name: StageRun(stage.name, stage.depends_on) for stage in ordered})
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+    origin = time.monotonic()
+    tasks: dict[str, asyncio.Task] = {}
+
+    async def execute(stage: Stage) -> None:
+        run = dag.runs[stage.name]
+        if stage.depends_on:
+            await asyncio.wait([tasks[name] for name in stage.depends_on])
+        if not all(dag.runs[name].succeeded for name in stage.depends_on):
+            run.skipped = True
+            logger.warning(f"ステージ {stage.name} スキップ: 依存先が失敗しました")
+        else:
+            run.ready_at = time.monotonic() - origin
+            if semaphore is not None:
+                await semaphore.acquire()
+            try:
+                run.started_at = time.monotonic() - origin
+                run.result = await stage.run()
+            except Exception as e:
+                run.error = e
+                logger.error(f"ステージ {stage.name} 失敗: {e}")
+            finally:
+                run.finished_at = time.monotonic() - origin
+                if semaphore is not None:
+                    semaphore.release()
+        if on_stage_done is not None:
+            outcome = on_stage_done(run)
+            if inspect.isawaitable(outcome):
+                await outcome
+
+    # 依存先のタスクが先に作られるよう、並べ替えた順に作成する
+    for stage in ordered:
+        tasks[stage.name] = asyncio.create_task(execute(stage), name=f"stage:{stage.name}")
+    await asyncio.gather(*tasks.values())
+
+    dag.total_seconds = time.monotonic() - origin
+    dag.critical_path = critical_path(dag.runs)
+    return dag
@@ -0,0 +1,224 @@
+"""パイプラインジョブキューモジュール
+
+分散実行するパイプラインのジョブを pipeline_jobs に保存し、任意の数のワーカー（プロセス・ノード）が
+SELECT ... FOR UPDATE SKIP LOCKED で1件ずつ取得する。ロック中の行は飛ばすため、ワーカー同士は待ち合わない。
+取得したジョブにはリース（lease_until）を付け、実行中のワーカーが延長する。ワーカーが停止してリースが切れた
+ジョブは他のワーカーが取得し直し、取得回数が上限に達したジョブは失敗とする。
+finalize ジョブ（シグナル検出・売買プラン生成の集約）は、同じ実行の stocks ジョブがすべて終わるまで取得しない。
+"""
+
+import logging
+from collections.abc import Iterable
+from datetime import timedelta
+from typing import Any, cast
+
+from sqlalchemy import CursorResult, Select, and_, exists, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.pipeline import PipelineJob
+
+logger = logging.getLogger(__name__)
+
+JOB_STOCKS = "stocks"
+JOB_FINALIZE = "finalize"
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+
+async def enqueue_jobs(
+    db: AsyncSession,
+    run_id: int,
+    kind: str,
+    stock_chunks: Iterable[list[int] | None],
+) -> int:
+    """ジョブを登録する（コミットは呼び出し側）
+
+    Returns:
+        登録したジョブ数
+    """
+    rows = [
+        {"run_id": run_id, "kind": kind, "stock_ids": chunk, "status": JOB_QUEUED, "attempts": 0}
+        for chunk in stock_chunks
+    ]
+    if rows:
+        await db.execute(pg_insert(PipelineJob).values(rows))
+    return len(rows)
+
+
+def _claimable_query(run_id: int | None) -> Select[PipelineJob]:
+    now = func.now()
+    pending = aliased(PipelineJob)
+    # 同じ実行に終わっていない stocks ジョブがある finalize ジョブは取得しない
+    stocks_pending = exists().where(
+        pending.run_id == PipelineJob.run_id,
+        pending.kind == JOB_STOCKS,
+        pending.status.in_([JOB_QUEUED, JOB_RUNNING]),
+    )
+    query = (
+        select(PipelineJob)
+        .where(
+            PipelineJob.status.in_([JOB_QUEUED, JOB_RUNNING]),
+            or_(PipelineJob.lease_until.is_(None), PipelineJob.lease_until <= now),
+            or_(PipelineJob.kind == JOB_STOCKS, and_(PipelineJob.kind == JOB_FINALIZE, ~stocks_pending)),
+        )
+        .order_by(PipelineJob.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    if run_id is not None:
+        query = query.where(PipelineJob.run_id == run_id)
+    return query
+
+
+async def claim_job(
+    db: AsyncSession,
+    worker_id: str,
+    lease_seconds: float,
+    max_attempts: int,
+    run_id: int | None = None,
+) -> PipelineJob | None:
+    """取得できるジョブを1件取得し、リースを付けてコミットする
+
+    待機中のジョブと、リースが切れた実行中のジョブを対象とする。
+    リースが切れたジョブの取得回数が max_attempts に達している場合は失敗にして次のジョブを探す。
+
+    Args:
+        run_id: 指定時はこの実行のジョブだけを取得する
+
+    Returns:
+        取得したジョブ（取得できるジョブがない場合はNone）
+    """
+    while True:
+        result = await db.execute(_claimable_query(run_id))
+        job = result.scalar_one_or_none()
+        if job is None:
+            await db.commit()
+            return None
+
+        if job.status == JOB_RUNNING and job.attempts >= max_attempts:
+            await db.execute(
+                update(PipelineJob)
+                .where(PipelineJob.id == job.id)
+                .values(status=JOB_FAILED, lease_until=None, error=f"リース切れ（{job.worker_id}）: 再試行回数の上限")
+            )
+            await db.commit()
+            logger.error(f"パイプラインジョブ {job.id} 失敗: {job.worker_id} のリース切れが上限回数に達しました")
+            continue
+
+        attempts = job.attempts + 1
+        await db.execute(
+            update(PipelineJob)
+            .where(PipelineJob.id == job.id)
+            .values(
+                status=JOB_RUNNING,
+                attempts=attempts,
+                worker_id=worker_id,
+                lease_until=func.now() + timedelta(seconds=lease_seconds),
+            )
+        )
+        await db.commit()
+        # 更新済みの値をセッションに書き戻さないよう、切り離してから反映する
+        db.expunge(job)
+        job.status, job.attempts, job.worker_id = JOB_RUNNING, attempts, worker_id
+        return job
+
+
+async def renew_lease(db: AsyncSession, job_id: int, worker_id: str, lease_seconds: float) -> bool:
+    """実行中のジョブのリースを延長する（コミットは呼び出し側）
+
+    Returns:
+        延長できたか（リースが切れて他のワーカーが取得していた場合はFalse）
+    """
+    result = cast(CursorResult[Any], await db.execute(
+        update(PipelineJob)
+        .where(PipelineJob.id == job_id, PipelineJob.worker_id == worker_id, PipelineJob.status == JOB_RUNNING)
+        .values(lease_until=func.now() + timedelta(seconds=lease_seconds))
+    ))
+    return result.rowcount > 0
+
+
+async def complete_job(db: AsyncSession, job_id: int, worker_id: str, result: list[dict[str, Any]]) -> bool:
+    """ジョブを完了にする（コミットは呼び出し側）
+
+    Returns:
+        完了にできたか（リースが切れて他のワーカーが取得していた場合はFalse）
+    """
+    updated = cast(CursorResult[Any], await db.execute(
+        update(PipelineJob)
+        .where(PipelineJob.id == job_id, PipelineJob.worker_id == worker_id, PipelineJob.status == JOB_RUNNING)
+        .values(status=JOB_COMPLETED, lease_until=None, result=result, error=None)
+    ))
+    return updated.rowcount > 0
+
+
+async def fail_job(
+    db: AsyncSession,
+    job: PipelineJob,
+    worker_id: str,
+    error: str,
+    max_attempts: int,
+    retry_seconds: float,
+) -> bool:
+    """ジョブの失敗を記録する（コミットは呼び出し側）
+
+    取得回数が max_attempts 未満なら retry_seconds 後に再試行できるよう待機に戻し、上限に達したら失敗とする。
+
+    Returns:
+        再試行するか
+    """
+    retry = job.attempts < max_attempts
+    values: dict[str, Any] = {"error": error}
+    if retry:
+        values.update(status=JOB_QUEUED, lease_until=func.now() + timedelta(seconds=retry_seconds))
+    else:
+        values.update(status=JOB_FAILED, lease_until=None)
+    await db.execute(
+        update(PipelineJob)
+        .where(PipelineJob.id == job.id, PipelineJob.worker_id == worker_id, PipelineJob.status == JOB_RUNNING)
+        .values(**values)
+    )
+    return retry
+
+
+async def requeue_jobs(db: AsyncSession, run_id: int) -> int:
+    """再開する実行の失敗したジョブと finalize ジョブを、取得回数を戻して待機に戻す（コミットは呼び出し側）
+
+    Returns:
+        待機に戻したジョブ数
+    """
+    result = cast(CursorResult[Any], await db.execute(
+        update(PipelineJob)
+        .where(PipelineJob.run_id == run_id, or_(PipelineJob.status == JOB_FAILED, PipelineJob.kind == JOB_FINALIZE))
+        .values(status=JOB_QUEUED, attempts=0, lease_until=None, error=None)
+    ))
+    return result.rowcount
+
+
+async def load_jobs(db: AsyncSession, run_id: int) -> list[PipelineJob]:
+    """実行のジョブ（登録順）"""
+    result = await db.execute(select(PipelineJob).where(PipelineJob.run_id == run_id).order_by(PipelineJob.id))
+    return list(result.scalars().all())
+
+
+async def unfinished_job_count(db: AsyncSession, run_id: int) -> int:
+    """待機中・実行中のジョブ数"""
+    return int(await db.scalar(
+        select(func.count())
+        .select_from(PipelineJob)
+        .where(PipelineJob.run_id == run_id, PipelineJob.status.in_([JOB_QUEUED, JOB_RUNNING]))
+    ) or 0)
+
+
+async def completed_stock_ids(db: AsyncSession, run_id: int) -> frozenset[int]:
+    """完了した stocks ジョブの銘柄ID"""
+    result = await db.execute(
+        select(PipelineJob.stock_ids).where(
+            PipelineJob.run_id == run_id, PipelineJob.kind == JOB_STOCKS, PipelineJob.status == JOB_COMPLETED
+        )
+    )
+    return frozenset(stock_id for stock_ids in result.scalars().all() for stock_id in stock_ids or ())
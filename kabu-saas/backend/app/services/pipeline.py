@@ -1,30 +1,117 @@
 """分析パイプラインオーケストレーター
 
-株価収集 → ファンダメンタル収集 → テクニカル計算 → シグナル検出 → 売買プラン生成
-の5ステップを順序実行する。
+株価収集 → テクニカル計算 → シグナル検出 → 売買プラン生成 と、ファンダメンタル収集
+（シグナル検出の前までに完了すればよい）の5ステップを、依存関係（PIPELINE_STAGES）に従って実行する。
+依存関係のないステップはそれぞれ専用のDBセッションで並行して実行する。並行するステップは同じ行を書き込まない
+（入力の変更は stock_input_changes に追記する）ため、ステップ全体を1トランザクションで実行しても互いを待たない。
+pipeline_mode が streaming の場合は、銘柄ごとに株価取得からシグナル検出までを上限付きのキューで流す。
+distributed の場合は銘柄をチャンクごとのジョブに分けて pipeline_jobs に登録し、任意の数のワーカー
+（run_pipeline_worker）が取得して実行する。
+実行状態は pipeline_runs / pipeline_run_items に保存し、中断・失敗した実行は次回の実行で再開する。
+シグナル検出と売買プラン生成は、同じ対象日の前回実行以降に入力（株価・ファンダメンタル・
+テクニカル指標）が変わった銘柄だけを処理する。対象日やルール・重みが変わった場合は全銘柄を処理する。
 """
 
+import asyncio
+import hashlib
+import json
 import logging
+import os
+import socket
+import time
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass, field
-from datetime import date, datetime, timezone
+from datetime import UTC, date, datetime
+from typing import Any
+
+import pandas as pd
+from sqlalchemy import Integer, any_, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.analysis import trade_planner
+from app.analysis.signal_detector import detect_all_signals, signal_rules_fingerprint
+from app.analysis.technical import calculate_all_technicals, calculate_stock_technicals
+from app.analysis.weight_schedule import load_scoring_weights
+from app.change_tracking import advance_change_cursor, load_changed_stocks
+from app.collectors.fundamental_collector import collect_all_fundamentals
+from app.collectors.price_collector import (
+    collect_all_prices,
+    fetch_price_data_batch,
+    resolve_price_targets,
+    store_price_records,
+    transform_price_data,
+)
+from app.config import get_settings
+from app.models.pipeline import PipelineJob, PipelineRun
+from app.models.signal import Signal
+from app.models.stock import Stock
+from app.services.advisory_lock import PIPELINE_LOCK, advisory_lock
+from app.services.dag import Stage, StageRun, run_dag
+from app.services.job_queue import (
+    JOB_FAILED,
+    JOB_FINALIZE,
+    JOB_STOCKS,
+    claim_job,
+    complete_job,
+    completed_stock_ids,
+    enqueue_jobs,
+    fail_job,
+    load_jobs,
+    renew_lease,
+    requeue_jobs,
+    unfinished_job_count,
+)
+from app.services.planner import generate_system_trade_plans
+from app.services.run_store import (
+    ITEM_FAILED,
+    RUN_COMPLETED,
+    RUN_FAILED,
+    RUN_RUNNING,
+    PipelineRunStore,
+    ResumeState,
+    start_pipeline_run,
+)
+from app.services.streaming import StreamStage, StreamStageStats, run_stream
 
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+logger = logging.getLogger(__name__)
 
-from sqlalchemy import func as sql_func
+# 変更追跡のカーソル名（シグナル検出・売買プラン生成で共有する）
+CHANGE_CONSUMER = "pipeline"
 
-from app.analysis.signal_detector import detect_all_signals
-from app.analysis.technical import calculate_all_technicals
-from app.collectors.fundamental_collector import collect_all_fundamentals
-from app.collectors.price_collector import collect_all_prices, collect_historical_prices
-from app.models.signal import Signal
-from app.models.stock import Stock, StockPrice
-from app.services.planner import generate_system_trade_plan
+STAGE_PRICES = "株価収集"
+STAGE_FUNDAMENTALS = "ファンダメンタル収集"
+STAGE_TECHNICALS = "テクニカル計算"
+STAGE_SIGNALS = "シグナル検出"
+STAGE_PLANS = "売買プラン生成"
+# ストリーミング方式だけのステージ
+STAGE_PRICE_TRANSFORM = "株価変換"
+STAGE_PRICE_STORE = "株価格納"
 
-# テクニカル指標計算に必要な最低データ件数
-MIN_PRICE_RECORDS_FOR_TECHNICALS = 200
+# ステップ → 完了を待つステップ（ファンダメンタル収集は株価収集・テクニカル計算と並行して実行する）。
+# 依存関係のないステップ同士は同じテーブルの行を更新しないこと（行ロックを待ち合い、並行実行にならない）
+PIPELINE_STAGES: dict[str, tuple[str, ...]] = {
+    STAGE_PRICES: (),
+    STAGE_FUNDAMENTALS: (),
+    STAGE_TECHNICALS: (STAGE_PRICES,),
+    STAGE_SIGNALS: (STAGE_FUNDAMENTALS, STAGE_TECHNICALS),
+    STAGE_PLANS: (STAGE_SIGNALS,),
+}
 
-logger = logging.getLogger(__name__)
+
+def rules_fingerprint(weights: dict[str, float] | None = None) -> str:
+    """シグナル検出・売買プラン生成の結果に影響するルール・重みのハッシュ（weights は対象日に有効な重み）"""
+    rules = {
+        "signal": signal_rules_fingerprint(weights),
+        "take_profit_rates": trade_planner.DEFAULT_TAKE_PROFIT_RATES,
+        "stop_loss_rate": trade_planner.DEFAULT_STOP_LOSS_RATE,
+        "max_position_ratio": trade_planner.DEFAULT_MAX_POSITION_RATIO,
+    }
+    return hashlib.sha256(json.dumps(rules, sort_keys=True).encode()).hexdigest()
+
+
+class PipelineAlreadyRunningError(RuntimeError):
+    """他のプロセス・レプリカがパイプラインを実行中"""
 
 
 @dataclass
@@ -34,115 +121,644 @@ class PipelineStepResult:
     success_count: int = 0
     error_count: int = 0
     errors: list[str] = field(default_factory=list)
+    # 依存するステップが失敗したため実行しなかった
+    skipped: bool = False
+    # 実行可能になってから開始するまでの待ち時間 / 実行時間（秒）
+    queue_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    # 最初の銘柄の処理を終えるまでの秒数（ストリーミング方式のみ）
+    first_output_seconds: float | None = None
+    # 再開した実行で、前回までに完了していたため実行しなかった
+    resumed: bool = False
+
+
+def _step_summary(s: PipelineStepResult) -> dict[str, Any]:
+    return {
+        "name": s.name,
+        "success_count": s.success_count,
+        "error_count": s.error_count,
+        "errors": s.errors[:5],
+        "skipped": s.skipped,
+        "resumed": s.resumed,
+        "queue_seconds": round(s.queue_seconds, 3),
+        "wall_seconds": round(s.wall_seconds, 3),
+        "first_output_seconds": round(s.first_output_seconds, 3) if s.first_output_seconds is not None else None,
+    }
 
 
 @dataclass
 class PipelineResult:
     """パイプライン全体の実行結果"""
-    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: datetime = field(default_factory=lambda: datetime.now(UTC))
     finished_at: datetime | None = None
     steps: list[PipelineStepResult] = field(default_factory=list)
-    status: str = "running"
+    status: str = RUN_RUNNING
+    # pipeline_runs のID と、中断した実行を再開したか
+    run_id: int | None = None
+    resumed: bool = False
+    # 所要時間を決めたステップの並びと、パイプライン全体の所要時間（秒）
+    critical_path: list[str] = field(default_factory=list)
+    critical_path_seconds: float = 0.0
 
     @property
     def summary(self) -> dict:
         return {
+            "run_id": self.run_id,
+            "resumed": self.resumed,
             "status": self.status,
             "started_at": self.started_at.isoformat(),
             "finished_at": self.finished_at.isoformat() if self.finished_at else None,
-            "steps": [
-                {
-                    "name": s.name,
-                    "success_count": s.success_count,
-                    "error_count": s.error_count,
-                    "errors": s.errors[:5],
-                }
-                for s in self.steps
-            ],
+            "steps": [_step_summary(s) for s in self.steps],
+            "critical_path": self.critical_path,
+            "critical_path_seconds": round(self.critical_path_seconds, 3),
         }
 
 
-# パイプラインの実行状態をモジュールレベルで保持（シングルプロセス前提）
-_current_pipeline: PipelineResult | None = None
+async def run_pipeline(
+    session_factory: async_sessionmaker[AsyncSession],
+    target_date: date | None = None,
+    full_rescan: bool = False,
+    max_concurrency: int | None = None,
+    mode: str | None = None,
+    on_lock: Callable[[bool], None] | None = None,
+) -> PipelineResult:
+    """分析パイプラインを実行する
+
+    実行状態は pipeline_runs に保存する（run_store）。同じ対象日・方式の前回の実行が失敗または中断していれば
+    その実行を再開し、完了済みのステップ（dag）または完了済みの銘柄（streaming）は処理しない。
+
+    Args:
+        session_factory: ステップごとのDBセッションを作成するファクトリ
+        full_rescan: Trueの場合、入力の変更有無に関わらず全銘柄のシグナル・売買プランを処理する
+        max_concurrency: 同時に実行するステップ数の上限（未指定時は設定値 pipeline_max_concurrency）
+        mode: "dag"、"streaming" または "distributed"（未指定時は設定値 pipeline_mode）
+        on_lock: ロックの取得を試みた直後に、取得できたかを渡して呼び出す（手動実行APIの応答に使う）
+
+    Raises:
+        PipelineAlreadyRunningError: 他のプロセスがパイプラインを実行中の場合（PostgreSQLのアドバイザリロックで判定）
+    """
+    mode = mode or get_settings().pipeline_mode
+    if target_date is None:
+        target_date = date.today()
 
+    # クラスタ全体で同時に1つだけ実行する（他のプロセス・レプリカが実行中なら開始しない）
+    async with advisory_lock(session_factory, PIPELINE_LOCK) as lock:
+        if on_lock is not None:
+            on_lock(lock.acquired)
+        if not lock.acquired:
+            raise PipelineAlreadyRunningError("分析パイプラインは他のプロセスで実行中です")
 
-def get_pipeline_status() -> dict | None:
-    """現在のパイプライン実行状態を取得する"""
-    if _current_pipeline is None:
-        return None
-    return _current_pipeline.summary
+        result = PipelineResult()
+        store, resume = await start_pipeline_run(session_factory, target_date, mode, result.summary)
+        result.run_id = store.run_id
+        result.resumed = resume is not None
 
+        try:
+            async with store.keep_alive():
+                if mode == "streaming":
+                    await _run_streaming(session_factory, target_date, result, store, resume)
+                elif mode == "distributed":
+                    await _run_distributed(session_factory, target_date, result, store, resume)
+                else:
+                    await _run_dag(session_factory, target_date, full_rescan, max_concurrency, result, store, resume)
+            result.status = RUN_COMPLETED
 
-async def run_pipeline(db: AsyncSession, target_date: date | None = None) -> PipelineResult:
-    """分析パイプラインを実行する"""
-    global _current_pipeline
+        except Exception as e:
+            result.status = RUN_FAILED
+            logger.error(f"パイプライン失敗: {e}")
+            raise
+        finally:
+            result.finished_at = datetime.now(UTC)
+            try:
+                await store.save(result.summary, result.status)
+            except Exception as e:
+                logger.error(f"パイプライン実行記録の保存に失敗: {e}")
 
-    if target_date is None:
-        target_date = date.today()
+        return result
 
-    result = PipelineResult()
-    _current_pipeline = result
 
-    try:
-        # Step 0: ヒストリカルデータチェック（初回のみ）
-        needs_historical = await _needs_historical_data(db)
-        if needs_historical:
-            logger.info("パイプライン Step 0: ヒストリカルデータ取得（初回）")
-            step0 = await _run_step("ヒストリカル取得", lambda: collect_historical_prices(db, years=1))
-            result.steps.append(step0)
+async def _run_dag(
+    session_factory: async_sessionmaker[AsyncSession],
+    target_date: date,
+    full_rescan: bool,
+    max_concurrency: int | None,
+    result: PipelineResult,
+    store: PipelineRunStore,
+    resume: ResumeState | None,
+) -> None:
+    """各ステップを PIPELINE_STAGES の依存関係に従い、依存先がすべて完了したものから並行して実行する
+
+    ステップごとに session_factory から専用のセッションを作成してコミットし、完了するたびに実行状態を保存する。
+    各ステップは銘柄ごとに増分で処理する（株価・ファンダメンタルは格納済みの日付以降、テクニカル指標は
+    計算状態以降、シグナル・売買プランは変更追跡のカーソル以降）ため、再開時はステップ単位で飛ばす。
+    """
+    # シグナル検出の処理対象（売買プラン生成と変更カーソルの更新で使う）
+    scope: dict[str, Any] = {}
+
+    async def resolve_scope() -> dict[str, Any]:
+        # 株価・ファンダメンタル・テクニカルで入力が変わった銘柄。
+        # シグナル検出を前回の実行で終えている場合も、カーソルは進んでいないためその銘柄を含む
+        if not scope:
+            async with session_factory() as db:
+                fingerprint = rules_fingerprint(await load_scoring_weights(db, target_date))
+                changes = await load_changed_stocks(db, CHANGE_CONSUMER, target_date, fingerprint)
+            stock_ids = None if full_rescan else changes.stock_ids
+            scope.update(fingerprint=fingerprint, changes=changes, stock_ids=stock_ids)
+            logger.info(
+                "パイプライン 処理対象: "
+                + ("全銘柄" if stock_ids is None else f"入力が変わった{len(stock_ids)}銘柄")
+            )
+        return scope
+
+    async def collect_prices() -> PipelineStepResult:
+        # 格納済み最終日以降の増分。未格納銘柄はバックフィル
+        async with session_factory() as db:
+            step = await _run_step(STAGE_PRICES, lambda: collect_all_prices(db))
             await db.commit()
+        return step
 
-        # Step 1: 株価収集（直近分の更新）
-        logger.info("パイプライン Step 1/5: 株価収集開始")
-        step1 = await _run_step("株価収集", lambda: collect_all_prices(db))
-        result.steps.append(step1)
-        await db.commit()
+    async def collect_fundamentals() -> PipelineStepResult:
+        async with session_factory() as db:
+            step = await _run_step(STAGE_FUNDAMENTALS, lambda: collect_all_fundamentals(db))
+            await db.commit()
+        return step
 
-        # Step 2: ファンダメンタル収集
-        logger.info("パイプライン Step 2/5: ファンダメンタル収集開始")
-        step2 = await _run_step("ファンダメンタル収集", lambda: collect_all_fundamentals(db))
-        result.steps.append(step2)
-        await db.commit()
+    async def calculate_technicals() -> PipelineStepResult:
+        async with session_factory() as db:
+            step = await _run_step(STAGE_TECHNICALS, lambda: calculate_all_technicals(db))
+            await db.commit()
+        return step
+
+    async def detect_signals() -> PipelineStepResult:
+        stock_ids = (await resolve_scope())["stock_ids"]
+        async with session_factory() as db:
+            step = await _run_step(STAGE_SIGNALS, lambda: detect_all_signals(db, target_date, stock_ids))
+            await db.commit()
+        return step
+
+    async def generate_plans() -> PipelineStepResult:
+        # 買いシグナル銘柄にシステム売買プラン生成
+        stock_ids = (await resolve_scope())["stock_ids"]
+        async with session_factory() as db:
+            step = await _run_generate_plans(db, target_date, stock_ids)
+            await db.commit()
+        return step
+
+    runners = {
+        STAGE_PRICES: collect_prices,
+        STAGE_FUNDAMENTALS: collect_fundamentals,
+        STAGE_TECHNICALS: calculate_technicals,
+        STAGE_SIGNALS: detect_signals,
+        STAGE_PLANS: generate_plans,
+    }
+
+    def runner(name: str):
+        completed = resume.steps.get(name) if resume is not None else None
+        if completed is None:
+            return runners[name]
+
+        async def restore() -> PipelineStepResult:
+            logger.info(f"  {name} スキップ: 実行 {store.run_id} で完了済み")
+            return _resumed_step(completed)
+
+        return restore
+
+    async def record(run: StageRun) -> None:
+        step = run.result if isinstance(run.result, PipelineStepResult) else PipelineStepResult(name=run.name)
+        if run.error is not None:
+            step.error_count += 1
+            step.errors.append(str(run.error))
+        if run.skipped:
+            step.skipped = True
+            step.errors.append("依存するステップが失敗したため実行していません")
+        if not step.resumed:
+            step.queue_seconds = run.queue_seconds
+            step.wall_seconds = run.wall_seconds
+        result.steps.append(step)
+        try:
+            await store.save(result.summary)
+        except Exception as e:
+            logger.warning(f"パイプライン実行記録の保存に失敗: {e}")
+
+    logger.info(f"パイプライン開始: {target_date}（実行 {store.run_id}{'、再開' if resume else ''}）")
+    dag = await run_dag(
+        [Stage(name, runner(name), depends_on) for name, depends_on in PIPELINE_STAGES.items()],
+        max_concurrency=max_concurrency or get_settings().pipeline_max_concurrency,
+        on_stage_done=record,
+    )
+    result.critical_path = dag.critical_path
+    result.critical_path_seconds = dag.total_seconds
+    if dag.errors:
+        raise dag.errors[0]
+
+    # 失敗した銘柄を次回も処理するため、エラーがない場合だけ変更を処理済みにする。
+    # シグナル検出を前回の実行で終えている場合は、その後の変更を取りこぼさないよう進めない
+    steps = {step.name: step for step in result.steps}
+    signals = steps[STAGE_SIGNALS]
+    if not signals.resumed and signals.error_count == 0 and steps[STAGE_PLANS].error_count == 0:
+        async with session_factory() as db:
+            await advance_change_cursor(db, CHANGE_CONSUMER, target_date, scope["fingerprint"], scope["changes"])
+            await db.commit()
+
+    logger.info(
+        f"パイプライン完了: {dag.total_seconds:.1f}秒 / クリティカルパス: {' → '.join(dag.critical_path)}"
+    )
+
+
+def _resumed_step(data: dict[str, Any]) -> PipelineStepResult:
+    """前回の実行で完了したステップの結果（PipelineResult.summary の steps の要素）を復元する"""
+    return PipelineStepResult(
+        name=data["name"],
+        success_count=data.get("success_count", 0),
+        error_count=data.get("error_count", 0),
+        errors=list(data.get("errors", [])),
+        queue_seconds=data.get("queue_seconds", 0.0),
+        wall_seconds=data.get("wall_seconds", 0.0),
+        first_output_seconds=data.get("first_output_seconds"),
+        resumed=True,
+    )
+
+
+@dataclass
+class _StreamItem:
+    """ストリーミング方式で流す1銘柄（取得開始日がNoneの銘柄は株価が最新のため取得しない）"""
+    stock: Stock
+    start_date: date | None
+    frame: pd.DataFrame | None = None
+    records: list[dict] | None = None
+
+
+def _stream_step(stats: StreamStageStats) -> PipelineStepResult:
+    return PipelineStepResult(
+        name=stats.name,
+        success_count=stats.processed,
+        error_count=stats.error_count,
+        errors=stats.errors,
+        queue_seconds=stats.queue_seconds,
+        wall_seconds=stats.busy_seconds,
+        first_output_seconds=stats.first_output_seconds,
+    )
 
-        # Step 3: テクニカル指標計算
-        logger.info("パイプライン Step 3/5: テクニカル指標計算開始")
-        step3 = await _run_step("テクニカル計算", lambda: calculate_all_technicals(db))
-        result.steps.append(step3)
-        await db.commit()
 
-        # Step 4: シグナル検出
-        logger.info("パイプライン Step 4/5: シグナル検出開始")
-        step4 = await _run_step("シグナル検出", lambda: detect_all_signals(db, target_date))
-        result.steps.append(step4)
+async def _run_streaming(
+    session_factory: async_sessionmaker[AsyncSession],
+    target_date: date,
+    result: PipelineResult,
+    store: PipelineRunStore,
+    resume: ResumeState | None,
+) -> None:
+    """銘柄ごとに 株価取得 → 変換 → 格納 → テクニカル計算 → シグナル検出 を流す
+
+    全銘柄の株価取得を待たずに、データが揃った銘柄から順にシグナルを保存するため、
+    実行中でも先に処理した銘柄のシグナルは /api/agent/today-actions に表示される。
+    ステージ間は上限付きのキューでつなぎ、処理中の銘柄数（メモリ使用量）は銘柄数によらず一定になる。
+    ファンダメンタル収集は並行して実行し、シグナル検出はその時点で格納済みのファンダメンタルを使う。
+    売買プランは全銘柄のシグナル検出後に一括で生成する。
+    株価格納・テクニカル計算・シグナル検出の銘柄ごとの結果は pipeline_run_items に記録し、
+    再開時はシグナル検出まで終えた銘柄を流さず、終えたステージも処理しない。
+    変更追跡のカーソルは進めない（全銘柄を判定するため）。
+    """
+    settings = get_settings()
+    end_date = date.today()
+    stored = resume.completed(STAGE_PRICE_STORE) if resume is not None else frozenset()
+    calculated = resume.completed(STAGE_TECHNICALS) if resume is not None else frozenset()
+    scored = resume.completed(STAGE_SIGNALS) if resume is not None else frozenset()
+
+    async def fetch(items: list[_StreamItem]) -> tuple[list[_StreamItem], list[str]]:
+        # 取得開始日が同じ銘柄は1リクエストでまとめて取得する（yfinanceは同期I/Oのため別スレッド）
+        groups: dict[date, list[_StreamItem]] = {}
+        for item in items:
+            if item.start_date is not None:
+                groups.setdefault(item.start_date, []).append(item)
+        for start_date, group in groups.items():
+            codes = [item.stock.code for item in group]
+            frames = await asyncio.to_thread(fetch_price_data_batch, codes, start_date, end_date)
+            for item in group:
+                item.frame = frames.get(item.stock.code)
+        return items, []
+
+    async def transform(items: list[_StreamItem]) -> tuple[list[_StreamItem], list[str]]:
+        for item in items:
+            if item.frame is not None:
+                item.records = transform_price_data(item.frame, item.stock.id)
+                item.frame = None
+        return items, []
+
+    async def persist(items: list[_StreamItem]) -> tuple[list[_StreamItem], list[str]]:
+        records = [record for item in items if item.records for record in item.records]
+        if records:
+            async with session_factory() as db:
+                await store_price_records(db, records)
+                await db.commit()
+        for item in items:
+            item.records = None
+        await store.mark_items(STAGE_PRICE_STORE, [item.stock.id for item in items if item.stock.id not in stored])
+        return items, []
+
+    async def technicals(items: list[_StreamItem]) -> tuple[list[_StreamItem], list[str]]:
+        done, errors = [], []
+        async with session_factory() as db:
+            for item in items:
+                if item.stock.id in calculated:
+                    done.append(item)
+                    continue
+                try:
+                    await calculate_stock_technicals(db, item.stock)
+                    await db.commit()
+                    done.append(item)
+                except Exception as e:
+                    await db.rollback()
+                    errors.append(f"{item.stock.code}: {e}")
+                    logger.error(f"テクニカル分析エラー: {item.stock.code} - {e}")
+                    await store.mark_items(STAGE_TECHNICALS, [item.stock.id], ITEM_FAILED, str(e))
+        await store.mark_items(STAGE_TECHNICALS, [item.stock.id for item in done if item.stock.id not in calculated])
+        return done, errors
+
+    async def score(items: list[_StreamItem]) -> tuple[list[_StreamItem], list[str]]:
+        # 少数の銘柄ずつ判定するため、プロセスプールは使わない
+        stock_ids = [item.stock.id for item in items]
+        async with session_factory() as db:
+            _, _, errors = await detect_all_signals(db, target_date, frozenset(stock_ids), workers=1)
+        if errors:
+            await store.mark_items(STAGE_SIGNALS, stock_ids, ITEM_FAILED, "\n".join(errors[:5]))
+            return [], errors
+        await store.mark_items(STAGE_SIGNALS, stock_ids)
+        return items, []
+
+    async def stream_prices() -> None:
+        async with session_factory() as db:
+            stocks = (await db.execute(select(Stock).where(Stock.is_active.is_(True)))).scalars().all()
+            pending = [stock for stock in stocks if stock.id not in scored]
+            targets = [stock for stock in pending if stock.id not in stored]
+            starts = {stock.id: start for stock, start in await resolve_price_targets(db, targets, end_date)}
+        logger.info(
+            f"ストリーミングパイプライン: {len(pending)}銘柄（株価取得対象 {len(starts)}銘柄"
+            + (f"、処理済み {len(stocks) - len(pending)}銘柄" if resume is not None else "")
+            + "）"
+        )
+        fetch_concurrency = max(settings.stream_fetch_concurrency, 1)
+        db_concurrency = max(settings.stream_db_concurrency, 1)
+        batch_size = max(settings.stream_batch_size, 1)
+        stats = await run_stream(
+            (_StreamItem(stock, starts.get(stock.id)) for stock in pending),
+            [
+                StreamStage(STAGE_PRICES, fetch, fetch_concurrency, min(batch_size, settings.price_batch_size)),
+                StreamStage(STAGE_PRICE_TRANSFORM, transform),
+                StreamStage(STAGE_PRICE_STORE, persist, db_concurrency, batch_size),
+                StreamStage(STAGE_TECHNICALS, technicals, db_concurrency, batch_size),
+                StreamStage(STAGE_SIGNALS, score, db_concurrency, batch_size),
+            ],
+            queue_size=settings.stream_queue_size,
+        )
+        result.steps.extend(_stream_step(stage_stats) for stage_stats in stats)
+
+    async def collect_fundamentals() -> None:
+        completed = resume.steps.get(STAGE_FUNDAMENTALS) if resume is not None else None
+        if completed is not None:
+            result.steps.append(_resumed_step(completed))
+            return
+        async with session_factory() as db:
+            step = await _run_step(STAGE_FUNDAMENTALS, lambda: collect_all_fundamentals(db))
+            await db.commit()
+        result.steps.append(step)
+
+    started = time.monotonic()
+    logger.info(f"ストリーミングパイプライン開始: {target_date}（実行 {store.run_id}{'、再開' if resume else ''}）")
+    await asyncio.gather(stream_prices(), collect_fundamentals())
+
+    async with session_factory() as db:
+        step = await _run_generate_plans(db, target_date)
         await db.commit()
+    result.steps.append(step)
+
+    result.critical_path_seconds = time.monotonic() - started
+    logger.info(f"ストリーミングパイプライン完了: {result.critical_path_seconds:.1f}秒")
+
 
-        # Step 5: 買いシグナル銘柄にシステム売買プラン生成
-        logger.info("パイプライン Step 5/5: 売買プラン生成開始")
-        step5 = await _run_generate_plans(db, target_date)
-        result.steps.append(step5)
+async def _run_distributed(
+    session_factory: async_sessionmaker[AsyncSession],
+    target_date: date,
+    result: PipelineResult,
+    store: PipelineRunStore,
+    resume: ResumeState | None,
+) -> None:
+    """銘柄を pipeline_job_chunk_size 件ずつのジョブに分けて登録し、すべて終わるまでワーカーとして実行する
+
+    stocks ジョブはチャンクの銘柄の 株価収集 → ファンダメンタル収集 → テクニカル計算 を行い、
+    finalize ジョブは stocks ジョブがすべて終わった後、完了したチャンクの銘柄のシグナル検出と売買プラン生成を行う。
+    他のプロセス・ノードで run_pipeline_worker を起動すると、ジョブを分担して実行する（ワーカーがなければ
+    この実行だけで処理する）。再開時は失敗したジョブと finalize ジョブ、完了したジョブでエラーになった銘柄だけを
+    再実行する。
+    変更追跡のカーソルは進めない（完了したチャンクの全銘柄を判定するため）。
+    """
+    settings = get_settings()
+    async with session_factory() as db:
+        jobs = await load_jobs(db, store.run_id) if resume is not None else []
+        if jobs:
+            requeued = await requeue_jobs(db, store.run_id)
+            # 完了したジョブのうち、エラーになった銘柄はジョブを作り直して再実行する
+            retry = sorted(await completed_stock_ids(db, store.run_id) - resume.completed(STAGE_TECHNICALS))
+            size = max(settings.pipeline_job_chunk_size, 1)
+            retried = await enqueue_jobs(
+                db, store.run_id, JOB_STOCKS, [retry[i:i + size] for i in range(0, len(retry), size)]
+            )
+            logger.info(
+                f"分散パイプライン 実行 {store.run_id} を再開: {requeued}/{len(jobs)}ジョブを再実行"
+                + (f"、エラーになった{len(retry)}銘柄を{retried}ジョブで再実行" if retry else "")
+            )
+        else:
+            query = select(Stock.id).where(Stock.is_active.is_(True)).order_by(Stock.id)
+            stock_ids = list((await db.execute(query)).scalars().all())
+            size = max(settings.pipeline_job_chunk_size, 1)
+            count = await enqueue_jobs(
+                db, store.run_id, JOB_STOCKS, [stock_ids[i:i + size] for i in range(0, len(stock_ids), size)]
+            )
+            await enqueue_jobs(db, store.run_id, JOB_FINALIZE, [None])
+            logger.info(
+                f"分散パイプライン開始: {target_date}（実行 {store.run_id}）{len(stock_ids)}銘柄 / {count}ジョブ"
+            )
         await db.commit()
 
-        result.status = "completed"
-        logger.info("パイプライン完了")
+    started = time.monotonic()
+    processed = await run_pipeline_worker(session_factory, run_id=store.run_id)
+
+    async with session_factory() as db:
+        jobs = await load_jobs(db, store.run_id)
+    result.steps = _merge_steps(entry for job in jobs for entry in job.result or ())
+    result.critical_path_seconds = time.monotonic() - started
+    failed = [job for job in jobs if job.status == JOB_FAILED]
+    if failed:
+        raise RuntimeError(f"{len(failed)}件のジョブが失敗しました（ジョブ {failed[0].id}: {failed[0].error}）")
+    logger.info(
+        f"分散パイプライン完了: {result.critical_path_seconds:.1f}秒 / このプロセスで実行 {processed}/{len(jobs)}ジョブ"
+    )
+
 
+def _merge_steps(entries: Iterable[dict[str, Any]]) -> list[PipelineStepResult]:
+    """ジョブごとのステップの結果を、ステップ名ごとに合計する（実行時間はワーカーの処理時間の合計）"""
+    merged: dict[str, PipelineStepResult] = {}
+    for data in entries:
+        step = merged.setdefault(data["name"], PipelineStepResult(name=data["name"]))
+        step.success_count += data.get("success_count", 0)
+        step.error_count += data.get("error_count", 0)
+        step.errors.extend(data.get("errors", []))
+        step.wall_seconds += data.get("wall_seconds", 0.0)
+    order = list(PIPELINE_STAGES)
+    return sorted(merged.values(), key=lambda step: order.index(step.name) if step.name in order else len(order))
+
+
+async def run_pipeline_worker(
+    session_factory: async_sessionmaker[AsyncSession],
+    worker_id: str | None = None,
+    run_id: int | None = None,
+    until_idle: bool = False,
+) -> int:
+    """pipeline_jobs からジョブを取得して実行する
+
+    取得できるジョブがない間は pipeline_worker_poll_seconds ごとに確認する。
+    ワーカーを増やすと、同じキューのジョブを分担して実行する。
+
+    Args:
+        worker_id: ワーカーの識別名（未指定時は ホスト名:プロセスID）
+        run_id: 指定時はこの実行のジョブだけを、待機中・実行中のジョブがなくなるまで実行する
+        until_idle: Trueの場合、取得できるジョブがなくなったら終了する（未指定時は停止されるまで実行する）
+
+    Returns:
+        実行したジョブ数
+    """
+    settings = get_settings()
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    processed = 0
+    while True:
+        async with session_factory() as db:
+            job = await claim_job(
+                db, worker_id, settings.pipeline_job_lease_seconds, settings.pipeline_job_max_attempts, run_id
+            )
+            if job is None:
+                remaining = await unfinished_job_count(db, run_id) if run_id is not None else None
+            else:
+                run = await db.get(PipelineRun, job.run_id)
+        if job is None:
+            if remaining == 0 or (run_id is None and until_idle):
+                return processed
+            await asyncio.sleep(settings.pipeline_worker_poll_seconds)
+            continue
+        await _execute_job(session_factory, job, run.target_date, worker_id)
+        processed += 1
+
+
+async def _execute_job(
+    session_factory: async_sessionmaker[AsyncSession],
+    job: PipelineJob,
+    target_date: date,
+    worker_id: str,
+) -> None:
+    """ジョブを実行し、実行中はリースと実行の heartbeat を更新する
+
+    例外が発生したジョブは、取得回数が pipeline_job_max_attempts に達するまで再試行する。
+    """
+    settings = get_settings()
+    lease_seconds = settings.pipeline_job_lease_seconds
+    store = PipelineRunStore(session_factory, job.run_id)
+
+    async def renew() -> None:
+        while True:
+            await asyncio.sleep(max(lease_seconds / 3, 1.0))
+            try:
+                async with session_factory() as db:
+                    renewed = await renew_lease(db, job.id, worker_id, lease_seconds)
+                    await db.commit()
+                await store.heartbeat()
+            except Exception as e:
+                logger.warning(f"パイプラインジョブ {job.id} のリース延長に失敗: {e}")
+            else:
+                if not renewed:
+                    logger.warning(f"パイプラインジョブ {job.id}: リースが切れ、他のワーカーが取得しました")
+
+    logger.info(f"パイプラインジョブ {job.id} 開始: {job.kind} {len(job.stock_ids or ())}銘柄 / {job.attempts}回目")
+    renewal = asyncio.create_task(renew())
+    try:
+        if job.kind == JOB_FINALIZE:
+            steps = await _run_finalize_job(session_factory, job.run_id, target_date, store)
+        else:
+            steps = await _run_stocks_job(session_factory, frozenset(job.stock_ids or ()), store)
     except Exception as e:
-        result.status = "failed"
-        logger.error(f"パイプライン失敗: {e}")
-        raise
+        async with session_factory() as db:
+            retry = await fail_job(
+                db, job, worker_id, str(e), settings.pipeline_job_max_attempts, settings.pipeline_job_retry_seconds
+            )
+            await db.commit()
+        logger.error(f"パイプラインジョブ {job.id} 失敗{'（再試行します）' if retry else ''}: {e}")
+        return
     finally:
-        result.finished_at = datetime.now(timezone.utc)
+        renewal.cancel()
 
-    return result
+    async with session_factory() as db:
+        completed = await complete_job(db, job.id, worker_id, [_step_summary(step) for step in steps])
+        await db.commit()
+    if not completed:
+        logger.warning(f"パイプラインジョブ {job.id}: リースが切れていたため結果を記録しませんでした")
+    await store.heartbeat()
+
+
+async def _run_stocks_job(
+    session_factory: async_sessionmaker[AsyncSession],
+    stock_ids: frozenset[int],
+    store: PipelineRunStore,
+) -> list[PipelineStepResult]:
+    """チャンクの銘柄の 株価収集 → ファンダメンタル収集 → テクニカル計算
+
+    いずれかのステップでエラーになった銘柄は失敗として記録し、再開時に再実行する。
+    """
+    steps = []
+    failed: set[int] = set()
+    async with session_factory() as db:
+        for name, collect in (
+            (STAGE_PRICES, collect_all_prices),
+            (STAGE_FUNDAMENTALS, collect_all_fundamentals),
+            (STAGE_TECHNICALS, calculate_all_technicals),
+        ):
+            started = time.monotonic()
+            failed_ids: set[int] = set()
+            success, error_count, errors = await collect(db, stock_ids=stock_ids, failed_ids=failed_ids)
+            await db.commit()
+            steps.append(
+                PipelineStepResult(name, success, error_count, errors, wall_seconds=time.monotonic() - started)
+            )
+            await store.mark_items(
+                STAGE_TECHNICALS, sorted(failed_ids - failed), ITEM_FAILED, f"{name}: " + "\n".join(errors[:5])
+            )
+            failed |= failed_ids
+    await store.mark_items(STAGE_TECHNICALS, sorted(stock_ids - failed))
+    return steps
 
 
-async def _needs_historical_data(db: AsyncSession) -> bool:
-    """テクニカル指標に必要なデータ量があるかチェックする"""
-    result = await db.execute(
-        select(sql_func.count(StockPrice.id))
-    )
-    total_prices = result.scalar_one()
-    # 30銘柄 x 200日 = 6000件以上あればOK
-    return total_prices < MIN_PRICE_RECORDS_FOR_TECHNICALS * 30
+async def _run_finalize_job(
+    session_factory: async_sessionmaker[AsyncSession],
+    run_id: int,
+    target_date: date,
+    store: PipelineRunStore,
+) -> list[PipelineStepResult]:
+    """完了したチャンクの銘柄のシグナル検出と売買プラン生成"""
+    async with session_factory() as db:
+        stock_ids = await completed_stock_ids(db, run_id)
+        if not stock_ids:
+            logger.warning("  シグナル検出 スキップ: 完了したチャンクなし")
+            return []
+        started = time.monotonic()
+        failed_ids: set[int] = set()
+        success, error_count, errors = await detect_all_signals(db, target_date, stock_ids, failed_ids=failed_ids)
+        await db.commit()
+        signals = PipelineStepResult(
+            STAGE_SIGNALS, success, error_count, errors, wall_seconds=time.monotonic() - started
+        )
+        started = time.monotonic()
+        plans = await _run_generate_plans(db, target_date, stock_ids)
+        await db.commit()
+        plans.wall_seconds = time.monotonic() - started
+    await store.mark_items(STAGE_SIGNALS, sorted(stock_ids - failed_ids))
+    await store.mark_items(STAGE_SIGNALS, sorted(failed_ids), ITEM_FAILED, "\n".join(errors[:5]))
+    return [signals, plans]
 
 
 async def _run_step(
@@ -167,37 +783,45 @@ async def _run_step(
 async def _run_generate_plans(
     db: AsyncSession,
     target_date: date,
+    stock_ids: frozenset[int] | None = None,
 ) -> PipelineStepResult:
-    """当日の買いシグナル銘柄に対してシステム売買プランを生成する"""
-    step = PipelineStepResult(name="売買プラン生成")
+    """当日の買いシグナル銘柄に対してシステム売買プランを生成する
+
+    株価・SMA25の取得とプランの保存はシグナル数によらず一括で行う（シグナルごとのクエリは発行しない）。
+    一括生成が失敗した場合だけシグナルごとに生成し直し、失敗したシグナルをエラーとして数える。
+
+    Args:
+        stock_ids: 指定時はこの銘柄のシグナルだけを処理する
+    """
+    step = PipelineStepResult(name=STAGE_PLANS)
+    if stock_ids is not None and not stock_ids:
+        logger.info("  売買プラン生成 スキップ: 入力が変わった銘柄なし")
+        return step
 
     # 当日の買いシグナルを取得
-    signal_result = await db.execute(
-        select(Signal)
-        .where(
-            Signal.date == target_date,
-            Signal.signal_type == "buy",
-        )
-        .order_by(Signal.score.desc())
+    query = select(Signal).where(
+        Signal.date == target_date,
+        Signal.signal_type == "buy",
     )
+    if stock_ids is not None:
+        query = query.where(Signal.stock_id == any_(literal(sorted(stock_ids), ARRAY(Integer))))
+    signal_result = await db.execute(query.order_by(Signal.score.desc()))
     buy_signals = signal_result.scalars().all()
 
-    for signal in buy_signals:
-        try:
-            stock_result = await db.execute(
-                select(Stock).where(Stock.id == signal.stock_id)
-            )
-            stock = stock_result.scalar_one_or_none()
-            if not stock:
-                continue
-
-            plan = await generate_system_trade_plan(db, stock, signal)
-            if plan:
-                step.success_count += 1
-        except Exception as e:
-            step.error_count += 1
-            step.errors.append(f"signal_id={signal.id}: {str(e)}")
-            logger.error(f"売買プラン生成エラー: signal_id={signal.id} - {e}")
+    try:
+        async with db.begin_nested():
+            step.success_count = await generate_system_trade_plans(db, list(buy_signals), target_date)
+    except Exception as e:
+        # 一括生成に失敗した場合はシグナルごとに生成し直し、失敗したシグナルだけをエラーにする
+        logger.warning(f"売買プラン一括生成に失敗、シグナルごとに再試行: {e}")
+        for signal in buy_signals:
+            try:
+                async with db.begin_nested():
+                    step.success_count += await generate_system_trade_plans(db, [signal], target_date)
+            except Exception as signal_error:
+                step.error_count += 1
+                step.errors.append(f"signal_id={signal.id}: {signal_error}")
+                logger.error(f"売買プラン生成エラー: signal_id={signal.id} - {signal_error}")
 
     logger.info(f"  売買プラン生成 完了: 成功={step.success_count}, エラー={step.error_count}")
     return step
@@ -4,12 +4,16 @@
 """
 
 import logging
-from decimal import Decimal
+from datetime import date
 
-from sqlalchemy import select
+import numpy as np
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.analysis.trade_planner import calculate_trade_plan
+from app.analysis.signal_detector import fetch_latest_rows
+from app.analysis.technical import MAX_BIND_PARAMS
+from app.analysis.trade_planner import calculate_trade_plan, calculate_trade_plans
 from app.models.signal import Signal
 from app.models.stock import Stock, StockPrice
 from app.models.technical import TechnicalIndicator
@@ -18,6 +22,17 @@ from app.models.user import User
 
 logger = logging.getLogger(__name__)
 
+# 売買プランの計算結果から保存する列
+PLAN_COLUMNS = (
+    "entry_price",
+    "target_price_1",
+    "target_price_2",
+    "target_price_3",
+    "stop_loss_price",
+    "position_size",
+    "risk_reward_ratio",
+)
+
 
 async def _fetch_latest_price_and_sma(
     db: AsyncSession,
@@ -82,40 +97,68 @@ async def generate_trade_plan(
     return trade_plan
 
 
-async def generate_system_trade_plan(
+async def generate_system_trade_plans(
     db: AsyncSession,
-    stock: Stock,
-    signal: Signal,
+    signals: list[Signal],
+    target_date: date,
     total_capital: float = 1_000_000,
-) -> TradePlan | None:
-    """エージェント用のシステム売買プランを生成する（ユーザー紐付けなし）"""
-    result = await _fetch_latest_price_and_sma(db, stock)
-    if not result:
-        logger.warning(f"株価データなし、プラン生成スキップ: {stock.code}")
-        return None
-
-    close_price, sma_25 = result
-    plan_result = calculate_trade_plan(
-        close_price=close_price,
-        sma_25=sma_25,
+) -> int:
+    """エージェント用のシステム売買プランをシグナルごとに一括で生成する（ユーザー紐付けなし）
+
+    株価・SMA25は銘柄ごとの target_date 以前の最新値をそれぞれ1クエリで取得し、プランは配列でまとめて計算する。
+    同じシグナルの有効な（active）プランがある場合は追加せず、最新の株価で計算した内容に更新する。
+
+    Returns:
+        生成・更新したプランの件数（株価データがない銘柄のシグナルは飛ばす）
+    """
+    if not signals:
+        return 0
+    stock_ids = {signal.stock_id for signal in signals}
+    prices = await fetch_latest_rows(db, StockPrice, ("close",), target_date, stock_ids)
+    indicators = await fetch_latest_rows(db, TechnicalIndicator, ("sma_25",), target_date, stock_ids)
+
+    targets = [signal for signal in signals if signal.stock_id in prices]
+    skipped = len(signals) - len(targets)
+    if skipped:
+        logger.warning(f"株価データなし、プラン生成スキップ: {skipped}件")
+    if not targets:
+        return 0
+
+    sma_25 = [
+        float(indicators[s.stock_id].sma_25)
+        if s.stock_id in indicators and indicators[s.stock_id].sma_25 else np.nan
+        for s in targets
+    ]
+    plans = calculate_trade_plans(
+        np.array([float(prices[s.stock_id].close) for s in targets]),
+        np.array(sma_25),
         total_capital=total_capital,
     )
-
-    trade_plan = TradePlan(
-        stock_id=stock.id,
-        user_id=None,
-        signal_id=signal.id,
-        plan_type=signal.signal_type,
-        entry_price=plan_result.entry_price,
-        target_price_1=plan_result.target_price_1,
-        target_price_2=plan_result.target_price_2,
-        target_price_3=plan_result.target_price_3,
-        stop_loss_price=plan_result.stop_loss_price,
-        position_size=plan_result.position_size,
-        risk_reward_ratio=plan_result.risk_reward_ratio,
-        status="active",
-    )
-    db.add(trade_plan)
-    await db.flush()
-    logger.info(f"システム売買プラン生成: {stock.code} ({signal.signal_type}, スコア: {signal.score})")
-    return trade_plan
+    rows = [
+        {
+            "stock_id": signal.stock_id,
+            "user_id": None,
+            "signal_id": signal.id,
+            "plan_type": signal.signal_type,
+            **{column: getattr(plan, column) for column in PLAN_COLUMNS},
+            "status": "active",
+        }
+        for signal, plan in zip(targets, plans, strict=True)
+    ]
+
+    batch_size = MAX_BIND_PARAMS // (len(PLAN_COLUMNS) + 5)
+    for start in range(0, len(rows), batch_size):
+        stmt = pg_insert(TradePlan).values(rows[start:start + batch_size])
+        stmt = stmt.on_conflict_do_update(
+            # uq_trade_plans_active_signal（部分ユニークインデックス）と同じ条件
+            index_elements=["signal_id"],
+            index_where=text("status = 'active' AND signal_id IS NOT NULL"),
+            set_={
+                "plan_type": stmt.excluded.plan_type,
+                **{column: stmt.excluded[column] for column in PLAN_COLUMNS},
+                "updated_at": func.now(),
+            },
+        )
+        await db.execute(stmt)
+    logger.info(f"システム売買プラン生成: {len(rows)}件 ({target_date})")
+    return len(rows)
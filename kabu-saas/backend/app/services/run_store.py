@@ -0,0 +1,227 @@
+"""パイプライン実行記録モジュール
+
+分析パイプラインの実行状態を pipeline_runs / pipeline_run_items に保存する。
+状態はプロセスのメモリではなくDBにあるため、再起動後や複数のuvicornワーカーからも同じ状態を参照できる。
+実行中のプロセスは heartbeat_at を定期的に更新し、pipeline_run_stale_seconds 以上更新がない
+実行中（running）の記録は中断したものとみなす。同じ対象日・方式で中断・失敗した実行があれば、
+新しく記録を作らずにその実行を再開し、完了済みのステップ・銘柄を飛ばす。
+実行の開始はアドバイザリロック（PIPELINE_LOCK）で排他するため、ロックを取得した時点で実行中の記録は
+すべて中断したものである。
+"""
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.analysis.technical import MAX_BIND_PARAMS
+from app.config import get_settings
+from app.models.pipeline import PipelineRun, PipelineRunItem
+
+logger = logging.getLogger(__name__)
+
+RUN_RUNNING = "running"
+RUN_COMPLETED = "completed"
+RUN_FAILED = "failed"
+
+ITEM_COMPLETED = "completed"
+ITEM_FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class ResumeState:
+    """再開する実行で完了済みのステップと銘柄"""
+    run_id: int
+    # ステップ名 → 完了時の結果（PipelineResult.summary の steps の要素）
+    steps: dict[str, dict[str, Any]] = field(default_factory=dict)
+    # ステージ名 → 処理を終えた銘柄ID
+    items: dict[str, frozenset[int]] = field(default_factory=dict)
+
+    def completed(self, stage: str) -> frozenset[int]:
+        return self.items.get(stage, frozenset())
+
+
+def _stale_before() -> datetime:
+    return datetime.now(UTC) - timedelta(seconds=get_settings().pipeline_run_stale_seconds)
+
+
+def _is_live(run: PipelineRun) -> bool:
+    """実行中で、heartbeat が途切れていない"""
+    return run.status == RUN_RUNNING and run.heartbeat_at >= _stale_before()
+
+
+async def find_active_run(db: AsyncSession) -> PipelineRun | None:
+    """heartbeat が途切れていない実行中のパイプライン"""
+    result = await db.execute(
+        select(PipelineRun)
+        .where(PipelineRun.status == RUN_RUNNING, PipelineRun.heartbeat_at >= _stale_before())
+        .order_by(PipelineRun.started_at.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def load_pipeline_status(db: AsyncSession) -> dict[str, Any] | None:
+    """直近のパイプライン実行の状態（未実行の場合はNone）
+
+    heartbeat が途切れた実行中の記録は failed として返す。ステージごとに処理を終えた銘柄数も返す。
+    """
+    result = await db.execute(select(PipelineRun).order_by(PipelineRun.started_at.desc()).limit(1))
+    run = result.scalar_one_or_none()
+    if run is None:
+        return None
+
+    counts = await db.execute(
+        select(PipelineRunItem.stage, func.count())
+        .where(PipelineRunItem.run_id == run.id, PipelineRunItem.status == ITEM_COMPLETED)
+        .group_by(PipelineRunItem.stage)
+    )
+    status = run.status if run.status != RUN_RUNNING or _is_live(run) else RUN_FAILED
+    return {
+        **run.summary,
+        "run_id": run.id,
+        "target_date": run.target_date.isoformat(),
+        "mode": run.mode,
+        "status": status,
+        "heartbeat_at": run.heartbeat_at.isoformat(),
+        "completed_items": {stage: count for stage, count in counts.all()},
+    }
+
+
+class PipelineRunStore:
+    """1回のパイプライン実行の記録（書き込みごとに専用のセッションを使う）"""
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], run_id: int) -> None:
+        self.session_factory = session_factory
+        self.run_id = run_id
+
+    async def save(self, summary: dict[str, Any], status: str = RUN_RUNNING) -> None:
+        """実行状態を保存する（heartbeat も更新する）"""
+        values: dict[str, Any] = {"summary": summary, "status": status, "heartbeat_at": func.now()}
+        if status != RUN_RUNNING:
+            values["finished_at"] = func.now()
+        async with self.session_factory() as db:
+            await db.execute(update(PipelineRun).where(PipelineRun.id == self.run_id).values(**values))
+            await db.commit()
+
+    async def heartbeat(self) -> None:
+        async with self.session_factory() as db:
+            await db.execute(
+                update(PipelineRun).where(PipelineRun.id == self.run_id).values(heartbeat_at=func.now())
+            )
+            await db.commit()
+
+    async def mark_items(
+        self,
+        stage: str,
+        stock_ids: list[int],
+        status: str = ITEM_COMPLETED,
+        error: str | None = None,
+    ) -> None:
+        """ステージ × 銘柄の処理状態を記録する（同じステージ・銘柄は上書き）"""
+        if not stock_ids:
+            return
+        rows = [
+            {"run_id": self.run_id, "stage": stage, "stock_id": stock_id, "status": status, "error": error}
+            for stock_id in stock_ids
+        ]
+        batch_size = MAX_BIND_PARAMS // 5
+        async with self.session_factory() as db:
+            for start in range(0, len(rows), batch_size):
+                stmt = pg_insert(PipelineRunItem).values(rows[start:start + batch_size])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["run_id", "stage", "stock_id"],
+                    set_={"status": stmt.excluded.status, "error": stmt.excluded.error, "updated_at": func.now()},
+                )
+                await db.execute(stmt)
+            await db.commit()
+
+    @asynccontextmanager
+    async def keep_alive(self) -> AsyncIterator[None]:
+        """実行中、heartbeat を pipeline_run_stale_seconds の1/3ごとに更新する"""
+        interval = max(get_settings().pipeline_run_stale_seconds / 3, 1.0)
+
+        async def beat() -> None:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.heartbeat()
+                except Exception as e:
+                    logger.warning(f"パイプライン実行記録のheartbeat更新に失敗: {e}")
+
+        task = asyncio.create_task(beat())
+        try:
+            yield
+        finally:
+            task.cancel()
+
+
+def _completed_steps(summary: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    return {
+        step["name"]: step
+        for step in summary.get("steps", [])
+        if step.get("error_count", 0) == 0 and not step.get("skipped", False)
+    }
+
+
+async def start_pipeline_run(
+    session_factory: async_sessionmaker[AsyncSession],
+    target_date: date,
+    mode: str,
+    summary: dict[str, Any],
+) -> tuple[PipelineRunStore, ResumeState | None]:
+    """パイプライン実行の記録を開始する
+
+    同じ対象日・方式の直近の実行が失敗または中断していれば、その実行を再開する。
+    呼び出し側が PIPELINE_LOCK を保持している前提で、実行中のまま残った記録は heartbeat によらず中断とみなす。
+
+    Returns:
+        (実行記録, 再開する場合は完了済みのステップ・銘柄)
+    """
+    async with session_factory() as db:
+        result = await db.execute(
+            select(PipelineRun)
+            .where(PipelineRun.target_date == target_date, PipelineRun.mode == mode)
+            .order_by(PipelineRun.started_at.desc())
+            .limit(1)
+        )
+        previous = result.scalar_one_or_none()
+        if previous is not None and previous.status in (RUN_FAILED, RUN_RUNNING):
+            items = await db.execute(
+                select(PipelineRunItem.stage, PipelineRunItem.stock_id).where(
+                    PipelineRunItem.run_id == previous.id, PipelineRunItem.status == ITEM_COMPLETED
+                )
+            )
+            completed: dict[str, set[int]] = {}
+            for stage, stock_id in items.all():
+                completed.setdefault(stage, set()).add(stock_id)
+            resume = ResumeState(
+                run_id=previous.id,
+                steps=_completed_steps(previous.summary),
+                items={stage: frozenset(ids) for stage, ids in completed.items()},
+            )
+            await db.execute(
+                update(PipelineRun)
+                .where(PipelineRun.id == previous.id)
+                .values(status=RUN_RUNNING, heartbeat_at=func.now(), finished_at=None)
+            )
+            await db.commit()
+            logger.info(
+                f"パイプライン実行 {previous.id} を再開: 完了済みステップ {len(resume.steps)}件 / "
+                f"完了済み銘柄 {', '.join(f'{s}={len(ids)}' for s, ids in resume.items.items()) or 'なし'}"
+            )
+            return PipelineRunStore(session_factory, previous.id), resume
+
+        run = PipelineRun(target_date=target_date, mode=mode, status=RUN_RUNNING, summary=summary)
+        db.add(run)
+        await db.flush()
+        run_id = run.id
+        await db.commit()
+    return PipelineRunStore(session_factory, run_id), None
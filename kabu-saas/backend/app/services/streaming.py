@@ -0,0 +1,125 @@
+"""ストリーミング実行モジュール
+
+要素（銘柄など）を、段ごとに上限付きのキューでつないだステージに順に流す。
+各ステージは concurrency 個のワーカーで処理し、キューにすでに届いている要素を最大 batch_size 件まとめて受け取る
+（バッチが埋まるのは待たない）。下流のキューが一杯の間は上流のワーカーが待つため、
+処理中の要素数はキューの大きさとワーカー数で決まり、要素の総数によらない。
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# キューの終端（ワーカーごとに1つ入れる）
+_DONE = object()
+
+
+@dataclass(frozen=True)
+class StreamStage:
+    """ストリームの1ステージ
+
+    handler は要素のリストを受け取り、(次のステージに渡す要素, エラー詳細) を返す。
+    渡さなかった要素はそのステージで処理を終える。
+    """
+    name: str
+    handler: Callable[[list[Any]], Awaitable[tuple[list[Any], list[str]]]]
+    concurrency: int = 1
+    batch_size: int = 1
+
+
+@dataclass
+class StreamStageStats:
+    """ステージの処理実績（時刻はストリーム開始からの経過秒）"""
+    name: str
+    processed: int = 0
+    error_count: int = 0
+    errors: list[str] = field(default_factory=list)
+    batches: int = 0
+    # ワーカーが処理していた時間の合計 / 要素がこのステージのキューで待った時間の合計
+    busy_seconds: float = 0.0
+    queue_seconds: float = 0.0
+    # 最初の要素の処理を終えた時刻
+    first_output_seconds: float | None = None
+
+
+async def run_stream(
+    items: Iterable[Any],
+    stages: list[StreamStage],
+    queue_size: int,
+) -> list[StreamStageStats]:
+    """要素をステージに順に流し、全要素の処理が終わるまで待つ
+
+    ハンドラの例外はそのバッチの要素のエラーとして記録し、残りの要素の処理は続ける。
+
+    Args:
+        queue_size: ステージ間のキューの最大要素数（上流はキューが空くまで待つ）
+    """
+    if not stages:
+        raise ValueError("ステージを1つ以上指定してください")
+    queues: list[asyncio.Queue] = [asyncio.Queue(maxsize=max(queue_size, 1)) for _ in stages]
+    stats = [StreamStageStats(stage.name) for stage in stages]
+    origin = time.monotonic()
+
+    async def worker(index: int) -> None:
+        stage, queue, stage_stats = stages[index], queues[index], stats[index]
+        downstream = queues[index + 1] if index + 1 < len(stages) else None
+        finished = False
+        while not finished:
+            entry = await queue.get()
+            if entry is _DONE:
+                break
+            entries = [entry]
+            # すでに届いている要素だけをまとめる
+            while len(entries) < stage.batch_size:
+                try:
+                    entry = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if entry is _DONE:
+                    finished = True
+                    break
+                entries.append(entry)
+
+            started = time.monotonic()
+            stage_stats.queue_seconds += sum(started - enqueued for enqueued, _ in entries)
+            batch = [item for _, item in entries]
+            try:
+                outputs, errors = await stage.handler(batch)
+            except Exception as e:
+                outputs, errors = [], [f"{len(batch)}件: {e}"]
+                stage_stats.error_count += len(batch)
+                logger.error(f"ストリーム {stage.name} エラー: {e}")
+            else:
+                stage_stats.error_count += len(errors)
+            stage_stats.errors.extend(errors)
+            stage_stats.processed += len(outputs)
+            stage_stats.batches += 1
+            finished_at = time.monotonic()
+            stage_stats.busy_seconds += finished_at - started
+            if outputs and stage_stats.first_output_seconds is None:
+                stage_stats.first_output_seconds = finished_at - origin
+
+            if downstream is not None:
+                for item in outputs:
+                    await downstream.put((time.monotonic(), item))
+
+    async def run_stage(index: int) -> None:
+        await asyncio.gather(*(worker(index) for _ in range(max(stages[index].concurrency, 1))))
+        # 上流の全ワーカーが終わってから、下流のワーカーに終端を知らせる
+        if index + 1 < len(stages):
+            for _ in range(max(stages[index + 1].concurrency, 1)):
+                await queues[index + 1].put(_DONE)
+
+    async def produce() -> None:
+        for item in items:
+            await queues[0].put((time.monotonic(), item))
+        for _ in range(max(stages[0].concurrency, 1)):
+            await queues[0].put(_DONE)
+
+    await asyncio.gather(produce(), *(run_stage(i) for i in range(len(stages))))
+    return stats
@@ -0,0 +1,68 @@
+"""バックテストベンチマーク: 全トレードの一括シミュレーション
+
+合成した日足（銘柄数 × 営業日数）とランダムな買いシグナルで simulate_trades・summarize_backtest の時間を計測する。
+
+    cd backend
+    python -m benchmarks.bench_backtest --stocks 4000 --days 1250 --signals 200000
+"""
+
+import argparse
+import time
+from datetime import date
+
+import numpy as np
+
+from app.analysis.backtest import BacktestConfig, OHLCPanel, SignalTrades, simulate_trades, summarize_backtest
+
+
+def _make_panel(stocks: int, days: int, seed: int) -> OHLCPanel:
+    rng = np.random.default_rng(seed)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.02, (stocks, days)), axis=1))
+    open_ = close * (1 + rng.normal(0, 0.005, (stocks, days)))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, (stocks, days)))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, (stocks, days)))
+    dates = np.datetime64(date(2020, 1, 1)) + np.arange(days)
+    return OHLCPanel(np.arange(1, stocks + 1), dates, open_, high, low, close)
+
+
+def _make_trades(panel: OHLCPanel, signals: int, seed: int) -> SignalTrades:
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(panel.stock_ids), signals)
+    cols = rng.integers(0, len(panel.dates), signals)
+    return SignalTrades(
+        stock_ids=panel.stock_ids[rows],
+        signal_dates=panel.dates[cols],
+        close_price=panel.close[rows, cols],
+        sma_25=np.full(signals, np.nan),
+    )
+
+
+def main(stocks: int, days: int, signals: int, chunk_size: int) -> None:
+    panel = _make_panel(stocks, days, 0)
+    trades = _make_trades(panel, signals, 1)
+    config = BacktestConfig()
+
+    started = time.perf_counter()
+    results = simulate_trades(panel, trades, config, chunk_size=chunk_size)
+    simulated = time.perf_counter() - started
+    report = summarize_backtest(panel, results, config, date(2020, 1, 1), date(2020, 1, 1))
+    summarized = time.perf_counter() - started - simulated
+
+    print(f"{stocks}銘柄 × {days}日, シグナル{signals}件（{chunk_size}件ずつ判定）")
+    print("| 処理 | 時間 (秒) |")
+    print("|---|---:|")
+    print(f"| simulate_trades | {simulated:.2f} |")
+    print(f"| summarize_backtest | {summarized:.2f} |")
+    print()
+    print(f"約定{report.filled}件, 利確到達率 {[f'{rate:.1%}' for rate in report.target_hit_rates]}, "
+          f"損切り率 {report.stop_loss_rate:.1%}, 最大ドローダウン {report.max_drawdown:.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stocks", type=int, default=4000, help="銘柄数")
+    parser.add_argument("--days", type=int, default=1250, help="営業日数")
+    parser.add_argument("--signals", type=int, default=200_000, help="買いシグナル件数")
+    parser.add_argument("--chunk-size", type=int, default=20_000, help="一括で判定するトレード数")
+    args = parser.parse_args()
+    main(args.stocks, args.days, args.signals, args.chunk_size)
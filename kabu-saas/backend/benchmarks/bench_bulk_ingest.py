@@ -0,0 +1,101 @@
+"""株価取り込みベンチマーク: multi-VALUES UPSERT vs COPY＋マージ
+
+DATABASE_URL の PostgreSQL に合成銘柄・株価を書き込み、計測後にロールバックする。
+
+    cd backend
+    python -m benchmarks.bench_bulk_ingest --sizes 30 500 4000 --days 250
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.bulk_ingest import copy_upsert_records
+from app.collectors.price_collector import upsert_price_records
+from app.config import get_settings
+from app.models.stock import Stock, StockPrice
+
+
+def _generate_records(stock_ids: list[int], days: int) -> dict[int, list[dict]]:
+    """銘柄ごとの合成株価レコードを生成する"""
+    rng = random.Random(42)
+    start = date(2020, 1, 1)
+    records: dict[int, list[dict]] = {}
+    for stock_id in stock_ids:
+        price = rng.uniform(500, 5000)
+        rows = []
+        for i in range(days):
+            price *= 1 + rng.gauss(0, 0.02)
+            value = Decimal(str(round(price, 2)))
+            rows.append({
+                "stock_id": stock_id,
+                "date": start + timedelta(days=i),
+                "open": value,
+                "high": value,
+                "low": value,
+                "close": value,
+                "volume": rng.randint(10_000, 1_000_000),
+                "adjusted_close": value,
+            })
+        records[stock_id] = rows
+    return records
+
+
+async def _create_stocks(db: AsyncSession, size: int) -> list[int]:
+    """合成銘柄を登録する"""
+    result = await db.execute(
+        insert(Stock).returning(Stock.id),
+        [{"code": f"BN{i:06d}.T", "name": f"ベンチ{i}", "is_active": True} for i in range(size)],
+    )
+    return list(result.scalars().all())
+
+
+async def _bench_upsert(db: AsyncSession, records: dict[int, list[dict]]) -> float:
+    """現行方式（銘柄ごとの multi-VALUES UPSERT）"""
+    started = time.perf_counter()
+    for rows in records.values():
+        await upsert_price_records(db, rows)
+    return time.perf_counter() - started
+
+
+async def _bench_copy(db: AsyncSession, records: dict[int, list[dict]]) -> float:
+    """COPY＋集合演算マージ"""
+    started = time.perf_counter()
+    await copy_upsert_records(db, StockPrice, [row for rows in records.values() for row in rows])
+    return time.perf_counter() - started
+
+
+async def main(sizes: list[int], days: int) -> None:
+    settings = get_settings()
+    engine = create_async_engine(settings.database_url, echo=False)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    print("| 銘柄数 | 行数 | UPSERT (秒) | COPY (秒) | 倍率 |")
+    print("|---:|---:|---:|---:|---:|")
+    for size in sizes:
+        timings: dict[str, float] = {}
+        for name, bench in (("upsert", _bench_upsert), ("copy", _bench_copy)):
+            async with session_factory() as db:
+                stock_ids = await _create_stocks(db, size)
+                records = _generate_records(stock_ids, days)
+                timings[name] = await bench(db, records)
+                await db.rollback()
+        rows = size * days
+        speedup = timings["upsert"] / timings["copy"] if timings["copy"] > 0 else float("inf")
+        print(f"| {size} | {rows} | {timings['upsert']:.2f} | {timings['copy']:.2f} | {speedup:.1f}x |")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[30, 500, 4000], help="銘柄数")
+    parser.add_argument("--days", type=int, default=250, help="1銘柄あたりの日数")
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.days))
@@ -0,0 +1,112 @@
+"""テクニカル指標カーネルベンチマーク: pandas vs NumPyカーネル（float64 / float32）
+
+1銘柄あたりの計算時間と一時的なピークメモリ、および多数銘柄分の結果を保持した場合のメモリを比較する。
+
+    cd backend
+    python -m benchmarks.bench_kernels --days 1250 --stocks 1000 --repeat 20
+"""
+
+import argparse
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.analysis.kernels import INDICATOR_NAMES, allocate_indicator_buffer, calculate_indicator_arrays
+from app.analysis.technical import calculate_technical_indicators
+
+
+def _make_prices(days: int, seed: int) -> tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    close = np.round(1000 * np.exp(np.cumsum(rng.normal(0, 0.02, days))), 1)
+    volume = rng.integers(10_000, 1_000_000, days)
+    start = date(2020, 1, 1)
+    df = pd.DataFrame({
+        "date": [start + timedelta(days=i) for i in range(days)],
+        "open": close, "high": close, "low": close, "close": close, "volume": volume,
+    })
+    return df, close, volume
+
+
+def _best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def _peak_memory(func) -> int:
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def _retained_memory(func) -> int:
+    """funcの戻り値を保持したままのメモリ使用量"""
+    tracemalloc.start()
+    kept = func()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+
+def main(days: int, stocks: int, repeat: int) -> None:
+    df, close, volume = _make_prices(days, 0)
+    buffer64 = allocate_indicator_buffer(days)
+    buffer32 = allocate_indicator_buffer(days, np.float32)
+
+    variants = {
+        "pandas": lambda: calculate_technical_indicators(df),
+        "kernel float64": lambda: calculate_indicator_arrays(close, volume),
+        "kernel float64（バッファ再利用）": lambda: calculate_indicator_arrays(close, volume, out=buffer64),
+        "kernel float32（バッファ再利用）": lambda: calculate_indicator_arrays(close, volume, out=buffer32),
+    }
+    print(f"1銘柄 {days}日 × best of {repeat}")
+    print("| 方式 | 時間 (ms) | ピークメモリ (KiB) |")
+    print("|---|---:|---:|")
+    for name, func in variants.items():
+        elapsed = _best_of(func, repeat)
+        peak = _peak_memory(func)
+        print(f"| {name} | {elapsed * 1000:.2f} | {peak / 1024:.0f} |")
+
+    universe = [_make_prices(days, seed)[1:] for seed in range(stocks)]
+    frames = [_make_prices(days, seed)[0] for seed in range(stocks)]
+
+    def _keep_pandas() -> list[pd.DataFrame]:
+        return [calculate_technical_indicators(frame)[list(INDICATOR_NAMES)] for frame in frames]
+
+    def _keep_kernel(dtype: type) -> np.ndarray:
+        out = np.empty((stocks, len(INDICATOR_NAMES), days), dtype=dtype)
+        for i, (c, v) in enumerate(universe):
+            calculate_indicator_arrays(c, v, out=out[i])
+        return out
+
+    print()
+    print(f"{stocks}銘柄分の指標を保持（{days}日）")
+    print("| 方式 | 合計時間 (秒) | 保持メモリ (MiB) |")
+    print("|---|---:|---:|")
+    for name, func in (
+        ("pandas", _keep_pandas),
+        ("kernel float64", lambda: _keep_kernel(np.float64)),
+        ("kernel float32", lambda: _keep_kernel(np.float32)),
+    ):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        print(f"| {name} | {elapsed:.2f} | {_retained_memory(func) / 2**20:.1f} |")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=1250, help="1銘柄あたりの日数")
+    parser.add_argument("--stocks", type=int, default=1000, help="保持メモリを測る銘柄数")
+    parser.add_argument("--repeat", type=int, default=20, help="計測回数（最良値を採用）")
+    args = parser.parse_args()
+    main(args.days, args.stocks, args.repeat)
@@ -0,0 +1,99 @@
+"""テクニカル指標計算ベンチマーク: 銘柄ごと vs パネル形式
+
+合成した銘柄ユニバースについて、DBアクセスを除いた計算部分（指標計算＋レコード変換）を比較する。
+
+    cd backend
+    python -m benchmarks.bench_technical_panel --stocks 4000 --days 1250 --chunk-size 500
+"""
+
+import argparse
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.analysis.technical import calculate_technical_indicators, transform_to_indicator_records
+from app.analysis.technical_panel import build_price_panel, calculate_panel_indicators, split_panel_indicators
+
+
+def _generate_universe(stocks: int, days: int) -> pd.DataFrame:
+    """銘柄ID・日付順の縦持ち株価を生成する（上場日数は銘柄ごとにばらつかせる）"""
+    rng = np.random.default_rng(42)
+    lengths = rng.integers(days // 2, days + 1, stocks)
+    lengths[: stocks // 20] = rng.integers(1, 26, stocks // 20)
+    end = date(2025, 12, 31)
+    all_dates = [end - timedelta(days=days - 1 - i) for i in range(days)]
+
+    frames = []
+    for stock_id, n in enumerate(lengths.tolist(), start=1):
+        close = np.round(rng.uniform(100, 5000) * np.exp(np.cumsum(rng.normal(0, 0.02, n))), 1)
+        frames.append(pd.DataFrame({
+            "stock_id": stock_id,
+            "date": all_dates[days - n:],
+            "close": close,
+            "volume": rng.integers(10_000, 1_000_000, n),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _per_stock(universe: pd.DataFrame, with_records: bool) -> int:
+    """現行方式（銘柄ごとに calculate_technical_indicators）"""
+    rows = 0
+    for stock_id, df in universe.groupby("stock_id", sort=False):
+        frame = df.drop(columns="stock_id").reset_index(drop=True)
+        frame["open"] = frame["high"] = frame["low"] = frame["close"]
+        indicators = calculate_technical_indicators(frame)
+        rows += len(transform_to_indicator_records(indicators, stock_id)) if with_records else len(indicators)
+    return rows
+
+
+def _panel(universe: pd.DataFrame, chunk_size: int, with_records: bool) -> int:
+    """パネル方式（chunk_size銘柄ずつ2次元で計算）"""
+    rows = 0
+    stock_ids = universe["stock_id"].to_numpy()
+    boundaries = np.flatnonzero(np.diff(stock_ids)) + 1
+    starts = np.concatenate([[0], boundaries])
+    for i in range(0, len(starts), chunk_size):
+        begin = starts[i]
+        end = starts[i + chunk_size] if i + chunk_size < len(starts) else len(universe)
+        chunk = universe.iloc[begin:end]
+        panel = build_price_panel(
+            chunk["stock_id"].to_numpy(),
+            chunk["date"].tolist(),
+            chunk["close"].to_numpy(dtype=float),
+            chunk["volume"].to_numpy(dtype=float),
+        )
+        frame = split_panel_indicators(panel, calculate_panel_indicators(panel))
+        rows += len(transform_to_indicator_records(frame)) if with_records else len(frame)
+    return rows
+
+
+def main(stocks: int, days: int, chunk_size: int) -> None:
+    universe = _generate_universe(stocks, days)
+    print(f"{stocks}銘柄 / {len(universe)}行 / チャンク {chunk_size}銘柄")
+    print("| 対象 | 銘柄ごと (秒) | パネル (秒) | 倍率 | 銘柄/秒（パネル） |")
+    print("|---|---:|---:|---:|---:|")
+    for label, with_records in (("指標計算", False), ("指標計算＋レコード変換", True)):
+        started = time.perf_counter()
+        per_stock_rows = _per_stock(universe, with_records)
+        per_stock_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        panel_rows = _panel(universe, chunk_size, with_records)
+        panel_time = time.perf_counter() - started
+
+        assert per_stock_rows == panel_rows
+        print(
+            f"| {label} | {per_stock_time:.2f} | {panel_time:.2f} | "
+            f"{per_stock_time / panel_time:.1f}x | {stocks / panel_time:.0f} |"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stocks", type=int, default=4000, help="銘柄数")
+    parser.add_argument("--days", type=int, default=1250, help="最長の日数")
+    parser.add_argument("--chunk-size", type=int, default=500, help="パネル1つあたりの銘柄数")
+    args = parser.parse_args()
+    main(args.stocks, args.days, args.chunk_size)
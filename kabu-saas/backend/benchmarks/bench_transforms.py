@@ -0,0 +1,119 @@
+"""レコード変換マイクロベンチマーク: 行単位(iterrows) vs 列単位
+
+    cd backend
+    python -m benchmarks.bench_transforms --days 1250 --repeat 5
+"""
+
+import argparse
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from app.analysis.technical import calculate_technical_indicators, transform_to_indicator_records
+from app.collectors.price_collector import transform_price_data
+
+
+def _rowwise_price(df: pd.DataFrame, stock_id: int) -> list[dict]:
+    """従来の transform_price_data"""
+    records = []
+    for idx, row in df.iterrows():
+        record_date = idx.date() if hasattr(idx, "date") else idx
+        records.append({
+            "stock_id": stock_id,
+            "date": record_date,
+            "open": Decimal(str(round(row["Open"], 2))),
+            "high": Decimal(str(round(row["High"], 2))),
+            "low": Decimal(str(round(row["Low"], 2))),
+            "close": Decimal(str(round(row["Close"], 2))),
+            "volume": int(row["Volume"]),
+            "adjusted_close": Decimal(str(round(row.get("Adj Close", row["Close"]), 2))),
+        })
+    return records
+
+
+def _to_decimal(value, precision: int = 2) -> Decimal | None:
+    if pd.isna(value):
+        return None
+    return Decimal(str(round(float(value), precision)))
+
+
+def _to_int(value) -> int | None:
+    if pd.isna(value):
+        return None
+    return int(float(value))
+
+
+def _rowwise_indicator(df: pd.DataFrame, stock_id: int) -> list[dict]:
+    """従来の transform_to_indicator_records"""
+    records = []
+    for _, row in df.iterrows():
+        records.append({
+            "stock_id": stock_id,
+            "date": row["date"] if isinstance(row["date"], date) else row["date"].date(),
+            "sma_5": _to_decimal(row.get("sma_5")),
+            "sma_25": _to_decimal(row.get("sma_25")),
+            "sma_75": _to_decimal(row.get("sma_75")),
+            "sma_200": _to_decimal(row.get("sma_200")),
+            "ema_12": _to_decimal(row.get("ema_12")),
+            "ema_26": _to_decimal(row.get("ema_26")),
+            "rsi_14": _to_decimal(row.get("rsi_14")),
+            "macd_line": _to_decimal(row.get("macd_line"), 4),
+            "macd_signal": _to_decimal(row.get("macd_signal"), 4),
+            "macd_histogram": _to_decimal(row.get("macd_histogram"), 4),
+            "bb_upper_2": _to_decimal(row.get("bb_upper_2")),
+            "bb_middle": _to_decimal(row.get("bb_middle")),
+            "bb_lower_2": _to_decimal(row.get("bb_lower_2")),
+            "volume_sma_25": _to_int(row.get("volume_sma_25")),
+        })
+    return records
+
+
+def _best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(days: int, repeat: int) -> None:
+    rng = np.random.default_rng(0)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    volume = rng.integers(10_000, 1_000_000, days).astype(float)
+
+    yf_df = pd.DataFrame(
+        {"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+         "Adj Close": close, "Volume": volume},
+        index=pd.date_range("2020-01-01", periods=days, freq="B", tz="Asia/Tokyo"),
+    )
+    start = date(2020, 1, 1)
+    indicators_df = calculate_technical_indicators(pd.DataFrame({
+        "date": [start + timedelta(days=i) for i in range(days)],
+        "open": close, "high": close, "low": close, "close": close, "volume": volume.astype(int),
+    }))
+
+    assert transform_price_data(yf_df, 1) == _rowwise_price(yf_df, 1)
+    assert transform_to_indicator_records(indicators_df, 1) == _rowwise_indicator(indicators_df, 1)
+
+    print(f"{days}行 × best of {repeat}")
+    print("| 変換 | 行単位 (ms) | 列単位 (ms) | 倍率 |")
+    print("|---|---:|---:|---:|")
+    for name, old, new, frame in (
+        ("transform_price_data", _rowwise_price, transform_price_data, yf_df),
+        ("transform_to_indicator_records", _rowwise_indicator, transform_to_indicator_records, indicators_df),
+    ):
+        old_time = _best_of(lambda old=old, frame=frame: old(frame, 1), repeat)
+        new_time = _best_of(lambda new=new, frame=frame: new(frame, 1), repeat)
+        print(f"| {name} | {old_time * 1000:.1f} | {new_time * 1000:.1f} | {old_time / new_time:.1f}x |")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=1250, help="1銘柄あたりの行数")
+    parser.add_argument("--repeat", type=int, default=5, help="計測回数（最良値を採用）")
+    args = parser.parse_args()
+    main(args.days, args.repeat)
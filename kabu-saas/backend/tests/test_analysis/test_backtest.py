@@ -0,0 +1,225 @@
+"""バックテストエンジンのテスト"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.analysis.backtest import (
+    EXIT_OPEN,
+    EXIT_SELL_SIGNAL,
+    EXIT_STOP,
+    EXIT_TARGET,
+    EXIT_TIMEOUT,
+    BacktestConfig,
+    SignalTrades,
+    build_ohlc_panel,
+    load_backtest_inputs,
+    simulate_trades,
+    summarize_backtest,
+)
+from app.analysis.trade_planner import calculate_trade_plan, calculate_trade_plan_arrays
+
+START = date(2024, 1, 1)
+
+
+def _panel(bars: dict[int, list[tuple[float, float, float, float]]]):
+    """銘柄ID → 日ごとの (始値, 高値, 安値, 終値) からパネルを作る"""
+    rows = [
+        (stock_id, START + timedelta(days=i), *bar)
+        for stock_id, stock_bars in bars.items()
+        for i, bar in enumerate(stock_bars)
+    ]
+    stock_ids, dates, open_, high, low, close = (np.array(column) for column in zip(*rows, strict=True))
+    return build_ohlc_panel(stock_ids, dates.astype("datetime64[D]"), open_, high, low, close)
+
+
+def _trades(*signals: tuple[int, int, float]) -> SignalTrades:
+    """(銘柄ID, シグナル日の位置, 終値) の買いシグナル（SMA25なし）"""
+    return SignalTrades(
+        stock_ids=np.array([s[0] for s in signals], dtype=np.int64),
+        signal_dates=np.array([START + timedelta(days=s[1]) for s in signals], dtype="datetime64[D]"),
+        close_price=np.array([s[2] for s in signals], dtype=np.float64),
+        sma_25=np.full(len(signals), np.nan),
+    )
+
+
+# エントリー1000 / 利確1100・1200・1300 / 損切り950 / 100株
+_FLAT = (1000.0, 1000.0, 1000.0, 1000.0)
+_FILL = (1010.0, 1020.0, 995.0, 1000.0)
+
+
+def test_trade_plan_arrays_match_scalar_plan():
+    """配列版の売買プランが calculate_trade_plan と一致すること"""
+    close = np.array([1000.0, 2345.6, 512.3, 87.0])
+    sma = np.array([np.nan, 2200.0, 600.0, 80.5])
+
+    plans = calculate_trade_plan_arrays(close, sma)
+
+    for i in range(len(close)):
+        expected = calculate_trade_plan(close[i], None if np.isnan(sma[i]) else sma[i])
+        assert plans.entry_price[i] == pytest.approx(float(expected.entry_price))
+        assert plans.target_prices[i].tolist() == pytest.approx([
+            float(expected.target_price_1), float(expected.target_price_2), float(expected.target_price_3),
+        ])
+        assert plans.stop_loss_price[i] == pytest.approx(float(expected.stop_loss_price))
+        assert plans.position_size[i] == expected.position_size
+
+
+def test_take_profit_then_stop_loss():
+    """利確1段目の後に損切りに達した場合、残りを損切り価格で決済すること"""
+    panel = _panel({1: [
+        _FLAT,
+        _FILL,
+        (1050.0, 1110.0, 1040.0, 1100.0),
+        (1100.0, 1150.0, 940.0, 960.0),
+        _FLAT,
+    ]})
+    config = BacktestConfig()
+
+    results = simulate_trades(panel, _trades((1, 0, 1000.0)), config)
+
+    assert results.filled.tolist() == [True]
+    assert results.fill_index.tolist() == [1]
+    assert results.fill_price.tolist() == [1000.0]
+    assert results.exit_index.tolist() == [[2, 3, 3]]
+    assert results.exit_price.tolist() == [[1100.0, 950.0, 950.0]]
+    assert results.exit_reason.tolist() == [[EXIT_TARGET, EXIT_STOP, EXIT_STOP]]
+    assert results.returns[0] == pytest.approx(0.0)
+
+    report = summarize_backtest(panel, results, config, START, START + timedelta(days=4))
+    assert report.target_hit_rates == [1.0, 0.0, 0.0]
+    assert report.stop_loss_rate == 1.0
+    assert report.total_pnl == pytest.approx(0.0)
+    assert report.equity == pytest.approx([1_000_000, 1_000_000, 1_010_000, 1_000_000, 1_000_000])
+    assert report.max_drawdown == pytest.approx(10_000 / 1_010_000)
+    assert report.max_exposure == pytest.approx(0.1)
+    assert results.open_notional.tolist() == pytest.approx([0, 100_000, 100_000, 200_000 / 3, 0], abs=1e-6)
+    assert results.open_positions.tolist() == [0, 1, 1, 1, 0]
+
+
+def test_gap_down_exits_at_open_and_same_day_hits_prefer_stop():
+    """損切りを窓で下回った場合は始値、利確・損切りが同じ日なら損切りで決済すること"""
+    panel = _panel({
+        1: [_FLAT, _FILL, (900.0, 905.0, 890.0, 895.0)],
+        2: [_FLAT, _FILL, (1000.0, 1110.0, 940.0, 1000.0)],
+    })
+
+    results = simulate_trades(panel, _trades((1, 0, 1000.0), (2, 0, 1000.0)), BacktestConfig())
+
+    assert results.exit_price.tolist() == [[900.0] * 3, [950.0] * 3]
+    assert (results.exit_reason == EXIT_STOP).all()
+
+
+def test_sell_signal_closes_remaining_position():
+    """売りシグナルの日の終値で残りを決済すること（同じ日の利確が優先）"""
+    panel = _panel({1: [
+        _FLAT,
+        _FILL,
+        (1050.0, 1110.0, 1040.0, 1060.0),
+        (1060.0, 1080.0, 1000.0, 1020.0),
+        (1020.0, 1250.0, 1010.0, 1200.0),
+    ]})
+    sell_signals = np.zeros(panel.close.shape, dtype=bool)
+    sell_signals[0, 2] = True
+
+    results = simulate_trades(panel, _trades((1, 0, 1000.0)), BacktestConfig(), sell_signals=sell_signals)
+
+    assert results.exit_reason.tolist() == [[EXIT_TARGET, EXIT_SELL_SIGNAL, EXIT_SELL_SIGNAL]]
+    assert results.exit_price.tolist() == [[1100.0, 1060.0, 1060.0]]
+    assert results.exit_index.tolist() == [[2, 2, 2]]
+
+
+def test_unfilled_and_expired_trades():
+    """約定しないシグナルと、保有期間の満了・データ終了で決済するトレード"""
+    panel = _panel({
+        1: [_FLAT, (1010.0, 1030.0, 1005.0, 1020.0), (1020.0, 1030.0, 1005.0, 1020.0), _FLAT, _FLAT, _FLAT],
+        2: [_FLAT, _FILL, (1000.0, 1050.0, 990.0, 1040.0), (1040.0, 1060.0, 1000.0, 1050.0), _FLAT, _FLAT],
+        3: [_FLAT, _FLAT, _FLAT, _FLAT, _FILL, (1000.0, 1050.0, 990.0, 1030.0)],
+    })
+    config = BacktestConfig(entry_window_days=2, max_holding_days=2)
+
+    results = simulate_trades(panel, _trades((1, 0, 1000.0), (2, 0, 1000.0), (3, 3, 1000.0)), config)
+
+    assert results.filled.tolist() == [False, True, True]
+    assert np.isnan(results.returns[0])
+    assert results.exit_reason[1].tolist() == [EXIT_TIMEOUT] * 3
+    assert results.exit_price[1].tolist() == [1050.0] * 3
+    assert results.exit_reason[2].tolist() == [EXIT_OPEN] * 3
+    assert results.exit_index[2].tolist() == [5] * 3
+
+    report = summarize_backtest(panel, results, config, START, START + timedelta(days=5))
+    assert report.signals == 3
+    assert report.filled == 2
+    assert report.expired_rate == 1.0
+    assert report.win_rate == 1.0
+
+
+def test_results_do_not_depend_on_chunk_size():
+    """トレードを分割して判定しても結果が同じこと"""
+    rng = np.random.default_rng(0)
+    days = 120
+    bars = {}
+    for stock_id in range(1, 21):
+        close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.03, days)))
+        open_ = close * (1 + rng.normal(0, 0.01, days))
+        high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.03, days))
+        low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.03, days))
+        bars[stock_id] = list(zip(open_, high, low, close, strict=True))
+    panel = _panel(bars)
+    picks = zip(rng.integers(1, 21, 200).tolist(), rng.integers(0, days, 200).tolist(), strict=True)
+    trades = _trades(*((stock_id, day, bars[stock_id][day][3]) for stock_id, day in picks))
+    config = BacktestConfig(max_holding_days=20)
+
+    whole = simulate_trades(panel, trades, config, chunk_size=1000)
+    split = simulate_trades(panel, trades, config, chunk_size=7)
+
+    assert whole.filled.sum() > 0
+    for name in ("filled", "fill_index", "exit_index", "exit_reason", "open_positions"):
+        np.testing.assert_array_equal(getattr(whole, name), getattr(split, name))
+    for name in ("fill_price", "exit_price", "returns", "daily_pnl", "open_notional"):
+        np.testing.assert_allclose(getattr(whole, name), getattr(split, name))
+
+
+class _InputsSession:
+    """シグナル1件と、期間後の営業日を返すセッション"""
+
+    def __init__(self, horizon_date: date | None) -> None:
+        self.horizon_date = horizon_date
+        self.statements: list[tuple[str, dict]] = []
+
+    def _record(self, stmt) -> str:
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        self.statements.append((str(compiled), compiled.params))
+        return str(compiled)
+
+    async def execute(self, stmt):
+        sql = self._record(stmt)
+        if "FROM signals" in sql:
+            rows = [SimpleNamespace(stock_id=1, date=date(2024, 3, 29), close=Decimal("1000"), sma_25=None)]
+            return SimpleNamespace(all=lambda: rows)
+        return SimpleNamespace(all=list)
+
+    async def scalar(self, stmt):
+        self._record(stmt)
+        return self.horizon_date
+
+
+@pytest.mark.parametrize(
+    ("horizon_date", "expected"), [(date(2024, 7, 5), date(2024, 7, 5)), (None, date(2024, 3, 31))]
+)
+async def test_load_backtest_inputs_reads_prices_past_end_date(horizon_date, expected):
+    """期間末のシグナルも再生できるよう、OHLCは end_date の後の horizon_days 営業日目まで読み込むこと"""
+    db = _InputsSession(horizon_date)
+
+    await load_backtest_inputs(db, date(2024, 1, 1), date(2024, 3, 31), horizon_days=65)
+
+    horizon_sql, horizon_params = db.statements[1]
+    assert "stock_prices.date > " in horizon_sql and horizon_params["param_2"] == 65
+    price_sql, price_params = db.statements[2]
+    assert "stock_prices.date BETWEEN" in price_sql
+    assert price_params["date_1"] == date(2024, 3, 29)
+    assert price_params["date_2"] == expected
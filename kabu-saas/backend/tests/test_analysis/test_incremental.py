@@ -0,0 +1,133 @@
+"""テクニカル指標の増分計算テスト"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.analysis import indicators
+from app.analysis.incremental import (
+    IndicatorState,
+    build_indicator_state,
+    restore_indicator_state,
+    update_technical_indicators,
+)
+from app.analysis.indicators import IndicatorSpec
+from app.analysis.technical import (
+    INDICATOR_PRECISION,
+    calculate_technical_indicators,
+    transform_to_indicator_records,
+)
+
+EXACT_COLUMNS = ["ema_12", "ema_26", "rsi_14", "macd_line", "macd_signal", "macd_histogram", "volume_sma_25"]
+PRECISION_UNITS = {name: Decimal(1).scaleb(-p) for name, p in INDICATOR_PRECISION.items() if p is not None}
+WINDOW_COLUMNS = ["sma_5", "sma_25", "sma_75", "sma_200", "bb_upper_2", "bb_middle", "bb_lower_2"]
+
+
+def _make_price_df(n: int = 320, seed: int = 1) -> pd.DataFrame:
+    """テスト用の株価DataFrameを生成する"""
+    rng = np.random.default_rng(seed)
+    close = np.round(1000 * np.exp(np.cumsum(rng.normal(0, 0.02, n))), 1)
+    start = date(2024, 1, 1)
+    return pd.DataFrame({
+        "date": [start + timedelta(days=i) for i in range(n)],
+        "open": close,
+        "high": close,
+        "low": close,
+        "close": close,
+        "volume": rng.integers(10_000, 1_000_000, n),
+    })
+
+
+def _state_for(df: pd.DataFrame) -> IndicatorState:
+    return build_indicator_state(df["close"].to_numpy(dtype=float), df["volume"].to_numpy(dtype=float))
+
+
+def _assert_records_within_precision(actual: list[dict], expected: list[dict]) -> None:
+    """格納値が格納精度（最下位桁1単位）の範囲で一致すること
+
+    SMA/ボリンジャーバンドは加算順序の違いで丸めの境界値が1桁ずれることがある
+    """
+    assert len(actual) == len(expected)
+    for got, want in zip(actual, expected, strict=True):
+        assert got.keys() == want.keys()
+        for key, value in want.items():
+            if key in WINDOW_COLUMNS and value is not None:
+                assert abs(got[key] - value) <= PRECISION_UNITS[key], key
+            else:
+                assert got[key] == value, key
+
+
+@pytest.mark.parametrize("split", [30, 150, 300])
+def test_incremental_matches_full_recompute(split: int):
+    """状態から計算した新規行が全期間の再計算結果と一致すること"""
+    df = _make_price_df()
+    full = calculate_technical_indicators(df).iloc[split:].reset_index(drop=True)
+
+    incremental, state = update_technical_indicators(_state_for(df.iloc[:split]), df.iloc[split:])
+
+    for column in EXACT_COLUMNS:
+        np.testing.assert_array_equal(incremental[column].to_numpy(), full[column].to_numpy(), err_msg=column)
+    for column in WINDOW_COLUMNS:
+        np.testing.assert_allclose(incremental[column].to_numpy(), full[column].to_numpy(), rtol=1e-12, err_msg=column)
+    _assert_records_within_precision(
+        transform_to_indicator_records(incremental, 1),
+        transform_to_indicator_records(full, 1),
+    )
+    assert state.bars == len(df)
+
+
+def test_incremental_day_by_day_keeps_state_consistent():
+    """1日ずつ状態を持ち越して更新しても全期間計算と同じ状態になること"""
+    df = _make_price_df(260)
+    state = _state_for(df.iloc[:200])
+    for i in range(200, len(df)):
+        _, state = update_technical_indicators(IndicatorState.from_dict(state.to_dict()), df.iloc[i:i + 1])
+
+    expected = _state_for(df)
+    assert state.ema == expected.ema
+    assert state.rsi == expected.rsi
+    assert state.last == expected.last
+    assert state.tails == expected.tails
+
+
+def test_incremental_without_new_bars():
+    """新しい日足がなければ何も計算しないこと"""
+    df = _make_price_df(60)
+    state = _state_for(df)
+
+    result, new_state = update_technical_indicators(state, df.iloc[0:0])
+
+    assert result.empty
+    assert new_state is state
+
+
+def test_restore_state_rejects_stale_definitions():
+    """旧形式の状態や、指標の定義が変わる前の状態は復元しないこと"""
+    state = _state_for(_make_price_df(60))
+
+    assert restore_indicator_state(state.to_dict()) == state
+    assert restore_indicator_state({**state.to_dict(), "signature": "stale"}) is None
+    assert restore_indicator_state({"bars": 60, "last_close": 1.0, "ema_12": 1.0}) is None
+
+
+def test_incremental_follows_registry(monkeypatch):
+    """レジストリに登録した指標のウィンドウ長で増分計算すること"""
+    monkeypatch.setitem(
+        indicators._REGISTRY,
+        "sma_10",
+        IndicatorSpec(
+            "sma_10", ("close",), lambda close: close.rolling(window=10).mean(), window=10, persisted=True,
+            kind="sma", params={"length": 10},
+        ),
+    )
+    df = _make_price_df(80)
+    state = _state_for(df.iloc[:50])
+
+    incremental, _ = update_technical_indicators(state, df.iloc[50:])
+
+    np.testing.assert_allclose(
+        incremental["sma_10"].to_numpy(), df["close"].rolling(window=10).mean().iloc[50:].to_numpy(), rtol=1e-12
+    )
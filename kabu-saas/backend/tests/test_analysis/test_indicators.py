@@ -0,0 +1,115 @@
+"""テクニカル指標レジストリテスト"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.analysis.indicators import (
+    compute_indicators,
+    persisted_indicators,
+    required_history,
+    resolve_indicators,
+)
+from app.models.technical import TechnicalIndicator
+
+
+def _make_price_df(n: int = 600, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    start = date(2022, 1, 1)
+    return pd.DataFrame({
+        "date": [start + timedelta(days=i) for i in range(n)],
+        "open": close,
+        "high": close * 1.01,
+        "low": close * 0.99,
+        "close": close,
+        "volume": rng.integers(10_000, 1_000_000, n),
+    })
+
+
+def _reference_persisted(df: pd.DataFrame) -> dict[str, pd.Series]:
+    """レジストリ導入前に calculate_technical_indicators で直接計算していた式"""
+    close = df["close"]
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0.0)
+    loss = (-delta).where(delta < 0, 0.0)
+    rs = gain.ewm(alpha=1 / 14, min_periods=14).mean() / loss.ewm(alpha=1 / 14, min_periods=14).mean()
+    ema_fast = close.ewm(span=12, adjust=False).mean()
+    ema_slow = close.ewm(span=26, adjust=False).mean()
+    macd_line = ema_fast - ema_slow
+    macd_signal = macd_line.ewm(span=9, adjust=False).mean()
+    middle = close.rolling(window=20).mean()
+    std = close.rolling(window=20).std()
+    return {
+        "sma_5": close.rolling(window=5).mean(),
+        "sma_25": close.rolling(window=25).mean(),
+        "sma_75": close.rolling(window=75).mean(),
+        "sma_200": close.rolling(window=200).mean(),
+        "ema_12": ema_fast,
+        "ema_26": ema_slow,
+        "rsi_14": 100 - (100 / (1 + rs)),
+        "macd_line": macd_line,
+        "macd_signal": macd_signal,
+        "macd_histogram": macd_line - macd_signal,
+        "bb_upper_2": middle + 2.0 * std,
+        "bb_middle": middle,
+        "bb_lower_2": middle - 2.0 * std,
+        "volume_sma_25": df["volume"].astype(float).rolling(window=25).mean(),
+    }
+
+
+def test_persisted_indicators_match_previous_formulas():
+    """格納対象の指標がレジストリ導入前の式と完全に一致すること"""
+    df = _make_price_df()
+    names = [spec.name for spec in persisted_indicators()]
+
+    result = compute_indicators(df, names)
+
+    for name, expected in _reference_persisted(df).items():
+        np.testing.assert_array_equal(result[name].to_numpy(), expected.to_numpy(), err_msg=name)
+
+
+def test_persisted_indicators_have_model_columns():
+    """格納対象の指標はすべて TechnicalIndicator の列であること"""
+    columns = set(TechnicalIndicator.__table__.columns.keys())
+    assert {spec.name for spec in persisted_indicators()} <= columns
+
+
+def test_resolve_computes_only_requested_with_shared_dependencies():
+    """要求された指標と依存だけが、依存順に1回ずつ解決されること"""
+    names = [spec.name for spec in resolve_indicators(["macd_histogram", "ema_12"])]
+
+    assert sorted(names) == sorted(["ema_12", "ema_26", "macd_line", "macd_signal", "macd_histogram"])
+    assert names.index("macd_line") > max(names.index("ema_12"), names.index("ema_26"))
+    assert names.index("macd_histogram") > names.index("macd_signal")
+
+    result = compute_indicators(_make_price_df(100), ["bb_upper_2", "atr_14"])
+    assert list(result.columns) == ["bb_upper_2", "atr_14"]
+
+
+def test_resolve_unknown_indicator():
+    """未登録の指標はエラーになること"""
+    with pytest.raises(ValueError):
+        resolve_indicators(["unknown_indicator"])
+
+
+def test_required_history():
+    """必要な履歴日数がウィンドウ長・ウォームアップ・依存から決まること"""
+    assert required_history(["sma_5"]) == 5
+    assert required_history(["sma_200", "sma_5"]) == 200
+    assert required_history(["stoch_d_3"]) == 14 + 3 - 1
+    assert required_history(["macd_signal"]) > required_history(["ema_26"]) > required_history(["ema_12"])
+
+
+@pytest.mark.parametrize("name", ["ema_26", "macd_signal", "rsi_14", "atr_14", "sma_200"])
+def test_required_history_is_sufficient(name: str):
+    """必要日数だけの履歴から計算した最新値が、全履歴からの計算と一致すること"""
+    df = _make_price_df()
+    full = compute_indicators(df, [name])[name].iloc[-1]
+
+    history = required_history([name])
+    truncated = compute_indicators(df.tail(history).reset_index(drop=True), [name])[name].iloc[-1]
+
+    assert truncated == pytest.approx(full, rel=1e-5)
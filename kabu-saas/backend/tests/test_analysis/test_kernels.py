@@ -0,0 +1,86 @@
+"""NumPy指標カーネルテスト"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.analysis.kernels import (
+    INDICATOR_NAMES,
+    allocate_indicator_buffer,
+    calculate_indicator_arrays,
+    linear_recurrence,
+)
+from app.analysis.technical import calculate_technical_indicators
+
+
+def _make_prices(n: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    close = np.round(1000 * np.exp(np.cumsum(rng.normal(0, 0.02, n))), 1)
+    return close, rng.integers(10_000, 1_000_000, n)
+
+
+def _pandas_reference(close: np.ndarray, volume: np.ndarray) -> pd.DataFrame:
+    return calculate_technical_indicators(pd.DataFrame({
+        "date": [date(2024, 1, 1)] * len(close),
+        "open": close,
+        "high": close,
+        "low": close,
+        "close": close,
+        "volume": volume,
+    }))
+
+
+@pytest.mark.parametrize("n", [26, 75, 300, 1250])
+def test_kernels_match_pandas_reference(n: int):
+    """float64のカーネルがpandasの計算結果と浮動小数点誤差の範囲で一致すること"""
+    close, volume = _make_prices(n)
+    expected = _pandas_reference(close, volume)
+
+    result = calculate_indicator_arrays(close, volume)
+
+    for name in INDICATOR_NAMES:
+        np.testing.assert_allclose(result[name], expected[name].to_numpy(), rtol=1e-11, atol=1e-9, err_msg=name)
+
+
+def test_kernels_float32_buffer():
+    """float32のバッファでも単精度の範囲で一致し、欠損位置が同じであること"""
+    close, volume = _make_prices(500, seed=1)
+    expected = _pandas_reference(close, volume)
+
+    result = calculate_indicator_arrays(close, volume, dtype=np.float32)
+
+    for name in INDICATOR_NAMES:
+        assert result[name].dtype == np.float32
+        np.testing.assert_allclose(result[name], expected[name].to_numpy(), rtol=1e-6, atol=1e-4, err_msg=name)
+
+
+def test_kernels_reuse_buffer():
+    """長めのバッファを使い回しても結果が変わらないこと"""
+    buffer = allocate_indicator_buffer(400)
+    for n, seed in ((400, 2), (120, 3)):
+        close, volume = _make_prices(n, seed)
+        expected = calculate_indicator_arrays(close, volume)
+        result = calculate_indicator_arrays(close, volume, out=buffer)
+        for name in INDICATOR_NAMES:
+            np.testing.assert_array_equal(result[name], expected[name], err_msg=name)
+            assert np.shares_memory(result[name], buffer)
+
+
+def test_kernels_short_series():
+    """日数が足りない場合は何も計算しないこと"""
+    close, volume = _make_prices(25)
+    assert calculate_indicator_arrays(close, volume) == {}
+
+
+def test_linear_recurrence_matches_loop():
+    """ブロック単位の閉形式が逐次計算と一致すること"""
+    values = np.random.default_rng(4).normal(0, 1, 1000)
+    expected = np.empty_like(values)
+    y = 3.0
+    for i, v in enumerate(values):
+        y = 0.9 * y + 0.5 * v
+        expected[i] = y
+
+    np.testing.assert_allclose(linear_recurrence(values, 0.9, 0.5, 3.0, np.empty_like(values)), expected, rtol=1e-12)
@@ -0,0 +1,110 @@
+"""分析処理のプロセス並列実行テスト"""
+
+import asyncio
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.analysis.parallel import analysis_pool
+from app.analysis.scoring import (
+    FUNDAMENTAL_FIELDS,
+    INDICATOR_FIELDS,
+    calculate_scores_from_arrays,
+    calculate_total_score,
+    pack_score_inputs,
+)
+from app.analysis.technical import compute_panel_chunk
+from app.models.fundamental import FundamentalData
+from app.models.technical import TechnicalIndicator
+
+
+def _make_inputs(n: int, seed: int = 0):
+    """ORMオブジェクト形式のスコア計算入力を生成する"""
+    rng = np.random.default_rng(seed)
+    indicators, fundamentals = [], []
+    for i in range(n):
+        base = rng.uniform(100, 5000)
+        indicators.append(TechnicalIndicator(
+            sma_5=Decimal(str(round(base * rng.uniform(0.9, 1.1), 2))),
+            sma_25=Decimal(str(round(base, 2))),
+            sma_75=None if i % 7 == 0 else Decimal(str(round(base * rng.uniform(0.9, 1.1), 2))),
+            rsi_14=Decimal(str(round(rng.uniform(0, 100), 2))),
+            macd_line=Decimal(str(round(rng.normal(0, 5), 4))),
+            macd_signal=Decimal(str(round(rng.normal(0, 5), 4))),
+            macd_histogram=Decimal("0") if i % 5 == 0 else Decimal(str(round(rng.normal(0, 1), 4))),
+            bb_upper_2=Decimal(str(round(base * 1.05, 2))),
+            bb_middle=Decimal(str(round(base, 2))),
+            bb_lower_2=Decimal(str(round(base * 0.95, 2))),
+            volume_sma_25=None if i % 11 == 0 else int(rng.integers(1_000, 1_000_000)),
+        ))
+        fundamentals.append(None if i % 3 == 0 else FundamentalData(
+            per=Decimal(str(round(rng.uniform(-10, 60), 2))),
+            pbr=None if i % 4 == 0 else Decimal(str(round(rng.uniform(0, 4), 2))),
+            dividend_yield=Decimal(str(round(rng.uniform(0, 6), 2))),
+            roe=Decimal(str(round(rng.uniform(-10, 30), 2))),
+        ))
+    closes = rng.uniform(100, 5000, n).round(1)
+    volumes = rng.integers(0, 3_000_000, n)
+    return indicators, fundamentals, closes, volumes
+
+
+def test_scores_from_arrays_match_orm_scores():
+    """配列経由のスコア計算がORMオブジェクトを渡した場合と一致すること"""
+    indicators, fundamentals, closes, volumes = _make_inputs(300)
+
+    scores = calculate_scores_from_arrays(
+        pack_score_inputs(indicators, INDICATOR_FIELDS),
+        pack_score_inputs(fundamentals, FUNDAMENTAL_FIELDS),
+        closes.astype(float),
+        volumes.astype(float),
+    )
+
+    expected = [
+        calculate_total_score(indicator, fundamental, float(close), int(volume))
+        for indicator, fundamental, close, volume in zip(indicators, fundamentals, closes, volumes, strict=True)
+    ]
+    assert scores == expected
+
+
+@pytest.mark.asyncio
+async def test_analysis_pool_runs_in_worker_processes():
+    """ワーカープロセスでの計算結果がイベントループ上での計算と一致すること"""
+    rng = np.random.default_rng(0)
+    counts = [40, 10, 60]
+    stock_ids = np.repeat(np.arange(1, 4), counts)
+    start = date(2025, 1, 1).toordinal()
+    date_ordinals = np.concatenate([np.arange(start, start + n) for n in counts])
+    close = np.round(rng.uniform(900, 1100, len(stock_ids)), 1)
+    volume = rng.integers(1_000, 100_000, len(stock_ids)).astype(float)
+
+    expected = compute_panel_chunk(stock_ids, date_ordinals, close, volume)
+    async with analysis_pool(workers=2) as pool:
+        assert pool.parallel
+        result = await pool.run(compute_panel_chunk, stock_ids, date_ordinals, close, volume)
+
+    assert result == expected
+    assert [stock_id for stock_id, _, _ in result[1]] == [1, 3]
+
+
+async def test_analysis_pool_without_workers_runs_off_event_loop_one_at_a_time():
+    """ワーカー数1ではプールを作らず、イベントループのスレッド以外で1件ずつ実行すること"""
+    running: list[int] = []
+    peak: list[int] = []
+
+    def _work(value: int) -> int:
+        running.append(value)
+        peak.append(len(running))
+        time.sleep(0.01)
+        running.remove(value)
+        return threading.get_ident()
+
+    async with analysis_pool(workers=1) as pool:
+        assert not pool.parallel
+        threads = await asyncio.gather(*(pool.run(_work, i) for i in range(4)))
+
+    assert threading.get_ident() not in threads
+    assert max(peak) == 1
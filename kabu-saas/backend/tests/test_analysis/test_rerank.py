@@ -0,0 +1,112 @@
+"""項目別スコアによる再ランキングテスト"""
+
+from datetime import date
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.analysis import rerank
+from app.analysis.rerank import ComponentMatrix, rank_components, rerank_universe, weights_hash
+from app.analysis.scoring import (
+    DEFAULT_WEIGHTS,
+    FUNDAMENTAL_FIELDS,
+    INDICATOR_FIELDS,
+    pack_score_inputs,
+    score_universe,
+    validate_weights,
+)
+from tests.test_analysis.test_scoring import _boundary_universe
+
+
+def _universe_matrix():
+    indicators, fundamentals, closes, volumes = _boundary_universe()
+    scores = score_universe(
+        pack_score_inputs(indicators, INDICATOR_FIELDS),
+        pack_score_inputs(fundamentals, FUNDAMENTAL_FIELDS),
+        np.array(closes),
+        np.array(volumes, dtype=float),
+    )
+    stock_ids = np.arange(1, len(scores) + 1)
+    return scores, ComponentMatrix(date(2026, 1, 9), stock_ids, scores.component_matrix())
+
+
+def test_rank_components_matches_signal_scores_with_default_weights():
+    """デフォルトの重みでは、シグナル検出時のスコアと完全に一致すること"""
+    scores, matrix = _universe_matrix()
+
+    ranked = rank_components(matrix, DEFAULT_WEIGHTS)
+
+    position = ranked.stock_ids - 1
+    np.testing.assert_array_equal(ranked.total_score, scores.total_score[position])
+    np.testing.assert_array_equal(ranked.technical_score, scores.technical_score[position])
+    np.testing.assert_array_equal(ranked.fundamental_score, scores.fundamental_score[position])
+    assert np.all(np.diff(ranked.total_score) <= 0)
+
+
+def test_rank_components_with_custom_weights():
+    """指定した重みで並べ替え、同点は銘柄ID順になること"""
+    matrix = ComponentMatrix(
+        date(2026, 1, 9),
+        np.array([10, 20, 30]),
+        np.array([
+            [90, 50, 50, 50, 50, 20, 20, 20, 20],
+            [30, 50, 50, 50, 50, 90, 90, 90, 90],
+            [30, 50, 50, 50, 50, 90, 90, 90, 90],
+        ], dtype=np.int16),
+    )
+    technical_only = {**dict.fromkeys(DEFAULT_WEIGHTS, 0.0), "sma_cross": 1.0, "per": 1e-9}
+
+    assert rank_components(matrix, technical_only).stock_ids.tolist() == [10, 20, 30]
+    assert rank_components(matrix, DEFAULT_WEIGHTS).stock_ids.tolist() == [20, 30, 10]
+
+
+def test_validate_weights_rejects_invalid_weights():
+    """項目の過不足・負の値・グループの合計0を拒否すること"""
+    with pytest.raises(ValueError):
+        validate_weights({"sma_cross": 1.0})
+    with pytest.raises(ValueError):
+        validate_weights({**DEFAULT_WEIGHTS, "rsi": -0.1})
+    with pytest.raises(ValueError):
+        validate_weights({**DEFAULT_WEIGHTS, "per": 0, "pbr": 0, "dividend_yield": 0, "roe": 0})
+
+
+class _ComponentSession:
+    """項目別スコアの行を返し、クエリ数を数えるセッション"""
+
+    def __init__(self, matrix: ComponentMatrix) -> None:
+        self.matrix = matrix
+        self.queries = 0
+
+    async def scalar(self, stmt):
+        self.queries += 1
+        return self.matrix.date
+
+    async def execute(self, stmt):
+        self.queries += 1
+        rows = [
+            SimpleNamespace(stock_id=s, components=c)
+            for s, c in zip(self.matrix.stock_ids.tolist(), self.matrix.components.tolist(), strict=True)
+        ]
+        return SimpleNamespace(all=lambda: rows)
+
+
+async def test_rerank_universe_caches_by_weights_hash():
+    """同じ重みでは結果を再利用し、項目別スコアの読み込みは日付ごとに1回で済むこと"""
+    rerank.invalidate_rerank_cache()
+    _, matrix = _universe_matrix()
+    db = _ComponentSession(matrix)
+    target = matrix.date
+    custom = {**DEFAULT_WEIGHTS, "rsi": 0.3}
+
+    first = await rerank_universe(db, DEFAULT_WEIGHTS, target)
+    second = await rerank_universe(db, custom, target)
+    again = await rerank_universe(db, dict(reversed(DEFAULT_WEIGHTS.items())), target)
+
+    assert db.queries == 1
+    assert again is first
+    assert second.weights_hash == weights_hash(custom) != first.weights_hash
+
+    rerank.invalidate_rerank_cache(target)
+    assert await rerank_universe(db, DEFAULT_WEIGHTS, target) is not first
+    assert db.queries == 2
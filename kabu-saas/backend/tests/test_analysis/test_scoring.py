@@ -0,0 +1,101 @@
+"""スコアリングモデルテスト"""
+
+import itertools
+from decimal import Decimal
+
+import numpy as np
+
+from app.analysis.scoring import (
+    DEFAULT_WEIGHTS,
+    FUNDAMENTAL_FIELDS,
+    INDICATOR_FIELDS,
+    calculate_total_score,
+    pack_score_inputs,
+    score_universe,
+)
+from app.models.fundamental import FundamentalData
+from app.models.technical import TechnicalIndicator
+
+
+def _decimal(value: float | None, places: int = 2) -> Decimal | None:
+    return None if value is None else Decimal(str(round(value, places)))
+
+
+def _boundary_universe() -> tuple[list, list, list[float], list[int]]:
+    """各項目の閾値ちょうどの値や欠損・0を組み合わせた入力を生成する"""
+    rng = np.random.default_rng(0)
+    rsi_values = [None, 30, 40, 50, 60, 70, 29.99, 70.01]
+    per_values = [None, -5, 0, 10, 15, 25, 40, 41]
+    pbr_values = [None, 0, 0.5, 1.0, 2.0, 2.01]
+    dy_values = [None, 0, 1, 2, 3, 5]
+    roe_values = [None, -1, 0, 5, 10, 20]
+    volume_sma_values = [None, 0, 1000]
+    volume_values = [500, 1000, 1500, 2000, 499]
+
+    indicators, fundamentals, closes, volumes = [], [], [], []
+    for i, (rsi, per, volume_sma, volume) in enumerate(
+        itertools.product(rsi_values, per_values, volume_sma_values, volume_values)
+    ):
+        sma_25 = 1000.0
+        sma_5 = [None, 1000.0, 1010.0, 990.0][i % 4]
+        sma_75 = [None, 0.0, 990.0, 1010.0][(i // 4) % 4]
+        histogram = [None, 0.0, 1.5, -1.5][(i // 3) % 4]
+        middle = [None, 0.0, 1000.0][i % 3]
+        close = [950.0, 1000.0, 1050.0, 900.0, 1100.0][(i // 2) % 5]
+        indicators.append(TechnicalIndicator(
+            sma_5=_decimal(sma_5),
+            sma_25=_decimal(sma_25),
+            sma_75=_decimal(sma_75),
+            rsi_14=_decimal(rsi),
+            macd_line=None if i % 13 == 0 else _decimal(rng.normal(0, 1), 4),
+            macd_signal=_decimal(rng.normal(0, 1), 4),
+            macd_histogram=_decimal(histogram, 4),
+            bb_upper_2=None if i % 17 == 0 else Decimal("1050"),
+            bb_middle=_decimal(middle),
+            bb_lower_2=Decimal("950"),
+            volume_sma_25=volume_sma,
+        ))
+        fundamentals.append(None if i % 11 == 0 else FundamentalData(
+            per=_decimal(per),
+            pbr=_decimal(pbr_values[i % len(pbr_values)]),
+            dividend_yield=_decimal(dy_values[(i // 2) % len(dy_values)]),
+            roe=_decimal(roe_values[(i // 3) % len(roe_values)]),
+        ))
+        closes.append(close)
+        volumes.append(volume)
+    return indicators, fundamentals, closes, volumes
+
+
+def test_score_universe_matches_calculate_total_score():
+    """閾値境界・欠損値を含めて銘柄ごとの計算結果と完全に一致すること"""
+    indicators, fundamentals, closes, volumes = _boundary_universe()
+    custom_weights = {**DEFAULT_WEIGHTS, "sma_cross": 0.3, "roe": 0.05}
+
+    for weights in (None, custom_weights):
+        scores = score_universe(
+            pack_score_inputs(indicators, INDICATOR_FIELDS),
+            pack_score_inputs(fundamentals, FUNDAMENTAL_FIELDS),
+            np.array(closes),
+            np.array(volumes, dtype=float),
+            weights,
+        )
+        rows = zip(indicators, fundamentals, closes, volumes, strict=True)
+        for i, (indicator, fundamental, close, volume) in enumerate(rows):
+            assert scores.result(i) == calculate_total_score(indicator, fundamental, close, volume, weights)
+
+
+def test_score_universe_components():
+    """項目別スコアが配列で得られること"""
+    indicators, fundamentals, closes, volumes = _boundary_universe()
+    scores = score_universe(
+        pack_score_inputs(indicators, INDICATOR_FIELDS),
+        pack_score_inputs(fundamentals, FUNDAMENTAL_FIELDS),
+        np.array(closes),
+        np.array(volumes, dtype=float),
+    )
+
+    assert set(scores.components) == set(DEFAULT_WEIGHTS)
+    assert all(len(values) == len(indicators) for values in scores.components.values())
+    # 欠損値の項目は中立の50点
+    missing_rsi = [i for i, indicator in enumerate(indicators) if indicator.rsi_14 is None]
+    assert (scores.components["rsi"][missing_rsi] == 50.0).all()
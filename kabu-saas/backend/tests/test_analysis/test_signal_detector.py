@@ -0,0 +1,278 @@
+"""シグナル検出テスト"""
+
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+from sqlalchemy.dialects import postgresql
+
+from app.analysis import signal_detector
+from app.analysis.scoring import (
+    COMPONENT_NAMES,
+    FUNDAMENTAL_FIELDS,
+    INDICATOR_FIELDS,
+    calculate_total_score,
+    pack_score_inputs,
+)
+from app.analysis.signal_detector import (
+    backfill_date_chunks,
+    backfill_signals,
+    detect_all_signals,
+    determine_signal_type,
+    load_backfill_frame,
+    score_signal_candidates,
+    signal_rules_fingerprint,
+)
+from app.models.stock import Stock
+from tests.test_analysis.test_scoring import _boundary_universe
+
+
+def test_score_signal_candidates_returns_only_signals():
+    """シグナルに該当する銘柄だけが、銘柄ごとの計算と同じ結果で返ること"""
+    indicators, fundamentals, closes, volumes = _boundary_universe()
+
+    hits, components = score_signal_candidates(
+        pack_score_inputs(indicators, INDICATOR_FIELDS),
+        pack_score_inputs(fundamentals, FUNDAMENTAL_FIELDS),
+        np.array(closes),
+        np.array(volumes, dtype=float),
+    )
+    candidates = dict(hits)
+
+    rows = zip(indicators, fundamentals, closes, volumes, strict=True)
+    for i, (indicator, fundamental, close, volume) in enumerate(rows):
+        expected = calculate_total_score(indicator, fundamental, close, volume)
+        if determine_signal_type(expected.total_score) is None:
+            assert i not in candidates
+        else:
+            assert candidates[i] == expected
+    assert candidates
+    assert components.shape == (len(indicators), len(COMPONENT_NAMES))
+
+
+class _SignalSession:
+    """テーブルごとに用意した行を返し、実行されたSQLとUPSERTしたシグナルを記録するセッション"""
+
+    def __init__(self, rows: dict[str, list]) -> None:
+        self.rows = rows
+        self.statements: list[str] = []
+        self.upserted: list[dict] = []
+
+    async def execute(self, stmt):
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        sql = str(compiled)
+        self.statements.append(sql)
+        if sql.startswith("INSERT INTO signals"):
+            count = sum(key.startswith("signal_type") for key in compiled.params)
+            rows = [
+                {c: compiled.params[f"{c}_m{i}"] for c in ("stock_id", "signal_type", "score")}
+                for i in range(count)
+            ]
+            self.upserted.extend(rows)
+            return _FakeResult(list(range(len(self.upserted) - count, len(self.upserted))))
+        if sql.startswith(("DELETE", "INSERT INTO component_scores")):
+            return _FakeResult([])
+        table = sql.split("FROM", 1)[1].split()[0]
+        return _FakeResult(self.rows[table])
+
+    async def commit(self) -> None:
+        pass
+
+
+class _FakeResult:
+    def __init__(self, rows: list) -> None:
+        self._rows = rows
+
+    def all(self) -> list:
+        return self._rows
+
+    def scalars(self) -> "_FakeResult":
+        return self
+
+
+def _row(stock_id: int, fields: tuple[str, ...], values: dict, row_date: date = date(2026, 1, 9)) -> SimpleNamespace:
+    return SimpleNamespace(stock_id=stock_id, date=row_date, **{f: values.get(f) for f in fields})
+
+
+_BULLISH = {
+    "sma_5": Decimal("110"), "sma_25": Decimal("100"), "sma_75": Decimal("90"), "rsi_14": Decimal("25"),
+    "macd_line": Decimal("2"), "macd_signal": Decimal("1"), "macd_histogram": Decimal("1"),
+    "bb_upper_2": Decimal("130"), "bb_middle": Decimal("110"), "bb_lower_2": Decimal("105"),
+    "volume_sma_25": 1000,
+}
+
+
+def _signal_session() -> _SignalSession:
+    """50銘柄中48銘柄が買いシグナルになる入力を返すセッション"""
+    stocks = [Stock(id=i, code=f"{1000 + i}.T", name=f"銘柄{i}", is_active=True) for i in range(1, 51)]
+    cheap = {"per": Decimal("8"), "pbr": Decimal("0.4"), "dividend_yield": Decimal("5"), "roe": Decimal("25")}
+    return _SignalSession({
+        "stocks": stocks,
+        # 最後の銘柄は指標なし、その1つ前は株価なし
+        "technical_indicators": [_row(s.id, INDICATOR_FIELDS, _BULLISH) for s in stocks[:-1]],
+        "fundamental_data": [_row(s.id, FUNDAMENTAL_FIELDS, cheap) for s in stocks[::2]],
+        "stock_prices": [
+            _row(s.id, ("close", "volume"), {"close": Decimal("100"), "volume": 3000}) for s in stocks[:-2]
+        ],
+    })
+
+
+async def test_detect_all_signals_prefetches_with_constant_queries():
+    """銘柄数によらず、銘柄一覧＋テーブルごとに1クエリで入力を取得すること"""
+    db = _signal_session()
+
+    success, errors, _ = await detect_all_signals(db, date(2026, 1, 9))
+
+    selects = [sql for sql in db.statements if sql.startswith("SELECT")]
+    assert len(selects) == 4
+    assert sum("DISTINCT ON (" in sql for sql in selects) == 3
+    assert errors == 0
+    assert success == len(db.upserted) == 48
+    assert {row["signal_type"] for row in db.upserted} == {"buy"}
+
+
+async def test_detect_all_signals_replaces_signals_idempotently():
+    """シグナルは1回のUPSERTで書き込み、同日の不要なシグナルを削除し、再実行しても同じ処理になること"""
+    first = _signal_session()
+    await detect_all_signals(first, date(2026, 1, 9))
+    second = _signal_session()
+    await detect_all_signals(second, date(2026, 1, 9))
+
+    writes = [sql for sql in first.statements if not sql.startswith("SELECT")]
+    assert len(writes) == 4
+    assert "ON CONFLICT ON CONSTRAINT uq_signals_stock_date_type DO UPDATE" in writes[0]
+    assert writes[1].startswith("DELETE FROM signals")
+    assert writes[2].startswith("INSERT INTO component_scores")
+    assert "signals.id != ALL (" in writes[1]
+    # 判定対象外になった銘柄の項目別スコアもシグナルと同じ範囲で削除する
+    assert writes[3].startswith("DELETE FROM component_scores")
+    assert "(component_scores.stock_id, component_scores.date) NOT IN (SELECT unnest(" in writes[3]
+    assert second.statements == first.statements
+    assert second.upserted == first.upserted
+
+
+async def test_detect_all_signals_only_rescans_given_stocks():
+    """対象銘柄を指定した場合はその銘柄だけを読み込み、その銘柄の同日シグナルだけを置き換えること"""
+    db = _signal_session()
+
+    await detect_all_signals(db, date(2026, 1, 9), stock_ids={2, 4})
+
+    reads = [sql for sql in db.statements if sql.startswith("SELECT")]
+    assert len(reads) == 4
+    assert all("stocks.id = ANY (" in sql for sql in reads)
+    assert db.statements[-3].startswith("DELETE FROM signals")
+    assert "signals.stock_id = ANY (" in db.statements[-3]
+    assert db.statements[-1].startswith("DELETE FROM component_scores")
+    assert "component_scores.stock_id = ANY (" in db.statements[-1]
+
+
+async def test_detect_all_signals_invalidates_rerank_cache_after_commit(monkeypatch):
+    """再ランキングのキャッシュはコミットした後に破棄すること"""
+    db = _signal_session()
+    events: list[str] = []
+
+    async def commit() -> None:
+        events.append("commit")
+
+    db.commit = commit
+    monkeypatch.setattr(
+        signal_detector, "invalidate_rerank_cache", lambda target: events.append(f"invalidate {target}")
+    )
+
+    await detect_all_signals(db, date(2026, 1, 9))
+
+    assert events == ["commit", "invalidate 2026-01-09"]
+
+
+async def test_detect_all_signals_skips_when_nothing_changed():
+    """入力が変わった銘柄がなければDBにアクセスしないこと"""
+    db = _signal_session()
+
+    assert await detect_all_signals(db, date(2026, 1, 9), stock_ids=set()) == (0, 0, [])
+    assert db.statements == []
+
+
+def test_backfill_date_chunks():
+    """期間を指定日数ごとに、最後のチャンクは終了日で切って分割すること"""
+    chunks = backfill_date_chunks(date(2026, 1, 1), date(2026, 1, 10), 4)
+
+    assert chunks == [
+        (date(2026, 1, 1), date(2026, 1, 4)),
+        (date(2026, 1, 5), date(2026, 1, 8)),
+        (date(2026, 1, 9), date(2026, 1, 10)),
+    ]
+
+
+class _BackfillSession:
+    """バックフィルの各クエリに固定の行を返し、書き込みを記録するセッション"""
+
+    def __init__(self, checkpoints: list | None = None) -> None:
+        days = [date(2026, 1, 5), date(2026, 1, 6), date(2026, 1, 7)]
+        self.rows = {
+            "technical_indicators": [
+                _row(s, INDICATOR_FIELDS, _BULLISH, d) for s in (1, 2) for d in days
+            ],
+            "stock_prices": [
+                _row(s, ("close", "volume"), {"close": Decimal("100"), "volume": 3000}, d) for s in (1, 2) for d in days
+            ],
+            # 銘柄1: 期間前のPER=8 → 1/6からPER=50。銘柄2: ファンダメンタルなし
+            "fundamental_data": [_row(1, FUNDAMENTAL_FIELDS, {"per": Decimal("50")}, date(2026, 1, 6))],
+            "latest_fundamental_data": [_row(1, FUNDAMENTAL_FIELDS, {"per": Decimal("8")}, date(2025, 12, 30))],
+            "signal_backfill_checkpoints": checkpoints or [],
+        }
+        self.statements: list[str] = []
+        self.commits = 0
+
+    async def execute(self, stmt):
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        self.statements.append(sql)
+        if sql.startswith("INSERT INTO signals"):
+            return _FakeResult([])
+        if not sql.startswith("SELECT"):
+            return _FakeResult([])
+        table = sql.split("FROM", 1)[1].split()[0]
+        if "DISTINCT ON" in sql:
+            table = f"latest_{table}"
+        return _FakeResult(self.rows[table])
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+    async def rollback(self) -> None:
+        pass
+
+
+async def test_load_backfill_frame_joins_fundamentals_as_of_each_date():
+    """各日付にはその日以前で最新のファンダメンタルが対応付けられること"""
+    frame = await load_backfill_frame(_BackfillSession(), date(2026, 1, 5), date(2026, 1, 7))
+
+    assert len(frame) == 6
+    assert frame[frame["stock_id"] == 1]["per"].tolist() == [8.0, 50.0, 50.0]
+    assert frame[frame["stock_id"] == 2]["per"].isna().all()
+    assert frame["close"].tolist() == [100.0] * 6
+
+
+async def test_backfill_signals_writes_in_bulk_and_skips_completed_chunks():
+    """チャンクごとに一括で書き込んでコミットし、同じルールで完了済みのチャンクは飛ばすこと"""
+    completed = [
+        SimpleNamespace(
+            chunk_start=date(2026, 1, 1), chunk_end=date(2026, 1, 4), fingerprint=signal_rules_fingerprint()
+        ),
+        # ルール変更前に完了したチャンクは計算し直す
+        SimpleNamespace(chunk_start=date(2026, 1, 5), chunk_end=date(2026, 1, 8), fingerprint="stale"),
+    ]
+    db = _BackfillSession(completed)
+
+    success, errors, _ = await backfill_signals(db, date(2026, 1, 1), date(2026, 1, 8), chunk_days=4)
+
+    assert errors == 0
+    assert success == 6
+    assert db.commits == 1
+    signal_writes = [sql for sql in db.statements if sql.startswith("INSERT INTO signals")]
+    checkpoints = [sql for sql in db.statements if sql.startswith("INSERT INTO signal_backfill_checkpoints")]
+    assert len(signal_writes) == len(checkpoints) == 1
+    # 判定した (銘柄, 日付) の組だけを置き換える（銘柄×日付の直積で削除しない）
+    deletes = [sql for sql in db.statements if sql.startswith("DELETE FROM signals")]
+    assert len(deletes) == 1
+    assert "(signals.stock_id, signals.date) IN (SELECT unnest(" in deletes[0]
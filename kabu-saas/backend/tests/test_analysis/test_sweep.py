@@ -0,0 +1,183 @@
+"""パラメータスイープのテスト"""
+
+from dataclasses import replace
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.analysis import sweep
+from app.analysis.backtest import (
+    BacktestConfig,
+    BacktestReport,
+    OHLCPanel,
+    SignalTrades,
+    simulate_trades,
+    summarize_backtest,
+)
+from app.analysis.parallel import SharedArrays, analysis_pool, attach_shared_arrays
+from app.analysis.scoring import COMPONENT_NAMES, DEFAULT_WEIGHTS, round_scores
+from app.analysis.sweep import (
+    SweepParams,
+    SweepSpace,
+    _threshold_mask,
+    build_leaderboard,
+    evaluate_params,
+    expand_space,
+    run_sweep,
+)
+
+START = date(2024, 1, 1)
+END = date(2024, 4, 30)
+
+
+def _panels(stocks: int = 8, days: int = 80, seed: int = 0) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.03, (stocks, days)), axis=1))
+    open_ = close * (1 + rng.normal(0, 0.01, (stocks, days)))
+    components = rng.integers(10, 95, (stocks, days, len(COMPONENT_NAMES))).astype(np.int16)
+    # 項目別スコアのない日
+    components[0, :5] = -1
+    return {
+        "stock_ids": np.arange(1, stocks + 1, dtype=np.int64),
+        "dates": np.datetime64(START) + np.arange(days),
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + rng.uniform(0, 0.03, (stocks, days))),
+        "low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.03, (stocks, days))),
+        "close": close,
+        "sma_25": np.where(rng.random((stocks, days)) < 0.5, close * 0.97, np.nan),
+        "components": components,
+    }
+
+
+def test_expand_space_grid_and_sample():
+    """全組み合わせと、その中からの重複のない無作為抽出"""
+    space = SweepSpace(
+        buy_thresholds=[55, 60, 65],
+        sell_thresholds=[35, 40],
+        take_profit_rates=[(0.1, 0.2, 0.3), (0.05, 0.1, 0.15)],
+        stop_loss_rates=[0.03, 0.05],
+    )
+
+    grid = expand_space(space)
+    sample = expand_space(space, samples=5, seed=1)
+
+    assert len(grid) == space.size() == 24
+    assert grid[0] == SweepParams(55, 35, dict(DEFAULT_WEIGHTS), (0.1, 0.2, 0.3), 0.03)
+    assert grid[-1] == SweepParams(65, 40, dict(DEFAULT_WEIGHTS), (0.05, 0.1, 0.15), 0.05)
+    assert len(sample) == 5
+    assert all(params in grid for params in sample)
+    assert len({repr(params) for params in sample}) == 5
+    assert sample == expand_space(space, samples=5, seed=1)
+
+
+def test_expand_space_rejects_invalid_weights():
+    weights = dict(DEFAULT_WEIGHTS, per=0, pbr=0, dividend_yield=0, roe=0)
+
+    with pytest.raises(ValueError):
+        expand_space(SweepSpace(weights=[weights]))
+
+
+def test_threshold_mask_matches_rounded_scores():
+    """閾値判定が組み込みround()で丸めたスコアの判定と一致すること"""
+    values = np.concatenate([
+        np.random.default_rng(0).uniform(0, 100, 5000),
+        60 - np.array([0.004, 0.005, 0.0051, 0.006, 1e-12]),
+        40 + np.array([0.004, 0.005, 0.0051, 0.006, 1e-12]),
+    ])
+    rounded = round_scores(values)
+
+    np.testing.assert_array_equal(_threshold_mask(values, 60.0, above=True), rounded >= 60.0)
+    np.testing.assert_array_equal(_threshold_mask(values, 40.0, above=False), rounded <= 40.0)
+
+
+def test_evaluate_params_matches_direct_backtest():
+    """共有メモリ経由の評価が、同じシグナルを直接バックテストした結果と一致すること"""
+    arrays = _panels()
+    params = SweepParams(buy_threshold=58, sell_threshold=45, take_profit_rates=(0.04, 0.08, 0.12))
+    config = BacktestConfig(max_holding_days=15)
+
+    with SharedArrays(arrays) as shared:
+        report = evaluate_params(shared.handles, params, config, START, END)
+
+    weights = np.array([DEFAULT_WEIGHTS[name] for name in COMPONENT_NAMES])
+    technical = arrays["components"][..., :5] @ weights[:5] / weights[:5].sum()
+    fundamental = arrays["components"][..., 5:] @ weights[5:] / weights[5:].sum()
+    total = (technical * weights[:5].sum() + fundamental * weights[5:].sum()) / weights.sum()
+    scored = arrays["components"][..., 0] >= 0
+    buy = scored & (np.round(total, 2) >= 58)
+    sell = scored & ~buy & (np.round(total, 2) <= 45)
+    rows, cols = np.nonzero(buy)
+    panel = OHLCPanel(*(arrays[key] for key in ("stock_ids", "dates", "open", "high", "low", "close")))
+    trades = SignalTrades(
+        panel.stock_ids[rows], panel.dates[cols], panel.close[rows, cols], arrays["sma_25"][rows, cols]
+    )
+    expected_config = replace(config, take_profit_rates=(0.04, 0.08, 0.12))
+    results = simulate_trades(panel, trades, expected_config, sell_signals=sell)
+    expected = summarize_backtest(panel, results, expected_config, START, END)
+
+    assert report.signals == expected.signals > 0
+    assert report.filled == expected.filled
+    assert report.sell_signal_rate > 0
+    assert report.total_pnl == pytest.approx(expected.total_pnl)
+    assert report.target_hit_rates == pytest.approx(expected.target_hit_rates)
+
+
+async def test_workers_read_panels_from_shared_memory():
+    """ワーカープロセスが共有メモリのパネルで評価し、プロセス内で評価した結果と一致すること"""
+    arrays = _panels(seed=3)
+    params = [SweepParams(buy_threshold=threshold) for threshold in (55, 60)]
+    config = BacktestConfig(max_holding_days=15)
+
+    with SharedArrays(arrays) as shared:
+        views = attach_shared_arrays(shared.handles)
+        assert not views["close"].flags.writeable
+        np.testing.assert_array_equal(views["components"], arrays["components"])
+
+        expected = [evaluate_params(shared.handles, p, config, START, END) for p in params]
+        async with analysis_pool(workers=2) as pool:
+            assert pool.parallel
+            reports = [await pool.run(evaluate_params, shared.handles, p, config, START, END) for p in params]
+
+    assert [r.total_pnl for r in reports] == pytest.approx([r.total_pnl for r in expected])
+    assert [r.filled for r in reports] == [r.filled for r in expected]
+
+
+def _report(filled: int, total_return: float) -> BacktestReport:
+    return BacktestReport(
+        start_date=START, end_date=END, signals=filled, filled=filled, fill_rate=1.0,
+        target_hit_rates=[0.5, 0.2, 0.1], stop_loss_rate=0.3, sell_signal_rate=0.0, expired_rate=0.2,
+        win_rate=0.5, average_return=total_return / max(filled, 1), median_return=0.0, average_holding_days=5.0,
+        total_pnl=total_return * 1_000_000, total_return=total_return, max_drawdown=0.1,
+        average_exposure=0.5, max_exposure=1.0, max_open_positions=3,
+    )
+
+
+def test_leaderboard_ranks_by_objective_and_demotes_thin_results():
+    """目的関数の降順に並び、約定件数が足りない組み合わせは末尾になること"""
+    params = [SweepParams(buy_threshold=t) for t in (55, 60, 65, 70)]
+    reports = [_report(50, 0.10), _report(50, 0.30), _report(5, 0.90), _report(40, -0.05)]
+
+    leaderboard = build_leaderboard(params, reports, "total_return", min_trades=10)
+
+    assert [result.params.buy_threshold for result in leaderboard] == [60, 55, 70, 65]
+    assert [result.rank for result in leaderboard] == [1, 2, 3, 4]
+    assert leaderboard[-1].objective is None
+    assert leaderboard[0].objective == pytest.approx(0.30)
+
+
+async def test_run_sweep_checks_grid_size_before_expanding(monkeypatch):
+    """組み合わせ数が上限を超える場合は、組み合わせを展開・DBを読む前に拒否すること"""
+    def _expand(*args):
+        raise AssertionError("組み合わせを展開してはいけない")
+
+    monkeypatch.setattr(sweep, "expand_space", _expand)
+    monkeypatch.setattr(sweep.get_settings(), "sweep_max_combinations", 100)
+    space = SweepSpace(
+        buy_thresholds=[float(v) for v in range(50, 70)], stop_loss_rates=[0.01 * v for v in range(1, 11)],
+    )
+
+    with pytest.raises(ValueError, match="組み合わせ数 200 が上限 100"):
+        await run_sweep(None, START, END, space)
+    with pytest.raises(ValueError, match="組み合わせ数 101 が上限 100"):
+        await run_sweep(None, START, END, space, samples=101)
@@ -0,0 +1,128 @@
+"""テクニカル指標計算テスト"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.dialects import postgresql
+
+from app.analysis.technical import (
+    calculate_technical_indicators,
+    transform_to_indicator_records,
+    upsert_indicator_records,
+)
+
+
+def _make_price_df(n: int = 300, seed: int = 0) -> pd.DataFrame:
+    """テスト用の株価DataFrame（calculate_stock_technicals と同じ形式）を生成する"""
+    rng = np.random.default_rng(seed)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    start = date(2024, 1, 1)
+    return pd.DataFrame({
+        "date": [start + timedelta(days=i) for i in range(n)],
+        "open": close,
+        "high": close * 1.01,
+        "low": close * 0.99,
+        "close": close,
+        "volume": rng.integers(10_000, 1_000_000, n),
+    })
+
+
+def _reference_to_decimal(value, precision: int = 2) -> Decimal | None:
+    if pd.isna(value):
+        return None
+    return Decimal(str(round(float(value), precision)))
+
+
+def _reference_to_int(value) -> int | None:
+    if pd.isna(value):
+        return None
+    return int(float(value))
+
+
+def _reference_transform(df: pd.DataFrame, stock_id: int) -> list[dict]:
+    """行単位で変換していた従来実装"""
+    records = []
+    for _, row in df.iterrows():
+        records.append({
+            "stock_id": stock_id,
+            "date": row["date"] if isinstance(row["date"], date) else row["date"].date(),
+            "sma_5": _reference_to_decimal(row.get("sma_5")),
+            "sma_25": _reference_to_decimal(row.get("sma_25")),
+            "sma_75": _reference_to_decimal(row.get("sma_75")),
+            "sma_200": _reference_to_decimal(row.get("sma_200")),
+            "ema_12": _reference_to_decimal(row.get("ema_12")),
+            "ema_26": _reference_to_decimal(row.get("ema_26")),
+            "rsi_14": _reference_to_decimal(row.get("rsi_14")),
+            "macd_line": _reference_to_decimal(row.get("macd_line"), 4),
+            "macd_signal": _reference_to_decimal(row.get("macd_signal"), 4),
+            "macd_histogram": _reference_to_decimal(row.get("macd_histogram"), 4),
+            "bb_upper_2": _reference_to_decimal(row.get("bb_upper_2")),
+            "bb_middle": _reference_to_decimal(row.get("bb_middle")),
+            "bb_lower_2": _reference_to_decimal(row.get("bb_lower_2")),
+            "volume_sma_25": _reference_to_int(row.get("volume_sma_25")),
+        })
+    return records
+
+
+def _as_text(records: list[dict]) -> list[dict]:
+    """Decimalの表記（桁数）まで比較するため文字列化する"""
+    return [{k: str(v) for k, v in r.items()} for r in records]
+
+
+def test_transform_to_indicator_records_matches_rowwise():
+    """列単位の変換結果が従来の行単位変換と表記まで一致すること"""
+    df = calculate_technical_indicators(_make_price_df())
+    # 組み込みround()とnp.roundで結果が分かれる中間値を含める
+    df.loc[df.index[-4:], "sma_5"] = [2.675, 1.005, 0.285, -1.115]
+    df.loc[df.index[-4:], "macd_line"] = [0.00005, 1.00015, -2.00025, np.inf]
+
+    assert _as_text(transform_to_indicator_records(df, 1)) == _as_text(_reference_transform(df, 1))
+
+
+def test_transform_to_indicator_records_missing_columns():
+    """存在しない指標列はNoneになること"""
+    df = pd.DataFrame({"date": [date(2026, 1, 5)], "sma_5": [100.123]})
+
+    records = transform_to_indicator_records(df, 1)
+
+    assert records == _reference_transform(df, 1)
+    assert records[0]["sma_5"] == Decimal("100.12")
+    assert records[0]["rsi_14"] is None
+
+
+class _RecordingSession:
+    """実行されたステートメントを記録するだけのセッション（RETURNINGは空を返す）"""
+
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    async def execute(self, stmt) -> SimpleNamespace:
+        self.statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=list))
+
+
+async def test_upsert_indicator_records_batches_statements():
+    """指定件数ごとに1ステートメントへまとめ、変更行のみ更新する条件を付けること"""
+    records = transform_to_indicator_records(calculate_technical_indicators(_make_price_df(250)), 1)
+    db = _RecordingSession()
+
+    count = await upsert_indicator_records(db, records, batch_size=100, only_changed=True)
+
+    assert count == 250
+    assert len(db.statements) == 3
+    assert "IS DISTINCT FROM excluded.sma_5" in db.statements[0]
+    assert "RETURNING technical_indicators.stock_id" in db.statements[0]
+
+
+async def test_upsert_indicator_records_without_change_filter():
+    """only_changed=False では無条件に更新すること"""
+    records = transform_to_indicator_records(calculate_technical_indicators(_make_price_df(30)), 1)
+    db = _RecordingSession()
+
+    await upsert_indicator_records(db, records, batch_size=1000, only_changed=False)
+
+    assert len(db.statements) == 1
+    assert "IS DISTINCT FROM" not in db.statements[0]
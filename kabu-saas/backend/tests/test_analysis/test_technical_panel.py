@@ -0,0 +1,79 @@
+"""パネル形式のテクニカル指標計算テスト"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.analysis.incremental import build_indicator_state
+from app.analysis.technical import calculate_technical_indicators, transform_to_indicator_records
+from app.analysis.technical_panel import (
+    build_price_panel,
+    calculate_panel_indicators,
+    panel_indicator_states,
+    split_panel_indicators,
+)
+
+
+def _make_universe(lengths: list[int], seed: int = 0) -> dict[int, pd.DataFrame]:
+    """銘柄ごとに日数の異なる株価DataFrameを生成する"""
+    rng = np.random.default_rng(seed)
+    end = date(2025, 12, 31)
+    frames = {}
+    for stock_id, n in enumerate(lengths, start=1):
+        close = np.round(rng.uniform(100, 5000) * np.exp(np.cumsum(rng.normal(0, 0.02, n))), 1)
+        frames[stock_id] = pd.DataFrame({
+            "date": [end - timedelta(days=n - 1 - i) for i in range(n)],
+            "open": close,
+            "high": close,
+            "low": close,
+            "close": close,
+            "volume": rng.integers(10_000, 1_000_000, n),
+        })
+    return frames
+
+
+def _build_panel(frames: dict[int, pd.DataFrame]):
+    long = pd.concat([df.assign(stock_id=stock_id) for stock_id, df in frames.items()], ignore_index=True)
+    return build_price_panel(
+        long["stock_id"].to_numpy(),
+        long["date"].tolist(),
+        long["close"].to_numpy(dtype=float),
+        long["volume"].to_numpy(dtype=float),
+    )
+
+
+def test_panel_matches_per_stock_calculation():
+    """パネル計算の結果が銘柄ごとの calculate_technical_indicators と一致すること"""
+    frames = _make_universe([300, 26, 25, 1, 240, 60])
+    panel = _build_panel(frames)
+
+    indicators = calculate_panel_indicators(panel)
+    panel_df = split_panel_indicators(panel, indicators)
+
+    expected_records = []
+    for stock_id, df in frames.items():
+        expected = calculate_technical_indicators(df)
+        expected_records += transform_to_indicator_records(expected, stock_id)
+        if expected.empty:
+            assert stock_id not in set(panel_df["stock_id"])
+            continue
+        actual = panel_df[panel_df["stock_id"] == stock_id].reset_index(drop=True)
+        for column in indicators.values:
+            np.testing.assert_array_equal(actual[column].to_numpy(), expected[column].to_numpy(), err_msg=column)
+
+    assert transform_to_indicator_records(panel_df) == expected_records
+
+
+def test_panel_states_match_per_stock_states():
+    """パネルから作った状態が銘柄ごとに作った状態と一致すること"""
+    frames = _make_universe([300, 40, 10], seed=1)
+    panel = _build_panel(frames)
+
+    states = panel_indicator_states(panel, calculate_panel_indicators(panel))
+
+    assert set(states) == {1, 2}
+    for stock_id in states:
+        df = frames[stock_id]
+        expected = build_indicator_state(df["close"].to_numpy(dtype=float), df["volume"].to_numpy(dtype=float))
+        assert states[stock_id] == expected
@@ -0,0 +1,150 @@
+"""ウォークフォワード最適化のテスト"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.analysis import walk_forward
+from app.analysis.backtest import BacktestConfig
+from app.analysis.parallel import SharedArrays
+from app.analysis.scoring import COMPONENT_NAMES, DEFAULT_WEIGHTS
+from app.analysis.sweep import SweepParams, evaluate_params
+from app.analysis.walk_forward import WalkForwardFold, run_walk_forward, walk_forward_folds, weight_candidates
+from app.analysis.weight_schedule import WeightSchedule
+
+START = date(2024, 1, 1)
+
+
+def _panels(stocks: int = 6, days: int = 60) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(0)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.03, (stocks, days)), axis=1))
+    open_ = close * (1 + rng.normal(0, 0.01, (stocks, days)))
+    return {
+        "stock_ids": np.arange(1, stocks + 1, dtype=np.int64),
+        "dates": np.datetime64(START) + np.arange(days),
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + rng.uniform(0, 0.03, (stocks, days))),
+        "low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.03, (stocks, days))),
+        "close": close,
+        "sma_25": np.full((stocks, days), np.nan),
+        "components": rng.integers(10, 95, (stocks, days, len(COMPONENT_NAMES))).astype(np.int16),
+    }
+
+
+def _day(offset: int) -> date:
+    return START + timedelta(days=offset)
+
+
+def test_walk_forward_folds_roll_by_test_window():
+    """検証期間の日数ずつずらし、最後の検証期間はデータの終わりまでになること"""
+    dates = np.datetime64(START) + np.arange(25)
+
+    folds = walk_forward_folds(dates, train_days=10, test_days=6)
+
+    assert folds == [
+        WalkForwardFold(_day(0), _day(9), _day(10), _day(15)),
+        WalkForwardFold(_day(6), _day(15), _day(16), _day(21)),
+        WalkForwardFold(_day(12), _day(21), _day(22), _day(24)),
+    ]
+    assert walk_forward_folds(dates, train_days=25, test_days=5) == []
+
+
+def test_weight_candidates_start_with_default_and_are_reproducible():
+    candidates = weight_candidates(20, seed=3)
+
+    assert len(candidates) == 20
+    assert candidates[0] == DEFAULT_WEIGHTS
+    assert candidates == weight_candidates(20, seed=3)
+    assert all(set(weights) == set(COMPONENT_NAMES) for weights in candidates)
+    assert all(sum(weights.values()) == pytest.approx(1.0, abs=0.01) for weights in candidates[1:])
+
+
+def test_evaluate_params_ignores_prices_after_period():
+    """評価期間の後の株価を変えても、期間内の評価結果が変わらないこと"""
+    arrays = _panels()
+    changed = {key: value.copy() for key, value in arrays.items()}
+    for key in ("open", "high", "low", "close"):
+        changed[key][:, 30:] *= 2
+    params = SweepParams(buy_threshold=55, sell_threshold=40)
+    config = BacktestConfig(max_holding_days=10)
+
+    with SharedArrays(arrays) as original, SharedArrays(changed) as shifted:
+        expected = evaluate_params(original.handles, params, config, _day(0), _day(29))
+        report = evaluate_params(shifted.handles, params, config, _day(0), _day(29))
+
+    assert expected.filled > 0
+    assert report.total_pnl == pytest.approx(expected.total_pnl)
+    assert report.equity_dates[-1] == _day(29)
+
+
+class _WeightSetSession:
+    """scoring_weight_sets への保存を記録する"""
+
+    def __init__(self) -> None:
+        self.rows: list[dict] = []
+        self.commits = 0
+
+    async def execute(self, stmt):
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        assert "INSERT INTO scoring_weight_sets" in str(compiled)
+        assert "ON CONFLICT (effective_from) DO UPDATE" in str(compiled)
+        count = sum(key.startswith("effective_from") for key in compiled.params)
+        self.rows.extend(
+            {c: compiled.params[f"{c}_m{i}"] for c in ("effective_from", "effective_to", "weights", "oos_score")}
+            for i in range(count)
+        )
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+
+async def test_run_walk_forward_saves_weights_per_test_window(monkeypatch):
+    """検証期間ごとに学習期間で最良の重みを選び、検証期間の開始日から適用する重みとして保存すること"""
+    arrays = _panels()
+
+    async def _load_panels(db, start_date, end_date):
+        return arrays
+
+    monkeypatch.setattr(walk_forward, "load_sweep_panels", _load_panels)
+    db = _WeightSetSession()
+
+    results = await run_walk_forward(
+        db, _day(0), _day(59), train_days=30, test_days=15, candidates=4,
+        base_config=BacktestConfig(max_holding_days=10), workers=1,
+    )
+
+    assert [result.fold.test_start for result in results] == [_day(30), _day(45)]
+    assert [row["effective_from"] for row in db.rows] == [_day(30), _day(45)]
+    assert db.commits == 1
+    candidates = weight_candidates(4)
+    for result in results:
+        assert result.weights in candidates
+        assert result.oos_report.start_date == result.fold.test_start
+        # 選んだ重みは学習期間の目的関数が最大の候補
+        with SharedArrays(arrays) as shared:
+            train_returns = [
+                evaluate_params(
+                    shared.handles, SweepParams(weights=weights), BacktestConfig(max_holding_days=10),
+                    result.fold.train_start, result.fold.train_end,
+                ).total_return
+                for weights in candidates
+            ]
+        assert result.train_score == pytest.approx(max(train_returns))
+
+
+def test_weight_schedule_by_date():
+    """適用開始日より前は DEFAULT_WEIGHTS、以降は最も新しい学習済みの重みを使うこと"""
+    first = dict(DEFAULT_WEIGHTS, rsi=0.2)
+    second = dict(DEFAULT_WEIGHTS, macd=0.3)
+    schedule = WeightSchedule([date(2024, 3, 1), date(2024, 6, 1)], [first, second])
+
+    assert schedule.weights_for(date(2024, 2, 29)) == DEFAULT_WEIGHTS
+    assert schedule.weights_for(date(2024, 3, 1)) == first
+    assert schedule.weights_for(date(2025, 1, 1)) == second
+    assert schedule.segments(date(2024, 1, 1), date(2024, 6, 30)) == [
+        (date(2024, 1, 1), date(2024, 2, 29), DEFAULT_WEIGHTS),
+        (date(2024, 3, 1), date(2024, 5, 31), first),
+        (date(2024, 6, 1), date(2024, 6, 30), second),
+    ]
@@ -0,0 +1,202 @@
+"""株価データ収集テスト"""
+
+from contextlib import asynccontextmanager
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.dialects import postgresql
+
+from app.collectors import price_collector
+from app.collectors.price_collector import (
+    _collect_prices_batched,
+    resolve_fetch_start,
+    split_batch_frame,
+    transform_price_data,
+    upsert_price_records,
+)
+
+
+def _make_price_frame(dates: pd.DatetimeIndex, base: float) -> pd.DataFrame:
+    """テスト用の株価DataFrameを生成する"""
+    values = base + np.arange(len(dates), dtype=float)
+    return pd.DataFrame(
+        {
+            "Open": values,
+            "High": values + 1,
+            "Low": values - 1,
+            "Close": values,
+            "Adj Close": values,
+            "Volume": np.full(len(dates), 1000.0),
+        },
+        index=dates,
+    )
+
+
+def test_split_batch_frame_multiindex():
+    """結合DataFrameが銘柄ごとに分割され、他銘柄のみの取引日が除去されること"""
+    dates = pd.date_range("2026-01-05", periods=3, freq="B")
+    toyota = _make_price_frame(dates, 100.0)
+    sony = _make_price_frame(dates[1:], 200.0)
+    combined = pd.concat({"7203.T": toyota, "6758.T": sony}, axis=1)
+
+    frames = split_batch_frame(combined, ["7203.T", "6758.T", "9984.T"])
+
+    assert len(frames["7203.T"]) == 3
+    assert len(frames["6758.T"]) == 2
+    assert frames["6758.T"].index[0] == dates[1]
+    assert frames["9984.T"].empty
+
+
+def test_split_batch_frame_single_ticker_flat_columns():
+    """単一銘柄でフラットな列が返った場合もそのまま扱えること"""
+    dates = pd.date_range("2026-01-05", periods=2, freq="B")
+    frames = split_batch_frame(_make_price_frame(dates, 100.0), ["7203.T"])
+
+    assert len(frames["7203.T"]) == 2
+
+
+def test_split_batch_frame_empty():
+    """空の結果では全銘柄が空DataFrameになること"""
+    frames = split_batch_frame(pd.DataFrame(), ["7203.T", "6758.T"])
+
+    assert all(frame.empty for frame in frames.values())
+
+
+def test_resolve_fetch_start_new_listing_backfills():
+    """未格納の銘柄はバックフィル開始日から取得すること"""
+    backfill = date(2021, 1, 1)
+    assert resolve_fetch_start(None, date(2026, 1, 9), backfill) == backfill
+
+
+def test_resolve_fetch_start_resumes_after_watermark():
+    """格納済み最終日の翌日から取得すること"""
+    assert resolve_fetch_start(date(2026, 1, 6), date(2026, 1, 9), date(2021, 1, 1)) == date(2026, 1, 7)
+
+
+def test_resolve_fetch_start_skips_up_to_date():
+    """取得すべき営業日がなければスキップ（None）すること"""
+    backfill = date(2021, 1, 1)
+    # 最終日の翌日が終了日（終了日は含まない）
+    assert resolve_fetch_start(date(2026, 1, 8), date(2026, 1, 9), backfill) is None
+    # 金曜まで格納済みで、間が週末のみ
+    assert resolve_fetch_start(date(2026, 1, 9), date(2026, 1, 12), backfill) is None
+
+
+def _reference_transform_price_data(df: pd.DataFrame, stock_id: int) -> list[dict]:
+    """行単位で変換していた従来実装"""
+    records = []
+    for idx, row in df.iterrows():
+        record_date = idx.date() if hasattr(idx, "date") else idx
+        records.append({
+            "stock_id": stock_id,
+            "date": record_date,
+            "open": Decimal(str(round(row["Open"], 2))),
+            "high": Decimal(str(round(row["High"], 2))),
+            "low": Decimal(str(round(row["Low"], 2))),
+            "close": Decimal(str(round(row["Close"], 2))),
+            "volume": int(row["Volume"]),
+            "adjusted_close": Decimal(str(round(row.get("Adj Close", row["Close"]), 2))),
+        })
+    return records
+
+
+def test_transform_price_data_matches_rowwise():
+    """列単位の変換結果が従来の行単位変換と表記まで一致すること"""
+    dates = pd.date_range("2026-01-05", periods=200, freq="B", tz="Asia/Tokyo")
+    rng = np.random.default_rng(0)
+    df = _make_price_frame(dates, 100.0) * rng.uniform(0.5, 50.0, (len(dates), 1))
+    df.iloc[:4, 0] = [2.675, 1.005, 0.285, 1234.565]
+
+    def _as_text(records: list[dict]) -> list[dict]:
+        return [{k: str(v) for k, v in r.items()} for r in records]
+
+    assert _as_text(transform_price_data(df, 1)) == _as_text(_reference_transform_price_data(df, 1))
+    # 調整後終値の列がない場合は終値を使う
+    no_adj = df.drop(columns=["Adj Close"])
+    assert transform_price_data(no_adj, 1) == _reference_transform_price_data(no_adj, 1)
+
+
+class _UpsertSession:
+    """株価UPSERTのRETURNINGで変更行を返し、実行したステートメントを記録するセッション"""
+
+    def __init__(self, changed: list[tuple[int, date]]) -> None:
+        self.changed = changed
+        self.statements: list[tuple[str, dict]] = []
+
+    async def execute(self, stmt):
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        self.statements.append((str(compiled), compiled.params))
+        return SimpleNamespace(all=lambda: self.changed)
+
+
+async def test_upsert_price_records_invalidates_states_for_past_changes():
+    """変更された株価の銘柄ごとの最古の日付以降まで計算済みの増分計算状態を削除すること"""
+    records = transform_price_data(_make_price_frame(pd.bdate_range("2026-01-05", periods=5), 100.0), 1)
+    db = _UpsertSession([(2, date(2026, 1, 9)), (1, date(2026, 1, 8)), (1, date(2026, 1, 5))])
+
+    assert await upsert_price_records(db, records) == 5
+
+    sql, params = db.statements[-1]
+    assert sql.startswith("DELETE FROM technical_indicator_states USING")
+    assert "technical_indicator_states.last_date >= anon_1.date" in sql
+    assert list(params.values()) == [[1, 2], [date(2026, 1, 5), date(2026, 1, 9)]]
+
+
+async def test_upsert_price_records_keeps_states_without_changes():
+    db = _UpsertSession([])
+
+    records = transform_price_data(_make_price_frame(pd.bdate_range("2026-01-05", periods=2), 1.0), 1)
+
+    await upsert_price_records(db, records)
+
+    assert len(db.statements) == 1
+
+
+class _SavepointSession:
+    """セーブポイントごとに、ブロック内の書き込みを確定したか取り消したかを記録する"""
+
+    def __init__(self) -> None:
+        self.savepoints: list[str] = []
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        try:
+            yield
+        except Exception:
+            self.savepoints.append("rollback")
+            raise
+        self.savepoints.append("release")
+
+
+async def test_collect_prices_batched_rolls_back_only_the_failed_copy_chunk(monkeypatch):
+    """COPY取り込みはチャンクごとのセーブポイントで行い、失敗したチャンクの後も取り込みを続けること"""
+    stocks = [SimpleNamespace(id=i, code=f"{1000 + i}.T") for i in range(1, 5)]
+    frame = _make_price_frame(pd.bdate_range("2026-01-05", periods=2), 100.0)
+    copied: list[list[int]] = []
+
+    def _fetch(codes, start_date, end_date):
+        return {code: frame for code in codes}
+
+    async def _copy(db, model, records, **kwargs):
+        stock_ids = sorted({record["stock_id"] for record in records})
+        if stock_ids[0] == 1:
+            raise RuntimeError("COPY失敗")
+        copied.append(stock_ids)
+        return len(records)
+
+    monkeypatch.setattr(price_collector, "fetch_price_data_batch", _fetch)
+    monkeypatch.setattr(price_collector, "copy_upsert_records", _copy)
+    monkeypatch.setattr(price_collector.get_settings(), "bulk_copy_enabled", True)
+    db = _SavepointSession()
+
+    success, error_count, errors = await _collect_prices_batched(
+        db, [(stock, date(2026, 1, 5)) for stock in stocks], date(2026, 1, 9), batch_size=2, max_concurrency=1
+    )
+
+    assert (success, error_count) == (2, 2)
+    assert "取り込み失敗" in errors[0]
+    assert copied == [[3, 4]]
+    assert sorted(db.savepoints) == ["release", "rollback"]
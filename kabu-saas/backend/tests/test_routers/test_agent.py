@@ -0,0 +1,35 @@
+"""エージェントAPIテスト"""
+
+import pytest
+
+from app.routers import agent
+from app.services.pipeline import PipelineAlreadyRunningError
+
+
+@pytest.mark.parametrize(("acquired", "expected"), [(True, "triggered"), (False, "already_running")])
+async def test_run_pipeline_reports_lock_acquired_by_worker(client, monkeypatch, acquired, expected):
+    """バックグラウンドのスレッドがロックを取得できたかが確定してから応答すること"""
+    async def run_pipeline(session_factory, on_lock):
+        on_lock(acquired)
+        if not acquired:
+            raise PipelineAlreadyRunningError("実行中")
+
+    monkeypatch.setattr(agent, "run_pipeline", run_pipeline)
+
+    response = await client.post("/api/agent/run-pipeline")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == expected
+
+
+async def test_run_pipeline_fails_when_worker_cannot_start(client, monkeypatch):
+    """ロックの取得を試みる前に失敗した場合は503を返すこと"""
+    async def run_pipeline(session_factory, on_lock):
+        raise ConnectionError("接続できません")
+
+    monkeypatch.setattr(agent, "run_pipeline", run_pipeline)
+
+    response = await client.post("/api/agent/run-pipeline")
+
+    assert response.status_code == 503
+    assert "接続できません" in response.text
@@ -0,0 +1,35 @@
+"""リサーチAPIテスト"""
+
+from types import SimpleNamespace
+
+from app.dependencies import get_current_user
+from app.main import app
+
+
+async def test_backtest_rejects_inverted_period(client):
+    """開始日が終了日より後の場合は422を返すこと"""
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1)
+    try:
+        response = await client.post(
+            "/api/research/backtest", json={"start_date": "2024-06-01", "end_date": "2024-01-01"}
+        )
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+    assert response.status_code == 422
+    assert "開始日" in response.text
+
+
+async def test_sweep_rejects_unknown_objective(client):
+    """未知の目的関数を指定した場合は422を返すこと"""
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1)
+    try:
+        response = await client.post(
+            "/api/research/sweep",
+            json={"start_date": "2024-01-01", "end_date": "2024-06-01", "objective": "profit"},
+        )
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+    assert response.status_code == 422
+    assert "total_return" in response.text
@@ -0,0 +1,13 @@
+"""シグナルAPIテスト"""
+
+from app.analysis.scoring import DEFAULT_WEIGHTS
+
+
+async def test_rerank_rejects_incomplete_weights(client):
+    """重みの項目が足りない場合は422を返すこと"""
+    weights = {k: v for k, v in DEFAULT_WEIGHTS.items() if k != "roe"}
+
+    response = await client.post("/api/signals/rerank", json={"weights": weights})
+
+    assert response.status_code == 422
+    assert "roe" in response.text
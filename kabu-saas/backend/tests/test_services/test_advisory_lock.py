@@ -0,0 +1,100 @@
+"""アドバイザリロック・スケジューラのリーダー選出のテスト"""
+
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+
+import app.scheduler as scheduler
+from app.scheduler import SchedulerLeader
+from app.services.advisory_lock import PIPELINE_LOCK, SCHEDULER_LEADER_LOCK, advisory_lock, lock_key
+
+
+class _LockServer:
+    """pg_try_advisory_lock / pg_advisory_unlock を接続ごとに再現する"""
+
+    def __init__(self) -> None:
+        self.holders: dict[int, object] = {}
+        self.options: list[dict] = []
+
+    def session(self) -> "_LockSession":
+        return _LockSession(self)
+
+
+class _LockSession:
+    def __init__(self, server: _LockServer) -> None:
+        self.server = server
+
+    async def __aenter__(self) -> "_LockSession":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        # 接続を閉じると保持していたロックは解放される
+        for key in [key for key, holder in self.server.holders.items() if holder is self]:
+            del self.server.holders[key]
+
+    async def connection(self, execution_options=None) -> "_LockSession":
+        self.server.options.append(execution_options)
+        return self
+
+    async def scalar(self, stmt):
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        key = next(iter(compiled.params.values()))
+        assert "pg_try_advisory_lock" in str(compiled)
+        if self.server.holders.get(key, self) is not self:
+            return False
+        self.server.holders[key] = self
+        return True
+
+    async def execute(self, stmt):
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        if "pg_advisory_unlock" in str(compiled):
+            self.server.holders.pop(next(iter(compiled.params.values())), None)
+
+
+def test_lock_key_is_stable_signed_64bit():
+    assert lock_key(PIPELINE_LOCK) == lock_key(PIPELINE_LOCK)
+    assert lock_key(PIPELINE_LOCK) != lock_key(SCHEDULER_LEADER_LOCK)
+    assert -(2 ** 63) <= lock_key(PIPELINE_LOCK) < 2 ** 63
+
+
+async def test_advisory_lock_excludes_other_sessions_until_released():
+    """ロック中は他のセッションが取得できず、ブロックを抜けると解放されること"""
+    server = _LockServer()
+
+    async with (
+        advisory_lock(server.session, PIPELINE_LOCK) as first,
+        advisory_lock(server.session, PIPELINE_LOCK) as second,
+    ):
+        assert first.acquired and not second.acquired
+    async with advisory_lock(server.session, PIPELINE_LOCK) as third:
+        assert third.acquired
+
+    assert server.holders == {}
+    assert server.options == [{"isolation_level": "AUTOCOMMIT"}] * 3
+
+
+async def test_only_one_scheduler_leader_and_failover(monkeypatch):
+    """スケジューラは1プロセスだけが起動し、リーダーが停止すると他のプロセスが引き継ぐこと"""
+    server = _LockServer()
+    started: list[str] = []
+    monkeypatch.setattr(scheduler, "start_scheduler", lambda: started.append("start"))
+    monkeypatch.setattr(scheduler, "shutdown_scheduler", lambda: started.append("stop"))
+    leaders = [SchedulerLeader(server.session, retry_seconds=0.01) for _ in range(3)]
+
+    for leader in leaders:
+        leader.start()
+    await asyncio.sleep(0.05)
+
+    current = [leader for leader in leaders if leader.is_leader]
+    assert len(current) == 1 and started == ["start"]
+
+    await current[0].stop()
+    await asyncio.sleep(0.05)
+
+    assert not current[0].is_leader
+    assert sum(leader.is_leader for leader in leaders) == 1
+    assert started == ["start", "stop", "start"]
+
+    for leader in leaders:
+        await leader.stop()
+    assert server.holders == {}
@@ -0,0 +1,131 @@
+"""COPYによる一括取り込みのテスト"""
+
+import os
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.bulk_ingest import _build_merge_sql, _dedupe_records, _staging_table_name, copy_upsert_records
+from app.models.stock import StockPrice
+
+
+def test_build_merge_sql_updates_only_changed_rows_and_returns_keys():
+    sql = _build_merge_sql(
+        "stock_prices", "_stage_stock_prices_0", ["stock_id", "date", "close"], ("stock_id", "date"),
+        only_changed=True, returning=("stock_id", "date"),
+    )
+
+    assert sql == (
+        'INSERT INTO "stock_prices" ("stock_id", "date", "close") '
+        'SELECT "stock_id", "date", "close" FROM "_stage_stock_prices_0" '
+        'ON CONFLICT ("stock_id", "date") DO UPDATE SET "close" = EXCLUDED."close" '
+        'WHERE "stock_prices"."close" IS DISTINCT FROM EXCLUDED."close" '
+        'RETURNING "stock_id", "date"'
+    )
+    assert "WHERE" not in _build_merge_sql("t", "s", ["id", "v"], ("id",), only_changed=False, returning=())
+
+
+def test_build_merge_sql_without_update_columns_does_nothing_on_conflict():
+    """すべての列が一意制約の列の場合は、既存の行を更新せず新しい行だけを挿入すること"""
+    sql = _build_merge_sql(
+        "t", "s", ["stock_id", "date"], ("stock_id", "date"), only_changed=True, returning=("stock_id", "date"),
+    )
+
+    assert sql == (
+        'INSERT INTO "t" ("stock_id", "date") SELECT "stock_id", "date" FROM "s" '
+        'ON CONFLICT ("stock_id", "date") DO NOTHING RETURNING "stock_id", "date"'
+    )
+
+
+def test_staging_table_name_depends_on_column_set():
+    """列の構成が異なる書き込みには別のステージングテーブルを使うこと"""
+    prices = _staging_table_name("stock_prices", ["stock_id", "date", "close"])
+
+    assert prices == _staging_table_name("stock_prices", ["stock_id", "date", "close"])
+    assert prices != _staging_table_name("stock_prices", ["stock_id", "date", "close", "volume"])
+    assert prices.startswith("_stage_stock_prices_") and len(prices) <= 63
+
+
+def test_dedupe_records_keeps_last_record_per_key():
+    records = [
+        {"stock_id": 1, "date": date(2026, 1, 5), "close": 100},
+        {"stock_id": 2, "date": date(2026, 1, 5), "close": 200},
+        {"stock_id": 1, "date": date(2026, 1, 5), "close": 101},
+    ]
+
+    assert _dedupe_records(records, ("stock_id", "date")) == [
+        {"stock_id": 1, "date": date(2026, 1, 5), "close": 101},
+        {"stock_id": 2, "date": date(2026, 1, 5), "close": 200},
+    ]
+
+
+class _CopySession:
+    """実行したSQLとCOPYしたレコードを記録するセッション"""
+
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+        self.copied: list[tuple[str, list[tuple]]] = []
+
+    async def execute(self, stmt):
+        self.statements.append(str(stmt))
+        return SimpleNamespace(all=list)
+
+    async def connection(self):
+        async def get_raw_connection():
+            return SimpleNamespace(driver_connection=self)
+        return SimpleNamespace(get_raw_connection=get_raw_connection)
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.copied.append((table, records))
+
+
+async def test_copy_upsert_records_dedupes_before_copy():
+    """同じキーのレコードは後のものだけをCOPYし、バッチごとにステージングを空にしてマージすること"""
+    records = [
+        {"stock_id": i % 3, "date": date(2026, 1, 5), "close": i}
+        for i in range(5)
+    ]
+    db = _CopySession()
+
+    count = await copy_upsert_records(db, StockPrice, records, batch_size=2)
+
+    staging = _staging_table_name("stock_prices", ["stock_id", "date", "close"])
+    assert count == 3
+    assert [rows for _, rows in db.copied] == [
+        [(0, date(2026, 1, 5), 3), (1, date(2026, 1, 5), 4)],
+        [(2, date(2026, 1, 5), 2)],
+    ]
+    assert {table for table, _ in db.copied} == {staging}
+    assert db.statements[0].startswith(f'CREATE TEMP TABLE IF NOT EXISTS "{staging}" ON COMMIT DROP')
+    assert [sql.split()[0] for sql in db.statements[1:]] == ["TRUNCATE", "INSERT", "TRUNCATE", "INSERT"]
+
+
+@pytest.mark.db
+async def test_copy_upsert_records_against_postgres():
+    """実際のPostgreSQLで、重複を含むレコードと列の構成が異なる書き込みを同じトランザクションで取り込めること"""
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL が未設定")
+    engine = create_async_engine(url)
+    model = SimpleNamespace(__tablename__="bulk_ingest_test")
+    try:
+        async with AsyncSession(engine) as db:
+            await db.execute(text(
+                "CREATE TEMP TABLE bulk_ingest_test "
+                "(stock_id integer, date date, close integer, volume integer, PRIMARY KEY (stock_id, date))"
+            ))
+            day = date(2026, 1, 5)
+            await copy_upsert_records(db, model, [
+                {"stock_id": 1, "date": day, "close": 100},
+                {"stock_id": 1, "date": day, "close": 101},
+            ])
+            await copy_upsert_records(db, model, [{"stock_id": 1, "date": day, "close": 102, "volume": 5}])
+            rows = (await db.execute(text("SELECT stock_id, close, volume FROM bulk_ingest_test"))).all()
+            await db.rollback()
+    finally:
+        await engine.dispose()
+
+    assert [tuple(row) for row in rows] == [(1, 102, 5)]
@@ -0,0 +1,87 @@
+"""DAG実行のテスト"""
+
+import asyncio
+
+import pytest
+
+from app.services.dag import Stage, run_dag, validate_stages
+
+
+def _stage(name: str, log: list[str], seconds: float = 0.01, depends_on: tuple[str, ...] = (), fail: bool = False):
+    async def run() -> str:
+        log.append(f"start:{name}")
+        await asyncio.sleep(seconds)
+        log.append(f"end:{name}")
+        if fail:
+            raise RuntimeError(f"{name} failed")
+        return name
+
+    return Stage(name, run, depends_on)
+
+
+async def test_independent_stages_run_concurrently_after_dependencies():
+    """依存先の完了後に開始し、依存関係のないステージは並行して実行すること"""
+    log: list[str] = []
+    stages = [
+        _stage("prices", log, 0.05),
+        _stage("fundamentals", log, 0.02),
+        _stage("technicals", log, 0.05, ("prices",)),
+        _stage("signals", log, 0.01, ("fundamentals", "technicals")),
+    ]
+
+    dag = await run_dag(stages)
+
+    assert log[:2] == ["start:prices", "start:fundamentals"]
+    assert log.index("start:technicals") > log.index("end:prices")
+    assert log.index("start:signals") > log.index("end:technicals")
+    assert [run.result for run in dag.runs.values()] == ["prices", "fundamentals", "technicals", "signals"]
+    assert dag.critical_path == ["prices", "technicals", "signals"]
+    # 並行実行のため、全体の所要時間は実行時間の合計より短い
+    assert dag.total_seconds < sum(run.wall_seconds for run in dag.runs.values())
+    assert dag.runs["technicals"].wall_seconds >= 0.05
+
+
+async def test_max_concurrency_records_queue_time():
+    """同時実行数の上限で待たされた時間を記録すること"""
+    log: list[str] = []
+
+    dag = await run_dag([_stage("a", log, 0.05), _stage("b", log, 0.05)], max_concurrency=1)
+
+    assert log == ["start:a", "end:a", "start:b", "end:b"]
+    assert dag.runs["a"].queue_seconds < 0.01
+    assert dag.runs["b"].queue_seconds >= 0.04
+
+
+async def test_failed_stage_skips_dependents():
+    """失敗したステージに依存するステージは実行せず、他のステージは続行すること"""
+    log: list[str] = []
+    done = []
+    stages = [
+        _stage("a", log, fail=True),
+        _stage("b", log, depends_on=("a",)),
+        _stage("c", log, depends_on=("b",)),
+        _stage("d", log),
+    ]
+
+    dag = await run_dag(stages, on_stage_done=lambda run: done.append(run.name))
+
+    assert "start:b" not in log and "start:c" not in log
+    assert dag.runs["b"].skipped and dag.runs["c"].skipped
+    assert dag.runs["d"].result == "d"
+    assert [str(e) for e in dag.errors] == ["a failed"]
+    assert sorted(done) == ["a", "b", "c", "d"]
+
+
+def test_validate_stages_rejects_invalid_graphs():
+    async def noop() -> None:
+        return None
+
+    ordered = validate_stages([Stage("c", noop, ("b",)), Stage("b", noop, ("a",)), Stage("a", noop)])
+    assert [stage.name for stage in ordered] == ["a", "b", "c"]
+
+    with pytest.raises(ValueError, match="循環"):
+        validate_stages([Stage("a", noop, ("b",)), Stage("b", noop, ("a",))])
+    with pytest.raises(ValueError, match="存在しません"):
+        validate_stages([Stage("a", noop, ("x",))])
+    with pytest.raises(ValueError, match="重複"):
+        validate_stages([Stage("a", noop), Stage("a", noop)])
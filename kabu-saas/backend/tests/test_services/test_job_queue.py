@@ -0,0 +1,75 @@
+"""パイプラインジョブキューのテスト"""
+
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.models.pipeline import PipelineJob
+from app.services.job_queue import claim_job, fail_job
+
+
+class _QueueSession:
+    """SELECT ... FOR UPDATE SKIP LOCKED に対して順にジョブを返し、UPDATE を記録するセッション"""
+
+    def __init__(self, jobs: list[PipelineJob]) -> None:
+        self.jobs = list(jobs)
+        self.selects: list[str] = []
+        self.updates: list[dict] = []
+        self.commits = 0
+
+    async def execute(self, stmt):
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        sql = str(compiled)
+        if sql.startswith("SELECT"):
+            self.selects.append(sql)
+            job = self.jobs.pop(0) if self.jobs else None
+            return SimpleNamespace(scalar_one_or_none=lambda: job)
+        self.updates.append(compiled.params)
+        return SimpleNamespace(rowcount=1)
+
+    def expunge(self, job) -> None:
+        return None
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+
+def _job(job_id: int, status: str = "queued", attempts: int = 0) -> PipelineJob:
+    return PipelineJob(
+        id=job_id, run_id=1, kind="stocks", stock_ids=[1, 2], status=status, attempts=attempts, worker_id="old",
+    )
+
+
+async def test_claim_job_locks_with_skip_locked_and_leases():
+    """ロック中の行を飛ばして取得し、取得回数を増やしてリースを付けること"""
+    db = _QueueSession([_job(3)])
+
+    job = await claim_job(db, "worker-1", 300, 3, run_id=1)
+
+    assert job.id == 3 and job.status == "running" and job.attempts == 1 and job.worker_id == "worker-1"
+    assert db.selects[0].endswith("FOR UPDATE SKIP LOCKED")
+    assert "NOT (EXISTS (SELECT *" in db.selects[0]
+    assert db.updates[0]["status"] == "running" and db.updates[0]["attempts"] == 1
+    assert db.commits == 1
+    assert await claim_job(_QueueSession([]), "worker-1", 300, 3) is None
+
+
+async def test_claim_job_fails_expired_job_at_max_attempts():
+    """リースが切れたジョブの取得回数が上限に達している場合は失敗にし、次のジョブを取得すること"""
+    db = _QueueSession([_job(1, "running", attempts=3), _job(2, "running", attempts=1)])
+
+    job = await claim_job(db, "worker-1", 300, 3)
+
+    assert job.id == 2 and job.attempts == 2
+    assert db.updates[0]["status"] == "failed" and "再試行回数の上限" in db.updates[0]["error"]
+    assert db.updates[1]["status"] == "running"
+
+
+async def test_fail_job_retries_until_max_attempts():
+    db = _QueueSession([])
+
+    assert await fail_job(db, _job(1, "running", attempts=1), "worker-1", "timeout", 3, 30)
+    assert not await fail_job(db, _job(1, "running", attempts=3), "worker-1", "timeout", 3, 30)
+
+    assert [params["status"] for params in db.updates] == ["queued", "failed"]
+    assert all(params["error"] == "timeout" for params in db.updates)
@@ -0,0 +1,679 @@
+"""パイプラインの変更追跡・ステップ実行のテスト"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from datetime import UTC, date, datetime
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.analysis import scoring
+from app.analysis.technical import MAX_BIND_PARAMS
+from app.change_tracking import ChangeSet, advance_change_cursor, load_changed_stocks, mark_stocks_changed
+from app.models.change_tracking import ChangeCursor
+from app.models.pipeline import PipelineJob, PipelineRun
+from app.models.stock import Stock
+from app.services import pipeline
+from app.services.pipeline import PipelineStepResult, rules_fingerprint, run_pipeline
+from app.services.run_store import ResumeState
+
+NOW = datetime(2026, 1, 9, 12, 0, tzinfo=UTC)
+XMIN = 1200
+
+
+class _ChangeSession:
+    """スナップショットの xmin・カーソル・変更銘柄を返すセッション"""
+
+    def __init__(self, cursor: ChangeCursor | None, changed: list[int]) -> None:
+        self.cursor = cursor
+        self.changed = changed
+        self.queries: list[str] = []
+
+    async def get(self, model, key):
+        return self.cursor
+
+    async def execute(self, stmt):
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        if "pg_snapshot_xmin" in sql:
+            return SimpleNamespace(scalar_one=lambda: XMIN)
+        self.queries.append(sql)
+        return _ScalarResult(self.changed)
+
+
+class _ScalarResult:
+    def __init__(self, rows: list) -> None:
+        self._rows = rows
+
+    def scalars(self) -> "_ScalarResult":
+        return self
+
+    def all(self) -> list:
+        return self._rows
+
+
+def _cursor(target_date: date, fingerprint: str) -> ChangeCursor:
+    return ChangeCursor(
+        consumer="pipeline", target_date=target_date, fingerprint=fingerprint, consumed_xmin=1000, consumed_at=NOW,
+    )
+
+
+async def test_load_changed_stocks_returns_changed_ids_for_same_date():
+    """同じ対象日・同じルールでの再実行では、入力が変わった銘柄だけが対象になること"""
+    db = _ChangeSession(_cursor(date(2026, 1, 9), "abc"), [3, 7])
+
+    changes = await load_changed_stocks(db, "pipeline", date(2026, 1, 9), "abc")
+
+    assert changes.stock_ids == frozenset({3, 7})
+    assert changes.as_of == XMIN
+    assert "WHERE stock_input_changes.change_xid >= " in db.queries[0]
+
+
+async def test_load_changed_stocks_full_when_cursor_does_not_match():
+    """初回・対象日の変更・ルールの変更の場合は全銘柄が対象になること"""
+    for cursor, target_date, fingerprint in (
+        (None, date(2026, 1, 9), "abc"),
+        (_cursor(date(2026, 1, 8), "abc"), date(2026, 1, 9), "abc"),
+        (_cursor(date(2026, 1, 9), "abc"), date(2026, 1, 9), "def"),
+    ):
+        db = _ChangeSession(cursor, [3])
+
+        changes = await load_changed_stocks(db, "pipeline", target_date, fingerprint)
+
+        assert changes.stock_ids is None
+        assert db.queries == []
+
+
+async def test_mark_stocks_changed_appends_without_conflict_handling():
+    """変更は銘柄ごとの行を更新せず、トランザクションIDとともに追記すること"""
+    db = _ChangeSession(None, [])
+
+    await mark_stocks_changed(db, [7, 3, 7])
+
+    assert len(db.queries) == 1
+    assert db.queries[0].startswith("INSERT INTO stock_input_changes (stock_id, change_xid)")
+    assert "pg_current_xact_id" in db.queries[0]
+    assert "ON CONFLICT" not in db.queries[0]
+
+
+async def test_advance_change_cursor_prunes_changes_consumed_by_all_cursors():
+    """カーソルを進めた後、すべてのカーソルが処理済みの変更記録を削除すること"""
+    db = _ChangeSession(None, [])
+
+    await advance_change_cursor(db, "pipeline", date(2026, 1, 9), "abc", ChangeSet(frozenset({3}), XMIN))
+
+    assert db.queries[0].startswith("INSERT INTO change_cursors")
+    assert db.queries[1].startswith("DELETE FROM stock_input_changes")
+    assert "stock_input_changes.change_xid < (SELECT min(change_cursors.consumed_xmin)" in db.queries[1]
+
+
+def test_rules_fingerprint_changes_with_weights(monkeypatch):
+    """スコアの重みが変わるとフィンガープリントが変わること"""
+    before = rules_fingerprint()
+    assert rules_fingerprint() == before
+
+    monkeypatch.setitem(scoring.DEFAULT_WEIGHTS, "rsi", 0.2)
+
+    assert rules_fingerprint() != before
+
+
+class _StageSession:
+    def __init__(self, sessions: list, stocks: list | None = None) -> None:
+        sessions.append(self)
+        self.commits = 0
+        self.stocks = stocks or []
+
+    async def __aenter__(self) -> "_StageSession":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+    async def execute(self, stmt):
+        return _ScalarResult(self.stocks)
+
+
+class _RunStore:
+    """実行状態の保存と銘柄ごとの記録を保持する"""
+    run_id = 1
+
+    def __init__(self) -> None:
+        self.saved: list[str] = []
+        self.items: dict[tuple[str, str], set[int]] = {}
+
+    async def save(self, summary: dict, status: str = "running") -> None:
+        self.saved.append(status)
+
+    async def mark_items(self, stage, stock_ids, status="completed", error=None) -> None:
+        self.items.setdefault((stage, status), set()).update(stock_ids)
+
+    async def heartbeat(self) -> None:
+        return None
+
+    @asynccontextmanager
+    async def keep_alive(self):
+        yield
+
+
+def _use_run_store(monkeypatch, resume: ResumeState | None = None, locked: bool = False) -> _RunStore:
+    store = _RunStore()
+
+    async def _start(session_factory, target_date, mode, summary):
+        return store, resume
+
+    @asynccontextmanager
+    async def _lock(session_factory, name):
+        yield SimpleNamespace(name=name, acquired=not locked)
+
+    monkeypatch.setattr(pipeline, "start_pipeline_run", _start)
+    monkeypatch.setattr(pipeline, "advisory_lock", _lock)
+    # ワーカーがジョブごとに作る実行記録も同じものを使う
+    monkeypatch.setattr(pipeline, "PipelineRunStore", lambda session_factory, run_id: store)
+    return store
+
+
+async def test_run_pipeline_does_not_start_while_another_process_holds_lock(monkeypatch):
+    """他のプロセスがパイプラインのロックを保持している場合は、実行記録を作らずに例外を送出すること"""
+    started = []
+    _use_run_store(monkeypatch, locked=True)
+
+    async def _start(session_factory, target_date, mode, summary):
+        started.append(mode)
+
+    monkeypatch.setattr(pipeline, "start_pipeline_run", _start)
+
+    with pytest.raises(pipeline.PipelineAlreadyRunningError):
+        await run_pipeline(lambda: _StageSession([]), date(2026, 1, 9))
+    assert started == []
+
+
+async def test_run_pipeline_runs_independent_steps_concurrently(monkeypatch):
+    """ファンダメンタル収集を株価収集・テクニカル計算と並行して実行し、ステップごとにセッションを使うこと"""
+    log: list[str] = []
+    advanced = []
+
+    def _collector(name: str, seconds: float):
+        async def collect(db, *args):
+            log.append(f"start:{name}")
+            await asyncio.sleep(seconds)
+            log.append(f"end:{name}")
+            return 1, 0, []
+        return collect
+
+    async def _load_changes(db, consumer, target_date, fingerprint):
+        return ChangeSet(stock_ids=frozenset({1, 2}), as_of=XMIN)
+
+    async def _plans(db, target_date, stock_ids):
+        log.append(f"plans:{sorted(stock_ids)}")
+        return PipelineStepResult(name=pipeline.STAGE_PLANS, success_count=2)
+
+    async def _advance(db, consumer, target_date, fingerprint, changes):
+        advanced.append(changes)
+
+    monkeypatch.setattr(pipeline, "collect_all_prices", _collector("prices", 0.05))
+    monkeypatch.setattr(pipeline, "collect_all_fundamentals", _collector("fundamentals", 0.02))
+    monkeypatch.setattr(pipeline, "calculate_all_technicals", _collector("technicals", 0.05))
+    monkeypatch.setattr(pipeline, "detect_all_signals", _collector("signals", 0.01))
+    monkeypatch.setattr(pipeline, "load_changed_stocks", _load_changes)
+    monkeypatch.setattr(pipeline, "_run_generate_plans", _plans)
+    monkeypatch.setattr(pipeline, "advance_change_cursor", _advance)
+    store = _use_run_store(monkeypatch)
+    sessions: list[_StageSession] = []
+
+    result = await run_pipeline(lambda: _StageSession(sessions), date(2026, 1, 9))
+
+    assert result.status == "completed"
+    assert log[:2] == ["start:prices", "start:fundamentals"]
+    assert log.index("end:fundamentals") < log.index("start:technicals")
+    assert log[-1] == "plans:[1, 2]"
+    assert result.critical_path == [
+        pipeline.STAGE_PRICES, pipeline.STAGE_TECHNICALS, pipeline.STAGE_SIGNALS, pipeline.STAGE_PLANS,
+    ]
+    assert {step.name for step in result.steps} == set(pipeline.PIPELINE_STAGES)
+    assert all(step.wall_seconds > 0 for step in result.steps)
+    assert result.summary["critical_path_seconds"] < sum(step.wall_seconds for step in result.steps)
+    # 5ステップ + 処理対象の取得（コミットなし）+ 変更カーソルの更新
+    assert len(sessions) == 7 and sum(session.commits for session in sessions) == 6
+    assert advanced == [ChangeSet(stock_ids=frozenset({1, 2}), as_of=XMIN)]
+    # ステップの完了ごとと終了時に実行状態を保存する
+    assert store.saved == ["running"] * 5 + ["completed"]
+    assert result.summary["run_id"] == 1 and not result.resumed
+
+
+async def test_streaming_pipeline_scores_early_stocks_before_all_prices_arrive(monkeypatch):
+    """ストリーミング方式では、全銘柄の株価取得を待たずに先の銘柄からシグナル検出すること"""
+    stocks = [Stock(id=i, code=f"{1000 + i}.T", name=f"銘柄{i}", is_active=True) for i in range(1, 41)]
+    log: list[str] = []
+
+    async def _targets(db, stocks, end_date, start_date=None):
+        # 最後の銘柄は株価が最新
+        return [(stock, date(2026, 1, 5)) for stock in stocks[:-1]]
+
+    def _fetch(codes, start_date, end_date):
+        time.sleep(0.002)
+        log.extend(f"fetch:{code}" for code in codes)
+        return {code: f"frame:{code}" for code in codes}
+
+    async def _store(db, records):
+        log.extend(f"store:{record}" for record in records)
+        return len(records)
+
+    async def _technicals(db, stock):
+        return 1
+
+    async def _detect(db, target_date, stock_ids, workers=None):
+        log.extend(f"score:{stock_id}" for stock_id in sorted(stock_ids))
+        return len(stock_ids), 0, []
+
+    async def _fundamentals(db):
+        return 0, 0, []
+
+    async def _plans(db, target_date, stock_ids=None):
+        log.append("plans")
+        return PipelineStepResult(name=pipeline.STAGE_PLANS)
+
+    monkeypatch.setattr(pipeline, "resolve_price_targets", _targets)
+    monkeypatch.setattr(pipeline, "fetch_price_data_batch", _fetch)
+    monkeypatch.setattr(pipeline, "transform_price_data", lambda frame, stock_id: [frame])
+    monkeypatch.setattr(pipeline, "store_price_records", _store)
+    monkeypatch.setattr(pipeline, "calculate_stock_technicals", _technicals)
+    monkeypatch.setattr(pipeline, "detect_all_signals", _detect)
+    monkeypatch.setattr(pipeline, "collect_all_fundamentals", _fundamentals)
+    monkeypatch.setattr(pipeline, "_run_generate_plans", _plans)
+    monkeypatch.setattr(pipeline.get_settings(), "stream_batch_size", 5)
+    store = _use_run_store(monkeypatch)
+    sessions: list[_StageSession] = []
+
+    result = await run_pipeline(lambda: _StageSession(sessions, stocks), date(2026, 1, 9), mode="streaming")
+
+    assert result.status == "completed"
+    assert sorted(entry for entry in log if entry.startswith("score:")) == sorted(f"score:{i}" for i in range(1, 41))
+    assert "fetch:1040.T" not in log and "store:frame:1040.T" not in log
+    assert log.index("score:1") < log.index("fetch:1039.T")
+    assert log[-1] == "plans"
+    steps = {step.name: step for step in result.steps}
+    assert steps[pipeline.STAGE_SIGNALS].success_count == 40
+    assert steps[pipeline.STAGE_SIGNALS].first_output_seconds < result.critical_path_seconds
+    assert store.items[(pipeline.STAGE_SIGNALS, "completed")] == set(range(1, 41))
+    assert store.saved == ["completed"]
+
+
+class _PriceStoreSession(_StageSession):
+    """株価のINSERTごとにバインドパラメータ数・行数を記録し、それ以外は銘柄を返すセッション"""
+
+    def __init__(self, sessions: list, stocks: list, inserts: list[tuple[int, int]]) -> None:
+        super().__init__(sessions, stocks)
+        self.inserts = inserts
+
+    async def execute(self, stmt):
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        if str(compiled).startswith("INSERT INTO stock_prices"):
+            params = len(compiled.params)
+            self.inserts.append((params, params // 8))
+            return _ScalarResult([])
+        return _ScalarResult(self.stocks)
+
+
+async def test_streaming_pipeline_stores_backfills_of_several_stocks_within_bind_limit(monkeypatch):
+    """株価が未格納の複数銘柄のバックフィルを、UPSERTのバインドパラメータ上限を超えずに格納すること"""
+    stocks = [Stock(id=i, code=f"{1000 + i}.T", name=f"銘柄{i}", is_active=True) for i in range(1, 5)]
+    # price_backfill_years（5年）分の営業日
+    dates = pd.bdate_range("2021-01-04", periods=1225)
+    frame = pd.DataFrame(
+        {"Open": 100.0, "High": 101.0, "Low": 99.0, "Close": 100.0, "Adj Close": 100.0, "Volume": 1000.0},
+        index=dates,
+    )
+    inserts: list[tuple[int, int]] = []
+
+    async def _targets(db, stocks, end_date, start_date=None):
+        return [(stock, dates[0].date()) for stock in stocks]
+
+    async def _technicals(db, stock):
+        return 1
+
+    async def _detect(db, target_date, stock_ids, workers=None):
+        return len(stock_ids), 0, []
+
+    async def _fundamentals(db):
+        return 0, 0, []
+
+    async def _plans(db, target_date, stock_ids=None):
+        return PipelineStepResult(name=pipeline.STAGE_PLANS)
+
+    monkeypatch.setattr(pipeline, "resolve_price_targets", _targets)
+    monkeypatch.setattr(pipeline, "fetch_price_data_batch", lambda codes, start, end: dict.fromkeys(codes, frame))
+    monkeypatch.setattr(pipeline, "calculate_stock_technicals", _technicals)
+    monkeypatch.setattr(pipeline, "detect_all_signals", _detect)
+    monkeypatch.setattr(pipeline, "collect_all_fundamentals", _fundamentals)
+    monkeypatch.setattr(pipeline, "_run_generate_plans", _plans)
+    monkeypatch.setattr(pipeline.get_settings(), "bulk_copy_enabled", False)
+    monkeypatch.setattr(pipeline.get_settings(), "stream_batch_size", 4)
+    store = _use_run_store(monkeypatch)
+
+    result = await run_pipeline(
+        lambda: _PriceStoreSession([], stocks, inserts), date(2026, 1, 9), mode="streaming"
+    )
+
+    assert result.status == "completed"
+    assert store.items[(pipeline.STAGE_PRICE_STORE, "completed")] == {1, 2, 3, 4}
+    assert len(inserts) > 1
+    assert all(params <= MAX_BIND_PARAMS for params, _ in inserts)
+    assert sum(rows for _, rows in inserts) == 4 * len(dates)
+
+
+async def test_run_pipeline_resumes_after_completed_steps(monkeypatch):
+    """中断した実行を再開する場合、完了済みのステップは実行せず、変更カーソルは進めないこと"""
+    log: list[str] = []
+    advanced = []
+
+    async def _collect(db, *args):
+        log.append("collect")
+        return 1, 0, []
+
+    async def _load_changes(db, consumer, target_date, fingerprint):
+        return ChangeSet(stock_ids=frozenset({3}), as_of=XMIN)
+
+    async def _plans(db, target_date, stock_ids):
+        log.append(f"plans:{sorted(stock_ids)}")
+        return PipelineStepResult(name=pipeline.STAGE_PLANS, success_count=1)
+
+    async def _advance(db, consumer, target_date, fingerprint, changes):
+        advanced.append(changes)
+
+    for name in ("collect_all_prices", "collect_all_fundamentals", "calculate_all_technicals", "detect_all_signals"):
+        monkeypatch.setattr(pipeline, name, _collect)
+    monkeypatch.setattr(pipeline, "load_changed_stocks", _load_changes)
+    monkeypatch.setattr(pipeline, "_run_generate_plans", _plans)
+    monkeypatch.setattr(pipeline, "advance_change_cursor", _advance)
+    completed = [pipeline.STAGE_PRICES, pipeline.STAGE_FUNDAMENTALS, pipeline.STAGE_TECHNICALS, pipeline.STAGE_SIGNALS]
+    resume = ResumeState(
+        run_id=1,
+        steps={name: {"name": name, "success_count": 10, "wall_seconds": 1.5} for name in completed},
+    )
+    _use_run_store(monkeypatch, resume)
+
+    result = await run_pipeline(lambda: _StageSession([]), date(2026, 1, 9))
+
+    assert result.status == "completed" and result.resumed
+    assert log == ["plans:[3]"]
+    steps = {step.name: step for step in result.steps}
+    assert all(steps[name].resumed and steps[name].success_count == 10 for name in completed)
+    assert steps[pipeline.STAGE_SIGNALS].wall_seconds == 1.5
+    assert not steps[pipeline.STAGE_PLANS].resumed
+    assert advanced == []
+
+
+async def test_streaming_pipeline_resumes_from_stock_checkpoints(monkeypatch):
+    """ストリーミング方式の再開時は、シグナル検出まで終えた銘柄を流さず、終えたステージも処理しないこと"""
+    stocks = [Stock(id=i, code=f"{1000 + i}.T", name=f"銘柄{i}", is_active=True) for i in range(1, 7)]
+    log: list[str] = []
+
+    async def _targets(db, stocks, end_date, start_date=None):
+        log.extend(f"target:{stock.id}" for stock in stocks)
+        return [(stock, date(2026, 1, 5)) for stock in stocks]
+
+    def _fetch(codes, start_date, end_date):
+        return {code: code for code in codes}
+
+    async def _store(db, records):
+        return len(records)
+
+    async def _technicals(db, stock):
+        log.append(f"technicals:{stock.id}")
+        return 1
+
+    async def _detect(db, target_date, stock_ids, workers=None):
+        log.extend(f"score:{stock_id}" for stock_id in sorted(stock_ids))
+        return len(stock_ids), 0, []
+
+    async def _none(db, *args, **kwargs):
+        return 0, 0, []
+
+    async def _plans(db, target_date, stock_ids=None):
+        return PipelineStepResult(name=pipeline.STAGE_PLANS)
+
+    monkeypatch.setattr(pipeline, "resolve_price_targets", _targets)
+    monkeypatch.setattr(pipeline, "fetch_price_data_batch", _fetch)
+    monkeypatch.setattr(pipeline, "transform_price_data", lambda frame, stock_id: [frame])
+    monkeypatch.setattr(pipeline, "store_price_records", _store)
+    monkeypatch.setattr(pipeline, "calculate_stock_technicals", _technicals)
+    monkeypatch.setattr(pipeline, "detect_all_signals", _detect)
+    monkeypatch.setattr(pipeline, "collect_all_fundamentals", _none)
+    monkeypatch.setattr(pipeline, "_run_generate_plans", _plans)
+    # 銘柄1-2はシグナル検出まで、銘柄3は株価格納・テクニカル計算まで、銘柄4は株価格納まで完了
+    resume = ResumeState(
+        run_id=1,
+        steps={pipeline.STAGE_FUNDAMENTALS: {"name": pipeline.STAGE_FUNDAMENTALS, "success_count": 6}},
+        items={
+            pipeline.STAGE_PRICE_STORE: frozenset({1, 2, 3, 4}),
+            pipeline.STAGE_TECHNICALS: frozenset({1, 2, 3}),
+            pipeline.STAGE_SIGNALS: frozenset({1, 2}),
+        },
+    )
+    store = _use_run_store(monkeypatch, resume)
+
+    result = await run_pipeline(lambda: _StageSession([], stocks), date(2026, 1, 9), mode="streaming")
+
+    assert result.status == "completed"
+    assert sorted(entry for entry in log if entry.startswith("target:")) == ["target:5", "target:6"]
+    assert sorted(entry for entry in log if entry.startswith("technicals:")) == [
+        "technicals:4", "technicals:5", "technicals:6",
+    ]
+    assert sorted(entry for entry in log if entry.startswith("score:")) == [f"score:{i}" for i in range(3, 7)]
+    assert store.items[(pipeline.STAGE_PRICE_STORE, "completed")] == {5, 6}
+    assert store.items[(pipeline.STAGE_SIGNALS, "completed")] == {3, 4, 5, 6}
+    steps = {step.name: step for step in result.steps}
+    assert steps[pipeline.STAGE_FUNDAMENTALS].resumed
+
+
+class _MemoryQueue:
+    """pipeline_jobs の代わりにメモリ上でジョブを保持するキュー"""
+
+    def __init__(self) -> None:
+        self.jobs: list[PipelineJob] = []
+
+    async def enqueue_jobs(self, db, run_id, kind, stock_chunks):
+        chunks = list(stock_chunks)
+        for chunk in chunks:
+            self.jobs.append(PipelineJob(
+                id=len(self.jobs) + 1, run_id=run_id, kind=kind, stock_ids=chunk, status="queued", attempts=0,
+            ))
+        return len(chunks)
+
+    async def claim_job(self, db, worker_id, lease_seconds, max_attempts, run_id=None):
+        stocks_pending = any(j.kind == "stocks" and j.status in ("queued", "running") for j in self.jobs)
+        for job in self.jobs:
+            if job.status == "queued" and (job.kind == "stocks" or not stocks_pending):
+                job.status, job.worker_id = "running", worker_id
+                job.attempts += 1
+                return job
+        return None
+
+    async def complete_job(self, db, job_id, worker_id, result):
+        job = self.jobs[job_id - 1]
+        job.status, job.result = "completed", result
+        return True
+
+    async def fail_job(self, db, job, worker_id, error, max_attempts, retry_seconds):
+        job.error = error
+        job.status = "queued" if job.attempts < max_attempts else "failed"
+        return job.status == "queued"
+
+    async def renew_lease(self, db, job_id, worker_id, lease_seconds):
+        return True
+
+    async def load_jobs(self, db, run_id):
+        return list(self.jobs)
+
+    async def unfinished_job_count(self, db, run_id):
+        return sum(job.status in ("queued", "running") for job in self.jobs)
+
+    async def completed_stock_ids(self, db, run_id):
+        return frozenset(i for j in self.jobs if j.kind == "stocks" and j.status == "completed" for i in j.stock_ids)
+
+
+class _WorkerSession(_StageSession):
+    async def get(self, model, key):
+        return PipelineRun(id=key, target_date=date(2026, 1, 9))
+
+    async def execute(self, stmt):
+        return _ScalarResult([stock.id for stock in self.stocks])
+
+
+async def test_distributed_pipeline_splits_stocks_into_jobs_shared_by_workers(monkeypatch):
+    """銘柄をチャンクごとのジョブに分けて複数のワーカーで実行し、失敗したジョブは再試行し、
+    全チャンクの完了後にシグナル検出・売買プラン生成をまとめて行うこと"""
+    stocks = [Stock(id=i, code=f"{1000 + i}.T", name=f"銘柄{i}", is_active=True) for i in range(1, 11)]
+    queue = _MemoryQueue()
+    for name in (
+        "enqueue_jobs", "claim_job", "complete_job", "fail_job", "renew_lease",
+        "load_jobs", "unfinished_job_count", "completed_stock_ids",
+    ):
+        monkeypatch.setattr(pipeline, name, getattr(queue, name))
+    log: list[str] = []
+    failures = {4}
+
+    def _collector(name: str):
+        async def collect(db, stock_ids=None, failed_ids=None):
+            if name == "prices" and min(stock_ids) in failures:
+                failures.clear()
+                raise RuntimeError("timeout")
+            await asyncio.sleep(0.01)
+            log.append(f"{name}:{sorted(stock_ids)}")
+            if name == "technicals" and 8 in stock_ids:
+                # 銘柄8だけがエラー（ジョブは完了する）
+                failed_ids.add(8)
+                return len(stock_ids) - 1, 1, ["1008.T: no prices"]
+            return len(stock_ids), 0, []
+        return collect
+
+    async def _detect(db, target_date, stock_ids, workers=None, failed_ids=None):
+        log.append(f"signals:{sorted(stock_ids)}")
+        return len(stock_ids), 0, []
+
+    async def _plans(db, target_date, stock_ids=None):
+        return PipelineStepResult(name=pipeline.STAGE_PLANS, success_count=2)
+
+    monkeypatch.setattr(pipeline, "collect_all_prices", _collector("prices"))
+    monkeypatch.setattr(pipeline, "collect_all_fundamentals", _collector("fundamentals"))
+    monkeypatch.setattr(pipeline, "calculate_all_technicals", _collector("technicals"))
+    monkeypatch.setattr(pipeline, "detect_all_signals", _detect)
+    monkeypatch.setattr(pipeline, "_run_generate_plans", _plans)
+    monkeypatch.setattr(pipeline.get_settings(), "pipeline_job_chunk_size", 3)
+    monkeypatch.setattr(pipeline.get_settings(), "pipeline_worker_poll_seconds", 0.01)
+    store = _use_run_store(monkeypatch)
+
+    def factory():
+        return _WorkerSession([], stocks)
+
+    result, helped = await asyncio.gather(
+        run_pipeline(factory, date(2026, 1, 9), mode="distributed"),
+        pipeline.run_pipeline_worker(factory, "worker-2", until_idle=True),
+    )
+
+    assert result.status == "completed"
+    assert [job.stock_ids for job in queue.jobs] == [[1, 2, 3], [4, 5, 6], [7, 8, 9], [10], None]
+    assert all(job.status == "completed" for job in queue.jobs)
+    assert queue.jobs[1].attempts == 2 and queue.jobs[1].error == "timeout"
+    assert helped > 0 and {job.worker_id for job in queue.jobs} >= {"worker-2"}
+    assert log[-1] == f"signals:{list(range(1, 11))}"
+    steps = {step.name: step for step in result.steps}
+    assert steps[pipeline.STAGE_PRICES].success_count == 10
+    assert steps[pipeline.STAGE_SIGNALS].success_count == 10
+    assert store.saved == ["completed"]
+    # エラーになった銘柄は完了として記録しない（再開時に再実行する）
+    assert store.items[(pipeline.STAGE_TECHNICALS, "completed")] == set(range(1, 11)) - {8}
+    assert store.items[(pipeline.STAGE_TECHNICALS, "failed")] == {8}
+
+
+async def test_distributed_pipeline_resume_retries_stocks_that_failed_in_completed_jobs(monkeypatch):
+    """再開時は、完了したジョブでエラーになった銘柄をジョブを作り直して再実行すること"""
+    stocks = [Stock(id=i, code=f"{1000 + i}.T", name=f"銘柄{i}", is_active=True) for i in range(1, 7)]
+    queue = _MemoryQueue()
+    await queue.enqueue_jobs(None, 1, "stocks", [[1, 2, 3], [4, 5, 6]])
+    await queue.enqueue_jobs(None, 1, "finalize", [None])
+    for job in queue.jobs:
+        job.status, job.result = "completed", []
+
+    async def _requeue(db, run_id):
+        queue.jobs[-1].status = "queued"
+        return 1
+
+    for name in (
+        "enqueue_jobs", "claim_job", "complete_job", "fail_job", "renew_lease",
+        "load_jobs", "unfinished_job_count", "completed_stock_ids",
+    ):
+        monkeypatch.setattr(pipeline, name, getattr(queue, name))
+    monkeypatch.setattr(pipeline, "requeue_jobs", _requeue)
+    collected: list[list[int]] = []
+
+    async def _collect(db, stock_ids=None, failed_ids=None):
+        collected.append(sorted(stock_ids))
+        return len(stock_ids), 0, []
+
+    async def _detect(db, target_date, stock_ids, workers=None, failed_ids=None):
+        return len(stock_ids), 0, []
+
+    async def _plans(db, target_date, stock_ids=None):
+        return PipelineStepResult(name=pipeline.STAGE_PLANS)
+
+    monkeypatch.setattr(pipeline, "collect_all_prices", _collect)
+    monkeypatch.setattr(pipeline, "collect_all_fundamentals", _collect)
+    monkeypatch.setattr(pipeline, "calculate_all_technicals", _collect)
+    monkeypatch.setattr(pipeline, "detect_all_signals", _detect)
+    monkeypatch.setattr(pipeline, "_run_generate_plans", _plans)
+    monkeypatch.setattr(pipeline.get_settings(), "pipeline_worker_poll_seconds", 0.01)
+    # 銘柄2と5は前回の実行でエラーになった
+    resume = ResumeState(run_id=1, items={pipeline.STAGE_TECHNICALS: frozenset({1, 3, 4, 6})})
+    store = _use_run_store(monkeypatch, resume)
+
+    result = await run_pipeline(lambda: _WorkerSession([], stocks), date(2026, 1, 9), mode="distributed")
+
+    assert result.status == "completed"
+    assert queue.jobs[-1].stock_ids == [2, 5]
+    assert collected == [[2, 5]] * 3
+    assert store.items[(pipeline.STAGE_TECHNICALS, "completed")] == {2, 5}
+
+
+class _SavepointSession:
+    """買いシグナルを返し、SAVEPOINT の開始・ロールバックを記録するセッション"""
+
+    def __init__(self, signals: list) -> None:
+        self.signals = signals
+        self.savepoints: list[str] = []
+
+    async def execute(self, stmt):
+        return _ScalarResult(self.signals)
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        try:
+            yield
+        except Exception:
+            self.savepoints.append("rollback")
+            raise
+        self.savepoints.append("release")
+
+
+async def test_generate_plans_counts_only_failed_signals(monkeypatch):
+    """一括生成が失敗した場合はシグナルごとに生成し直し、失敗したシグナルだけをエラーにすること"""
+    signals = [SimpleNamespace(id=10 + i, stock_id=i) for i in range(1, 4)]
+
+    async def _generate(db, batch, target_date):
+        if any(signal.id == 12 for signal in batch):
+            raise RuntimeError("invalid price")
+        return len(batch)
+
+    monkeypatch.setattr(pipeline, "generate_system_trade_plans", _generate)
+    db = _SavepointSession(signals)
+
+    step = await pipeline._run_generate_plans(db, date(2026, 1, 9))
+
+    assert step.success_count == 2 and step.error_count == 1
+    assert step.errors == ["signal_id=12: invalid price"]
+    assert db.savepoints == ["rollback", "release", "rollback", "release"]
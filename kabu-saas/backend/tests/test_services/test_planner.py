@@ -0,0 +1,95 @@
+"""売買プランサービスのテスト"""
+
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+from sqlalchemy.dialects import postgresql
+
+from app.analysis.trade_planner import calculate_trade_plan, calculate_trade_plans
+from app.models.signal import Signal
+from app.services.planner import generate_system_trade_plans
+
+TARGET_DATE = date(2026, 1, 9)
+
+
+def test_trade_plans_match_scalar_plan():
+    """一括計算した売買プランが calculate_trade_plan と小数2桁まで一致すること"""
+    rng = np.random.default_rng(0)
+    close = np.round(rng.uniform(50, 20000, 2000), 1)
+    sma = np.where(rng.random(2000) < 0.3, np.nan, np.round(close * rng.uniform(0.8, 1.2, 2000), 2))
+
+    plans = calculate_trade_plans(close, sma)
+
+    assert plans == [
+        calculate_trade_plan(float(c), None if np.isnan(s) else float(s)) for c, s in zip(close, sma, strict=True)
+    ]
+
+
+class _PlanSession:
+    """株価・SMA25の最新行を返し、売買プランのINSERTを記録するセッション"""
+
+    def __init__(self, prices: dict[int, str], sma: dict[int, str | None]) -> None:
+        self.rows = {
+            "stock_prices": [
+                SimpleNamespace(stock_id=i, date=TARGET_DATE, close=Decimal(v)) for i, v in prices.items()
+            ],
+            "technical_indicators": [
+                SimpleNamespace(stock_id=i, date=TARGET_DATE, sma_25=None if v is None else Decimal(v))
+                for i, v in sma.items()
+            ],
+        }
+        self.statements: list[str] = []
+        self.inserted: list[dict] = []
+
+    async def execute(self, stmt):
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        sql = str(compiled)
+        self.statements.append(sql)
+        if sql.startswith("INSERT INTO trade_plans"):
+            count = sum(key.startswith("signal_id") for key in compiled.params)
+            self.inserted.extend(
+                {c: compiled.params[f"{c}_m{i}"] for c in ("stock_id", "signal_id", "entry_price", "status")}
+                for i in range(count)
+            )
+            return None
+        table = sql.split("FROM", 1)[1].split()[0]
+        return SimpleNamespace(all=lambda: self.rows[table])
+
+
+async def test_generate_system_trade_plans_in_bulk():
+    """シグナル数によらず株価・SMA25の取得とINSERTを1回ずつで行い、有効なプランは更新すること"""
+    signals = [
+        Signal(id=10 + i, stock_id=i, date=TARGET_DATE, signal_type="buy", score=Decimal("70"))
+        for i in range(1, 6)
+    ]
+    # 銘柄5は株価なし、銘柄2はSMA25なし
+    db = _PlanSession(
+        prices={1: "1000", 2: "2000", 3: "500", 4: "1500"},
+        sma={1: "900", 3: "600", 4: None},
+    )
+
+    count = await generate_system_trade_plans(db, signals, TARGET_DATE)
+
+    assert count == 4
+    assert len(db.statements) == 3
+    assert "DISTINCT ON (stock_prices.stock_id)" in db.statements[0]
+    assert "DISTINCT ON (technical_indicators.stock_id)" in db.statements[1]
+    assert (
+        "ON CONFLICT (signal_id) WHERE status = 'active' AND signal_id IS NOT NULL DO UPDATE" in db.statements[2]
+    )
+    assert [(row["stock_id"], row["signal_id"], row["entry_price"]) for row in db.inserted] == [
+        (1, 11, Decimal("950.0")),
+        (2, 12, Decimal("2000.0")),
+        (3, 13, Decimal("500.0")),
+        (4, 14, Decimal("1500.0")),
+    ]
+    assert {row["status"] for row in db.inserted} == {"active"}
+
+
+async def test_generate_system_trade_plans_without_signals():
+    db = _PlanSession({}, {})
+
+    assert await generate_system_trade_plans(db, [], TARGET_DATE) == 0
+    assert db.statements == []
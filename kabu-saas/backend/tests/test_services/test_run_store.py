@@ -0,0 +1,114 @@
+"""パイプライン実行記録のテスト"""
+
+from datetime import UTC, date, datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.models.pipeline import PipelineRun
+from app.services.run_store import PipelineRunStore, load_pipeline_status, start_pipeline_run
+
+TARGET_DATE = date(2026, 1, 9)
+
+
+class _RunSession:
+    """直近の実行記録と完了済み銘柄を返し、更新・追加を記録するセッション"""
+
+    def __init__(self, run: PipelineRun | None, items: list[tuple] = ()) -> None:
+        self.run = run
+        self.items = list(items)
+        self.statements: list[str] = []
+        self.added: list[PipelineRun] = []
+        self.commits = 0
+
+    async def __aenter__(self) -> "_RunSession":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    async def execute(self, stmt):
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        self.statements.append(sql)
+        if sql.startswith("SELECT pipeline_runs."):
+            return SimpleNamespace(scalar_one_or_none=lambda: self.run)
+        return SimpleNamespace(all=lambda: self.items)
+
+    def add(self, run: PipelineRun) -> None:
+        self.added.append(run)
+
+    async def flush(self) -> None:
+        for run in self.added:
+            run.id = 42
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+
+def _run(status: str, heartbeat_age: timedelta, steps: list[dict] = ()) -> PipelineRun:
+    now = datetime.now(UTC)
+    return PipelineRun(
+        id=7, target_date=TARGET_DATE, mode="streaming", status=status,
+        summary={"status": status, "started_at": now.isoformat(), "steps": list(steps)},
+        started_at=now - heartbeat_age, heartbeat_at=now - heartbeat_age,
+    )
+
+
+async def test_start_resumes_failed_or_interrupted_run():
+    """同じ対象日・方式の失敗した実行、実行中のまま残った実行を再開すること"""
+    steps = [
+        {"name": "ファンダメンタル収集", "error_count": 0, "skipped": False},
+        {"name": "株価収集", "error_count": 3, "skipped": False},
+        {"name": "シグナル検出", "error_count": 0, "skipped": True},
+    ]
+    for previous in (
+        _run("failed", timedelta(seconds=10), steps),
+        _run("running", timedelta(hours=1), steps),
+        # パイプラインのロックを取得できたため、heartbeat が新しくても中断している
+        _run("running", timedelta(seconds=10), steps),
+    ):
+        db = _RunSession(previous, [("株価格納", 1), ("株価格納", 2), ("シグナル検出", 1)])
+
+        store, resume = await start_pipeline_run(lambda db=db: db, TARGET_DATE, "streaming", {})
+
+        assert store.run_id == 7 and resume.run_id == 7
+        assert list(resume.steps) == ["ファンダメンタル収集"]
+        assert resume.completed("株価格納") == {1, 2}
+        assert resume.completed("シグナル検出") == {1}
+        assert resume.completed("テクニカル計算") == frozenset()
+        assert db.statements[-1].startswith("UPDATE pipeline_runs SET status=") and db.commits == 1
+        assert db.added == []
+
+
+async def test_start_creates_new_run_when_previous_is_completed():
+    """前回の実行がない、または完了済みの場合は新しい実行を作ること"""
+    for previous in (None, _run("completed", timedelta(hours=1))):
+        db = _RunSession(previous)
+
+        store, resume = await start_pipeline_run(lambda db=db: db, TARGET_DATE, "streaming", {"status": "running"})
+
+        assert resume is None and store.run_id == 42
+        assert [run.status for run in db.added] == ["running"] and db.commits == 1
+
+
+async def test_load_pipeline_status_reports_stale_run_as_failed():
+    """heartbeat が途切れた実行中の実行は failed として、ステージごとの完了銘柄数とともに返すこと"""
+    db = _RunSession(_run("running", timedelta(hours=1)), [("株価格納", 120), ("シグナル検出", 80)])
+
+    status = await load_pipeline_status(db)
+
+    assert status["status"] == "failed" and status["run_id"] == 7 and status["mode"] == "streaming"
+    assert status["completed_items"] == {"株価格納": 120, "シグナル検出": 80}
+    assert await load_pipeline_status(_RunSession(None)) is None
+
+
+async def test_mark_items_upserts_stage_and_stock():
+    db = _RunSession(None)
+    store = PipelineRunStore(lambda: db, 7)
+
+    await store.mark_items("テクニカル計算", [1, 2, 3], "failed", "timeout")
+    await store.mark_items("テクニカル計算", [])
+
+    assert len(db.statements) == 1 and db.commits == 1
+    assert db.statements[0].startswith("INSERT INTO pipeline_run_items")
+    assert "ON CONFLICT (run_id, stage, stock_id) DO UPDATE" in db.statements[0]
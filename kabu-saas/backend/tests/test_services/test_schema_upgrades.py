@@ -0,0 +1,47 @@
+"""既存テーブルのスキーマ更新のテスト"""
+
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.schema_upgrades import SCHEMA_UPGRADES, apply_schema_upgrades
+
+
+class _SchemaConnection:
+    """適用済みの確認SQLには applied に含まれる更新だけ1行を返し、実行したSQLを記録する"""
+
+    def __init__(self, applied: set[str]) -> None:
+        self.applied_sql = {u.applied_sql for u in SCHEMA_UPGRADES if u.name in applied}
+        self.statements: list[str] = []
+
+    async def execute(self, stmt):
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        self.statements.append(sql)
+        return SimpleNamespace(first=lambda: (1,) if sql in self.applied_sql else None)
+
+
+async def test_apply_schema_upgrades_cleans_up_then_adds_constraint():
+    """未適用の更新は重複データを整理してから制約・インデックスを追加すること"""
+    conn = _SchemaConnection(applied=set())
+
+    applied = await apply_schema_upgrades(conn)
+
+    assert applied == [u.name for u in SCHEMA_UPGRADES]
+    assert "pg_advisory_xact_lock" in conn.statements[0]
+    executed = [sql.strip() for sql in conn.statements]
+    signals = executed.index("SELECT 1 FROM pg_constraint WHERE conname = 'uq_signals_stock_date_type'")
+    assert executed[signals + 1].startswith("UPDATE trade_plans")
+    assert executed[signals + 2].startswith("DELETE FROM signals")
+    assert executed[signals + 3].startswith("ALTER TABLE signals ADD CONSTRAINT uq_signals_stock_date_type")
+    plans = executed.index("SELECT 1 FROM pg_indexes WHERE indexname = 'uq_trade_plans_active_signal'")
+    assert plans > signals
+    assert executed[plans + 1].startswith("UPDATE trade_plans\n        SET status = 'cancelled'")
+    assert executed[plans + 2].startswith("CREATE UNIQUE INDEX uq_trade_plans_active_signal")
+
+
+async def test_apply_schema_upgrades_skips_applied():
+    """適用済みの更新（create_all で作成したテーブルを含む）は実行しないこと"""
+    conn = _SchemaConnection(applied={u.name for u in SCHEMA_UPGRADES})
+
+    assert await apply_schema_upgrades(conn) == []
+    assert len(conn.statements) == 1 + len(SCHEMA_UPGRADES)
@@ -0,0 +1,76 @@
+"""ストリーミング実行のテスト"""
+
+import asyncio
+
+from app.services.streaming import StreamStage, run_stream
+
+
+async def test_items_flow_through_stages_with_bounded_in_flight_items():
+    """各要素が全ステージを通り、処理中の要素数がキューの大きさとワーカー数で抑えられること"""
+    in_flight = 0
+    peak = 0
+    finished: list[int] = []
+
+    async def enter(items):
+        nonlocal in_flight, peak
+        in_flight += len(items)
+        peak = max(peak, in_flight)
+        return items, []
+
+    async def slow(items):
+        await asyncio.sleep(0.001)
+        return [item * 10 for item in items], []
+
+    async def leave(items):
+        nonlocal in_flight
+        in_flight -= len(items)
+        finished.extend(items)
+        return items, []
+
+    stats = await run_stream(
+        range(200),
+        [StreamStage("enter", enter), StreamStage("slow", slow, concurrency=2), StreamStage("leave", leave)],
+        queue_size=4,
+    )
+
+    assert sorted(finished) == [i * 10 for i in range(200)]
+    assert [s.processed for s in stats] == [200, 200, 200]
+    # キュー2つ分 + 各ステージのワーカーが持つ要素まで
+    assert peak <= 4 * 2 + 4
+    assert all(s.first_output_seconds is not None for s in stats)
+
+
+async def test_batches_only_take_items_already_queued():
+    """バッチは届いている要素だけをまとめ、batch_size を超えないこと"""
+    sizes: list[int] = []
+
+    async def collect(items):
+        sizes.append(len(items))
+        return items, []
+
+    await run_stream(range(50), [StreamStage("batch", collect, batch_size=8)], queue_size=50)
+
+    assert sum(sizes) == 50
+    assert max(sizes) <= 8
+    assert len(sizes) < 50
+
+
+async def test_errors_drop_items_and_processing_continues():
+    """例外を出したバッチの要素は下流に流さず、エラーとして記録して続行すること"""
+    seen: list[int] = []
+
+    async def check(items):
+        if 3 in items:
+            raise RuntimeError("bad item")
+        return items, [f"{item}: skipped" for item in items if item == 5]
+
+    async def sink(items):
+        seen.extend(items)
+        return items, []
+
+    stats = await run_stream(range(8), [StreamStage("check", check), StreamStage("sink", sink)], queue_size=2)
+
+    assert 3 not in seen
+    assert sorted(seen) == [0, 1, 2, 4, 5, 6, 7]
+    assert stats[0].error_count == 2
+    assert stats[0].errors == ["1件: bad item", "5: skipped"]